@@ -4,6 +4,7 @@ from fpts.config.settings import Settings
 from fpts.processing.phenology_service import PhenologyComputationService
 from fpts.processing.raster_service import RasterService
 from fpts.query.service import QueryService
+from fpts.storage.write_behind import WriteBehindQueue
 
 
 def get_query_service(request: Request) -> QueryService:
@@ -18,5 +19,9 @@ def get_phenology_compute_service(request: Request) -> PhenologyComputationServi
     return request.app.state.phenology_compute_service
 
 
+def get_write_behind(request: Request) -> WriteBehindQueue | None:
+    return getattr(request.app.state, "write_behind", None)
+
+
 def get_settings(request: Request) -> Settings:
     return request.app.state.settings
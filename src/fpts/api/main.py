@@ -5,6 +5,7 @@ from fpts.api.routers.health import router as health_router
 from fpts.api.routers.metrics import router as metrics_router
 from fpts.api.routers.phenology import router as phenology_router
 from fpts.api.wiring import (
+    lifespan,
     register_exception_handlers,
     wire_in_memory_services,
     wire_postgis_services,
@@ -27,7 +28,7 @@ def create_app(settings: Settings | None = None) -> FastAPI:
     )
     logger.debug("debug_logging_enabled")
 
-    app = FastAPI(title=settings.app_name)
+    app = FastAPI(title=settings.app_name, lifespan=lifespan)
     app.state.settings = settings
 
     if settings.phenology_repo_backend == "postgis":
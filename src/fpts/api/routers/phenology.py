@@ -1,21 +1,37 @@
+import re
 from typing import Literal
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
-from fpts.api.dependencies import get_phenology_compute_service, get_query_service
+from fpts.api.dependencies import (
+    get_phenology_compute_service,
+    get_query_service,
+    get_write_behind,
+)
 from fpts.api.schemas import (
+    AreaStatsSchema,
+    AreaYearStatsSchema,
     GeoJSONPolygonRequest,
     LocationSchema,
+    PhenologyAreaBatchRequest,
+    PhenologyAreaBatchResponse,
     PhenologyAreaStatsResponse,
+    PhenologyAreaYearsResponse,
     PhenologyPointResponse,
     PhenologyPointsRequest,
     PhenologyTimeseriesResponse,
     PhenologyYearMetricSchema,
     SeasonLengthStat,
 )
-from fpts.domain.models import Location
+from fpts.domain.errors import InvalidGeometryError
+from fpts.domain.models import BBox, Location
+from fpts.processing.phenology_algorithm import DEFAULT_THRESHOLD_FRAC
 from fpts.processing.phenology_service import PhenologyComputationService
+from fpts.query.export import MEDIA_TYPES, iter_export
 from fpts.query.service import QueryService
+from fpts.storage.write_behind import WriteBehindQueue
 from fpts.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -24,7 +40,7 @@ router = APIRouter(prefix="/phenology", tags=["phenology"])
 
 
 @router.get("/point", response_model=PhenologyPointResponse)
-def get_point_phenology(
+async def get_point_phenology(
     lat: float = Query(..., ge=-90.0, le=90.0, description="Latitude value for the point."),
     lon: float = Query(..., ge=-180.0, le=180.0, description="Longitude value for the point."),
     year: int = Query(..., ge=2000, le=2027, description="Year we want to analyse."),
@@ -43,8 +59,18 @@ def get_point_phenology(
         lt=1.0,
         description="Fraction value used in calculating SOS and EOS limits.",
     ),
+    nearest_tolerance_deg: float | None = Query(
+        None,
+        gt=0.0,
+        le=1.0,
+        description=(
+            "If set and no metric is stored for the exact pixel, return the nearest "
+            "stored point within this distance (degrees)."
+        ),
+    ),
     query_service: QueryService = Depends(get_query_service),
     compute_service: PhenologyComputationService = Depends(get_phenology_compute_service),
+    write_behind: WriteBehindQueue | None = Depends(get_write_behind),
 ):
     """
     Get phenology metrics for a single point.
@@ -54,10 +80,12 @@ def get_point_phenology(
 
     mode=compute:
       Computes from NDVI raster stack on the fly (currently synthetic NDVI stack).
+      Computation runs in the threadpool; repository reads are awaited.
 
     mode=auto:
       Tries to read from repo, and falls back to compute from NDVI raster stack on the fly
-      (currently synthetic NDVI stack).
+      (currently synthetic NDVI stack). With write-behind enabled, computed metrics
+      (default threshold_frac only) are queued for writing to the repo.
     """
     logger.info(
         "point_query_received",
@@ -68,17 +96,19 @@ def get_point_phenology(
             "mode": mode,
             "product": product,
             "threshold_frac": threshold_frac,
+            "nearest_tolerance_deg": nearest_tolerance_deg,
         },
     )
 
     location = Location(lat=lat, lon=lon)
 
     if mode == "repo":
-        metric = query_service.get_point_metric(
+        metric = await query_service.aget_point_metric(
             product=product,
             location=location,
             year=year,
             threshold_frac=threshold_frac,
+            nearest_tolerance_deg=nearest_tolerance_deg,
         )
         if metric is None:
             raise HTTPException(
@@ -91,7 +121,8 @@ def get_point_phenology(
 
     elif mode == "compute":
         try:
-            metric = compute_service.compute_point_phenology(
+            metric = await run_in_threadpool(
+                compute_service.compute_point_phenology,
                 product=product,
                 year=year,
                 location=location,
@@ -101,15 +132,17 @@ def get_point_phenology(
             raise HTTPException(status_code=404, detail=str(e)) from e
 
     else:  # mode == "auto"
-        metric = query_service.get_point_metric(
+        metric = await query_service.aget_point_metric(
             product=product,
             location=location,
             year=year,
             threshold_frac=threshold_frac,
+            nearest_tolerance_deg=nearest_tolerance_deg,
         )
         if metric is None:
             try:
-                metric = compute_service.compute_point_phenology(
+                metric = await run_in_threadpool(
+                    compute_service.compute_point_phenology,
                     product=product,
                     year=year,
                     location=location,
@@ -117,6 +150,8 @@ def get_point_phenology(
                 )
             except FileNotFoundError as e:
                 raise HTTPException(status_code=404, detail=str(e)) from e
+            if write_behind is not None and threshold_frac == DEFAULT_THRESHOLD_FRAC:
+                write_behind.submit(product, metric)
 
     return PhenologyPointResponse(
         year=metric.year,
@@ -129,22 +164,79 @@ def get_point_phenology(
 
 
 @router.post("/points", response_model=list[PhenologyPointResponse])
-def get_points_phenology(
+async def get_points_phenology(
     body: PhenologyPointsRequest = Body(...),
     year: int = Query(..., ge=2000, le=2027, description="Year we want to analyse."),
+    mode: Literal["repo", "compute", "auto"] = Query(
+        "compute",
+        description=(
+            "Execution mode. 'repo' returns precomputed metrics, "
+            "'compute' calculates on request, and "
+            "'auto' reads the repo first then computes the missing points."
+        ),
+    ),
     product: str = Query("ndvi_synth", min_length=1, description="Product to analyse."),
     threshold_frac: float = Query(
         0.5, gt=0.0, lt=1.0, description="Fraction value used in SOS/EOS limits."
     ),
+    query_service: QueryService = Depends(get_query_service),
     compute_service: PhenologyComputationService = Depends(get_phenology_compute_service),
+    write_behind: WriteBehindQueue | None = Depends(get_write_behind),
 ):
+    """
+    Get phenology metrics for many points of one year, in request order.
+
+    mode=repo and mode=auto read all points from the repository in one batched lookup;
+    mode=auto then computes only the points the repository does not have (queued for
+    writing to the repository with write-behind enabled, as for /point).
+    """
     locations = [Location(lat=loc.lat, lon=loc.lon) for loc in body.locations]
-    metrics = compute_service.compute_points_phenology(
-        product=product,
-        year=year,
-        locations=locations,
-        threshold_frac=threshold_frac,
-    )
+
+    if mode == "compute":
+        metrics = await run_in_threadpool(
+            compute_service.compute_points_phenology,
+            product=product,
+            year=year,
+            locations=locations,
+            threshold_frac=threshold_frac,
+        )
+    else:
+        found = await query_service.aget_point_metrics(
+            product=product,
+            locations=locations,
+            year=year,
+            threshold_frac=threshold_frac,
+        )
+        missing = [i for i, m in enumerate(found) if m is None]
+
+        if missing and mode == "repo":
+            raise HTTPException(
+                status_code=404,
+                detail=(
+                    f"No phenology data found for {len(missing)} of {len(locations)} "
+                    f"locations for product: {product} and year: {year}",
+                ),
+            )
+
+        if missing:
+            try:
+                computed = await run_in_threadpool(
+                    compute_service.compute_points_phenology,
+                    product=product,
+                    year=year,
+                    locations=[locations[i] for i in missing],
+                    threshold_frac=threshold_frac,
+                )
+            except FileNotFoundError as e:
+                raise HTTPException(status_code=404, detail=str(e)) from e
+            for i, m in zip(missing, computed, strict=True):
+                found[i] = m
+            if write_behind is not None and threshold_frac == DEFAULT_THRESHOLD_FRAC:
+                for m in computed:
+                    write_behind.submit(product, m)
+
+        metrics = found
+
     return [
         PhenologyPointResponse(
             year=m.year,
@@ -166,12 +258,21 @@ def get_points_phenology(
         400: {"description": "Invalid parameters"},
     },
 )
-def get_point_timeseries(
+async def get_point_timeseries(
     lat: float = Query(..., ge=-90.0, le=90.0, description="Latitude value for the point."),
     lon: float = Query(..., ge=-180.0, le=180.0, description="Longitude value for the point."),
     start_year: int = Query(..., ge=2000, le=2027, description="Start year (inclusive)."),
     end_year: int = Query(..., ge=2000, le=2027, description="End year (inclusive)."),
     product: str = Query("ndvi_synth", min_length=1, description="Product to analyse."),
+    nearest_tolerance_deg: float | None = Query(
+        None,
+        gt=0.0,
+        le=1.0,
+        description=(
+            "If set and no metric is stored for the exact pixel, return the nearest "
+            "stored point within this distance (degrees)."
+        ),
+    ),
     query_service: QueryService = Depends(get_query_service),
 ):
     logger.info(
@@ -182,6 +283,7 @@ def get_point_timeseries(
             "start_year": start_year,
             "end_year": end_year,
             "product": product,
+            "nearest_tolerance_deg": nearest_tolerance_deg,
         },
     )
 
@@ -192,11 +294,12 @@ def get_point_timeseries(
 
     location = Location(lat=lat, lon=lon)
 
-    metrics = query_service.get_point_timeseries(
+    metrics = await query_service.aget_point_timeseries(
         product=product,
         location=location,
         start_year=start_year,
         end_year=end_year,
+        nearest_tolerance_deg=nearest_tolerance_deg,
     )
 
     if not metrics:
@@ -227,7 +330,7 @@ def get_point_timeseries(
 
 
 @router.post("/area", response_model=PhenologyAreaStatsResponse)
-def get_area_phenology_stats(
+async def get_area_phenology_stats(
     payload: GeoJSONPolygonRequest = Body(...),
     year: int = Query(..., ge=2000, le=2027, description="Year we want to analyse."),
     product: str = Query("ndvi_synth", min_length=1, description="Product to analyse."),
@@ -254,7 +357,7 @@ def get_area_phenology_stats(
     )
 
     try:
-        stats = query_service.get_area_stats(
+        stats = await query_service.aget_area_stats(
             product=product,
             year=year,
             polygon_geojson=payload.geometry,
@@ -282,3 +385,164 @@ def get_area_phenology_stats(
         median_season_length=stats.get("median_season_length"),
         forest_fraction=stats.get("forest_fraction"),
     )
+
+
+@router.post("/area/batch", response_model=PhenologyAreaBatchResponse)
+async def get_area_phenology_stats_batch(
+    payload: PhenologyAreaBatchRequest = Body(...),
+    year: int = Query(..., ge=2000, le=2027, description="Year we want to analyse."),
+    product: str = Query("ndvi_synth", min_length=1, description="Product to analyse."),
+    only_forest: bool = Query(False, description="If True, only include forest points."),
+    season_length_stat: SeasonLengthStat = Query(
+        SeasonLengthStat.mean,
+        description="How to summarise season_length: mean, median, or both.",
+    ),
+    min_season_length: int | None = Query(
+        None,
+        ge=0,
+        le=366,
+        description="If set, only include rows with season_length >= this value.",
+    ),
+    query_service: QueryService = Depends(get_query_service),
+):
+    """
+    Area stats for many polygons in one request (and one database query); results are
+    keyed by the polygon ids, null for polygons without data.
+    """
+    logger.info(
+        "area_stats_batch_query_received",
+        extra={"year": year, "product": product, "n_polygons": len(payload.polygons)},
+    )
+
+    try:
+        stats = await query_service.aget_area_stats_many(
+            product=product,
+            year=year,
+            polygons=[p.geometry for p in payload.polygons],
+            only_forest=only_forest,
+            min_season_length=min_season_length,
+            season_length_stat=season_length_stat.value,
+        )
+    except InvalidGeometryError as e:
+        ids = [payload.polygons[i].id for i in e.indexes]
+        raise HTTPException(
+            status_code=400, detail=f"Invalid GeoJSON geometry for ids: {', '.join(ids)}"
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid GeoJSON geometry")
+
+    return PhenologyAreaBatchResponse(
+        product=product,
+        year=year,
+        results={
+            p.id: None if s is None else AreaStatsSchema(**s)
+            for p, s in zip(payload.polygons, stats, strict=True)
+        },
+    )
+
+
+@router.post("/area/years", response_model=PhenologyAreaYearsResponse)
+async def get_area_phenology_stats_years(
+    payload: GeoJSONPolygonRequest = Body(...),
+    start_year: int = Query(..., ge=2000, le=2027, description="Start year (inclusive)."),
+    end_year: int = Query(..., ge=2000, le=2027, description="End year (inclusive)."),
+    product: str = Query("ndvi_synth", min_length=1, description="Product to analyse."),
+    only_forest: bool = Query(False, description="If True, only include forest points."),
+    season_length_stat: SeasonLengthStat = Query(
+        SeasonLengthStat.mean,
+        description="How to summarise season_length: mean, median, or both.",
+    ),
+    min_season_length: int | None = Query(
+        None,
+        ge=0,
+        le=366,
+        description="If set, only include rows with season_length >= this value.",
+    ),
+    query_service: QueryService = Depends(get_query_service),
+):
+    """
+    Per-year area stats over a year range, from one spatial query.
+    """
+    logger.info(
+        "area_stats_years_query_received",
+        extra={"start_year": start_year, "end_year": end_year, "product": product},
+    )
+
+    if end_year < start_year:
+        raise HTTPException(
+            status_code=400, detail="Invalid parameters: end_year must be >= start_year"
+        )
+
+    try:
+        years = await query_service.aget_area_stats_years(
+            product=product,
+            start_year=start_year,
+            end_year=end_year,
+            polygon_geojson=payload.geometry,
+            only_forest=only_forest,
+            min_season_length=min_season_length,
+            season_length_stat=season_length_stat.value,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid GeoJSON geometry")
+
+    if not years:
+        raise HTTPException(
+            status_code=404,
+            detail=(
+                "No phenology data found intersecting this polygon "
+                f"for product: {product} and year range {start_year} : {end_year}"
+            ),
+        )
+
+    return PhenologyAreaYearsResponse(
+        product=product,
+        start_year=start_year,
+        end_year=end_year,
+        years=[AreaYearStatsSchema(**y) for y in years],
+    )
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}, "text/csv": {}}},
+        400: {"description": "Invalid bbox"},
+    },
+)
+def export_phenology_metrics(
+    year: int = Query(..., ge=2000, le=2027, description="Year to export."),
+    product: str = Query("ndvi_synth", min_length=1, description="Product to export."),
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Output format."),
+    bbox: str | None = Query(
+        None,
+        description="Only export points inside min_lon,min_lat,max_lon,max_lat (inclusive).",
+    ),
+    query_service: QueryService = Depends(get_query_service),
+):
+    """
+    Stream every stored metric of a product/year as NDJSON or CSV.
+
+    Rows are read through a server-side cursor and written out chunk by chunk, so memory
+    stays flat regardless of the slice size. An empty slice is a 200 with no rows.
+    """
+    try:
+        box = BBox.parse(bbox) if bbox is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {e}") from e
+
+    logger.info(
+        "export_requested",
+        extra={"year": year, "product": product, "format": format, "bbox": bbox},
+    )
+
+    metrics = query_service.iter_metrics(product=product, year=year, bbox=box)
+    filename = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{product}_{year}.{format}")
+    return StreamingResponse(
+        iter_export(format, product, metrics),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        },
+    )
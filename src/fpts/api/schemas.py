@@ -49,6 +49,24 @@ class GeoJSONPolygonRequest(BaseModel):
     model_config = ConfigDict(frozen=True)
 
 
+class AreaPolygonSchema(GeoJSONPolygonRequest):
+    id: str = Field(..., min_length=1, max_length=128, description="Client-chosen key")
+
+
+class PhenologyAreaBatchRequest(BaseModel):
+    polygons: list[AreaPolygonSchema] = Field(..., min_length=1, max_length=200)
+
+    @field_validator("polygons")
+    @classmethod
+    def validate_unique_ids(cls, val: list[AreaPolygonSchema]) -> list[AreaPolygonSchema]:
+        ids = [p.id for p in val]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Polygon ids must be unique")
+        return val
+
+    model_config = ConfigDict(frozen=True)
+
+
 class PhenologyPointsRequest(BaseModel):
     locations: list[LocationSchema] = Field(..., min_length=1)
 
@@ -67,6 +85,39 @@ class PhenologyAreaStatsResponse(BaseModel):
     model_config = ConfigDict(frozen=True)
 
 
+class AreaStatsSchema(BaseModel):
+    n: int
+
+    mean_season_length: float | None = None
+    median_season_length: float | None = None
+    forest_fraction: float | None = None
+
+    model_config = ConfigDict(frozen=True)
+
+
+class PhenologyAreaBatchResponse(BaseModel):
+    product: str
+    year: int
+    # keyed by the request's polygon ids; null where no rows intersect the polygon
+    results: dict[str, AreaStatsSchema | None]
+
+    model_config = ConfigDict(frozen=True)
+
+
+class AreaYearStatsSchema(AreaStatsSchema):
+    year: int
+
+
+class PhenologyAreaYearsResponse(BaseModel):
+    product: str
+    start_year: int
+    end_year: int
+    # years without intersecting rows are omitted
+    years: list[AreaYearStatsSchema]
+
+    model_config = ConfigDict(frozen=True)
+
+
 class PhenologyPointResponse(BaseModel):
     """
     Phenology metrics for a single location and year.
@@ -1,6 +1,10 @@
-from typing import Any
+from contextlib import asynccontextmanager
+from itertools import groupby
+from pathlib import Path
+from typing import Any, AsyncIterator
 
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 
 from fpts.cache.codecs import (
@@ -12,14 +16,24 @@ from fpts.cache.codecs import (
 from fpts.cache.redis_cache import RedisTTLCache
 from fpts.cache.ttl_cache import InMemoryTTLCache
 from fpts.config.settings import Settings
+from fpts.domain.area_summary import SummaryLayout
 from fpts.domain.errors import OutOfCoverageError
-from fpts.domain.models import PhenologyMetric
+from fpts.domain.grid import ProductGrids
+from fpts.domain.models import Location, PhenologyMetric
 from fpts.processing.phenology_service import PhenologyComputationService
 from fpts.processing.raster_service import RasterService
 from fpts.query.service import QueryService
+from fpts.scripts.load_seed_metrics import read_rows
+from fpts.storage.columnar_repository import ColumnarPhenologyRepository
+from fpts.storage.db_pool import create_async_pool, create_pool
 from fpts.storage.in_memory_repository import InMemoryPhenologyRepository
 from fpts.storage.local_raster_repository import LocalRasterRepository
+from fpts.storage.postgis_async_phenology_repository import AsyncPostGISPhenologyRepository
 from fpts.storage.postgis_phenology_repository import PostGISPhenologyRepository
+from fpts.storage.raster_phenology_repository import RasterPhenologyRepository
+from fpts.storage.read_replicas import ReadTarget, ReplicaSet
+from fpts.storage.sqlite_phenology_repository import SQLitePhenologyRepository
+from fpts.storage.write_behind import WriteBehindQueue
 
 
 def register_exception_handlers(app: FastAPI) -> None:
@@ -40,10 +54,128 @@ def register_exception_handlers(app: FastAPI) -> None:
             },
         )
 
+    # queries the configured backend cannot answer (e.g. area stats on the memory backend)
+    @app.exception_handler(NotImplementedError)
+    async def not_implemented_handler(request: Request, exc: NotImplementedError) -> JSONResponse:
+        return JSONResponse(
+            status_code=501,
+            content={"error": "not_implemented", "message": str(exc)},
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Open the database pools (if wired) and start the write-behind queue on startup;
+    on shutdown, flush the queue, then close the pools (and the SQLite connections).
+    """
+    pool = getattr(app.state, "db_pool", None)
+    async_pool = getattr(app.state, "db_async_pool", None)
+    read_pools = getattr(app.state, "db_read_pools", [])
+    async_read_pools = getattr(app.state, "db_async_read_pools", [])
+    sqlite_repo = getattr(app.state, "sqlite_repo", None)
+    write_behind = getattr(app.state, "write_behind", None)
+    settings: Settings = app.state.settings
+    # Fail fast at startup if the database is unreachable rather than on first request.
+    if pool is not None:
+        await run_in_threadpool(pool.open, wait=True, timeout=settings.database_pool_timeout_s)
+    if async_pool is not None:
+        await async_pool.open(wait=True, timeout=settings.database_pool_timeout_s)
+    # Replicas are optional: open without waiting so a replica that is down does not
+    # block startup (reads fall back to the primary meanwhile).
+    for read_pool in read_pools:
+        await run_in_threadpool(read_pool.open, wait=False)
+    for async_read_pool in async_read_pools:
+        await async_read_pool.open(wait=False)
+    if write_behind is not None:
+        write_behind.start()
+    try:
+        yield
+    finally:
+        # Before the pools close: the final flush still needs a connection.
+        if write_behind is not None:
+            await run_in_threadpool(write_behind.close)
+        for async_read_pool in async_read_pools:
+            await async_read_pool.close()
+        for read_pool in read_pools:
+            await run_in_threadpool(read_pool.close)
+        if async_pool is not None:
+            await async_pool.close()
+        if pool is not None:
+            await run_in_threadpool(pool.close)
+        if sqlite_repo is not None:
+            sqlite_repo.close()
+
+
+def load_seed_csv(repo: InMemoryPhenologyRepository, csv_path: Path) -> int:
+    """
+    Bulk-load a seed CSV (fpts.scripts.generate_seed_metrics) into an in-memory repo.
+    """
+    n = 0
+    for product, rows in groupby(read_rows(csv_path), key=lambda r: r.product):
+        n += repo.add_metrics(
+            product,
+            (
+                PhenologyMetric(
+                    year=r.year,
+                    location=Location(lat=r.lat, lon=r.lon),
+                    sos_date=r.sos_date,
+                    eos_date=r.eos_date,
+                    season_length=r.season_length,
+                    is_forest=r.is_forest,
+                )
+                for r in rows
+            ),
+        )
+    return n
+
+
+def create_write_behind(
+    settings: Settings,
+    repo: InMemoryPhenologyRepository | SQLitePhenologyRepository | PostGISPhenologyRepository,
+) -> WriteBehindQueue | None:
+    """
+    Write-behind queue persisting metrics computed by mode=auto through the repo's
+    upsert_many, or None when disabled. For the backends keyed by pixel (cell_id: SQLite,
+    PostGIS) metrics are snapped to the product's pixel grid; the memory backends find
+    rows by their exact coordinate, so they store the requested one. With PostGIS area
+    summaries, the summary cells of the rows a flush wrote are rebuilt after it.
+    """
+    if not settings.write_behind_enabled:
+        return None
+    refresh_summaries = (
+        isinstance(repo, PostGISPhenologyRepository) and settings.area_summaries_enabled
+    )
+
+    def write(product: str, metrics: list[PhenologyMetric]) -> None:
+        repo.upsert_many(product=product, metrics=metrics)
+        if refresh_summaries:
+            for year in sorted({m.year for m in metrics}):
+                repo.refresh_area_summaries(
+                    product=product,
+                    year=year,
+                    locations=[m.location for m in metrics if m.year == year],
+                )
+
+    return WriteBehindQueue(
+        write,
+        max_pending=settings.write_behind_max_pending,
+        batch_size=settings.write_behind_batch_size,
+        flush_interval_s=settings.write_behind_flush_interval_s,
+        grids=(
+            None
+            if isinstance(repo, InMemoryPhenologyRepository)
+            else ProductGrids.from_steps(
+                settings.pixel_grid_step_deg, settings.pixel_grid_step_deg_by_product
+            )
+        ),
+    )
+
 
 def wire_in_memory_services(app, settings: Settings) -> None:
     """
-    Wiring for development/testing.
+    Wiring without a database server: development/testing (memory, columnar) and edge
+    deployments (sqlite, raster).
     """
     # Create caches
     if settings.cache_backend == "redis":
@@ -94,8 +226,29 @@ def wire_in_memory_services(app, settings: Settings) -> None:
         point_cache=app.state.point_metric_cache,
     )
 
-    # In memory phenology repo to store and read metrics.
-    repo = InMemoryPhenologyRepository()
+    # Embedded phenology repo to store and read metrics.
+    if settings.phenology_repo_backend == "sqlite":
+        repo = SQLitePhenologyRepository(
+            settings.sqlite_path,
+            grids=ProductGrids.from_steps(
+                settings.pixel_grid_step_deg, settings.pixel_grid_step_deg_by_product
+            ),
+        )
+        app.state.sqlite_repo = repo
+        app.state.write_behind = create_write_behind(settings, repo)
+    elif settings.phenology_repo_backend == "raster":
+        repo = RasterPhenologyRepository(settings.raster_results_dir)
+        # Cubes are only written whole, by the batch job.
+        app.state.write_behind = None
+    else:
+        repo = (
+            ColumnarPhenologyRepository(index_cell_deg=settings.columnar_index_cell_deg)
+            if settings.phenology_repo_backend == "columnar"
+            else InMemoryPhenologyRepository()
+        )
+        if settings.memory_seed_csv:
+            load_seed_csv(repo, Path(settings.memory_seed_csv))
+        app.state.write_behind = create_write_behind(settings, repo)
     app.state.phenology_repo = repo
     app.state.query_service = QueryService(
         repository=repo,
@@ -159,11 +312,93 @@ def wire_postgis_services(app, settings: Settings) -> None:
     )
 
     # PostGIS repo to store and read metrics.
-    repo = PostGISPhenologyRepository(dsn=settings.database_dsn)
+    app.state.db_pool = (
+        create_pool(settings.database_dsn, settings) if settings.database_pool_enabled else None
+    )
+    repo_options = dict(
+        connect_timeout_s=settings.database_connect_timeout_s,
+        prepare=True if settings.database_prepare_statements else None,
+        grids=ProductGrids.from_steps(
+            settings.pixel_grid_step_deg, settings.pixel_grid_step_deg_by_product
+        ),
+        subdivide_max_vertices=settings.area_subdivide_max_vertices,
+        summaries=(
+            SummaryLayout(
+                cell_deg=settings.area_summary_cell_deg, bin_days=settings.area_summary_bin_days
+            )
+            if settings.area_summaries_enabled
+            else None
+        ),
+    )
+    # Read replicas, each with its own pool when pooling is enabled.
+    app.state.db_read_pools = []
+    read_targets = []
+    for i, read_dsn in enumerate(settings.database_read_dsns):
+        read_pool = (
+            create_pool(read_dsn, settings, name=f"fpts-read-{i}")
+            if settings.database_pool_enabled
+            else None
+        )
+        if read_pool is not None:
+            app.state.db_read_pools.append(read_pool)
+        read_targets.append(ReadTarget(dsn=read_dsn, pool=read_pool))
+    repo = PostGISPhenologyRepository(
+        dsn=settings.database_dsn,
+        pool=app.state.db_pool,
+        replicas=(
+            ReplicaSet(
+                read_targets,
+                retry_after_s=settings.database_read_retry_s,
+                acquire_timeout_s=settings.database_read_acquire_timeout_s,
+            )
+            if read_targets
+            else None
+        ),
+        **repo_options,
+    )
     app.state.phenology_repo = repo
+    app.state.write_behind = create_write_behind(settings, repo)
+
+    # Async repo for the async API handlers (reads only).
+    app.state.db_async_pool = (
+        create_async_pool(settings.database_dsn, settings)
+        if settings.database_async_enabled and settings.database_pool_enabled
+        else None
+    )
+    app.state.db_async_read_pools = []
+    async_read_targets = []
+    if settings.database_async_enabled:
+        for i, read_dsn in enumerate(settings.database_read_dsns):
+            async_read_pool = (
+                create_async_pool(read_dsn, settings, name=f"fpts-async-read-{i}")
+                if settings.database_pool_enabled
+                else None
+            )
+            if async_read_pool is not None:
+                app.state.db_async_read_pools.append(async_read_pool)
+            async_read_targets.append(ReadTarget(dsn=read_dsn, pool=async_read_pool))
+    app.state.phenology_async_repo = (
+        AsyncPostGISPhenologyRepository(
+            dsn=settings.database_dsn,
+            pool=app.state.db_async_pool,
+            replicas=(
+                ReplicaSet(
+                    async_read_targets,
+                    retry_after_s=settings.database_read_retry_s,
+                    acquire_timeout_s=settings.database_read_acquire_timeout_s,
+                )
+                if async_read_targets
+                else None
+            ),
+            **repo_options,
+        )
+        if settings.database_async_enabled
+        else None
+    )
     app.state.query_service = QueryService(
         repository=repo,
         point_cache=app.state.point_metric_cache,
         area_stats_cache=app.state.area_stats_cache,
         timeseries_cache=app.state.timeseries_cache,
+        async_repository=app.state.phenology_async_repo,
     )
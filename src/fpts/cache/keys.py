@@ -17,6 +17,12 @@ def _stable_json_hash(obj: dict) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 
+def _nearest_suffix(nearest_tolerance_deg: float | None) -> str:
+    if nearest_tolerance_deg is None:
+        return ""
+    return f":nearest={round(nearest_tolerance_deg, 6)}"
+
+
 def area_stats_cache_key(
     *,
     product: str,
@@ -34,16 +40,36 @@ def area_stats_cache_key(
     )
 
 
+def area_stats_years_cache_key(
+    *,
+    product: str,
+    start_year: int,
+    end_year: int,
+    polygon_geojson: dict,
+    only_forest: bool,
+    min_season_length: int | None,
+    season_length_stat: str,
+) -> str:
+    poly_h = _stable_json_hash(polygon_geojson)
+    return (
+        "phenology:area_stats_years:"
+        f"{product}:{start_year}:{end_year}:{poly_h}:only_forest={only_forest}:"
+        f"min_season_length={min_season_length}:season_length_stat={season_length_stat}"
+    )
+
+
 def timeseries_cache_key(
     *,
     product: str,
     location: Location,
     start_year: int,
     end_year: int,
+    nearest_tolerance_deg: float | None = None,
 ) -> str:
     lat = round(location.lat, 6)
     lon = round(location.lon, 6)
-    return f"phenology:timeseries:{product}:{lat}:{lon}:{start_year}:{end_year}"
+    key = f"phenology:timeseries:{product}:{lat}:{lon}:{start_year}:{end_year}"
+    return key + _nearest_suffix(nearest_tolerance_deg)
 
 
 def point_metric_cache_key(
@@ -52,14 +78,17 @@ def point_metric_cache_key(
     year: int,
     location: Location,
     threshold_frac: float,
+    nearest_tolerance_deg: float | None = None,
 ) -> str:
     """
     Normalize floats so equivalent requests map to the same key.
 
     - lat/lon rounded to 6dp: ~0.11m precision at equator (more than enough here)
     - threshold rounded to 3dp
+    - nearest-pixel tolerance only appended when set, so exact-lookup keys are unchanged
     """
     lat = round(location.lat, 6)
     lon = round(location.lon, 6)
     thr = round(threshold_frac, 3)
-    return f"phenology:point:{product}:{year}:{lat}:{lon}:{thr}"
+    key = f"phenology:point:{product}:{year}:{lat}:{lon}:{thr}"
+    return key + _nearest_suffix(nearest_tolerance_deg)
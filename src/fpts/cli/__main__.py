@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import argparse
+import sys
+
+from fpts.config.settings import Settings
+from fpts.domain.grid import ProductGrids
+from fpts.domain.models import BBox
+from fpts.query.export import iter_export
+from fpts.storage.postgis_phenology_repository import PostGISPhenologyRepository
+
+
+def export(args: argparse.Namespace, settings: Settings) -> int:
+    repo = PostGISPhenologyRepository(
+        dsn=settings.database_dsn,
+        connect_timeout_s=settings.database_connect_timeout_s,
+        grids=ProductGrids.from_steps(
+            settings.pixel_grid_step_deg, settings.pixel_grid_step_deg_by_product
+        ),
+    )
+    bbox = BBox.parse(args.bbox) if args.bbox else None
+    metrics = repo.iter_metrics(
+        product=args.product, year=args.year, bbox=bbox, chunk_size=args.chunk_size
+    )
+    chunks = iter_export(args.format, args.product, metrics)
+
+    if args.out == "-":
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.out, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+    return 0
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(prog="python -m fpts.cli")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    exp = sub.add_parser(
+        "export", help="Stream all stored metrics of a product/year to NDJSON or CSV"
+    )
+    exp.add_argument("--product", type=str, required=True)
+    exp.add_argument("--year", type=int, required=True)
+    exp.add_argument("--bbox", type=str, default=None, help="min_lon,min_lat,max_lon,max_lat")
+    exp.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    exp.add_argument("--out", type=str, default="-", help="Output file ('-' for stdout)")
+    exp.add_argument(
+        "--chunk-size", type=int, default=10_000, help="Rows fetched per server round trip"
+    )
+
+    args = p.parse_args()
+    settings = Settings()
+
+    if args.cmd == "export":
+        return export(args, settings)
+    return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+# Histogram range: season lengths above this fall into the last bin
+SEASON_LENGTH_MAX_DAYS = 366
+
+
+@dataclass(frozen=True)
+class SummaryLayout:
+    """
+    Layout of the pre-aggregated area summaries (phenology_area_summaries).
+
+    Rows are grouped into coarse cells of `cell_deg` degrees (row/col counted from
+    -90/-180) and each cell keeps a season_length histogram with `bin_days`-day bins
+    over [0, SEASON_LENGTH_MAX_DAYS]. Counts and sums are exact, so mean and forest
+    fraction computed from summaries are exact; the median is estimated from bin
+    midpoints and is within `max_median_error_days` of the exact percentile_cont value
+    (exact for bin_days=1; season lengths outside the range are clamped into the first
+    or last bin and not covered by that bound).
+    """
+
+    cell_deg: float = 0.1
+    bin_days: int = 5
+
+    def __post_init__(self) -> None:
+        if not (self.cell_deg > 0):
+            raise ValueError(f"cell_deg must be > 0, got {self.cell_deg}")
+        if self.bin_days < 1:
+            raise ValueError(f"bin_days must be >= 1, got {self.bin_days}")
+
+    @property
+    def n_bins(self) -> int:
+        return SEASON_LENGTH_MAX_DAYS // self.bin_days + 1
+
+    @property
+    def max_median_error_days(self) -> float:
+        return (self.bin_days - 1) / 2
+
+    def bin_index(self, season_length: int) -> int:
+        return min(max(season_length, 0) // self.bin_days, self.n_bins - 1)
+
+    def bin_midpoint(self, bin_index: int) -> float:
+        lo = bin_index * self.bin_days
+        return lo + (self.bin_days - 1) / 2
+
+    def median(self, bins: Sequence[int], counts: Sequence[int]) -> float | None:
+        """
+        Median (percentile_cont(0.5) semantics) of a sparse histogram given as parallel
+        bin indexes / counts; None when it is empty.
+        """
+        hist = sorted((b, c) for b, c in zip(bins, counts) if c > 0)
+        total = sum(c for _, c in hist)
+        if total == 0:
+            return None
+
+        # 0-based ranks of the middle value(s)
+        lo_rank, hi_rank = (total - 1) // 2, total // 2
+        lo_value: float | None = None
+        seen = 0
+        for b, c in hist:
+            seen += c
+            if lo_value is None and seen > lo_rank:
+                lo_value = self.bin_midpoint(b)
+            if seen > hi_rank:
+                return (lo_value + self.bin_midpoint(b)) / 2
+        raise AssertionError("unreachable: ranks are below total")
@@ -20,3 +20,14 @@ class OutOfCoverageError(Exception):
             f"lon range=[{self.x_min}, {self.x_max}], "
             f"lat range=[{self.y_min}, {self.y_max}])"
         )
+
+
+class InvalidGeometryError(ValueError):
+    """
+    One or more polygons of a batched area query are not valid geometries; `indexes`
+    are their 0-based positions in the request.
+    """
+
+    def __init__(self, indexes: list[int]) -> None:
+        super().__init__(f"Invalid GeoJSON geometry at index {', '.join(map(str, indexes))}")
+        self.indexes = indexes
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Mapping
+
+from fpts.domain.models import Location
+
+DEFAULT_PIXEL_STEP_DEG = 0.001
+
+# snap() rounds pixel centres to this many decimals, so lattice coordinates come back
+# as written (51.495, not 51.495000000000005)
+_SNAP_DECIMALS = 9
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(location: Location, precision: int = 12) -> str:
+    """
+    Standard geohash of a location (same encoding as PostGIS ST_GeoHash).
+
+    Geohashes of equal precision sort along a Z-order curve, so ordering rows by this
+    key keeps spatially close points close together on disk.
+    """
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    out: list[str] = []
+    bits = 0
+    n_bits = 0
+    use_lon = True
+
+    while len(out) < precision:
+        if use_lon:
+            mid = (lon_lo + lon_hi) / 2
+            if location.lon > mid:
+                bits, lon_lo = (bits << 1) | 1, mid
+            else:
+                bits, lon_hi = bits << 1, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if location.lat > mid:
+                bits, lat_lo = (bits << 1) | 1, mid
+            else:
+                bits, lat_hi = bits << 1, mid
+        use_lon = not use_lon
+        n_bits += 1
+        if n_bits == 5:
+            out.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            n_bits = 0
+
+    return "".join(out)
+
+
+@dataclass(frozen=True)
+class PixelGrid:
+    """
+    Global lon/lat pixel grid used to key stored metrics by an integer cell id.
+
+    Pixel centres sit on multiples of `step_deg` from (origin_lon, origin_lat); a
+    coordinate anywhere inside a pixel (within step/2 of its centre) snaps to that pixel.
+    """
+
+    step_deg: float = DEFAULT_PIXEL_STEP_DEG
+    origin_lon: float = -180.0
+    origin_lat: float = -90.0
+
+    def __post_init__(self) -> None:
+        if not (self.step_deg > 0):
+            raise ValueError(f"step_deg must be > 0, got {self.step_deg}")
+
+    @property
+    def n_cols(self) -> int:
+        # +1: both -180 and 180 are valid pixel centres
+        return math.floor(360.0 / self.step_deg + 0.5) + 1
+
+    def row_col(self, location: Location) -> tuple[int, int]:
+        row = math.floor((location.lat - self.origin_lat) / self.step_deg + 0.5)
+        col = math.floor((location.lon - self.origin_lon) / self.step_deg + 0.5)
+        return (row, col)
+
+    def cell_id(self, location: Location) -> int:
+        row, col = self.row_col(location)
+        return row * self.n_cols + col
+
+    def check_lattice(self, *, min_lon: float, min_lat: float, step_deg: float) -> None:
+        """
+        Raise ValueError unless the lattice (min_lon + i * step_deg, min_lat + j * step_deg)
+        is made of this grid's pixel centres, i.e. a batch grid writing it stores exactly one
+        point per pixel, and a coordinate anywhere in a written pixel finds that point.
+        """
+        if not math.isclose(step_deg, self.step_deg, rel_tol=1e-9):
+            raise ValueError(
+                f"Grid step {step_deg} does not match the pixel grid step {self.step_deg}"
+            )
+        for name, value, origin in (
+            ("min_lon", min_lon, self.origin_lon),
+            ("min_lat", min_lat, self.origin_lat),
+        ):
+            offset = (value - origin) / self.step_deg
+            if abs(offset - round(offset)) > 1e-6:
+                raise ValueError(
+                    f"{name}={value} is not a pixel centre of the {self.step_deg} deg "
+                    f"pixel grid (centres at {origin} + k * {self.step_deg})"
+                )
+
+    def cell_center(self, cell_id: int) -> Location:
+        row, col = divmod(cell_id, self.n_cols)
+        return Location(
+            lat=self.origin_lat + row * self.step_deg,
+            lon=self.origin_lon + col * self.step_deg,
+        )
+
+    def snap(self, location: Location) -> Location:
+        """
+        Centre of the pixel containing location.
+        """
+        center = self.cell_center(self.cell_id(location))
+        return Location(
+            lat=round(center.lat, _SNAP_DECIMALS), lon=round(center.lon, _SNAP_DECIMALS)
+        )
+
+
+@dataclass(frozen=True)
+class ProductGrids:
+    """
+    Pixel grid per product, falling back to `default` for products without an override.
+    """
+
+    default: PixelGrid = field(default_factory=PixelGrid)
+    overrides: Mapping[str, PixelGrid] = field(default_factory=dict)
+
+    @classmethod
+    def from_steps(
+        cls, default_step_deg: float, steps_by_product: Mapping[str, float]
+    ) -> ProductGrids:
+        return cls(
+            default=PixelGrid(step_deg=default_step_deg),
+            overrides={p: PixelGrid(step_deg=s) for p, s in steps_by_product.items()},
+        )
+
+    def for_product(self, product: str) -> PixelGrid:
+        return self.overrides.get(product, self.default)
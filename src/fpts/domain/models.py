@@ -19,6 +19,41 @@ class Location:
             raise ValueError(f"Longitude bust be between -180 and 180, got {self.lon}")
 
 
+@dataclass(frozen=True)
+class BBox:
+    """
+    Lon/lat bounding box in WGS84 (edges inclusive).
+    """
+
+    min_lon: float
+    min_lat: float
+    max_lon: float
+    max_lat: float
+
+    def __post_init__(self) -> None:
+        if not (-180.0 <= self.min_lon <= self.max_lon <= 180.0):
+            raise ValueError(f"Invalid bbox longitudes: {self.min_lon}, {self.max_lon}")
+        if not (-90.0 <= self.min_lat <= self.max_lat <= 90.0):
+            raise ValueError(f"Invalid bbox latitudes: {self.min_lat}, {self.max_lat}")
+
+    @classmethod
+    def parse(cls, text: str) -> "BBox":
+        """
+        Parse "min_lon,min_lat,max_lon,max_lat".
+        """
+        parts = [p.strip() for p in text.split(",")]
+        if len(parts) != 4:
+            raise ValueError(f"bbox must be min_lon,min_lat,max_lon,max_lat, got {text!r}")
+        min_lon, min_lat, max_lon, max_lat = (float(p) for p in parts)
+        return cls(min_lon=min_lon, min_lat=min_lat, max_lon=max_lon, max_lat=max_lat)
+
+    def contains(self, location: Location) -> bool:
+        return (
+            self.min_lon <= location.lon <= self.max_lon
+            and self.min_lat <= location.lat <= self.max_lat
+        )
+
+
 @dataclass(frozen=True)
 class PhenologyMetric:
     """
@@ -4,6 +4,7 @@ import argparse
 from pathlib import Path
 
 from fpts.config.settings import Settings
+from fpts.ingestion.cog import COG_BLOCKSIZE, convert_year_to_cog
 from fpts.ingestion.mod13q1 import Mod13Q1IngestionService, read_plan
 
 
@@ -28,6 +29,32 @@ def main() -> None:
     fetch.add_argument("--data-dir", type=Path, default=Path("data"))
     fetch.add_argument("--product", type=str, default="mod13q1")
     fetch.add_argument("--no-verify-existing", action="store_true")
+    fetch.add_argument("--workers", type=int, default=None)
+    fetch.add_argument(
+        "--subset",
+        action="store_true",
+        help="Only read the window intersecting the manifest bbox (ranged COG reads)",
+    )
+
+    sync = sub.add_parser(
+        "sync", help="Fetch only new/changed assets vs the existing manifest and checksums"
+    )
+    sync.add_argument("--year", type=int, required=True)
+    sync.add_argument("--bbox", type=_parse_bbox, required=True)
+    sync.add_argument("--data-dir", type=Path, default=Path("data"))
+    sync.add_argument("--product", type=str, default="mod13q1")
+    sync.add_argument("--subset", action="store_true")
+    sync.add_argument("--dry-run", action="store_true", help="Only write changes.json")
+
+    cog = sub.add_parser(
+        "cog", help="Rewrite fetched rasters as tiled, compressed COGs with overviews"
+    )
+    cog.add_argument("--year", type=int, required=True)
+    cog.add_argument("--data-dir", type=Path, default=Path("data"))
+    cog.add_argument("--product", type=str, default="mod13q1")
+    cog.add_argument("--workers", type=int, default=None)
+    cog.add_argument("--blocksize", type=int, default=COG_BLOCKSIZE)
+    cog.add_argument("--force", action="store_true", help="Rewrite files already in COG layout")
 
     args = p.parse_args()
 
@@ -35,10 +62,9 @@ def main() -> None:
     svc = Mod13Q1IngestionService(settings=settings)
 
     if args.cmd == "plan":
-        plan = svc.build_plan(year=args.year, bbox=args.bbox)
         out = args.data_dir / "raw" / "mod13q1" / str(args.year) / "manifest.json"
-        svc.write_manifest(plan, out)
-        print(f"Wrote manifest: {out} ({len(plan.assets)} items)")
+        n = svc.write_manifest_stream(year=args.year, bbox=args.bbox, out_path=out)
+        print(f"Wrote manifest: {out} ({n} items)")
 
     if args.cmd == "fetch":
         plan_path: Path = args.manifest
@@ -48,12 +74,43 @@ def main() -> None:
             data_dir=args.data_dir,
             product=args.product,
             verify_existing=not args.no_verify_existing,
+            subset=args.subset,
+            max_workers=args.workers,
         )
         print(
             f"Fetched {len(records)} files into "
             f"{args.data_dir / 'raw' / args.product / str(plan.year)}"
         )
 
+    if args.cmd == "sync":
+        fresh = svc.build_plan(year=args.year, bbox=args.bbox)
+        diff = svc.sync_plan(
+            fresh,
+            data_dir=args.data_dir,
+            product=args.product,
+            subset=args.subset,
+            dry_run=args.dry_run,
+        )
+        out = args.data_dir / "raw" / args.product / str(args.year) / "changes.json"
+        print(
+            f"{len(diff.added)} new, {len(diff.changed)} changed, "
+            f"{len(diff.unchanged)} unchanged; wrote {out}"
+        )
+
+    if args.cmd == "cog":
+        records = convert_year_to_cog(
+            data_dir=args.data_dir,
+            product=args.product,
+            year=args.year,
+            max_workers=args.workers,
+            blocksize=args.blocksize,
+            force=args.force,
+        )
+        print(
+            f"Converted {len(records)} files to COG in "
+            f"{args.data_dir / 'raw' / args.product / str(args.year)}"
+        )
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import rasterio
+import rasterio.shutil
+
+from fpts.ingestion.mod13q1 import (
+    DownloadRecord,
+    read_checksums,
+    sha256_file,
+    write_checksums,
+)
+
+# The compute path samples single pixels across every DOY file of a stack
+# (extract_ndvi_timeseries / _batch), so each point read touches one block per file.
+# 256x256 keeps that to one ~128 KiB int16 block and is GDAL's COG default.
+COG_BLOCKSIZE = 256
+
+# Companion assets whose pixels are codes rather than measurements: MOD13Q1
+# pixel_reliability (classes), VI_Quality (bit flags) and composite_day_of_the_year.
+# Matched case-insensitively against the end of the asset key.
+CATEGORICAL_ASSET_SUFFIXES = ("pixel_reliability", "vi_quality", "composite_day_of_the_year")
+
+
+def is_categorical_asset(asset_key: str) -> bool:
+    return asset_key.lower().endswith(CATEGORICAL_ASSET_SUFFIXES)
+
+
+def cog_creation_options(
+    dtype: str, *, categorical: bool = False, blocksize: int = COG_BLOCKSIZE
+) -> dict[str, str]:
+    """
+    GDAL COG driver options for NDVI rasters (and companion assets).
+
+    MOD13Q1 NDVI is scaled int16 and our synthetic stacks are float32, both smooth in space:
+    horizontal differencing (integers) or floating-point prediction compress them well.
+    Overviews use AVERAGE since NDVI is continuous.
+
+    categorical=True is for QA/class bands: overviews use NEAREST so they only hold codes
+    that exist in the data (an average of two classes or flag sets is neither), and no
+    predictor, since differencing codes does not help compression.
+    """
+    if categorical:
+        predictor, resampling = "NO", "NEAREST"
+    elif np.issubdtype(np.dtype(dtype), np.floating):
+        predictor, resampling = "FLOATING_POINT", "AVERAGE"
+    else:
+        predictor, resampling = "STANDARD", "AVERAGE"
+    return {
+        "BLOCKSIZE": str(blocksize),
+        "COMPRESS": "DEFLATE",
+        "PREDICTOR": predictor,
+        "OVERVIEWS": "AUTO",
+        "OVERVIEW_RESAMPLING": resampling,
+        "NUM_THREADS": "1",  # parallelism is across files
+    }
+
+
+def is_cog(path: Path, *, blocksize: int = COG_BLOCKSIZE) -> bool:
+    """
+    True if path is already internally tiled at `blocksize`, compressed and has overviews
+    where the raster is large enough to need them.
+    """
+    with rasterio.open(path) as src:
+        if src.block_shapes[0] != (blocksize, blocksize) or src.compression is None:
+            return False
+        needs_overviews = max(src.width, src.height) > blocksize
+        return bool(src.overviews(1)) or not needs_overviews
+
+
+def convert_to_cog(
+    path: Path, *, categorical: bool = False, blocksize: int = COG_BLOCKSIZE
+) -> tuple[str, int]:
+    """
+    Rewrite a GeoTIFF in place as a tiled, compressed COG with overviews (atomic replace).
+    Returns (sha256, bytes) of the new file.
+    """
+    tmp_path = path.with_suffix(path.suffix + ".partial")
+
+    with rasterio.open(path) as src:
+        options = cog_creation_options(src.dtypes[0], categorical=categorical, blocksize=blocksize)
+
+    rasterio.shutil.copy(path, tmp_path, driver="COG", **options)
+    os.replace(tmp_path, path)  # atomic on same filesystem
+    return (sha256_file(path), path.stat().st_size)
+
+
+def convert_year_to_cog(
+    *,
+    data_dir: Path,
+    product: str,
+    year: int,
+    max_workers: int | None = None,
+    blocksize: int = COG_BLOCKSIZE,
+    force: bool = False,
+) -> list[DownloadRecord]:
+    """
+    Convert every {data_dir}/raw/{product}/{year}/doy_*.tif (and companion asset
+    {asset_key}/doy_*.tif) to COG in parallel and update checksums.json with the new
+    hashes/sizes. Companion assets holding codes (is_categorical_asset) get categorical
+    options.
+
+    Files already in COG layout are skipped unless force=True.
+    """
+    year_dir = data_dir / "raw" / product / str(year)
+    paths = sorted(year_dir.glob("doy_*.tif")) + sorted(year_dir.glob("*/doy_*.tif"))
+    if not paths:
+        raise FileNotFoundError(f"No doy_*.tif files found in {year_dir}")
+
+    def _convert(path: Path) -> tuple[Path, str, int]:
+        if not force and is_cog(path, blocksize=blocksize):
+            return (path, sha256_file(path), path.stat().st_size)
+        categorical = path.parent != year_dir and is_categorical_asset(path.parent.name)
+        digest, nbytes = convert_to_cog(path, categorical=categorical, blocksize=blocksize)
+        return (path, digest, nbytes)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(_convert, paths))
+
+    previous = {r.filename: r for r in read_checksums(year_dir / "checksums.json")}
+    records: list[DownloadRecord] = []
+    for path, digest, nbytes in results:
+        filename = path.relative_to(year_dir).as_posix()
+        prev = previous.get(filename)
+        records.append(
+            DownloadRecord(
+                filename=filename,
+                sha256=digest,
+                bytes=nbytes,
+                href=prev.href if prev else "",
+                item_id=prev.item_id if prev else "",
+                dt=prev.dt if prev else "",
+                doy=prev.doy if prev else int(path.stem.removeprefix("doy_")),
+                window=prev.window if prev else None,
+            )
+        )
+
+    write_checksums(records, year_dir / "checksums.json")
+    return records
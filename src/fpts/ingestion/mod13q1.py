@@ -2,14 +2,19 @@ from __future__ import annotations
 
 import hashlib
 import json
+import math
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable, Iterator
 
+import rasterio
 import requests
 from pystac_client import Client
+from rasterio.warp import transform_bounds
+from rasterio.windows import Window, from_bounds
 
 try:
     import planetary_computer as pc
@@ -36,9 +41,16 @@ def _doy_from_iso(dt: str) -> int:
     return int(d.strftime("%j"))
 
 
-def download_to_path(url: str, out_path: Path, *, timeout_s: float = 60.0) -> tuple[str, int]:
+def download_to_path(
+    url: str,
+    out_path: Path,
+    *,
+    timeout_s: float = 60.0,
+    session: requests.Session | None = None,
+) -> tuple[str, int]:
     """
     Download url -> out_path with atomic write.
+    Pass a shared session to reuse pooled connections across downloads.
     Returns (sha256, bytes).
     """
     out_path.parent.mkdir(parents=True, exist_ok=True)
@@ -47,7 +59,8 @@ def download_to_path(url: str, out_path: Path, *, timeout_s: float = 60.0) -> tu
     hash = hashlib.sha256()
     nbytes = 0
 
-    with requests.get(url, stream=True, timeout=timeout_s) as r:
+    http = session if session is not None else requests
+    with http.get(url, stream=True, timeout=timeout_s) as r:
         r.raise_for_status()
         with tmp_path.open("wb") as f:
             for chunk in r.iter_content(chunk_size=1024 * 1024):
@@ -61,6 +74,146 @@ def download_to_path(url: str, out_path: Path, *, timeout_s: float = 60.0) -> tu
     return (hash.hexdigest(), nbytes)
 
 
+# GDAL options for ranged reads against remote COGs: skip directory listings and only
+# fetch the header + the tiles that intersect the requested window.
+_REMOTE_COG_ENV = {
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+    "CPL_VSIL_CURL_ALLOWED_EXTENSIONS": ".tif,.tiff",
+    "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+    "GDAL_HTTP_MULTIPLEX": "YES",
+}
+
+
+def bbox_window(src: rasterio.io.DatasetReader, bbox: tuple[float, float, float, float]) -> Window:
+    """
+    Pixel window of `src` covering a WGS84 bbox (min_lon, min_lat, max_lon, max_lat).
+
+    The bbox is reprojected into the raster CRS (MODIS is sinusoidal), expanded outwards
+    to whole pixels and clipped to the raster extent.
+    Raises ValueError if the bbox does not intersect the raster.
+    """
+    bounds = transform_bounds("EPSG:4326", src.crs, *bbox, densify_pts=21)
+    exact = from_bounds(*bounds, transform=src.transform)
+
+    col_start = max(0, math.floor(exact.col_off))
+    row_start = max(0, math.floor(exact.row_off))
+    col_stop = min(src.width, math.ceil(exact.col_off + exact.width))
+    row_stop = min(src.height, math.ceil(exact.row_off + exact.height))
+
+    if col_stop <= col_start or row_stop <= row_start:
+        raise ValueError(f"bbox {bbox} does not intersect raster {src.name}")
+
+    return Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
+
+
+def _window_dict(window: Window) -> dict[str, int]:
+    return {
+        "col_off": int(window.col_off),
+        "row_off": int(window.row_off),
+        "width": int(window.width),
+        "height": int(window.height),
+    }
+
+
+def source_window(href: str, *, bbox: tuple[float, float, float, float]) -> dict[str, int]:
+    """
+    Source pixel window crop_to_path would read for bbox (as recorded in DownloadRecord),
+    from the COG header only.
+    """
+    with rasterio.Env(**_REMOTE_COG_ENV):
+        with rasterio.open(href) as src:
+            return _window_dict(bbox_window(src, bbox))
+
+
+def crop_to_path(
+    href: str,
+    out_path: Path,
+    *,
+    bbox: tuple[float, float, float, float],
+) -> tuple[str, int, dict[str, int]]:
+    """
+    Read only the window of a (remote) COG that intersects bbox and write it as a small
+    GeoTIFF with atomic write.
+
+    Remote hrefs are read through GDAL's /vsicurl/ driver, which issues HTTP range requests
+    for the header and the intersecting tiles only.
+    Returns (sha256, bytes, window) where window is the source pixel window.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(out_path.suffix + ".partial")
+
+    with rasterio.Env(**_REMOTE_COG_ENV):
+        with rasterio.open(href) as src:
+            window = bbox_window(src, bbox)
+            data = src.read(window=window)
+            profile = {
+                "driver": "GTiff",
+                "height": int(window.height),
+                "width": int(window.width),
+                "count": src.count,
+                "dtype": src.dtypes[0],
+                "crs": src.crs,
+                "transform": src.window_transform(window),
+                "nodata": src.nodata,
+                "compress": "deflate",
+            }
+
+    with rasterio.open(tmp_path, "w", **profile) as dst:
+        dst.write(data)
+
+    os.replace(tmp_path, out_path)  # atomic on same filesystem
+    return (sha256_file(out_path), out_path.stat().st_size, _window_dict(window))
+
+
+def asset_filename(asset: Mod13Q1AssetRef, *, primary_asset_key: str) -> str:
+    """
+    Path of an asset relative to its year directory.
+
+    The primary (NDVI) asset keeps the flat doy_{doy}.tif layout the stack loader reads;
+    companion assets go to one sub-directory per asset key with the same file names,
+    so matching DOYs line up across bands.
+    """
+    name = f"doy_{asset.doy:03d}.tif"
+    if asset.asset_key == primary_asset_key:
+        return name
+    return f"{asset.asset_key}/{name}"
+
+
+def _asset_refs_from_item(item: dict[str, Any], asset_keys: list[str]) -> list[Mod13Q1AssetRef]:
+    """
+    Build one asset ref per requested asset key from a (signed) STAC item dict.
+    """
+    props = item.get("properties", {})
+    dt = props.get("datetime")
+    if not dt:
+        # fallback if datetime missing
+        dt = props.get("start_datetime") or props.get("end_datetime")
+    if not dt:
+        raise ValueError(f"STAC item missing datetime fields: {item.get('id')}")
+
+    item_assets: dict[str, Any] = item.get("assets", {})
+    refs: list[Mod13Q1AssetRef] = []
+    for asset_key in asset_keys:
+        if asset_key not in item_assets:
+            # fail fast so we learn the exact asset key early
+            raise ValueError(
+                f"Expected '{asset_key}' asset not found in item "
+                f"{item.get('id')}; keys={list(item_assets)}"
+            )
+
+        refs.append(
+            Mod13Q1AssetRef(
+                item_id=str(item.get("id")),
+                dt=str(dt),
+                doy=_doy_from_iso(str(dt)),
+                asset_key=asset_key,
+                href=str(item_assets[asset_key]["href"]),
+                updated=props.get("updated"),
+            )
+        )
+    return refs
+
+
 def read_plan(path: Path) -> Mod13Q1Plan:
     payload = json.loads(path.read_text())
     assets = [Mod13Q1AssetRef(**a) for a in payload["assets"]]
@@ -72,6 +225,17 @@ def read_plan(path: Path) -> Mod13Q1Plan:
     )
 
 
+def read_checksums(path: Path) -> list[DownloadRecord]:
+    """
+    Load records from a checksums.json written by write_checksums.
+    Returns an empty list if the file does not exist.
+    """
+    if not path.exists():
+        return []
+    payload = json.loads(path.read_text())
+    return [DownloadRecord(**r) for r in payload.get("files", [])]
+
+
 def write_checksums(records: Iterable[DownloadRecord], out_path: Path) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
     payload = {
@@ -88,6 +252,7 @@ class Mod13Q1AssetRef:
     doy: int
     asset_key: str
     href: str  # signed href (Planetary Computer)
+    updated: str | None = None  # STAC "updated" property, used to detect reprocessed items
 
 
 @dataclass(frozen=True)
@@ -107,13 +272,112 @@ class DownloadRecord:
     item_id: str
     dt: str
     doy: int
+    window: dict[str, int] | None = None  # source pixel window when fetched in subset mode
+
+
+@dataclass(frozen=True)
+class Mod13Q1PlanDiff:
+    """
+    Result of comparing a fresh plan against what is already on disk.
+    """
+
+    year: int
+    added: list[Mod13Q1AssetRef]  # DOYs with nothing fetched yet
+    changed: list[Mod13Q1AssetRef]  # DOYs whose STAC item was replaced/reprocessed
+    unchanged: list[Mod13Q1AssetRef]
+
+    @property
+    def changed_doys(self) -> list[int]:
+        return sorted({a.doy for a in [*self.added, *self.changed]})
+
+
+def diff_plan(
+    fresh: Mod13Q1Plan,
+    existing: Mod13Q1Plan | None,
+    records: Iterable[DownloadRecord],
+    *,
+    year_dir: Path,
+    primary_asset_key: str,
+) -> Mod13Q1PlanDiff:
+    """
+    Compare a fresh STAC plan with the stored manifest + checksums.
+
+    An asset is unchanged only if the stored manifest has the same item (id + updated
+    timestamp) for its DOY, checksums.json has a record for it, and the file exists.
+    Signed hrefs are ignored since SAS tokens change on every search.
+    """
+    known = {(a.doy, a.asset_key): a for a in existing.assets} if existing is not None else {}
+    fetched = {r.filename: r for r in records}
+
+    added: list[Mod13Q1AssetRef] = []
+    changed: list[Mod13Q1AssetRef] = []
+    unchanged: list[Mod13Q1AssetRef] = []
+    for asset in fresh.assets:
+        filename = asset_filename(asset, primary_asset_key=primary_asset_key)
+        prev = known.get((asset.doy, asset.asset_key))
+        record = fetched.get(filename)
+
+        if record is None or not (year_dir / filename).exists():
+            added.append(asset)
+        elif (
+            prev is None
+            or prev.item_id != asset.item_id
+            or prev.updated != asset.updated
+            or record.item_id != asset.item_id
+        ):
+            changed.append(asset)
+        else:
+            unchanged.append(asset)
+
+    return Mod13Q1PlanDiff(year=fresh.year, added=added, changed=changed, unchanged=unchanged)
+
+
+def write_changes(diff: Mod13Q1PlanDiff, *, product: str, out_path: Path) -> None:
+    """
+    Machine-readable list of DOYs changed by a sync, for downstream consumers.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "product": product,
+        "year": diff.year,
+        "changed_doys": diff.changed_doys,
+        "added": [
+            {"doy": a.doy, "item_id": a.item_id, "asset_key": a.asset_key} for a in diff.added
+        ],
+        "changed": [
+            {"doy": a.doy, "item_id": a.item_id, "asset_key": a.asset_key} for a in diff.changed
+        ],
+    }
+    out_path.write_text(json.dumps(payload, indent=2, sort_keys=True))
 
 
 class Mod13Q1IngestionService:
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
 
-    def build_plan(self, *, year: int, bbox: tuple[float, float, float, float]) -> Mod13Q1Plan:
+    @property
+    def asset_keys(self) -> list[str]:
+        """
+        Asset keys fetched per STAC item: NDVI first, then configured companions.
+        """
+        extra = self._settings.mod13q1_extra_asset_keys
+        primary = self._settings.mod13q1_ndvi_asset_key
+        return [primary, *(k for k in extra if k != primary)]
+
+    def iter_plan_assets(
+        self, *, year: int, bbox: tuple[float, float, float, float]
+    ) -> Iterator[Mod13Q1AssetRef]:
+        """
+        Stream asset refs (NDVI + configured companion assets) page by page from the
+        STAC search, in a single pass over the results.
+
+        Pages are consumed as raw dicts (no pystac objects) and signed in place with one
+        pc.sign call per page; planetary_computer caches the container SAS token until it
+        expires, so signing a page is a string rewrite per asset, not a request per item.
+        Results come back sorted by (datetime, id) from the server, so the stream order is
+        deterministic.
+        """
         if pc is None:
             raise RuntimeError("planetary-computer package not available")
 
@@ -124,43 +388,23 @@ class Mod13Q1IngestionService:
             collections=[self._settings.mod13q1_collection],
             bbox=list(bbox),
             datetime=dt_range,
+            limit=self._settings.pc_stac_page_size,
+            sortby=[
+                {"field": "datetime", "direction": "asc"},
+                {"field": "id", "direction": "asc"},
+            ],
         )
-        items = list(search.items())
-
-        assets: list[Mod13Q1AssetRef] = []
-        for item in items:
-            signed = pc.sign(item).to_dict()  # sign each item to get SAS URLs
-            props = signed.get("properties", {})
-            dt = props.get("datetime")
-            if not dt:
-                # fallback if datetime missing
-                dt = props.get("start_datetime") or props.get("end_datetime")
-            if not dt:
-                raise ValueError(f"STAC item missing datetime fields: {signed.get('id')}")
-
-            # pick NDVI asset
-            item_assets: dict[str, Any] = signed.get("assets", {})
-            ndvi_key = self._settings.mod13q1_ndvi_asset_key
-
-            if ndvi_key not in item_assets:
-                # fail fast so we learn the exact asset key early
-                raise ValueError(
-                    "Expected 'ndvi' asset not found in item "
-                    f"{signed.get('id')}; keys={list(item_assets)}"
-                )
 
-            href = item_assets[ndvi_key]["href"]
-            assets.append(
-                Mod13Q1AssetRef(
-                    item_id=str(signed.get("id")),
-                    dt=str(dt),
-                    doy=_doy_from_iso(str(dt)),
-                    asset_key=ndvi_key,
-                    href=str(href),
-                )
-            )
+        asset_keys = self.asset_keys
+        for page in search.pages_as_dicts():
+            signed_page = pc.sign(page, copy=False)  # bulk-sign the whole page
+            for feature in signed_page.get("features", []):
+                yield from _asset_refs_from_item(feature, asset_keys)
 
-        assets.sort(key=lambda a: (a.doy, a.item_id))  # stable ordering for deterministic manifests
+    def build_plan(self, *, year: int, bbox: tuple[float, float, float, float]) -> Mod13Q1Plan:
+        assets = list(self.iter_plan_assets(year=year, bbox=bbox))
+        # stable ordering for deterministic manifests
+        assets.sort(key=lambda a: (a.doy, a.item_id, a.asset_key))
         return Mod13Q1Plan(
             collection=self._settings.mod13q1_collection,
             year=year,
@@ -175,50 +419,196 @@ class Mod13Q1IngestionService:
         data_dir: Path,
         product: str = "mod13q1",
         verify_existing: bool = True,
+        subset: bool = False,
+        max_workers: int | None = None,
     ) -> list[DownloadRecord]:
         """
         Store as:
-          {data_dir}/raw/{product}/{year}/doy_{doy:03d}.tif
+          {data_dir}/raw/{product}/{year}/doy_{doy:03d}.tif              (NDVI)
+          {data_dir}/raw/{product}/{year}/{asset_key}/doy_{doy:03d}.tif  (companion assets)
           {data_dir}/raw/{product}/{year}/checksums.json
+
+        Assets are fetched concurrently over one shared HTTP session.
+        subset=True reads only the window of each asset intersecting plan.bbox (ranged COG
+        reads) and stores the cropped GeoTIFF; the source window is recorded per file.
+
+        verify_existing reuses files already on disk that match the requested mode: in
+        subset mode only crops whose recorded window is the one plan.bbox maps to (read
+        from the asset's header), otherwise only full files (no recorded window). Other
+        files are fetched again.
         """
-        records: list[DownloadRecord] = []
         year_dir = data_dir / "raw" / product / str(plan.year)
+        previous = {r.filename: r for r in read_checksums(year_dir / "checksums.json")}
 
-        for asset in plan.assets:
-            out = year_dir / f"doy_{asset.doy:03d}.tif"
+        def _record(asset: Mod13Q1AssetRef, session: requests.Session) -> DownloadRecord:
+            filename = self._asset_filename(asset)
+            out = year_dir / filename
 
             if out.exists() and verify_existing:
-                digest = sha256_file(out)
-                records.append(
-                    DownloadRecord(
-                        filename=str(out.name),
-                        sha256=digest,
+                prev = previous.get(filename)
+                window = prev.window if prev is not None else None
+                if subset:
+                    reusable = window is not None and window == source_window(
+                        asset.href, bbox=plan.bbox
+                    )
+                else:
+                    reusable = window is None
+                if reusable:
+                    return DownloadRecord(
+                        filename=filename,
+                        sha256=sha256_file(out),
                         bytes=out.stat().st_size,
                         href=asset.href,
                         item_id=asset.item_id,
                         dt=asset.dt,
                         doy=asset.doy,
+                        window=window,
                     )
-                )
-                continue
-
-            digest, nbytes = download_to_path(asset.href, out)
-            records.append(
-                DownloadRecord(
-                    filename=str(out.name),
-                    sha256=digest,
-                    bytes=nbytes,
-                    href=asset.href,
-                    item_id=asset.item_id,
-                    dt=asset.dt,
-                    doy=asset.doy,
-                )
-            )
 
+            return self._fetch_asset(asset, out, bbox=plan.bbox, subset=subset, session=session)
+
+        records = self._fetch_many(plan.assets, _record, max_workers=max_workers)
         write_checksums(records, year_dir / "checksums.json")
         return records
 
+    def sync_plan(
+        self,
+        fresh: Mod13Q1Plan,
+        *,
+        data_dir: Path,
+        product: str = "mod13q1",
+        subset: bool = False,
+        dry_run: bool = False,
+    ) -> Mod13Q1PlanDiff:
+        """
+        Incremental update of a year directory from a fresh plan.
+
+        Diffs against the stored manifest.json/checksums.json, fetches only new or changed
+        assets, merges both files and writes changes.json listing the changed DOYs.
+        dry_run=True only writes changes.json.
+        """
+        year_dir = data_dir / "raw" / product / str(fresh.year)
+        manifest_path = year_dir / "manifest.json"
+        checksums_path = year_dir / "checksums.json"
+
+        existing = read_plan(manifest_path) if manifest_path.exists() else None
+        previous = read_checksums(checksums_path)
+        diff = diff_plan(
+            fresh,
+            existing,
+            previous,
+            year_dir=year_dir,
+            primary_asset_key=self._settings.mod13q1_ndvi_asset_key,
+        )
+
+        if not dry_run:
+
+            def _record(asset: Mod13Q1AssetRef, session: requests.Session) -> DownloadRecord:
+                out = year_dir / self._asset_filename(asset)
+                return self._fetch_asset(
+                    asset, out, bbox=fresh.bbox, subset=subset, session=session
+                )
+
+            merged = {r.filename: r for r in previous}
+            for record in self._fetch_many([*diff.added, *diff.changed], _record):
+                merged[record.filename] = record
+            write_checksums(sorted(merged.values(), key=lambda r: r.filename), checksums_path)
+
+            # fresh search is authoritative; keep assets that dropped out of it (files remain)
+            fresh_keys = {(a.doy, a.asset_key) for a in fresh.assets}
+            kept = [
+                a
+                for a in (existing.assets if existing else [])
+                if (a.doy, a.asset_key) not in fresh_keys
+            ]
+            assets = sorted([*fresh.assets, *kept], key=lambda a: (a.doy, a.item_id, a.asset_key))
+            self.write_manifest(
+                Mod13Q1Plan(
+                    collection=fresh.collection,
+                    year=fresh.year,
+                    bbox=fresh.bbox,
+                    assets=assets,
+                ),
+                manifest_path,
+            )
+
+        write_changes(diff, product=product, out_path=year_dir / "changes.json")
+        return diff
+
+    def _asset_filename(self, asset: Mod13Q1AssetRef) -> str:
+        return asset_filename(asset, primary_asset_key=self._settings.mod13q1_ndvi_asset_key)
+
+    def _fetch_many(
+        self,
+        assets: list[Mod13Q1AssetRef],
+        fetch: Callable[[Mod13Q1AssetRef, requests.Session], DownloadRecord],
+        *,
+        max_workers: int | None = None,
+    ) -> list[DownloadRecord]:
+        """
+        Run fetch for every asset on a thread pool sharing one HTTP session.
+        Records are returned in asset order.
+        """
+        workers = max_workers or self._settings.ingestion_max_workers
+        with requests.Session() as session:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(lambda a: fetch(a, session), assets))
+
+    def _fetch_asset(
+        self,
+        asset: Mod13Q1AssetRef,
+        out: Path,
+        *,
+        bbox: tuple[float, float, float, float],
+        subset: bool,
+        session: requests.Session | None = None,
+    ) -> DownloadRecord:
+        window: dict[str, int] | None = None
+        if subset:
+            digest, nbytes, window = crop_to_path(asset.href, out, bbox=bbox)
+        else:
+            digest, nbytes = download_to_path(asset.href, out, session=session)
+
+        return DownloadRecord(
+            filename=self._asset_filename(asset),
+            sha256=digest,
+            bytes=nbytes,
+            href=asset.href,
+            item_id=asset.item_id,
+            dt=asset.dt,
+            doy=asset.doy,
+            window=window,
+        )
+
     def write_manifest(self, plan: Mod13Q1Plan, out_path: Path) -> None:
         out_path.parent.mkdir(parents=True, exist_ok=True)
         payload = asdict(plan)
         out_path.write_text(json.dumps(payload, indent=2, sort_keys=True))
+
+    def write_manifest_stream(
+        self, *, year: int, bbox: tuple[float, float, float, float], out_path: Path
+    ) -> int:
+        """
+        Build and write a manifest without holding the search results in memory.
+
+        Assets are written as each STAC page arrives, in server (datetime, id) order.
+        The file has the same shape as write_manifest, so read_plan can load it.
+        Returns the number of assets written.
+        """
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = out_path.with_suffix(out_path.suffix + ".partial")
+
+        n = 0
+        with tmp_path.open("w") as f:
+            f.write('{\n  "assets": [')
+            for asset in self.iter_plan_assets(year=year, bbox=bbox):
+                f.write(",\n    " if n else "\n    ")
+                f.write(json.dumps(asdict(asset), sort_keys=True))
+                n += 1
+            f.write("\n  ],\n" if n else "],\n")
+            f.write(f'  "bbox": {json.dumps(list(bbox))},\n')
+            f.write(f'  "collection": {json.dumps(self._settings.mod13q1_collection)},\n')
+            f.write(f'  "year": {year}\n}}')
+
+        os.replace(tmp_path, out_path)  # atomic on same filesystem
+        return n
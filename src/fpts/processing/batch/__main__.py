@@ -1,10 +1,18 @@
 from __future__ import annotations
 
 import argparse
-import sys
 
 from fpts.config.settings import Settings
-from fpts.processing.batch.process_year import GridSpec, process_year_to_db
+from fpts.processing.batch.process_year import (
+    GridSpec,
+    cluster_year_in_db,
+    load_year_to_sqlite,
+    process_year_to_db,
+    product_grids,
+    reload_year_to_db,
+    summarize_year_in_db,
+    write_year_raster,
+)
 
 
 def main() -> None:
@@ -12,29 +20,130 @@ def main() -> None:
     sub = p.add_subparsers(dest="cmd", required=True)
 
     run = sub.add_parser(
-        "process-year", help="Compute phenology for a grid and upsert into PostGIS"
+        "process-year",
+        help="Compute phenology for a grid and write it to PostGIS, SQLite or a result cube",
     )
     run.add_argument("--product", type=str, required=True)
     run.add_argument("--year", type=int, required=True)
     run.add_argument("--bbox", type=str, required=True, help="min_lon,min_lat,max_lon,max_lat")
-    run.add_argument("--step-deg", type=float, default=0.02)
+    run.add_argument(
+        "--step-deg",
+        type=float,
+        default=None,
+        help=(
+            "Grid step; defaults to the product's pixel grid step (PIXEL_GRID_STEP_DEG, "
+            "PIXEL_GRID_STEP_DEG_BY_PRODUCT), the only step the postgis and sqlite targets "
+            "accept; they move --bbox min_lon/min_lat to the nearest pixel centre"
+        ),
+    )
+    run.add_argument(
+        "--mode",
+        choices=["upsert", "reload"],
+        default="upsert",
+        help=(
+            "upsert: insert/update point by point; reload: recompute the whole year and "
+            "swap it in atomically (replaces every stored row of that product/year; on the "
+            "unpartitioned schema a DELETE + INSERT followed by VACUUM (ANALYZE) of the "
+            "table, use the partitioned DDL for large years)"
+        ),
+    )
+    run.add_argument(
+        "--order",
+        choices=["none", "geohash"],
+        default="none",
+        help="Write order; geohash writes spatially close pixels next to each other on disk",
+    )
+    run.add_argument(
+        "--target",
+        choices=["postgis", "sqlite", "raster"],
+        default="postgis",
+        help=(
+            "postgis: DATABASE_DSN; sqlite: bulk-load the embedded file at SQLITE_PATH; "
+            "raster: write the year's result cube under RASTER_RESULTS_DIR (always replaces "
+            "the year, --mode and --order do not apply)"
+        ),
+    )
+
+    cluster = sub.add_parser(
+        "cluster",
+        help="Physically reorder a stored product/year by geohash (speeds up area queries)",
+    )
+    cluster.add_argument("--product", type=str, required=True)
+    cluster.add_argument("--year", type=int, required=True)
+    cluster.add_argument(
+        "--brin", action="store_true", help="Also create the BRIN index on geom if missing"
+    )
+
+    summarize = sub.add_parser(
+        "summarize",
+        help="Rebuild the pre-aggregated area summaries of a stored product/year",
+    )
+    summarize.add_argument("--product", type=str, required=True)
+    summarize.add_argument("--year", type=int, required=True)
 
     args = p.parse_args()
     settings = Settings()
 
+    if args.cmd == "summarize":
+        n = summarize_year_in_db(settings=settings, product=args.product, year=args.year)
+        print(f"Built {n} area summary rows for product={args.product} year={args.year}")
+        return
+
+    if args.cmd == "cluster":
+        n = cluster_year_in_db(
+            settings=settings, product=args.product, year=args.year, brin=args.brin
+        )
+        print(f"Clustered {n} metrics in PostGIS for product={args.product} year={args.year}")
+        return
+
     min_lon, min_lat, max_lon, max_lat = [float(x.strip()) for x in args.bbox.split(",")]
     grid = GridSpec(
         min_lon=min_lon,
         min_lat=min_lat,
         max_lon=max_lon,
         max_lat=max_lat,
-        step_deg=args.step_deg,
+        step_deg=args.step_deg or product_grids(settings).for_product(args.product).step_deg,
     )
 
-    n = process_year_to_db(settings=settings, product=args.product, year=args.year, grid=grid)
+    if args.target == "raster":
+        n = write_year_raster(settings=settings, product=args.product, year=args.year, grid=grid)
+        print(
+            f"Wrote {n} pixels under {settings.raster_results_dir} "
+            f"for product={args.product} year={args.year}"
+        )
+        return
+
+    if args.target == "sqlite":
+        n = load_year_to_sqlite(
+            settings=settings,
+            product=args.product,
+            year=args.year,
+            grid=grid,
+            order=args.order,
+            replace=args.mode == "reload",
+        )
+        print(
+            f"Loaded {n} metrics into {settings.sqlite_path} "
+            f"for product={args.product} year={args.year}"
+        )
+        return
+
+    if args.mode == "reload":
+        n = reload_year_to_db(
+            settings=settings,
+            product=args.product,
+            year=args.year,
+            grid=grid,
+            order=args.order,
+        )
+        print(f"Reloaded {n} metrics into PostGIS for product={args.product} year={args.year}")
+        return
+
+    n = process_year_to_db(
+        settings=settings, product=args.product, year=args.year, grid=grid, order=args.order
+    )
     print(f"Upserted {n} metrics into PostGIS for product={args.product} year={args.year}")
 
 
 if __name__ == "__main__":
-    sys.exit(0)
     main()
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Iterable
+from dataclasses import dataclass, replace
+from itertools import batched
+from typing import Iterable, Iterator, Literal
 
 from fpts.config.settings import Settings
+from fpts.domain.area_summary import SummaryLayout
+from fpts.domain.grid import ProductGrids, geohash
 from fpts.domain.models import Location, PhenologyMetric
 from fpts.processing.phenology_service import PhenologyComputationService
 from fpts.storage.local_raster_repository import LocalRasterRepository
 from fpts.storage.postgis_phenology_repository import PostGISPhenologyRepository
+from fpts.storage.raster_phenology_repository import CubeGrid, RasterPhenologyRepository
+from fpts.storage.sqlite_phenology_repository import SQLitePhenologyRepository
+from fpts.utils.logging import get_logger
+
+logger = get_logger(__name__)
 
 
 @dataclass(frozen=True)
@@ -29,22 +37,211 @@ def iter_grid(spec: GridSpec) -> Iterable[Location]:
         lat += spec.step_deg
 
 
+WriteOrder = Literal["none", "geohash"]
+
+
+def ordered_grid(spec: GridSpec, order: WriteOrder = "none") -> Iterable[Location]:
+    """
+    Grid locations in write order. "geohash" sorts along a Z-order curve so rows land
+    on disk spatially clustered (see PostGISPhenologyRepository.cluster_year);
+    this materialises the grid.
+    """
+    if order == "geohash":
+        return sorted(iter_grid(spec), key=geohash)
+    return iter_grid(spec)
+
+
+def product_grids(settings: Settings) -> ProductGrids:
+    return ProductGrids.from_steps(
+        settings.pixel_grid_step_deg, settings.pixel_grid_step_deg_by_product
+    )
+
+
+def check_grid(settings: Settings, *, product: str, grid: GridSpec) -> GridSpec:
+    """
+    The grid aligned on the product's pixel grid: its min corner is moved to the centre
+    of the pixel containing it (with a warning when that changes it). A step other than
+    the pixel grid's is rejected (PixelGrid.check_lattice): the stored rows are keyed by
+    its cell ids, so a coarser step would merge points into one row and a finer one would
+    leave most of each written pixel without a match.
+    """
+    pixel_grid = product_grids(settings).for_product(product)
+    origin = pixel_grid.snap(Location(lat=grid.min_lat, lon=grid.min_lon))
+    pixel_grid.check_lattice(min_lon=origin.lon, min_lat=origin.lat, step_deg=grid.step_deg)
+    tol = 1e-6 * pixel_grid.step_deg
+    if abs(origin.lon - grid.min_lon) > tol or abs(origin.lat - grid.min_lat) > tol:
+        logger.warning(
+            "bbox min corner (%s, %s) is not a pixel centre of the %s deg pixel grid of "
+            "%s; starting the grid at (%s, %s) instead",
+            grid.min_lon,
+            grid.min_lat,
+            pixel_grid.step_deg,
+            product,
+            origin.lon,
+            origin.lat,
+        )
+    return replace(grid, min_lon=origin.lon, min_lat=origin.lat)
+
+
+def _postgis_repo(settings: Settings) -> PostGISPhenologyRepository:
+    return PostGISPhenologyRepository(
+        dsn=settings.database_dsn,
+        grids=product_grids(settings),
+        summaries=SummaryLayout(
+            cell_deg=settings.area_summary_cell_deg, bin_days=settings.area_summary_bin_days
+        ),
+    )
+
+
+def _sqlite_repo(settings: Settings) -> SQLitePhenologyRepository:
+    return SQLitePhenologyRepository(settings.sqlite_path, grids=product_grids(settings))
+
+
+def iter_year_metrics(
+    compute: PhenologyComputationService,
+    *,
+    product: str,
+    year: int,
+    grid: GridSpec,
+    order: WriteOrder = "none",
+    chunk_size: int = 10_000,
+) -> Iterator[PhenologyMetric]:
+    """
+    Compute a whole grid in chunks with the vectorized batch path (stack loaded once).
+    """
+    for chunk in batched(ordered_grid(grid, order), chunk_size):
+        yield from compute.compute_points_phenology(product=product, year=year, locations=chunk)
+
+
 def process_year_to_db(
     *,
     settings: Settings,
     product: str,
     year: int,
     grid: GridSpec,
+    order: WriteOrder = "none",
 ) -> int:
+    grid = check_grid(settings, product=product, grid=grid)
     raster_repo = LocalRasterRepository(data_dir=settings.data_dir)
     compute = PhenologyComputationService(raster_repo=raster_repo)
-    db_repo = PostGISPhenologyRepository(dsn=settings.database_dsn)
+    db_repo = _postgis_repo(settings)
 
     n = 0
-    for loc in iter_grid(grid):
+    for loc in ordered_grid(grid, order):
         metric: PhenologyMetric = compute.compute_point_phenology(
             product=product, location=loc, year=year
         )
         db_repo.upsert(product=product, metric=metric)
         n += 1
+
+    if settings.area_summaries_enabled:
+        db_repo.refresh_area_summaries(product=product, year=year)
     return n
+
+
+def reload_year_to_db(
+    *,
+    settings: Settings,
+    product: str,
+    year: int,
+    grid: GridSpec,
+    order: WriteOrder = "none",
+) -> int:
+    """
+    Recompute a whole (product, year) and swap it in atomically
+    (PostGISPhenologyRepository.replace_year) instead of upserting row by row.
+    Rows of that year outside `grid` are dropped.
+    """
+    grid = check_grid(settings, product=product, grid=grid)
+    raster_repo = LocalRasterRepository(data_dir=settings.data_dir)
+    compute = PhenologyComputationService(raster_repo=raster_repo)
+    db_repo = _postgis_repo(settings)
+
+    n = db_repo.replace_year(
+        product=product,
+        year=year,
+        metrics=iter_year_metrics(compute, product=product, year=year, grid=grid, order=order),
+    )
+
+    if settings.area_summaries_enabled:
+        db_repo.refresh_area_summaries(product=product, year=year)
+    return n
+
+
+def load_year_to_sqlite(
+    *,
+    settings: Settings,
+    product: str,
+    year: int,
+    grid: GridSpec,
+    order: WriteOrder = "none",
+    replace: bool = False,
+) -> int:
+    """
+    Compute a whole (product, year) with the vectorized batch path and bulk-load it
+    into the SQLite file at settings.sqlite_path in one transaction. replace=True drops
+    the stored rows of that year first (like reload_year_to_db). "geohash" order keeps
+    the R*Tree pages of neighbouring pixels together.
+    """
+    grid = check_grid(settings, product=product, grid=grid)
+    raster_repo = LocalRasterRepository(data_dir=settings.data_dir)
+    compute = PhenologyComputationService(raster_repo=raster_repo)
+    db_repo = _sqlite_repo(settings)
+    metrics = iter_year_metrics(compute, product=product, year=year, grid=grid, order=order)
+
+    try:
+        if replace:
+            return db_repo.replace_year(product=product, year=year, metrics=metrics)
+        return db_repo.upsert_many(product=product, metrics=metrics)
+    finally:
+        db_repo.close()
+
+
+def write_year_raster(
+    *,
+    settings: Settings,
+    product: str,
+    year: int,
+    grid: GridSpec,
+) -> int:
+    """
+    Compute a whole (product, year) with the vectorized batch path and write it as a
+    result cube under settings.raster_results_dir (RasterPhenologyRepository), one
+    pixel per grid point, replacing any earlier cube of that year.
+    """
+    raster_repo = LocalRasterRepository(data_dir=settings.data_dir)
+    compute = PhenologyComputationService(raster_repo=raster_repo)
+    return RasterPhenologyRepository(settings.raster_results_dir).write_year(
+        product=product,
+        year=year,
+        grid=CubeGrid.from_bounds(
+            grid.min_lon, grid.min_lat, grid.max_lon, grid.max_lat, grid.step_deg
+        ),
+        metrics=iter_year_metrics(compute, product=product, year=year, grid=grid),
+    )
+
+
+def cluster_year_in_db(
+    *,
+    settings: Settings,
+    product: str,
+    year: int,
+    brin: bool = False,
+) -> int:
+    """
+    Maintenance: physically cluster a stored (product, year) by geohash, optionally
+    adding the BRIN index on geom.
+    """
+    db_repo = _postgis_repo(settings)
+    n = db_repo.cluster_year(product=product, year=year)
+    if brin:
+        db_repo.ensure_brin_index()
+    return n
+
+
+def summarize_year_in_db(*, settings: Settings, product: str, year: int) -> int:
+    """
+    Rebuild the pre-aggregated area summaries of a stored (product, year), e.g. after
+    loading rows outside process-year.
+    """
+    return _postgis_repo(settings).refresh_area_summaries(product=product, year=year)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Sequence
+from typing import Mapping, Sequence
 
 import rioxarray
 import xarray as xr
@@ -44,6 +44,30 @@ def load_ndvi_stack(paths: Sequence[Path]) -> xr.DataArray:
     return stack
 
 
+def load_band_cube(paths_by_band: Mapping[str, Sequence[Path]]) -> xr.DataArray:
+    """
+    Load several per-DOY single-band stacks (e.g. NDVI, EVI, pixel reliability) into one
+    cube. Output dims: time, band, y, x with band coordinate = the mapping keys.
+
+    Every band must cover the same DOYs and grid.
+    """
+    if not paths_by_band:
+        raise ValueError("paths_by_band must not be empty")
+
+    stacks: list[xr.DataArray] = []
+    doys: list[int] | None = None
+    for band, paths in paths_by_band.items():
+        stack = load_ndvi_stack(paths)
+        band_doys = [int(t) for t in stack["time"].values.tolist()]
+        if doys is None:
+            doys = band_doys
+        elif band_doys != doys:
+            raise ValueError(f"Band {band!r} DOYs {band_doys} do not match {doys}")
+        stacks.append(stack.isel(band=0, drop=True).expand_dims(band=[band], axis=1))
+
+    return xr.concat(stacks, dim="band", join="exact")
+
+
 def extract_ndvi_timeseries(
     stack: xr.DataArray, location: Location, *, tolerance_deg: float = 0.005
 ) -> NdviTimeSeries:
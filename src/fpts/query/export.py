@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from itertools import islice
+from typing import Iterable, Iterator, Literal
+
+from fpts.domain.models import PhenologyMetric
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_FIELDS = (
+    "product",
+    "year",
+    "lat",
+    "lon",
+    "sos_date",
+    "eos_date",
+    "season_length",
+    "is_forest",
+)
+
+MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _chunks(metrics: Iterable[PhenologyMetric], n: int) -> Iterator[list[PhenologyMetric]]:
+    it = iter(metrics)
+    while chunk := list(islice(it, n)):
+        yield chunk
+
+
+def _record(product: str, m: PhenologyMetric) -> dict:
+    return {
+        "product": product,
+        "year": m.year,
+        "lat": m.location.lat,
+        "lon": m.location.lon,
+        "sos_date": m.sos_date.isoformat() if m.sos_date else None,
+        "eos_date": m.eos_date.isoformat() if m.eos_date else None,
+        "season_length": m.season_length,
+        "is_forest": m.is_forest,
+    }
+
+
+def iter_ndjson(
+    product: str, metrics: Iterable[PhenologyMetric], *, chunk_rows: int = 1_000
+) -> Iterator[bytes]:
+    """
+    One JSON object per line, yielded chunk_rows lines at a time.
+    """
+    for chunk in _chunks(metrics, chunk_rows):
+        lines = (json.dumps(_record(product, m), separators=(",", ":")) for m in chunk)
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def iter_csv(
+    product: str, metrics: Iterable[PhenologyMetric], *, chunk_rows: int = 1_000
+) -> Iterator[bytes]:
+    """
+    CSV with an EXPORT_FIELDS header (empty cells for NULLs), yielded chunk_rows rows at
+    a time.
+    """
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    yield buf.getvalue().encode("utf-8")
+
+    for chunk in _chunks(metrics, chunk_rows):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(_record(product, m) for m in chunk)
+        yield buf.getvalue().encode("utf-8")
+
+
+def iter_export(
+    fmt: ExportFormat,
+    product: str,
+    metrics: Iterable[PhenologyMetric],
+    *,
+    chunk_rows: int = 1_000,
+) -> Iterator[bytes]:
+    if fmt == "csv":
+        return iter_csv(product, metrics, chunk_rows=chunk_rows)
+    return iter_ndjson(product, metrics, chunk_rows=chunk_rows)
@@ -1,18 +1,24 @@
-from typing import Any, Optional
+from functools import partial
+from typing import Any, Callable, Iterator, Optional, Sequence, TypeVar
+
+from anyio import to_thread
 
 from fpts.cache.keys import (
     area_stats_cache_key,
+    area_stats_years_cache_key,
     point_metric_cache_key,
     timeseries_cache_key,
 )
 from fpts.cache.redis_cache import RedisTTLCache
 from fpts.cache.ttl_cache import InMemoryTTLCache
-from fpts.domain.models import Location, PhenologyMetric
-from fpts.storage.phenology_repository import PhenologyRepository
+from fpts.domain.models import BBox, Location, PhenologyMetric
+from fpts.storage.phenology_repository import AsyncPhenologyRepository, PhenologyRepository
 from fpts.utils.logging import get_logger
 
 logger = get_logger("fpts.cache.QueryService")
 
+T = TypeVar("T")
+
 
 class QueryService:
     """
@@ -22,6 +28,11 @@ class QueryService:
     to repositories or storage directly.
 
     Returns metrics for a point (lat, long, year)
+
+    The aget_* variants are for async API handlers: they await `async_repository` when
+    one is wired, and otherwise run the sync method in the threadpool. Both share the
+    caches; on the awaited path, lookups and stores of a Redis cache (blocking network
+    calls) run in the threadpool so they never stall the event loop.
     """
 
     def __init__(
@@ -39,45 +50,240 @@ class QueryService:
         area_stats_cache: (
             RedisTTLCache[dict[str, Any]] | InMemoryTTLCache[str, dict[str, Any]] | None
         ) = None,
+        async_repository: AsyncPhenologyRepository | None = None,
     ) -> None:
         self._repository = repository
+        self._async_repository = async_repository
         self._point_cache = point_cache
         self._area_stats_cache = area_stats_cache
         self._timeseries_cache = timeseries_cache
 
+    async def _cache_io(self, cache: object, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run a cache lookup/store from the awaited path: in the threadpool when the cache
+        does network I/O (Redis), inline for the in-process cache.
+        """
+        if isinstance(cache, RedisTTLCache):
+            return await to_thread.run_sync(partial(fn, *args))
+        return fn(*args)
+
     def get_point_metric(
         self,
         product: str,
         location: Location,
         year: int,
         threshold_frac: float = 0.5,
+        nearest_tolerance_deg: float | None = None,
     ) -> Optional[PhenologyMetric]:
         """
-        Return phenology metric for a single location and year, or None if not found
+        Return phenology metric for a single location and year, or None if not found.
+
+        nearest_tolerance_deg: fall back to the nearest stored point within this distance.
+        """
+        key, cached = self._point_cache_lookup(
+            product, location, year, threshold_frac, nearest_tolerance_deg
+        )
+        if cached is not None:
+            return cached
+
+        metric = self._repository.get_metric_for_location(
+            product=product,
+            location=location,
+            year=year,
+            nearest_tolerance_deg=nearest_tolerance_deg,
+        )
+
+        if metric is not None and self._point_cache is not None:
+            self._point_cache.set(key, metric)
+
+        return metric
+
+    async def aget_point_metric(
+        self,
+        product: str,
+        location: Location,
+        year: int,
+        threshold_frac: float = 0.5,
+        nearest_tolerance_deg: float | None = None,
+    ) -> Optional[PhenologyMetric]:
+        if self._async_repository is None:
+            return await to_thread.run_sync(
+                partial(
+                    self.get_point_metric,
+                    product,
+                    location,
+                    year,
+                    threshold_frac=threshold_frac,
+                    nearest_tolerance_deg=nearest_tolerance_deg,
+                )
+            )
+
+        key, cached = await self._cache_io(
+            self._point_cache,
+            self._point_cache_lookup,
+            product,
+            location,
+            year,
+            threshold_frac,
+            nearest_tolerance_deg,
+        )
+        if cached is not None:
+            return cached
+
+        metric = await self._async_repository.get_metric_for_location(
+            product=product,
+            location=location,
+            year=year,
+            nearest_tolerance_deg=nearest_tolerance_deg,
+        )
+
+        if metric is not None and self._point_cache is not None:
+            await self._cache_io(self._point_cache, self._point_cache.set, key, metric)
+
+        return metric
+
+    def _point_cache_lookup(
+        self,
+        product: str,
+        location: Location,
+        year: int,
+        threshold_frac: float,
+        nearest_tolerance_deg: float | None,
+    ) -> tuple[str | None, Optional[PhenologyMetric]]:
+        if self._point_cache is None:
+            return None, None
+
+        key = point_metric_cache_key(
+            product=product,
+            year=year,
+            location=location,
+            threshold_frac=threshold_frac,
+            nearest_tolerance_deg=nearest_tolerance_deg,
+        )
+        cached = self._point_cache.get(key)
+        logger.debug("cache_lookup", extra={"cache": "point_metric_repo", "key": key})
+        if cached is not None:
+            logger.debug("cache_hit", extra={"cache": "point_metric_repo", "key": key})
+            return key, cached
+
+        logger.debug("cache_miss", extra={"cache": "point_metric_repo", "key": key})
+        return key, None
+
+    def get_point_metrics(
+        self,
+        product: str,
+        locations: Sequence[Location],
+        year: int,
+        threshold_frac: float = 0.5,
+    ) -> list[Optional[PhenologyMetric]]:
+        """
+        Return phenology metrics for many locations of one year, aligned with `locations`
+        (None where not found). Cached points are served from the cache; only the misses
+        are fetched from the repository, in a single batched lookup.
+        """
+        out, keys, miss_idx = self._point_metrics_cache_lookup(
+            product, locations, year, threshold_frac
+        )
+        if not miss_idx:
+            return out
+
+        fetched = self._repository.get_metrics_for_locations(
+            product=product, year=year, locations=[locations[i] for i in miss_idx]
+        )
+        self._merge_fetched_points(out, keys, miss_idx, fetched)
+        return out
+
+    async def aget_point_metrics(
+        self,
+        product: str,
+        locations: Sequence[Location],
+        year: int,
+        threshold_frac: float = 0.5,
+    ) -> list[Optional[PhenologyMetric]]:
+        if self._async_repository is None:
+            return await to_thread.run_sync(
+                partial(
+                    self.get_point_metrics,
+                    product,
+                    locations,
+                    year,
+                    threshold_frac=threshold_frac,
+                )
+            )
+
+        out, keys, miss_idx = await self._cache_io(
+            self._point_cache,
+            self._point_metrics_cache_lookup,
+            product,
+            locations,
+            year,
+            threshold_frac,
+        )
+        if not miss_idx:
+            return out
+
+        fetched = await self._async_repository.get_metrics_for_locations(
+            product=product, year=year, locations=[locations[i] for i in miss_idx]
+        )
+        await self._cache_io(
+            self._point_cache, self._merge_fetched_points, out, keys, miss_idx, fetched
+        )
+        return out
+
+    def _point_metrics_cache_lookup(
+        self,
+        product: str,
+        locations: Sequence[Location],
+        year: int,
+        threshold_frac: float,
+    ) -> tuple[list[Optional[PhenologyMetric]], list[str], list[int]]:
+        """
+        Cached metrics aligned with `locations`, their cache keys, and the indexes of
+        the misses.
         """
-        if self._point_cache is not None:
+        out: list[Optional[PhenologyMetric]] = [None] * len(locations)
+        keys: list[str] = []
+        miss_idx: list[int] = []
+
+        for i, location in enumerate(locations):
+            if self._point_cache is None:
+                miss_idx.append(i)
+                continue
+
             key = point_metric_cache_key(
                 product=product,
                 year=year,
                 location=location,
                 threshold_frac=threshold_frac,
             )
+            keys.append(key)
             cached = self._point_cache.get(key)
-            logger.debug("cache_lookup", extra={"cache": "point_metric_repo", "key": key})
             if cached is not None:
-                logger.debug("cache_hit", extra={"cache": "point_metric_repo", "key": key})
-                return cached
+                out[i] = cached
+            else:
+                miss_idx.append(i)
 
-            logger.debug("cache_miss", extra={"cache": "point_metric_repo", "key": key})
-
-        metric = self._repository.get_metric_for_location(
-            product=product, location=location, year=year
+        logger.debug(
+            "cache_lookup_many",
+            extra={
+                "cache": "point_metric_repo",
+                "n": len(locations),
+                "misses": len(miss_idx),
+            },
         )
+        return out, keys, miss_idx
 
-        if metric is not None and self._point_cache is not None:
-            self._point_cache.set(key, metric)
-
-        return metric
+    def _merge_fetched_points(
+        self,
+        out: list[Optional[PhenologyMetric]],
+        keys: list[str],
+        miss_idx: list[int],
+        fetched: list[PhenologyMetric | None],
+    ) -> None:
+        for i, metric in zip(miss_idx, fetched, strict=True):
+            out[i] = metric
+            if metric is not None and self._point_cache is not None:
+                self._point_cache.set(keys[i], metric)
 
     def get_point_timeseries(
         self,
@@ -86,31 +292,100 @@ class QueryService:
         location: Location,
         start_year: int,
         end_year: int,
+        nearest_tolerance_deg: float | None = None,
     ) -> list[PhenologyMetric]:
+        key, cached = self._timeseries_cache_lookup(
+            product, location, start_year, end_year, nearest_tolerance_deg
+        )
+        if cached is not None:
+            return cached
+
+        data = self._repository.get_timeseries_for_location(
+            product=product,
+            location=location,
+            start_year=start_year,
+            end_year=end_year,
+            nearest_tolerance_deg=nearest_tolerance_deg,
+        )
+
         if self._timeseries_cache is not None:
-            key = timeseries_cache_key(
-                product=product,
-                location=location,
-                start_year=start_year,
-                end_year=end_year,
+            self._timeseries_cache.set(key, data)
+
+        return data
+
+    async def aget_point_timeseries(
+        self,
+        *,
+        product: str,
+        location: Location,
+        start_year: int,
+        end_year: int,
+        nearest_tolerance_deg: float | None = None,
+    ) -> list[PhenologyMetric]:
+        if self._async_repository is None:
+            return await to_thread.run_sync(
+                partial(
+                    self.get_point_timeseries,
+                    product=product,
+                    location=location,
+                    start_year=start_year,
+                    end_year=end_year,
+                    nearest_tolerance_deg=nearest_tolerance_deg,
+                )
             )
-            cached = self._timeseries_cache.get(key)
-            logger.debug("cache_lookup", extra={"cache": "timeseries_repo", "key": key})
-            if cached is not None:
-                logger.debug("cache_hit", extra={"cache": "timeseries", "key": key})
-                return cached
 
-            logger.debug("cache_miss", extra={"cache": "timeseries", "key": key})
+        key, cached = await self._cache_io(
+            self._timeseries_cache,
+            self._timeseries_cache_lookup,
+            product,
+            location,
+            start_year,
+            end_year,
+            nearest_tolerance_deg,
+        )
+        if cached is not None:
+            return cached
 
-        data = self._repository.get_timeseries_for_location(
-            product=product, location=location, start_year=start_year, end_year=end_year
+        data = await self._async_repository.get_timeseries_for_location(
+            product=product,
+            location=location,
+            start_year=start_year,
+            end_year=end_year,
+            nearest_tolerance_deg=nearest_tolerance_deg,
         )
 
         if self._timeseries_cache is not None:
-            self._timeseries_cache.set(key, data)
+            await self._cache_io(self._timeseries_cache, self._timeseries_cache.set, key, data)
 
         return data
 
+    def _timeseries_cache_lookup(
+        self,
+        product: str,
+        location: Location,
+        start_year: int,
+        end_year: int,
+        nearest_tolerance_deg: float | None,
+    ) -> tuple[str | None, list[PhenologyMetric] | None]:
+        if self._timeseries_cache is None:
+            return None, None
+
+        key = timeseries_cache_key(
+            product=product,
+            location=location,
+            start_year=start_year,
+            end_year=end_year,
+            nearest_tolerance_deg=nearest_tolerance_deg,
+        )
+        cached = self._timeseries_cache.get(key)
+        logger.debug("cache_lookup", extra={"cache": "timeseries_repo", "key": key})
+        if cached is not None:
+            logger.debug("cache_hit", extra={"cache": "timeseries", "key": key})
+            return key, cached
+
+        logger.debug("cache_miss", extra={"cache": "timeseries", "key": key})
+        return key, None
+
     def get_area_stats(
         self,
         *,
@@ -121,23 +396,11 @@ class QueryService:
         min_season_length: int | None = None,
         season_length_stat: str = "mean",
     ) -> dict | None:
-        if self._area_stats_cache is not None:
-            key = area_stats_cache_key(
-                product=product,
-                year=year,
-                polygon_geojson=polygon_geojson,
-                only_forest=only_forest,
-                min_season_length=min_season_length,
-                season_length_stat=season_length_stat,
-            )
-
-            cached = self._area_stats_cache.get(key)
-            logger.debug("cache_lookup", extra={"cache": "area_stats_repo", "key": key})
-            if cached is not None:
-                logger.debug("cache_hit", extra={"cache": "area_stats", "key": key})
-                return cached
-
-            logger.debug("cache_miss", extra={"cache": "area_stats", "key": key})
+        key, cached = self._area_stats_cache_lookup(
+            product, year, polygon_geojson, only_forest, min_season_length, season_length_stat
+        )
+        if cached is not None:
+            return cached
 
         stats = self._repository.get_area_stats(
             product=product,
@@ -152,3 +415,346 @@ class QueryService:
             self._area_stats_cache.set(key, stats)
 
         return stats
+
+    async def aget_area_stats(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> dict | None:
+        if self._async_repository is None:
+            return await to_thread.run_sync(
+                partial(
+                    self.get_area_stats,
+                    product=product,
+                    year=year,
+                    polygon_geojson=polygon_geojson,
+                    only_forest=only_forest,
+                    min_season_length=min_season_length,
+                    season_length_stat=season_length_stat,
+                )
+            )
+
+        key, cached = await self._cache_io(
+            self._area_stats_cache,
+            self._area_stats_cache_lookup,
+            product,
+            year,
+            polygon_geojson,
+            only_forest,
+            min_season_length,
+            season_length_stat,
+        )
+        if cached is not None:
+            return cached
+
+        stats = await self._async_repository.get_area_stats(
+            product=product,
+            year=year,
+            polygon_geojson=polygon_geojson,
+            only_forest=only_forest,
+            min_season_length=min_season_length,
+            season_length_stat=season_length_stat,
+        )
+
+        if stats is not None and self._area_stats_cache is not None:
+            await self._cache_io(self._area_stats_cache, self._area_stats_cache.set, key, stats)
+
+        return stats
+
+    def get_area_stats_many(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygons: Sequence[dict],
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict | None]:
+        """
+        Area stats for many polygons of one year, aligned with `polygons`. Each polygon
+        is cached under the same key as get_area_stats; the misses are computed in a
+        single batched repository query.
+        """
+        out, keys, miss_idx = self._area_stats_many_cache_lookup(
+            product, year, polygons, only_forest, min_season_length, season_length_stat
+        )
+        if not miss_idx:
+            return out
+
+        fetched = self._repository.get_area_stats_many(
+            product=product,
+            year=year,
+            polygons=[polygons[i] for i in miss_idx],
+            only_forest=only_forest,
+            min_season_length=min_season_length,
+            season_length_stat=season_length_stat,
+        )
+        self._merge_fetched_area_stats(out, keys, miss_idx, fetched)
+        return out
+
+    async def aget_area_stats_many(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygons: Sequence[dict],
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict | None]:
+        if self._async_repository is None:
+            return await to_thread.run_sync(
+                partial(
+                    self.get_area_stats_many,
+                    product=product,
+                    year=year,
+                    polygons=polygons,
+                    only_forest=only_forest,
+                    min_season_length=min_season_length,
+                    season_length_stat=season_length_stat,
+                )
+            )
+
+        out, keys, miss_idx = await self._cache_io(
+            self._area_stats_cache,
+            self._area_stats_many_cache_lookup,
+            product,
+            year,
+            polygons,
+            only_forest,
+            min_season_length,
+            season_length_stat,
+        )
+        if not miss_idx:
+            return out
+
+        fetched = await self._async_repository.get_area_stats_many(
+            product=product,
+            year=year,
+            polygons=[polygons[i] for i in miss_idx],
+            only_forest=only_forest,
+            min_season_length=min_season_length,
+            season_length_stat=season_length_stat,
+        )
+        await self._cache_io(
+            self._area_stats_cache, self._merge_fetched_area_stats, out, keys, miss_idx, fetched
+        )
+        return out
+
+    def _area_stats_many_cache_lookup(
+        self,
+        product: str,
+        year: int,
+        polygons: Sequence[dict],
+        only_forest: bool,
+        min_season_length: int | None,
+        season_length_stat: str,
+    ) -> tuple[list[dict | None], list[str | None], list[int]]:
+        out: list[dict | None] = [None] * len(polygons)
+        keys: list[str | None] = []
+        miss_idx: list[int] = []
+
+        for i, polygon in enumerate(polygons):
+            key, cached = self._area_stats_cache_lookup(
+                product, year, polygon, only_forest, min_season_length, season_length_stat
+            )
+            keys.append(key)
+            if cached is not None:
+                out[i] = cached
+            else:
+                miss_idx.append(i)
+        return out, keys, miss_idx
+
+    def _merge_fetched_area_stats(
+        self,
+        out: list[dict | None],
+        keys: list[str | None],
+        miss_idx: list[int],
+        fetched: list[dict | None],
+    ) -> None:
+        for i, stats in zip(miss_idx, fetched, strict=True):
+            out[i] = stats
+            if stats is not None and self._area_stats_cache is not None:
+                self._area_stats_cache.set(keys[i], stats)
+
+    def _area_stats_cache_lookup(
+        self,
+        product: str,
+        year: int,
+        polygon_geojson: dict,
+        only_forest: bool,
+        min_season_length: int | None,
+        season_length_stat: str,
+    ) -> tuple[str | None, dict | None]:
+        if self._area_stats_cache is None:
+            return None, None
+
+        key = area_stats_cache_key(
+            product=product,
+            year=year,
+            polygon_geojson=polygon_geojson,
+            only_forest=only_forest,
+            min_season_length=min_season_length,
+            season_length_stat=season_length_stat,
+        )
+
+        cached = self._area_stats_cache.get(key)
+        logger.debug("cache_lookup", extra={"cache": "area_stats_repo", "key": key})
+        if cached is not None:
+            logger.debug("cache_hit", extra={"cache": "area_stats", "key": key})
+            return key, cached
+
+        logger.debug("cache_miss", extra={"cache": "area_stats", "key": key})
+        return key, None
+
+    def get_area_stats_years(
+        self,
+        *,
+        product: str,
+        start_year: int,
+        end_year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict]:
+        """
+        Per-year area stats over an inclusive year range from a single repository query
+        (years without data omitted). Cached in the area stats cache as one entry per
+        range.
+        """
+        key, cached = self._area_stats_years_cache_lookup(
+            product,
+            start_year,
+            end_year,
+            polygon_geojson,
+            only_forest,
+            min_season_length,
+            season_length_stat,
+        )
+        if cached is not None:
+            return cached
+
+        years = self._repository.get_area_stats_years(
+            product=product,
+            start_year=start_year,
+            end_year=end_year,
+            polygon_geojson=polygon_geojson,
+            only_forest=only_forest,
+            min_season_length=min_season_length,
+            season_length_stat=season_length_stat,
+        )
+
+        if years and self._area_stats_cache is not None:
+            self._area_stats_cache.set(key, {"years": years})
+
+        return years
+
+    async def aget_area_stats_years(
+        self,
+        *,
+        product: str,
+        start_year: int,
+        end_year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict]:
+        if self._async_repository is None:
+            return await to_thread.run_sync(
+                partial(
+                    self.get_area_stats_years,
+                    product=product,
+                    start_year=start_year,
+                    end_year=end_year,
+                    polygon_geojson=polygon_geojson,
+                    only_forest=only_forest,
+                    min_season_length=min_season_length,
+                    season_length_stat=season_length_stat,
+                )
+            )
+
+        key, cached = await self._cache_io(
+            self._area_stats_cache,
+            self._area_stats_years_cache_lookup,
+            product,
+            start_year,
+            end_year,
+            polygon_geojson,
+            only_forest,
+            min_season_length,
+            season_length_stat,
+        )
+        if cached is not None:
+            return cached
+
+        years = await self._async_repository.get_area_stats_years(
+            product=product,
+            start_year=start_year,
+            end_year=end_year,
+            polygon_geojson=polygon_geojson,
+            only_forest=only_forest,
+            min_season_length=min_season_length,
+            season_length_stat=season_length_stat,
+        )
+
+        if years and self._area_stats_cache is not None:
+            await self._cache_io(
+                self._area_stats_cache, self._area_stats_cache.set, key, {"years": years}
+            )
+
+        return years
+
+    def _area_stats_years_cache_lookup(
+        self,
+        product: str,
+        start_year: int,
+        end_year: int,
+        polygon_geojson: dict,
+        only_forest: bool,
+        min_season_length: int | None,
+        season_length_stat: str,
+    ) -> tuple[str | None, list[dict] | None]:
+        if self._area_stats_cache is None:
+            return None, None
+
+        key = area_stats_years_cache_key(
+            product=product,
+            start_year=start_year,
+            end_year=end_year,
+            polygon_geojson=polygon_geojson,
+            only_forest=only_forest,
+            min_season_length=min_season_length,
+            season_length_stat=season_length_stat,
+        )
+
+        cached = self._area_stats_cache.get(key)
+        logger.debug("cache_lookup", extra={"cache": "area_stats_years_repo", "key": key})
+        if cached is not None:
+            logger.debug("cache_hit", extra={"cache": "area_stats_years", "key": key})
+            return key, cached["years"]
+
+        logger.debug("cache_miss", extra={"cache": "area_stats_years", "key": key})
+        return key, None
+
+    def iter_metrics(
+        self,
+        *,
+        product: str,
+        year: int,
+        bbox: BBox | None = None,
+        chunk_size: int = 10_000,
+    ) -> Iterator[PhenologyMetric]:
+        """
+        Stream all metrics of a product/year (bulk export; not cached).
+        """
+        return self._repository.iter_metrics(
+            product=product, year=year, bbox=bbox, chunk_size=chunk_size
+        )
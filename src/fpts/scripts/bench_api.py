@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from dataclasses import dataclass
+
+import httpx
+
+# Load generator for a running API (uses httpx from the dev dependencies). Run it once
+# against a server started with DATABASE_ASYNC_ENABLED=false and once with true, same
+# uvicorn --workers, and compare the max sustained RPS.
+
+
+@dataclass(frozen=True)
+class LoadResult:
+    concurrency: int
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    *,
+    path: str,
+    params: dict,
+    bbox: tuple[float, float, float, float],
+    concurrency: int,
+    duration_s: float,
+    snap_deg: float,
+    rng: random.Random,
+) -> LoadResult:
+    """
+    `concurrency` closed-loop clients hitting `path` with random points in bbox, snapped
+    to a `snap_deg` lattice (the seeded grid) so repo lookups find rows.
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    latencies_ms: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration_s
+
+    async def worker() -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            q = {
+                **params,
+                "lat": round(round(rng.uniform(min_lat, max_lat) / snap_deg) * snap_deg, 6),
+                "lon": round(round(rng.uniform(min_lon, max_lon) / snap_deg) * snap_deg, 6),
+            }
+            t0 = time.perf_counter()
+            try:
+                resp = await client.get(path, params=q)
+                ok = resp.status_code < 500
+            except httpx.HTTPError:
+                ok = False
+            latencies_ms.append((time.perf_counter() - t0) * 1_000)
+            errors += not ok
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+
+    ordered = sorted(latencies_ms) or [0.0]
+    return LoadResult(
+        concurrency=concurrency,
+        requests=len(latencies_ms),
+        errors=errors,
+        rps=len(latencies_ms) / elapsed,
+        p50_ms=statistics.median(ordered),
+        p95_ms=ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    )
+
+
+async def ramp(args: argparse.Namespace) -> list[LoadResult]:
+    rng = random.Random(args.seed)
+    bbox = tuple(float(x) for x in args.bbox.split(","))
+    params = {"product": args.product, "year": args.year, "mode": "repo"}
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=None)
+
+    results: list[LoadResult] = []
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30.0) as client:
+        for concurrency in args.concurrency:
+            results.append(
+                await run_level(
+                    client,
+                    path=args.path,
+                    params=params,
+                    bbox=bbox,
+                    concurrency=concurrency,
+                    duration_s=args.duration,
+                    snap_deg=args.snap_deg,
+                    rng=rng,
+                )
+            )
+    return results
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(
+        description="Ramp concurrency against a running API and report sustained RPS."
+    )
+    p.add_argument("--url", default="http://localhost:8000")
+    p.add_argument("--path", default="/phenology/point")
+    p.add_argument("--product", default="ndvi_synth")
+    p.add_argument("--year", type=int, default=2020)
+    p.add_argument("--bbox", default="-7.5,49.5,2.0,59.0", help="min_lon,min_lat,max_lon,max_lat")
+    p.add_argument("--snap-deg", type=float, default=0.1, help="Seeded grid step")
+    p.add_argument("--concurrency", type=int, nargs="+", default=[8, 16, 32, 64, 128, 256])
+    p.add_argument("--duration", type=float, default=15.0, help="Seconds per level")
+    p.add_argument("--p95-slo-ms", type=float, default=250.0)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    results = asyncio.run(ramp(args))
+
+    print(f"{'conc':>6} {'reqs':>8} {'err%':>6} {'rps':>9} {'p50_ms':>8} {'p95_ms':>8}")
+    for r in results:
+        print(
+            f"{r.concurrency:>6} {r.requests:>8} {100 * r.error_rate:>6.2f} "
+            f"{r.rps:>9.1f} {r.p50_ms:>8.1f} {r.p95_ms:>8.1f}"
+        )
+
+    # sustained: no errors to speak of and p95 inside the SLO
+    sustained = [r for r in results if r.error_rate < 0.01 and r.p95_ms <= args.p95_slo_ms]
+    best = max(sustained, key=lambda r: r.rps, default=None)
+    if best is None:
+        print(f"no level sustained (p95 <= {args.p95_slo_ms} ms, errors < 1%)")
+    else:
+        print(f"max sustained: {best.rps:.1f} rps at concurrency {best.concurrency}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
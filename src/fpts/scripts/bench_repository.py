@@ -0,0 +1,506 @@
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+
+import psycopg
+from fpts.config.settings import Settings
+from fpts.domain.grid import PixelGrid
+from fpts.domain.models import Location
+from fpts.sql.queries.phenology import GET_NEAREST_METRIC_FOR_LOCATION
+from fpts.storage.db_pool import create_pool
+from fpts.storage.phenology_repository import PhenologyRepository
+from fpts.storage.postgis_phenology_repository import PostGISPhenologyRepository
+from fpts.storage.sqlite_phenology_repository import SQLitePhenologyRepository
+
+BENCH_PRODUCT = "bench_repository"
+
+# Bench rows are written with the default pixel grid, like the repository does.
+_SEED_SQL = """
+INSERT INTO phenology_metrics (
+    product, year, cell_id, lon, lat, geom,
+    sos_date, eos_date, season_length, is_forest
+)
+SELECT
+    %(product)s::text,
+    %(year)s::int,
+    floor((p.lat - %(origin_lat)s::float8) / %(pixel_step)s::float8 + 0.5)::bigint
+        * %(n_cols)s::bigint
+        + floor((p.lon - %(origin_lon)s::float8) / %(pixel_step)s::float8 + 0.5)::bigint,
+    p.lon,
+    p.lat,
+    ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326),
+    make_date(%(year)s::int, 4, 1),
+    make_date(%(year)s::int, 10, 15),
+    197,
+    (i %% 3) <> 0
+FROM generate_series(0, %(n_points)s::int - 1) AS i
+CROSS JOIN LATERAL (
+    SELECT
+        %(lat0)s::float8 + (i / %(side)s::int)::float8 * %(step)s::float8 AS lat,
+        %(lon0)s::float8 + (i %% %(side)s::int)::float8 * %(step)s::float8 AS lon
+) AS p
+ON CONFLICT DO NOTHING
+"""
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    case: str
+    mode: str
+    n: int
+    mean_us: float
+    p50_us: float
+    p95_us: float
+
+
+@dataclass(frozen=True)
+class BenchGrid:
+    """
+    Square lattice of seeded points: n_points at step_deg spacing from (lat0, lon0).
+    """
+
+    n_points: int
+    step_deg: float = 0.01
+    lat0: float = 50.0
+    lon0: float = 5.0
+
+    @property
+    def side(self) -> int:
+        return max(1, int(self.n_points**0.5))
+
+    def location(self, i: int) -> Location:
+        row, col = divmod(i, self.side)
+        return Location(
+            lat=self.lat0 + float(row) * self.step_deg,
+            lon=self.lon0 + float(col) * self.step_deg,
+        )
+
+    def random_location(self, rng: random.Random) -> Location:
+        return self.location(rng.randrange(self.n_points))
+
+    def star_polygon(self, n_vertices: int, rng: random.Random) -> dict:
+        """
+        GeoJSON polygon with n_vertices jagged vertices around the lattice centre,
+        standing in for a detailed admin boundary.
+        """
+        half = self.side * self.step_deg / 2
+        clat, clon = self.lat0 + half, self.lon0 + half
+        ring = []
+        for k in range(n_vertices):
+            r = half * (0.6 + 0.35 * rng.random())
+            a = 2 * math.pi * k / n_vertices
+            ring.append([clon + r * math.cos(a), clat + r * math.sin(a)])
+        return {"type": "Polygon", "coordinates": [ring + [ring[0]]]}
+
+    def random_offset_location(self, rng: random.Random) -> Location:
+        """
+        A point between lattice points (never inside a stored pixel).
+        """
+        loc = self.random_location(rng)
+        return Location(lat=loc.lat + 0.4 * self.step_deg, lon=loc.lon + 0.3 * self.step_deg)
+
+
+def seed(dsn: str, grid: BenchGrid, years: range) -> None:
+    pixel = PixelGrid()
+    with psycopg.connect(dsn) as conn:
+        for year in years:
+            conn.execute(
+                _SEED_SQL,
+                {
+                    "product": BENCH_PRODUCT,
+                    "year": year,
+                    "n_points": grid.n_points,
+                    "side": grid.side,
+                    "step": grid.step_deg,
+                    "lat0": grid.lat0,
+                    "lon0": grid.lon0,
+                    "pixel_step": pixel.step_deg,
+                    "origin_lat": pixel.origin_lat,
+                    "origin_lon": pixel.origin_lon,
+                    "n_cols": pixel.n_cols,
+                },
+            )
+            conn.commit()
+
+
+def cleanup(dsn: str) -> None:
+    with psycopg.connect(dsn) as conn:
+        conn.execute("DELETE FROM phenology_metrics WHERE product = %s", (BENCH_PRODUCT,))
+
+
+def time_calls(fn: Callable[[], object], *, iterations: int, warmup: int = 50) -> list[float]:
+    for _ in range(warmup):
+        fn()
+    samples: list[float] = []
+    for _ in range(iterations):
+        t0 = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - t0) / 1_000)
+    return samples
+
+
+def summarize(case: str, mode: str, samples_us: list[float]) -> BenchResult:
+    ordered = sorted(samples_us)
+    return BenchResult(
+        case=case,
+        mode=mode,
+        n=len(ordered),
+        mean_us=statistics.fmean(ordered),
+        p50_us=ordered[len(ordered) // 2],
+        p95_us=ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    )
+
+
+def print_results(results: list[BenchResult]) -> None:
+    print(f"{'case':<12} {'mode':<12} {'n':>6} {'mean_us':>10} {'p50_us':>10} {'p95_us':>10}")
+    for r in results:
+        stats = f"{r.mean_us:>10.1f} {r.p50_us:>10.1f} {r.p95_us:>10.1f}"
+        print(f"{r.case:<12} {r.mode:<12} {r.n:>6} {stats}")
+
+
+def bench_prepared(
+    dsn: str,
+    *,
+    grid: BenchGrid,
+    years: range,
+    iterations: int,
+    rng: random.Random,
+) -> list[BenchResult]:
+    """
+    Point/timeseries lookups over a single pooled connection, unprepared vs prepared.
+    """
+    # One connection so every call hits the same (possibly prepared) session.
+    settings = Settings(database_pool_min_size=1, database_pool_max_size=1)
+    results: list[BenchResult] = []
+
+    for mode, prepare in (("unprepared", False), ("prepared", True)):
+        with create_pool(dsn, settings) as pool:
+            repo = PostGISPhenologyRepository(dsn=dsn, pool=pool, prepare=prepare)
+
+            def point() -> object:
+                return repo.get_metric_for_location(
+                    product=BENCH_PRODUCT, location=grid.random_location(rng), year=years.start
+                )
+
+            def timeseries() -> object:
+                return repo.get_timeseries_for_location(
+                    product=BENCH_PRODUCT,
+                    location=grid.random_location(rng),
+                    start_year=years.start,
+                    end_year=years.stop - 1,
+                )
+
+            results.append(summarize("point", mode, time_calls(point, iterations=iterations)))
+            results.append(
+                summarize("timeseries", mode, time_calls(timeseries, iterations=iterations))
+            )
+
+    return results
+
+
+def explain_nearest(dsn: str, *, grid: BenchGrid, year: int, rng: random.Random) -> str:
+    """
+    EXPLAIN (ANALYZE, BUFFERS) of one nearest-pixel lookup; raises if it is not index-driven.
+    """
+    loc = grid.random_offset_location(rng)
+    with psycopg.connect(dsn) as conn:
+        rows = conn.execute(
+            "EXPLAIN (ANALYZE, BUFFERS) " + GET_NEAREST_METRIC_FOR_LOCATION,
+            {
+                "product": BENCH_PRODUCT,
+                "year": year,
+                "lon": loc.lon,
+                "lat": loc.lat,
+                "tolerance_deg": grid.step_deg,
+            },
+        ).fetchall()
+    plan = "\n".join(r[0] for r in rows)
+    if "Seq Scan" in plan or "Index" not in plan:
+        raise SystemExit(f"nearest lookup is not index-driven:\n{plan}")
+    return plan
+
+
+def bench_nearest(
+    dsn: str,
+    *,
+    grid: BenchGrid,
+    years: range,
+    iterations: int,
+    rng: random.Random,
+) -> list[BenchResult]:
+    """
+    Off-pixel lookups that miss the exact cell and fall back to the KNN `<->` query.
+    """
+    settings = Settings(database_pool_min_size=1, database_pool_max_size=1)
+
+    with create_pool(dsn, settings) as pool:
+        repo = PostGISPhenologyRepository(dsn=dsn, pool=pool, prepare=True)
+
+        def point() -> object:
+            metric = repo.get_metric_for_location(
+                product=BENCH_PRODUCT,
+                location=grid.random_offset_location(rng),
+                year=years.start,
+                nearest_tolerance_deg=grid.step_deg,
+            )
+            assert metric is not None
+            return metric
+
+        def timeseries() -> object:
+            series = repo.get_timeseries_for_location(
+                product=BENCH_PRODUCT,
+                location=grid.random_offset_location(rng),
+                start_year=years.start,
+                end_year=years.stop - 1,
+                nearest_tolerance_deg=grid.step_deg,
+            )
+            assert len(series) == len(years)
+            return series
+
+        return [
+            summarize("point", "nearest", time_calls(point, iterations=iterations)),
+            summarize("timeseries", "nearest", time_calls(timeseries, iterations=iterations)),
+        ]
+
+
+def bench_area(
+    dsn: str,
+    *,
+    grid: BenchGrid,
+    years: range,
+    iterations: int,
+    rng: random.Random,
+    n_vertices: int,
+    max_vertices: int,
+) -> list[BenchResult]:
+    """
+    Area stats over one many-vertex polygon: raw ST_Covers vs ST_Subdivide pieces.
+    """
+    settings = Settings(database_pool_min_size=1, database_pool_max_size=1)
+    polygon = grid.star_polygon(n_vertices, rng)
+    results: list[BenchResult] = []
+
+    with create_pool(dsn, settings) as pool:
+        for mode, limit in (("raw", None), (f"subdiv{max_vertices}", max_vertices)):
+            repo = PostGISPhenologyRepository(dsn=dsn, pool=pool, subdivide_max_vertices=limit)
+
+            def area() -> object:
+                stats = repo.get_area_stats(
+                    product=BENCH_PRODUCT,
+                    year=years.start,
+                    polygon_geojson=polygon,
+                    season_length_stat="both",
+                )
+                assert stats is not None
+                return stats
+
+            samples = time_calls(area, iterations=iterations, warmup=5)
+            results.append(summarize("area", mode, samples))
+
+    return results
+
+
+def copy_to_sqlite(dsn: str, path: str, *, years: range) -> SQLitePhenologyRepository:
+    """
+    Bulk-load the seeded PostGIS rows into a SQLite file (the batch loader's path).
+    """
+    source = PostGISPhenologyRepository(dsn=dsn)
+    target = SQLitePhenologyRepository(path)
+    for year in years:
+        target.replace_year(
+            product=BENCH_PRODUCT,
+            year=year,
+            metrics=source.iter_metrics(product=BENCH_PRODUCT, year=year),
+        )
+    return target
+
+
+def _backend_cases(
+    backend: str,
+    repo: PhenologyRepository,
+    *,
+    grid: BenchGrid,
+    years: range,
+    iterations: int,
+    area_iterations: int,
+    polygon: dict,
+    rng: random.Random,
+) -> list[BenchResult]:
+    def point() -> object:
+        return repo.get_metric_for_location(
+            product=BENCH_PRODUCT, location=grid.random_location(rng), year=years.start
+        )
+
+    def timeseries() -> object:
+        return repo.get_timeseries_for_location(
+            product=BENCH_PRODUCT,
+            location=grid.random_location(rng),
+            start_year=years.start,
+            end_year=years.stop - 1,
+        )
+
+    def nearest() -> object:
+        metric = repo.get_metric_for_location(
+            product=BENCH_PRODUCT,
+            location=grid.random_offset_location(rng),
+            year=years.start,
+            nearest_tolerance_deg=grid.step_deg,
+        )
+        assert metric is not None
+        return metric
+
+    def area() -> object:
+        stats = repo.get_area_stats(
+            product=BENCH_PRODUCT,
+            year=years.start,
+            polygon_geojson=polygon,
+            season_length_stat="both",
+        )
+        assert stats is not None
+        return stats
+
+    return [
+        summarize("point", backend, time_calls(point, iterations=iterations)),
+        summarize("timeseries", backend, time_calls(timeseries, iterations=iterations)),
+        summarize("nearest", backend, time_calls(nearest, iterations=iterations)),
+        summarize("area", backend, time_calls(area, iterations=area_iterations, warmup=5)),
+    ]
+
+
+def bench_sqlite(
+    dsn: str,
+    *,
+    grid: BenchGrid,
+    years: range,
+    iterations: int,
+    area_iterations: int,
+    rng: random.Random,
+    n_vertices: int,
+    sqlite_path: str | None,
+) -> list[BenchResult]:
+    """
+    The same point / timeseries / nearest / area calls against the PostGIS repository
+    (pooled, prepared) and the embedded SQLite repository loaded with the same rows.
+    """
+    settings = Settings(database_pool_min_size=1, database_pool_max_size=1)
+    polygon = grid.star_polygon(n_vertices, rng)
+    cases = dict(
+        grid=grid,
+        years=years,
+        iterations=iterations,
+        area_iterations=area_iterations,
+        polygon=polygon,
+        rng=rng,
+    )
+
+    with create_pool(dsn, settings) as pool:
+        postgis = PostGISPhenologyRepository(dsn=dsn, pool=pool, prepare=True)
+        results = _backend_cases("postgis", postgis, **cases)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = sqlite_path or f"{tmp}/bench.sqlite"
+        t0 = time.perf_counter()
+        sqlite = copy_to_sqlite(dsn, path, years=years)
+        print(f"loaded sqlite {path} in {timedelta(seconds=time.perf_counter() - t0)}")
+        try:
+            results += _backend_cases("sqlite", sqlite, **cases)
+        finally:
+            sqlite.close()
+
+    return results
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(
+        description=(
+            "Micro-benchmark PostGISPhenologyRepository lookups against a local PostGIS "
+            "(and, with --cases sqlite, the embedded SQLite repository)."
+        )
+    )
+    p.add_argument("--dsn", default=os.getenv("DATABASE_DSN", ""), help="PostGIS DSN")
+    p.add_argument("--points", type=int, default=10_000, help="Seeded points per year")
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--iterations", type=int, default=2_000)
+    p.add_argument(
+        "--cases",
+        nargs="+",
+        choices=["prepared", "nearest", "area", "sqlite"],
+        default=["prepared", "nearest"],
+    )
+    p.add_argument("--area-vertices", type=int, default=5_000, help="Vertices of the area polygon")
+    p.add_argument("--area-iterations", type=int, default=50)
+    p.add_argument("--subdivide-max-vertices", type=int, default=256)
+    p.add_argument(
+        "--sqlite-path", default=None, help="SQLite file for the sqlite case (default: temp)"
+    )
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--keep", action="store_true", help="Keep seeded rows after the run")
+    p.add_argument("--no-seed", action="store_true", help="Reuse rows kept by an earlier run")
+    args = p.parse_args()
+
+    if not args.dsn:
+        raise SystemExit("DATABASE_DSN is required (or pass --dsn).")
+
+    rng = random.Random(args.seed)
+    grid = BenchGrid(n_points=args.points)
+    years = range(2020, 2020 + args.years)
+
+    if not args.no_seed:
+        t0 = time.perf_counter()
+        seed(args.dsn, grid, years)
+        with psycopg.connect(args.dsn, autocommit=True) as conn:
+            conn.execute("ANALYZE phenology_metrics")
+        elapsed = timedelta(seconds=time.perf_counter() - t0)
+        print(f"seeded {grid.n_points * len(years)} rows in {elapsed}")
+
+    results: list[BenchResult] = []
+    try:
+        if "prepared" in args.cases:
+            results += bench_prepared(
+                args.dsn, grid=grid, years=years, iterations=args.iterations, rng=rng
+            )
+        if "nearest" in args.cases:
+            print(explain_nearest(args.dsn, grid=grid, year=years.start, rng=rng))
+            results += bench_nearest(
+                args.dsn, grid=grid, years=years, iterations=args.iterations, rng=rng
+            )
+        if "area" in args.cases:
+            results += bench_area(
+                args.dsn,
+                grid=grid,
+                years=years,
+                iterations=args.area_iterations,
+                rng=rng,
+                n_vertices=args.area_vertices,
+                max_vertices=args.subdivide_max_vertices,
+            )
+        if "sqlite" in args.cases:
+            results += bench_sqlite(
+                args.dsn,
+                grid=grid,
+                years=years,
+                iterations=args.iterations,
+                area_iterations=args.area_iterations,
+                rng=rng,
+                n_vertices=args.area_vertices,
+                sqlite_path=args.sqlite_path,
+            )
+    finally:
+        if not args.keep:
+            cleanup(args.dsn)
+
+    print_results(results)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,6 +10,8 @@ from pathlib import Path
 from typing import Iterable
 
 import psycopg
+from fpts.config.settings import Settings
+from fpts.domain.grid import ProductGrids
 from fpts.domain.models import Location, PhenologyMetric
 from fpts.storage.postgis_phenology_repository import PostGISPhenologyRepository
 
@@ -83,16 +85,25 @@ def main() -> int:
     if not csv_path.exists():
         raise SystemExit(f"Seed file not found: {csv_path}")
 
-    repo = PostGISPhenologyRepository(dsn=args.dsn)
-
-    batch: list[PhenologyMetric] = []
+    settings = Settings()
+    grids = ProductGrids.from_steps(
+        settings.pixel_grid_step_deg, settings.pixel_grid_step_deg_by_product
+    )
+    repo = PostGISPhenologyRepository(dsn=args.dsn, grids=grids)
+
+    # rows are stored at the centre of their product pixel, like batch rows; a row in a
+    # pixel already written replaces it (keyed by (year, cell_id) within a batch, since
+    # one upsert statement cannot update the same row twice)
+    batch: dict[tuple[int, int], PhenologyMetric] = {}
+    written: set[tuple[str, int, int]] = set()
+    n_replaced = 0
     current_product: str | None = None
 
     def flush(product: str) -> None:
         nonlocal batch
         if batch:
-            repo.upsert_many(product=product, metrics=batch)
-            batch = []
+            repo.upsert_many(product=product, metrics=list(batch.values()))
+            batch = {}
 
     for srow in read_rows(csv_path):
         if current_product is None:
@@ -102,15 +113,19 @@ def main() -> int:
             flush(current_product)
             current_product = srow.product
 
-        batch.append(
-            PhenologyMetric(
-                year=srow.year,
-                location=Location(lat=srow.lat, lon=srow.lon),
-                sos_date=srow.sos_date,
-                eos_date=srow.eos_date,
-                season_length=srow.season_length,
-                is_forest=srow.is_forest,
-            )
+        grid = grids.for_product(srow.product)
+        location = Location(lat=srow.lat, lon=srow.lon)
+        key = (srow.year, grid.cell_id(location))
+        if (srow.product, *key) in written:
+            n_replaced += 1
+        written.add((srow.product, *key))
+        batch[key] = PhenologyMetric(
+            year=srow.year,
+            location=grid.snap(location),
+            sos_date=srow.sos_date,
+            eos_date=srow.eos_date,
+            season_length=srow.season_length,
+            is_forest=srow.is_forest,
         )
 
         if len(batch) >= args.batch_size:
@@ -119,6 +134,11 @@ def main() -> int:
     if current_product is not None:
         flush(current_product)
 
+    if n_replaced:
+        print(
+            f"Warning: {n_replaced} seed rows fell in the pixel of an earlier row and "
+            "replaced it; generate the seed on the product's pixel grid step"
+        )
     print(f"Loaded seed metrics from {csv_path}")
     return 0
 
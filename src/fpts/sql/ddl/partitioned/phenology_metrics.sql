@@ -0,0 +1,101 @@
+-- Partitioned variant of ../phenology_metrics.sql: same columns and lookups, but the
+-- table is LIST-partitioned by product and each product partition LIST-partitioned by
+-- year, so point/area queries for one (product, year) prune to a single leaf and a
+-- year can be rebuilt and swapped in on its own.
+--
+-- Not run by the default initdb image (subdirectories of docker-entrypoint-initdb.d are
+-- ignored); apply it instead of ../phenology_metrics.sql on a fresh database:
+--   psql "$DATABASE_DSN" -f src/fpts/sql/ddl/partitioned/phenology_metrics.sql
+--
+-- Leaf partitions are created on demand by fpts_ensure_partition(product, year), which
+-- PostGISPhenologyRepository.upsert_many calls before writing a batch.
+
+CREATE EXTENSION IF NOT EXISTS postgis;
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+CREATE TABLE IF NOT EXISTS phenology_metrics (
+    -- no PRIMARY KEY (id): unique constraints on a partitioned table must include
+    -- the partition keys, see uq_phenology_metrics_product_cell_year
+    id BIGSERIAL,
+
+    product TEXT NOT NULL,
+    year INTEGER NOT NULL,
+
+    -- snapped pixel key (fpts.domain.grid.PixelGrid.cell_id) used for point lookups
+    cell_id BIGINT NOT NULL,
+
+    -- stored pixel coordinate as written
+    lon DOUBLE PRECISION NOT NULL,
+    lat DOUBLE PRECISION NOT NULL,
+
+    -- spatial column for PostGIS queries
+    geom GEOMETRY(Point, 4326) NOT NULL,
+
+    sos_date DATE,
+    eos_date DATE,
+    season_length INTEGER,
+    is_forest BOOLEAN NOT NULL,
+
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+
+    CONSTRAINT uq_phenology_metrics_product_cell_year
+        UNIQUE (product, cell_id, year)
+        INCLUDE (lat, lon, sos_date, eos_date, season_length, is_forest)
+) PARTITION BY LIST (product);
+
+-- Every leaf holds a single (product, year), so a plain GiST on geom serves both area
+-- stats and KNN lookups once the planner has pruned to the leaf.
+CREATE INDEX IF NOT EXISTS idx_phenology_metrics_geom
+ON phenology_metrics
+USING GIST (geom);
+
+
+-- Partition names are derived from the product (sanitised, plus a short hash so that
+-- e.g. "a-b" and "a_b" do not collide) and the year.
+CREATE OR REPLACE FUNCTION fpts_partition_name(p_product TEXT, p_year INTEGER DEFAULT NULL)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT 'phenology_metrics_'
+        || left(lower(regexp_replace(p_product, '[^a-zA-Z0-9]+', '_', 'g')), 30)
+        || '_' || left(md5(p_product), 6)
+        || coalesce('_' || p_year::text, '');
+$$;
+
+
+-- Create (if missing) the product partition and its year leaf; returns the leaf.
+CREATE OR REPLACE FUNCTION fpts_ensure_partition(p_product TEXT, p_year INTEGER)
+RETURNS REGCLASS
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    product_part TEXT := fpts_partition_name(p_product);
+    year_part TEXT := fpts_partition_name(p_product, p_year);
+    parent_schema TEXT;
+BEGIN
+    IF to_regclass(year_part) IS NOT NULL THEN
+        RETURN to_regclass(year_part);
+    END IF;
+
+    -- serialise concurrent writers creating the same partitions
+    PERFORM pg_advisory_xact_lock(hashtext('fpts_ensure_partition'), hashtext(p_product));
+
+    SELECT n.nspname INTO parent_schema
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = 'phenology_metrics'::regclass;
+
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I.%I PARTITION OF %I.phenology_metrics '
+        'FOR VALUES IN (%L) PARTITION BY LIST (year)',
+        parent_schema, product_part, parent_schema, p_product
+    );
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I.%I PARTITION OF %I.%I FOR VALUES IN (%s)',
+        parent_schema, year_part, parent_schema, product_part, p_year
+    );
+
+    RETURN format('%I.%I', parent_schema, year_part)::regclass;
+END;
+$$;
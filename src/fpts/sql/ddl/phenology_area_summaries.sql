@@ -0,0 +1,40 @@
+CREATE EXTENSION IF NOT EXISTS postgis;
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- Pre-aggregated area statistics (fpts.domain.area_summary.SummaryLayout), rebuilt per
+-- (product, year) by the batch job from phenology_metrics. Area queries take polygons'
+-- fully covered cells from here and only read raw rows for boundary cells.
+--
+-- Rows written to phenology_metrics after a rebuild are not reflected until the next
+-- rebuild of that (product, year).
+CREATE TABLE IF NOT EXISTS phenology_area_summaries (
+    product TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    -- the summary of every row (false) or of is_forest rows only (true)
+    only_forest BOOLEAN NOT NULL,
+
+    -- layout: cell size and histogram bin width the row was built with
+    cell_deg DOUBLE PRECISION NOT NULL,
+    bin_days INTEGER NOT NULL,
+
+    -- cell = floor((lat + 90) / cell_deg), floor((lon + 180) / cell_deg)
+    cell_row INTEGER NOT NULL,
+    cell_col INTEGER NOT NULL,
+    cell GEOMETRY(Polygon, 4326) NOT NULL,
+
+    n INTEGER NOT NULL,
+    n_forest INTEGER NOT NULL,
+    -- rows with a season_length, their sum and histogram (bin i counts lengths in
+    -- [i * bin_days, (i + 1) * bin_days), 1-based array)
+    n_season INTEGER NOT NULL,
+    season_length_sum BIGINT NOT NULL,
+    season_length_hist INTEGER[] NOT NULL,
+
+    built_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+
+    PRIMARY KEY (product, year, only_forest, cell_deg, bin_days, cell_row, cell_col)
+);
+
+CREATE INDEX IF NOT EXISTS idx_phenology_area_summaries_product_year_cell
+ON phenology_area_summaries
+USING GIST (product, year, cell);
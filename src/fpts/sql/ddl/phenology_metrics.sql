@@ -1,4 +1,6 @@
 CREATE EXTENSION IF NOT EXISTS postgis;
+-- lets GiST indexes carry scalar (product, year) keys for filtered KNN lookups
+CREATE EXTENSION IF NOT EXISTS btree_gist;
 
 CREATE TABLE IF NOT EXISTS phenology_metrics (
     id SERIAL PRIMARY KEY,
@@ -6,7 +8,10 @@ CREATE TABLE IF NOT EXISTS phenology_metrics (
     product TEXT NOT NULL,
     year INTEGER NOT NULL,
 
-    -- store lon/lat explicitly for exact point lookups
+    -- snapped pixel key (fpts.domain.grid.PixelGrid.cell_id) used for point lookups
+    cell_id BIGINT NOT NULL,
+
+    -- stored pixel coordinate as written
     lon DOUBLE PRECISION NOT NULL,
     lat DOUBLE PRECISION NOT NULL,
 
@@ -20,7 +25,11 @@ CREATE TABLE IF NOT EXISTS phenology_metrics (
 
     created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
 
-    UNIQUE (product, year, lon, lat)
+    -- point/timeseries lookups are an equality probe on this index; the INCLUDE columns
+    -- let them be answered index-only
+    CONSTRAINT uq_phenology_metrics_product_cell_year
+        UNIQUE (product, cell_id, year)
+        INCLUDE (lat, lon, sos_date, eos_date, season_length, is_forest)
 );
 
 CREATE INDEX IF NOT EXISTS idx_phenology_metrics_geom
@@ -29,3 +38,8 @@ USING GIST (geom);
 
 CREATE INDEX IF NOT EXISTS idx_phenology_metrics_product_year
 ON phenology_metrics (product, year);
+
+-- nearest-pixel (KNN `<->`) lookups filtered by product/year stay inside one index scan
+CREATE INDEX IF NOT EXISTS idx_phenology_metrics_product_year_geom
+ON phenology_metrics
+USING GIST (product, year, geom);
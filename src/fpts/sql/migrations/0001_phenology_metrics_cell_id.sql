@@ -0,0 +1,79 @@
+-- Migrates a phenology_metrics table created before cell_id keys (UNIQUE (product, year,
+-- lon, lat)) to the layout of ../ddl/phenology_metrics.sql: adds cell_id, backfills it
+-- from lon/lat on each product's pixel grid and swaps the unique constraint.
+--
+-- Pass the same steps the API and batch jobs are configured with (PIXEL_GRID_STEP_DEG,
+-- PIXEL_GRID_STEP_DEG_BY_PRODUCT), otherwise stored rows are keyed on another grid and
+-- point lookups miss them:
+--   psql "$DATABASE_DSN" -v ON_ERROR_STOP=1 \
+--       -v default_step=0.001 -v steps_by_product='{"mod13q1": 0.0025}' \
+--       -f src/fpts/sql/migrations/0001_phenology_metrics_cell_id.sql
+--
+-- Rows that snap to the same pixel of a (product, year) would violate the new key; only
+-- the most recently written one (highest id) is kept, as an upsert of them would have.
+-- Runs in one transaction and holds an exclusive lock on the table until it commits.
+-- Safe to run again: an already migrated table is left as it is.
+
+\if :{?default_step}
+\else
+\set default_step 0.001
+\endif
+\if :{?steps_by_product}
+\else
+\set steps_by_product '{}'
+\endif
+
+BEGIN;
+
+ALTER TABLE phenology_metrics ADD COLUMN IF NOT EXISTS cell_id BIGINT;
+
+-- same arithmetic as fpts.domain.grid.PixelGrid.cell_id (origin -180/-90, round half up)
+WITH steps AS (
+    SELECT
+        p.product,
+        coalesce(
+            (:'steps_by_product'::jsonb ->> p.product)::float8, :'default_step'::float8
+        ) AS step
+    FROM (SELECT DISTINCT product FROM phenology_metrics WHERE cell_id IS NULL) p
+)
+UPDATE phenology_metrics m
+SET cell_id = floor((m.lat + 90) / s.step + 0.5)::bigint
+        * (floor(360 / s.step + 0.5)::bigint + 1)
+    + floor((m.lon + 180) / s.step + 0.5)::bigint
+FROM steps s
+WHERE m.product = s.product
+    AND m.cell_id IS NULL;
+
+DELETE FROM phenology_metrics
+WHERE id IN (
+    SELECT id
+    FROM (
+        SELECT
+            id,
+            row_number() OVER (PARTITION BY product, cell_id, year ORDER BY id DESC) AS rn
+        FROM phenology_metrics
+    ) ranked
+    WHERE rn > 1
+);
+
+ALTER TABLE phenology_metrics ALTER COLUMN cell_id SET NOT NULL;
+
+ALTER TABLE phenology_metrics
+    DROP CONSTRAINT IF EXISTS phenology_metrics_product_year_lon_lat_key;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'phenology_metrics'::regclass
+            AND conname = 'uq_phenology_metrics_product_cell_year'
+    ) THEN
+        ALTER TABLE phenology_metrics
+            ADD CONSTRAINT uq_phenology_metrics_product_cell_year
+            UNIQUE (product, cell_id, year)
+            INCLUDE (lat, lon, sos_date, eos_date, season_length, is_forest);
+    END IF;
+END;
+$$;
+
+COMMIT;
@@ -1,21 +1,156 @@
 UPSERT_MANY = """
 INSERT INTO phenology_metrics (
-    product, year, lon, lat, geom,
+    product, year, cell_id, lon, lat, geom,
     sos_date, eos_date, season_length, is_forest
 )
 VALUES (
-    %(product)s, %(year)s, %(lon)s, %(lat)s,
+    %(product)s, %(year)s, %(cell_id)s, %(lon)s, %(lat)s,
     ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326),
     %(sos_date)s, %(eos_date)s, %(season_length)s, %(is_forest)s
 )
-ON CONFLICT (product, year, lon, lat)
+ON CONFLICT (product, cell_id, year)
 DO UPDATE SET
+    lon = EXCLUDED.lon,
+    lat = EXCLUDED.lat,
+    geom = EXCLUDED.geom,
     sos_date = EXCLUDED.sos_date,
     eos_date = EXCLUDED.eos_date,
     season_length = EXCLUDED.season_length,
     is_forest = EXCLUDED.is_forest;
 """
 
+# Partitioned schema (ddl/partitioned/phenology_metrics.sql) support.
+IS_PARTITIONED = """
+SELECT c.relkind = 'p' AS partitioned
+FROM pg_class c
+WHERE c.oid = to_regclass('phenology_metrics')
+"""
+
+ENSURE_PARTITION = """
+SELECT fpts_ensure_partition(%(product)s::text, %(year)s::int)::text AS partition
+"""
+
+# Whole-year reload (PostGISPhenologyRepository.replace_year). {placeholders} are
+# composed client-side with psycopg.sql (identifiers/literals), since multi-statement
+# strings cannot take bind parameters. The year is loaded into a staging table first
+# and swapped in for the live (product, year) slice in one short transaction.
+RELOAD_PARTITION_NAMES = """
+SELECT
+    n.nspname AS schema,
+    fpts_partition_name(%(product)s::text) AS product_partition,
+    fpts_partition_name(%(product)s::text, %(year)s::int) AS year_partition
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.oid = 'phenology_metrics'::regclass
+"""
+
+RELOAD_CREATE_STAGE = """
+CREATE TABLE {stage} (LIKE phenology_metrics INCLUDING DEFAULTS)
+"""
+
+RELOAD_CREATE_TEMP_STAGE = """
+CREATE TEMP TABLE {stage} (LIKE phenology_metrics INCLUDING DEFAULTS) ON COMMIT DROP
+"""
+
+RELOAD_COPY_STAGE = """
+COPY {stage} (
+    product, year, cell_id, lon, lat, geom,
+    sos_date, eos_date, season_length, is_forest
+) FROM STDIN
+"""
+
+# Matching constraint/indexes let ATTACH PARTITION adopt them instead of building new
+# ones, and the CHECK lets it skip the partition-bound validation scan.
+RELOAD_INDEX_STAGE = """
+ALTER TABLE {stage}
+    ADD CHECK (product = {product} AND year = {year}),
+    ADD UNIQUE (product, cell_id, year)
+        INCLUDE (lat, lon, sos_date, eos_date, season_length, is_forest);
+CREATE INDEX ON {stage} USING GIST (geom);
+ANALYZE {stage};
+"""
+
+RELOAD_SWAP_PARTITION = """
+SET LOCAL lock_timeout = '5s';
+ALTER TABLE {product_partition} DETACH PARTITION {year_partition};
+DROP TABLE {year_partition};
+ALTER TABLE {stage} RENAME TO {year_partition_name};
+ALTER TABLE {product_partition} ATTACH PARTITION {year_partition} FOR VALUES IN ({year});
+"""
+
+# Unpartitioned fallback: delete + insert in one transaction. Readers keep seeing the
+# old rows (MVCC) until commit, but the deleted tuples still need vacuuming
+# (VACUUM_ANALYZE_METRICS after the commit).
+RELOAD_REPLACE_ROWS = """
+DELETE FROM phenology_metrics WHERE product = {product} AND year = {year};
+INSERT INTO phenology_metrics (
+    product, year, cell_id, lon, lat, geom,
+    sos_date, eos_date, season_length, is_forest
+)
+SELECT
+    product, year, cell_id, lon, lat, geom,
+    sos_date, eos_date, season_length, is_forest
+FROM {stage};
+"""
+
+# Cannot run inside a transaction block: needs an autocommit connection.
+VACUUM_ANALYZE_METRICS = "VACUUM (ANALYZE) phenology_metrics"
+
+# Spatial clustering (PostGISPhenologyRepository.cluster_year). Rows are ordered by
+# geohash, a Z-order curve over lon/lat, so points close in space share heap pages.
+CLUSTER_FILL_STAGE = """
+INSERT INTO {stage} (
+    product, year, cell_id, lon, lat, geom,
+    sos_date, eos_date, season_length, is_forest
+)
+SELECT
+    product, year, cell_id, lon, lat, geom,
+    sos_date, eos_date, season_length, is_forest
+FROM {source}
+ORDER BY ST_GeoHash(geom, 12), cell_id
+"""
+
+# Unpartitioned table: the (product, year) rows are copied out in geohash order, then
+# deleted and re-inserted in that order in one transaction, so only this slice is
+# rewritten and readers keep seeing the old rows (MVCC) until commit. The deleted tuples
+# still need vacuuming, like RELOAD_REPLACE_ROWS.
+CLUSTER_REPLACE_ROWS = """
+CREATE TEMP TABLE {stage} ON COMMIT DROP AS
+SELECT
+    product, year, cell_id, lon, lat, geom,
+    sos_date, eos_date, season_length, is_forest
+FROM phenology_metrics
+WHERE product = {product} AND year = {year};
+DELETE FROM phenology_metrics WHERE product = {product} AND year = {year};
+INSERT INTO phenology_metrics (
+    product, year, cell_id, lon, lat, geom,
+    sos_date, eos_date, season_length, is_forest
+)
+SELECT
+    product, year, cell_id, lon, lat, geom,
+    sos_date, eos_date, season_length, is_forest
+FROM {stage}
+ORDER BY ST_GeoHash(geom, 12), cell_id;
+"""
+
+COUNT_PRODUCT_YEAR = """
+SELECT count(*) AS n
+FROM phenology_metrics
+WHERE product = %(product)s::text AND year = %(year)s::int
+"""
+
+# Block-range summaries of geom; only selective once rows are clustered as above.
+CREATE_GEOM_BRIN_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_phenology_metrics_geom_brin
+ON phenology_metrics
+USING BRIN (geom) WITH (pages_per_range = {pages_per_range})
+"""
+
+# Point/timeseries lookups are the hot path and may run as server-side prepared statements
+# (PostGISPhenologyRepository(prepare=True)); parameters are cast explicitly so the
+# prepared plan has fixed types matching the columns/index.
+# Requests are snapped to the product's pixel grid by the repository, so these are
+# equality probes on (product, cell_id, year).
 GET_METRIC_FOR_LOCATION = """
 SELECT
     year,
@@ -27,10 +162,28 @@ SELECT
     is_forest
 FROM phenology_metrics
 WHERE
-    product = %(product)s
-    AND year = %(year)s
-    AND lat = %(lat)s
-    AND lon = %(lon)s
+    product = %(product)s::text
+    AND cell_id = %(cell_id)s::bigint
+    AND year = %(year)s::int
+"""
+
+# Many points for one (product, year) in a single round trip. `idx` is the 1-based
+# position in the input array so results can be realigned (and duplicates kept).
+GET_METRICS_FOR_LOCATIONS = """
+SELECT
+    q.idx,
+    m.year,
+    m.lat,
+    m.lon,
+    m.sos_date,
+    m.eos_date,
+    m.season_length,
+    m.is_forest
+FROM unnest(%(cell_ids)s::bigint[]) WITH ORDINALITY AS q(cell_id, idx)
+JOIN phenology_metrics m
+    ON m.product = %(product)s::text
+    AND m.cell_id = q.cell_id
+    AND m.year = %(year)s::int
 """
 
 GET_TIMESERIES_FOR_LOCATION = """
@@ -44,13 +197,72 @@ SELECT
     is_forest
 FROM phenology_metrics
 WHERE
-    product = %(product)s
-    AND lat = %(lat)s
-    AND lon = %(lon)s
-    AND year BETWEEN %(start_year)s AND %(end_year)s
+    product = %(product)s::text
+    AND cell_id = %(cell_id)s::bigint
+    AND year BETWEEN %(start_year)s::int AND %(end_year)s::int
 ORDER BY year ASC
 """
 
+# Nearest stored pixel within a tolerance (degrees, EPSG:4326), used when the snapped
+# cell has no row. ST_DWithin bounds the search and `<->` orders a KNN scan of the
+# (product, year, geom) GiST index, so only a handful of index entries are visited.
+GET_NEAREST_METRIC_FOR_LOCATION = """
+SELECT
+    year,
+    lat,
+    lon,
+    sos_date,
+    eos_date,
+    season_length,
+    is_forest
+FROM phenology_metrics
+WHERE
+    product = %(product)s::text
+    AND year = %(year)s::int
+    AND ST_DWithin(
+        geom,
+        ST_SetSRID(ST_MakePoint(%(lon)s::double precision, %(lat)s::double precision), 4326),
+        %(tolerance_deg)s::double precision
+    )
+ORDER BY
+    geom <-> ST_SetSRID(ST_MakePoint(%(lon)s::double precision, %(lat)s::double precision), 4326)
+LIMIT 1
+"""
+
+# Timeseries of the nearest stored pixel (nearest cell with any row in the year range).
+GET_NEAREST_TIMESERIES_FOR_LOCATION = """
+WITH nearest AS (
+    SELECT cell_id
+    FROM phenology_metrics
+    WHERE
+        product = %(product)s::text
+        AND year BETWEEN %(start_year)s::int AND %(end_year)s::int
+        AND ST_DWithin(
+            geom,
+            ST_SetSRID(ST_MakePoint(%(lon)s::double precision, %(lat)s::double precision), 4326),
+            %(tolerance_deg)s::double precision
+        )
+    ORDER BY
+        geom
+        <-> ST_SetSRID(ST_MakePoint(%(lon)s::double precision, %(lat)s::double precision), 4326)
+    LIMIT 1
+)
+SELECT
+    m.year,
+    m.lat,
+    m.lon,
+    m.sos_date,
+    m.eos_date,
+    m.season_length,
+    m.is_forest
+FROM nearest n
+JOIN phenology_metrics m
+    ON m.product = %(product)s::text
+    AND m.cell_id = n.cell_id
+    AND m.year BETWEEN %(start_year)s::int AND %(end_year)s::int
+ORDER BY m.year ASC
+"""
+
 GET_AREA_STATS = """
 WITH poly AS (
     SELECT ST_SetSRID(ST_GeomFromGeoJSON(%(poly)s), 4326) AS g
@@ -83,3 +295,423 @@ LEFT JOIN phenology_metrics m
     )
 GROUP BY f.ok
 """
+
+# Large/complex polygons (PostGISPhenologyRepository(subdivide_max_vertices=...)): after
+# the same validation, ST_Subdivide splits the polygon into pieces of at most
+# max_vertices vertices, each with a tight bbox for the GiST index and a cheap
+# ST_Covers test. Points on a shared piece edge match twice, so hits are de-duplicated
+# by cell_id (unique per product/year).
+GET_AREA_STATS_SUBDIVIDED = """
+WITH poly AS (
+    SELECT ST_SetSRID(ST_GeomFromGeoJSON(%(poly)s), 4326) AS g
+),
+flags AS (
+    SELECT
+        g,
+        (g IS NOT NULL) AS not_null,
+        (g IS NOT NULL AND NOT ST_IsEmpty(g)) AS not_empty,
+        (g IS NOT NULL AND ST_IsValid(g)) AS is_valid,
+        (g IS NOT NULL AND NOT ST_IsEmpty(g) AND ST_IsValid(g)) AS ok
+    FROM poly
+),
+pieces AS (
+    SELECT ST_Subdivide(g, %(max_vertices)s::int) AS g
+    FROM flags
+    WHERE ok
+),
+hits AS (
+    SELECT DISTINCT ON (m.cell_id)
+        m.season_length,
+        m.is_forest
+    FROM pieces p
+    JOIN phenology_metrics m
+        ON m.product = %(product)s
+        AND m.year = %(year)s
+        AND ST_Covers(p.g, m.geom)
+        AND (%(only_forest)s::boolean = false OR m.is_forest = true)
+        AND (
+            %(min_season_length)s::int IS NULL
+            OR (m.season_length IS NOT NULL AND m.season_length >= %(min_season_length)s::int)
+        )
+)
+SELECT
+    f.ok AS ok,
+    COUNT(h.*)::int AS n,
+    AVG(h.season_length)::float AS mean_season_length,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY h.season_length)::float AS median_season_length,
+    AVG(CASE WHEN h.is_forest THEN 1 ELSE 0 END)::float AS forest_fraction
+FROM flags f
+LEFT JOIN hits h
+    ON f.ok
+GROUP BY f.ok
+"""
+
+# Many polygons for one (product, year) in a single statement: the polygons arrive as a
+# text[] of GeoJSON (plus a parallel int[] of ST_Subdivide limits, NULL for polygons that
+# are tested whole) and a LATERAL subquery aggregates each one's rows, so every polygon
+# gets its own index scan without a round trip. `idx` is the 1-based input position.
+GET_AREA_STATS_MANY = """
+WITH poly AS (
+    SELECT
+        q.idx,
+        q.max_vertices,
+        ST_SetSRID(ST_GeomFromGeoJSON(q.poly), 4326) AS g
+    FROM unnest(%(polys)s::text[], %(max_vertices)s::int[])
+        WITH ORDINALITY AS q(poly, max_vertices, idx)
+),
+flags AS (
+    SELECT
+        idx,
+        max_vertices,
+        g,
+        (g IS NOT NULL AND NOT ST_IsEmpty(g) AND ST_IsValid(g)) AS ok
+    FROM poly
+)
+SELECT
+    f.idx,
+    f.ok,
+    s.n,
+    s.mean_season_length,
+    s.median_season_length,
+    s.forest_fraction
+FROM flags f
+CROSS JOIN LATERAL (
+    SELECT
+        COUNT(h.*)::int AS n,
+        AVG(h.season_length)::float AS mean_season_length,
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY h.season_length)::float
+            AS median_season_length,
+        AVG(CASE WHEN h.is_forest THEN 1 ELSE 0 END)::float AS forest_fraction
+    FROM (
+        -- hits on a shared edge of two subdivided pieces are counted once
+        SELECT DISTINCT ON (m.cell_id)
+            m.season_length,
+            m.is_forest
+        FROM (
+            SELECT ST_Subdivide(f.g, f.max_vertices) AS g
+            WHERE f.ok AND f.max_vertices IS NOT NULL
+            UNION ALL
+            SELECT f.g
+            WHERE f.ok AND f.max_vertices IS NULL
+        ) p
+        JOIN phenology_metrics m
+            ON m.product = %(product)s
+            AND m.year = %(year)s
+            AND ST_Covers(p.g, m.geom)
+            AND (%(only_forest)s::boolean = false OR m.is_forest = true)
+            AND (
+                %(min_season_length)s::int IS NULL
+                OR (m.season_length IS NOT NULL AND m.season_length >= %(min_season_length)s::int)
+            )
+    ) h
+) s
+ORDER BY f.idx
+"""
+
+# One polygon over a year range: the polygon is parsed, validated and (when
+# max_vertices is not NULL) subdivided once, the spatial join covers every year in one
+# scan, and rows are aggregated per year. Returns one row per year with data; a valid
+# polygon without data returns a single row with a NULL year and n = 0.
+GET_AREA_STATS_YEARS = """
+WITH poly AS (
+    SELECT ST_SetSRID(ST_GeomFromGeoJSON(%(poly)s), 4326) AS g
+),
+flags AS (
+    SELECT
+        g,
+        (g IS NOT NULL AND NOT ST_IsEmpty(g) AND ST_IsValid(g)) AS ok
+    FROM poly
+),
+pieces AS (
+    SELECT ST_Subdivide(g, %(max_vertices)s::int) AS g
+    FROM flags
+    WHERE ok AND %(max_vertices)s::int IS NOT NULL
+    UNION ALL
+    SELECT g
+    FROM flags
+    WHERE ok AND %(max_vertices)s::int IS NULL
+),
+hits AS (
+    SELECT DISTINCT ON (m.year, m.cell_id)
+        m.year,
+        m.season_length,
+        m.is_forest
+    FROM pieces p
+    JOIN phenology_metrics m
+        ON m.product = %(product)s
+        AND m.year BETWEEN %(start_year)s::int AND %(end_year)s::int
+        AND ST_Covers(p.g, m.geom)
+        AND (%(only_forest)s::boolean = false OR m.is_forest = true)
+        AND (
+            %(min_season_length)s::int IS NULL
+            OR (m.season_length IS NOT NULL AND m.season_length >= %(min_season_length)s::int)
+        )
+)
+SELECT
+    f.ok AS ok,
+    h.year,
+    COUNT(h.*)::int AS n,
+    AVG(h.season_length)::float AS mean_season_length,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY h.season_length)::float AS median_season_length,
+    AVG(CASE WHEN h.is_forest THEN 1 ELSE 0 END)::float AS forest_fraction
+FROM flags f
+LEFT JOIN hits h
+    ON f.ok
+GROUP BY f.ok, h.year
+ORDER BY h.year
+"""
+
+# Pre-aggregated area summaries (ddl/phenology_area_summaries.sql,
+# fpts.domain.area_summary.SummaryLayout). Cell assignment must match between the
+# rebuild and GET_AREA_STATS_SUMMARIZED:
+#   floor((lat + 90) / cell_deg), floor((lon + 180) / cell_deg)
+DELETE_AREA_SUMMARIES = """
+DELETE FROM phenology_area_summaries
+WHERE product = %(product)s::text
+    AND year = %(year)s::int
+    AND cell_deg = %(cell_deg)s::float8
+    AND bin_days = %(bin_days)s::int
+"""
+
+# Cell-scoped refresh (the write-behind queue's): the cells holding the given stored
+# rows (cell_ids), then only those cells' summaries are deleted and rebuilt.
+AREA_SUMMARY_CELLS_OF_ROWS = """
+SELECT DISTINCT
+    floor((lat + 90) / %(cell_deg)s::float8)::int AS cell_row,
+    floor((lon + 180) / %(cell_deg)s::float8)::int AS cell_col
+FROM phenology_metrics
+WHERE product = %(product)s::text
+    AND year = %(year)s::int
+    AND cell_id = ANY(%(cell_ids)s::bigint[])
+"""
+
+DELETE_AREA_SUMMARY_CELLS = (
+    DELETE_AREA_SUMMARIES
+    + """    AND (cell_row, cell_col) IN (
+        SELECT * FROM unnest(%(cell_rows)s::int[], %(cell_cols)s::int[])
+    )
+"""
+)
+
+_BUILD_AREA_SUMMARIES = """
+WITH pts AS ({points}),
+cells AS (
+    SELECT
+        only_forest,
+        cell_row,
+        cell_col,
+        count(*)::int AS n,
+        count(*) FILTER (WHERE is_forest)::int AS n_forest,
+        count(season_length)::int AS n_season,
+        coalesce(sum(season_length), 0)::bigint AS season_length_sum
+    FROM pts
+    GROUP BY only_forest, cell_row, cell_col
+),
+bins AS (
+    SELECT
+        only_forest,
+        cell_row,
+        cell_col,
+        least(greatest(season_length, 0) / %(bin_days)s::int, %(n_bins)s::int - 1) AS bin,
+        count(*)::int AS cnt
+    FROM pts
+    WHERE season_length IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+),
+hists AS (
+    SELECT
+        c.only_forest,
+        c.cell_row,
+        c.cell_col,
+        array_agg(coalesce(b.cnt, 0) ORDER BY s.bin) AS season_length_hist
+    FROM cells c
+    CROSS JOIN generate_series(0, %(n_bins)s::int - 1) AS s(bin)
+    LEFT JOIN bins b
+        ON b.only_forest = c.only_forest
+        AND b.cell_row = c.cell_row
+        AND b.cell_col = c.cell_col
+        AND b.bin = s.bin
+    GROUP BY c.only_forest, c.cell_row, c.cell_col
+)
+INSERT INTO phenology_area_summaries (
+    product, year, only_forest, cell_deg, bin_days, cell_row, cell_col, cell,
+    n, n_forest, n_season, season_length_sum, season_length_hist
+)
+SELECT
+    %(product)s::text,
+    %(year)s::int,
+    c.only_forest,
+    %(cell_deg)s::float8,
+    %(bin_days)s::int,
+    c.cell_row,
+    c.cell_col,
+    ST_MakeEnvelope(
+        -180 + c.cell_col * %(cell_deg)s::float8,
+        -90 + c.cell_row * %(cell_deg)s::float8,
+        -180 + (c.cell_col + 1) * %(cell_deg)s::float8,
+        -90 + (c.cell_row + 1) * %(cell_deg)s::float8,
+        4326
+    ),
+    c.n,
+    c.n_forest,
+    c.n_season,
+    c.season_length_sum,
+    h.season_length_hist
+FROM cells c
+JOIN hists h
+    ON h.only_forest = c.only_forest
+    AND h.cell_row = c.cell_row
+    AND h.cell_col = c.cell_col
+"""
+
+BUILD_AREA_SUMMARIES = _BUILD_AREA_SUMMARIES.format(
+    points="""
+    SELECT
+        v.only_forest,
+        floor((m.lat + 90) / %(cell_deg)s::float8)::int AS cell_row,
+        floor((m.lon + 180) / %(cell_deg)s::float8)::int AS cell_col,
+        m.is_forest,
+        m.season_length
+    FROM phenology_metrics m
+    CROSS JOIN (VALUES (false), (true)) AS v(only_forest)
+    WHERE m.product = %(product)s::text
+        AND m.year = %(year)s::int
+        AND (NOT v.only_forest OR m.is_forest)
+"""
+)
+
+# The envelope only narrows the rows through the geom index; floor() assigns them, as in
+# the full rebuild. It is widened a little since the rebuilt cell edges can round past
+# points that floor() puts inside the cell.
+BUILD_AREA_SUMMARY_CELLS = _BUILD_AREA_SUMMARIES.format(
+    points="""
+    SELECT
+        v.only_forest,
+        c.cell_row,
+        c.cell_col,
+        m.is_forest,
+        m.season_length
+    FROM unnest(%(cell_rows)s::int[], %(cell_cols)s::int[]) AS c(cell_row, cell_col)
+    JOIN phenology_metrics m
+        ON m.product = %(product)s::text
+        AND m.year = %(year)s::int
+        AND m.geom && ST_Expand(
+            ST_MakeEnvelope(
+                -180 + c.cell_col * %(cell_deg)s::float8,
+                -90 + c.cell_row * %(cell_deg)s::float8,
+                -180 + (c.cell_col + 1) * %(cell_deg)s::float8,
+                -90 + (c.cell_row + 1) * %(cell_deg)s::float8,
+                4326
+            ),
+            1e-9
+        )
+        AND floor((m.lat + 90) / %(cell_deg)s::float8)::int = c.cell_row
+        AND floor((m.lon + 180) / %(cell_deg)s::float8)::int = c.cell_col
+    CROSS JOIN (VALUES (false), (true)) AS v(only_forest)
+    WHERE NOT v.only_forest OR m.is_forest
+"""
+)
+
+# Same validation as GET_AREA_STATS. Cells fully covered by the polygon contribute their
+# summary row; for cells only intersecting it, raw rows of that cell are tested with
+# ST_Covers. `summarized` is false when no summaries exist for this (product, year,
+# layout), in which case the caller falls back to GET_AREA_STATS. The season_length
+# histogram is returned sparse (bin index -> count) for the median estimate.
+GET_AREA_STATS_SUMMARIZED = """
+WITH poly AS (
+    SELECT ST_SetSRID(ST_GeomFromGeoJSON(%(poly)s), 4326) AS g
+),
+flags AS (
+    SELECT
+        g,
+        (g IS NOT NULL) AS not_null,
+        (g IS NOT NULL AND NOT ST_IsEmpty(g)) AS not_empty,
+        (g IS NOT NULL AND ST_IsValid(g)) AS is_valid,
+        (g IS NOT NULL AND NOT ST_IsEmpty(g) AND ST_IsValid(g)) AS ok
+    FROM poly
+),
+summary AS (
+    SELECT *
+    FROM phenology_area_summaries
+    WHERE product = %(product)s::text
+        AND year = %(year)s::int
+        AND only_forest = %(only_forest)s::boolean
+        AND cell_deg = %(cell_deg)s::float8
+        AND bin_days = %(bin_days)s::int
+),
+touched AS (
+    SELECT s.*, ST_Covers(f.g, s.cell) AS covered
+    FROM flags f
+    JOIN summary s
+        ON f.ok
+        AND ST_Intersects(f.g, s.cell)
+),
+boundary AS (
+    SELECT m.season_length, m.is_forest
+    FROM flags f
+    JOIN touched t
+        ON NOT t.covered
+    JOIN phenology_metrics m
+        ON m.product = %(product)s::text
+        AND m.year = %(year)s::int
+        -- widened like in BUILD_AREA_SUMMARY_CELLS: points on a cell edge can lie just
+        -- outside the rebuilt envelope of the cell floor() assigns them to
+        AND m.geom && ST_Expand(t.cell, 1e-9)
+        AND floor((m.lat + 90) / t.cell_deg)::int = t.cell_row
+        AND floor((m.lon + 180) / t.cell_deg)::int = t.cell_col
+        AND ST_Covers(f.g, m.geom)
+        AND (%(only_forest)s::boolean = false OR m.is_forest = true)
+),
+parts AS (
+    SELECT n, n_forest, n_season, season_length_sum
+    FROM touched
+    WHERE covered
+    UNION ALL
+    SELECT
+        1,
+        CASE WHEN is_forest THEN 1 ELSE 0 END,
+        CASE WHEN season_length IS NULL THEN 0 ELSE 1 END,
+        coalesce(season_length, 0)
+    FROM boundary
+),
+bins AS (
+    SELECT (b.idx - 1)::int AS bin, b.cnt::bigint AS cnt
+    FROM touched t
+    CROSS JOIN unnest(t.season_length_hist) WITH ORDINALITY AS b(cnt, idx)
+    WHERE t.covered AND b.cnt > 0
+    UNION ALL
+    SELECT
+        least(greatest(season_length, 0) / %(bin_days)s::int, %(n_bins)s::int - 1),
+        1
+    FROM boundary
+    WHERE season_length IS NOT NULL
+),
+hist AS (
+    SELECT bin, sum(cnt)::bigint AS cnt
+    FROM bins
+    GROUP BY bin
+)
+SELECT
+    f.ok AS ok,
+    EXISTS (SELECT 1 FROM summary) AS summarized,
+    coalesce((SELECT sum(n) FROM parts), 0)::bigint AS n,
+    coalesce((SELECT sum(n_forest) FROM parts), 0)::bigint AS n_forest,
+    coalesce((SELECT sum(n_season) FROM parts), 0)::bigint AS n_season,
+    coalesce((SELECT sum(season_length_sum) FROM parts), 0)::bigint AS season_length_sum,
+    (SELECT array_agg(bin ORDER BY bin) FROM hist) AS hist_bins,
+    (SELECT array_agg(cnt ORDER BY bin) FROM hist) AS hist_counts
+FROM flags f
+"""
+
+# Streaming export (PostGISPhenologyRepository.iter_metrics), read through a named
+# server-side cursor. Without a bbox the caller passes the whole-world envelope.
+EXPORT_METRICS = """
+SELECT year, lat, lon, sos_date, eos_date, season_length, is_forest
+FROM phenology_metrics
+WHERE product = %(product)s::text
+    AND year = %(year)s::int
+    AND geom && ST_MakeEnvelope(
+        %(min_lon)s::float8, %(min_lat)s::float8, %(max_lon)s::float8, %(max_lat)s::float8, 4326
+    )
+ORDER BY cell_id
+"""
@@ -0,0 +1,173 @@
+# SQL of the embedded single-file backend (fpts.storage.sqlite_phenology_repository).
+# Named :params (sqlite3 style). Dates are ISO-8601 TEXT, is_forest is 0/1.
+
+# Schema, applied with executescript on open (idempotent). The R*Tree holds one
+# degenerate box per row (rowid = phenology_metrics.id) and is kept in sync by
+# triggers, so writers only touch phenology_metrics. product/year are R*Tree auxiliary
+# columns: not indexed, but filtered during the R*Tree scan before the join.
+CREATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS phenology_metrics (
+    id INTEGER PRIMARY KEY,
+    product TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    -- snapped pixel key (fpts.domain.grid.PixelGrid.cell_id) used for point lookups
+    cell_id INTEGER NOT NULL,
+    lon REAL NOT NULL,
+    lat REAL NOT NULL,
+    sos_date TEXT,
+    eos_date TEXT,
+    season_length INTEGER,
+    is_forest INTEGER NOT NULL,
+    UNIQUE (product, cell_id, year)
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS phenology_metrics_rtree USING rtree(
+    id, min_lon, max_lon, min_lat, max_lat, +product TEXT, +year INTEGER
+);
+
+CREATE TRIGGER IF NOT EXISTS phenology_metrics_rtree_insert
+AFTER INSERT ON phenology_metrics
+BEGIN
+    INSERT INTO phenology_metrics_rtree
+    VALUES (new.id, new.lon, new.lon, new.lat, new.lat, new.product, new.year);
+END;
+
+CREATE TRIGGER IF NOT EXISTS phenology_metrics_rtree_update
+AFTER UPDATE OF lon, lat ON phenology_metrics
+BEGIN
+    UPDATE phenology_metrics_rtree
+    SET min_lon = new.lon, max_lon = new.lon, min_lat = new.lat, max_lat = new.lat
+    WHERE id = new.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS phenology_metrics_rtree_delete
+AFTER DELETE ON phenology_metrics
+BEGIN
+    DELETE FROM phenology_metrics_rtree WHERE id = old.id;
+END;
+"""
+
+UPSERT_METRIC = """
+INSERT INTO phenology_metrics (
+    product, year, cell_id, lon, lat, sos_date, eos_date, season_length, is_forest
+)
+VALUES (
+    :product, :year, :cell_id, :lon, :lat, :sos_date, :eos_date, :season_length, :is_forest
+)
+ON CONFLICT (product, cell_id, year)
+DO UPDATE SET
+    lon = excluded.lon,
+    lat = excluded.lat,
+    sos_date = excluded.sos_date,
+    eos_date = excluded.eos_date,
+    season_length = excluded.season_length,
+    is_forest = excluded.is_forest
+"""
+
+DELETE_YEAR = """
+DELETE FROM phenology_metrics WHERE product = :product AND year = :year
+"""
+
+# Point lookup: equality probe on the (product, cell_id, year) unique index.
+GET_METRIC_FOR_LOCATION = """
+SELECT year, lat, lon, sos_date, eos_date, season_length, is_forest
+FROM phenology_metrics
+WHERE product = :product AND cell_id = :cell_id AND year = :year
+"""
+
+# Batch point lookup: one probe per element of the :cell_ids JSON array; idx is the
+# 0-based position in the request.
+GET_METRICS_FOR_LOCATIONS = """
+SELECT
+    q.key AS idx,
+    m.year, m.lat, m.lon, m.sos_date, m.eos_date, m.season_length, m.is_forest
+FROM json_each(:cell_ids) AS q
+JOIN phenology_metrics AS m
+    ON m.product = :product AND m.cell_id = q.value AND m.year = :year
+"""
+
+GET_TIMESERIES_FOR_LOCATION = """
+SELECT year, lat, lon, sos_date, eos_date, season_length, is_forest
+FROM phenology_metrics
+WHERE product = :product AND cell_id = :cell_id AND year BETWEEN :start_year AND :end_year
+ORDER BY year
+"""
+
+# Nearest pixel within :tolerance_deg (planar degrees, like ST_DWithin on 4326).
+# R*Tree boxes are stored as float32 rounded outwards, so the window test is an
+# overlap test (never misses a row) and the exact distance check runs on the table.
+GET_NEAREST_METRIC_FOR_LOCATION = """
+SELECT m.year, m.lat, m.lon, m.sos_date, m.eos_date, m.season_length, m.is_forest
+FROM phenology_metrics_rtree AS r
+JOIN phenology_metrics AS m ON m.id = r.id
+WHERE
+    r.max_lon >= :lon - :tolerance_deg AND r.min_lon <= :lon + :tolerance_deg
+    AND r.max_lat >= :lat - :tolerance_deg AND r.min_lat <= :lat + :tolerance_deg
+    AND r.product = :product
+    AND r.year = :year
+    AND (m.lon - :lon) * (m.lon - :lon) + (m.lat - :lat) * (m.lat - :lat)
+        <= :tolerance_deg * :tolerance_deg
+ORDER BY (m.lon - :lon) * (m.lon - :lon) + (m.lat - :lat) * (m.lat - :lat)
+LIMIT 1
+"""
+
+GET_NEAREST_TIMESERIES_FOR_LOCATION = """
+WITH nearest AS (
+    SELECT m.cell_id
+    FROM phenology_metrics_rtree AS r
+    JOIN phenology_metrics AS m ON m.id = r.id
+    WHERE
+        r.max_lon >= :lon - :tolerance_deg AND r.min_lon <= :lon + :tolerance_deg
+        AND r.max_lat >= :lat - :tolerance_deg AND r.min_lat <= :lat + :tolerance_deg
+        AND r.product = :product
+        AND r.year BETWEEN :start_year AND :end_year
+        AND (m.lon - :lon) * (m.lon - :lon) + (m.lat - :lat) * (m.lat - :lat)
+            <= :tolerance_deg * :tolerance_deg
+    ORDER BY (m.lon - :lon) * (m.lon - :lon) + (m.lat - :lat) * (m.lat - :lat)
+    LIMIT 1
+)
+SELECT m.year, m.lat, m.lon, m.sos_date, m.eos_date, m.season_length, m.is_forest
+FROM nearest
+JOIN phenology_metrics AS m
+    ON m.product = :product
+    AND m.cell_id = nearest.cell_id
+    AND m.year BETWEEN :start_year AND :end_year
+ORDER BY m.year
+"""
+
+# Area stats candidates: rows whose point falls in the polygon's bbox (R*Tree window),
+# after the only_forest / min_season_length filters. The point-in-polygon test and the
+# aggregation run client-side on these rows.
+GET_AREA_CANDIDATES = """
+SELECT m.year, m.lon, m.lat, m.season_length, m.is_forest
+FROM phenology_metrics_rtree AS r
+JOIN phenology_metrics AS m ON m.id = r.id
+WHERE
+    r.max_lon >= :min_lon AND r.min_lon <= :max_lon
+    AND r.max_lat >= :min_lat AND r.min_lat <= :max_lat
+    AND r.product = :product
+    AND r.year BETWEEN :start_year AND :end_year
+    AND (:only_forest = 0 OR m.is_forest = 1)
+    AND (:min_season_length IS NULL OR m.season_length >= :min_season_length)
+"""
+
+EXPORT_METRICS = """
+SELECT year, lat, lon, sos_date, eos_date, season_length, is_forest
+FROM phenology_metrics
+WHERE product = :product AND year = :year
+ORDER BY cell_id
+"""
+
+EXPORT_METRICS_IN_BBOX = """
+SELECT m.year, m.lat, m.lon, m.sos_date, m.eos_date, m.season_length, m.is_forest
+FROM phenology_metrics_rtree AS r
+JOIN phenology_metrics AS m ON m.id = r.id
+WHERE
+    r.max_lon >= :min_lon AND r.min_lon <= :max_lon
+    AND r.max_lat >= :min_lat AND r.min_lat <= :max_lat
+    AND r.product = :product
+    AND r.year = :year
+    AND m.lon BETWEEN :min_lon AND :max_lon
+    AND m.lat BETWEEN :min_lat AND :max_lat
+ORDER BY m.cell_id
+"""
@@ -0,0 +1,397 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from fpts.domain.errors import InvalidGeometryError
+from fpts.domain.models import PhenologyMetric
+from fpts.storage.in_memory_repository import InMemoryPhenologyRepository
+
+
+@dataclass(frozen=True)
+class YearColumns:
+    """
+    One (product, year) as columns, rows sorted by `key` (the uniform grid cell:
+    lat_bin * n_lon_bins + lon_bin). Missing dates are NaT, a missing season_length
+    is NaN.
+    """
+
+    key: np.ndarray  # int64
+    lat: np.ndarray  # float64
+    lon: np.ndarray  # float64
+    sos: np.ndarray  # datetime64[D]
+    eos: np.ndarray  # datetime64[D]
+    season_length: np.ndarray  # float64
+    is_forest: np.ndarray  # bool
+
+    @classmethod
+    def from_metrics(cls, metrics: Sequence[PhenologyMetric], cell_deg: float) -> YearColumns:
+        lat = np.fromiter((m.location.lat for m in metrics), dtype=np.float64, count=len(metrics))
+        lon = np.fromiter((m.location.lon for m in metrics), dtype=np.float64, count=len(metrics))
+        key = _cell_key(lat, lon, cell_deg)
+        order = np.argsort(key, kind="stable")
+        return cls(
+            key=key[order],
+            lat=lat[order],
+            lon=lon[order],
+            sos=np.array([m.sos_date or "NaT" for m in metrics], dtype="datetime64[D]")[order],
+            eos=np.array([m.eos_date or "NaT" for m in metrics], dtype="datetime64[D]")[order],
+            season_length=np.array(
+                [np.nan if m.season_length is None else m.season_length for m in metrics],
+                dtype=np.float64,
+            )[order],
+            is_forest=np.array([m.is_forest for m in metrics], dtype=bool)[order],
+        )
+
+    def rows_in_bbox(
+        self, min_lon: float, min_lat: float, max_lon: float, max_lat: float, cell_deg: float
+    ) -> np.ndarray:
+        """
+        Indexes of the rows inside the bbox (edges inclusive): the grid cells it spans
+        are contiguous key ranges per grid row, found with one searchsorted per bound.
+        """
+        n_lon = _n_lon_bins(cell_deg)
+        r0, c0 = _cell(min_lat, min_lon, cell_deg)
+        r1, c1 = _cell(max_lat, max_lon, cell_deg)
+        rows = np.arange(r0, r1 + 1, dtype=np.int64)
+        starts = np.searchsorted(self.key, rows * n_lon + c0, side="left")
+        ends = np.searchsorted(self.key, rows * n_lon + c1, side="right")
+        if not len(rows) or not (ends > starts).any():
+            return np.empty(0, dtype=np.int64)
+
+        idx = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends) if e > s])
+        lat, lon = self.lat[idx], self.lon[idx]
+        inside = (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        return idx[inside]
+
+
+def _n_lon_bins(cell_deg: float) -> int:
+    return math.ceil(360.0 / cell_deg) + 1
+
+
+def _cell(lat: float, lon: float, cell_deg: float) -> tuple[int, int]:
+    return math.floor((lat + 90.0) / cell_deg), math.floor((lon + 180.0) / cell_deg)
+
+
+def _cell_key(lat: np.ndarray, lon: np.ndarray, cell_deg: float) -> np.ndarray:
+    row = np.floor((lat + 90.0) / cell_deg).astype(np.int64)
+    col = np.floor((lon + 180.0) / cell_deg).astype(np.int64)
+    return row * _n_lon_bins(cell_deg) + col
+
+
+def _polygon_rings(geojson: dict) -> list[list[np.ndarray]]:
+    """
+    Polygon / MultiPolygon GeoJSON as polygons of closed (n, 2) lon/lat rings, exterior
+    first. Raises ValueError for anything that is not structurally a valid polygon.
+    """
+    geom_type = geojson.get("type") if isinstance(geojson, dict) else None
+    if geom_type == "Polygon":
+        polygons = [geojson.get("coordinates")]
+    elif geom_type == "MultiPolygon":
+        polygons = geojson.get("coordinates")
+    else:
+        raise ValueError("Invalid GeoJSON geometry")
+    if not isinstance(polygons, list) or not polygons:
+        raise ValueError("Invalid GeoJSON geometry")
+
+    out = []
+    for polygon in polygons:
+        if not isinstance(polygon, list) or not polygon:
+            raise ValueError("Invalid GeoJSON geometry")
+        rings = []
+        for ring in polygon:
+            try:
+                arr = np.asarray(ring, dtype=np.float64)
+            except (TypeError, ValueError):
+                raise ValueError("Invalid GeoJSON geometry") from None
+            if (
+                arr.ndim != 2
+                or arr.shape[0] < 4
+                or arr.shape[1] < 2
+                or not np.isfinite(arr).all()
+                or not np.array_equal(arr[0, :2], arr[-1, :2])
+            ):
+                raise ValueError("Invalid GeoJSON geometry")
+            rings.append(arr[:, :2])
+        out.append(rings)
+    return out
+
+
+def _ring_covers(ring: np.ndarray, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (strictly inside, on the boundary) of a closed ring for points x, y.
+
+    Even-odd ray casting with the points sorted by y: each edge only touches the points
+    in its y band (two searchsorted calls), and the crossing / on-segment tests run
+    vectorized over that band, so the cost is O(E log P + points in the bands) rather
+    than O(E * P).
+    """
+    order = np.argsort(y, kind="stable")
+    xs, ys = x[order], y[order]
+    inside = np.zeros(len(x), dtype=bool)
+    on_edge = np.zeros(len(x), dtype=bool)
+
+    for (x1, y1), (x2, y2) in zip(ring[:-1], ring[1:]):
+        lo_y, hi_y = min(y1, y2), max(y1, y2)
+        a = np.searchsorted(ys, lo_y, side="left")
+        b = np.searchsorted(ys, hi_y, side="left")
+        c = np.searchsorted(ys, hi_y, side="right")
+
+        # crossings: the edge spans py in [lo_y, hi_y) (never for horizontal edges)
+        if b > a:
+            px, py = xs[a:b], ys[a:b]
+            x_at = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+            inside[a:b] ^= px < x_at
+
+        # on the segment: collinear and within its x / y range
+        if c > a:
+            px, py = xs[a:c], ys[a:c]
+            cross = (x2 - x1) * (py - y1) - (y2 - y1) * (px - x1)
+            tol = 1e-12 * max(abs(x2 - x1), abs(y2 - y1), 1.0)
+            on_edge[a:c] |= (np.abs(cross) <= tol) & (px >= min(x1, x2)) & (px <= max(x1, x2))
+
+    out_inside = np.empty_like(inside)
+    out_on_edge = np.empty_like(on_edge)
+    out_inside[order] = inside & ~on_edge
+    out_on_edge[order] = on_edge
+    return out_inside, out_on_edge
+
+
+def _covers(polygons: list[list[np.ndarray]], x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    ST_Covers semantics: inside or on the boundary of any polygon, where points
+    strictly inside a hole are excluded (points on a hole's ring are covered).
+    """
+    covered = np.zeros(len(x), dtype=bool)
+    for rings in polygons:
+        inside, on_edge = _ring_covers(rings[0], x, y)
+        hit = inside | on_edge
+        for hole in rings[1:]:
+            hole_inside, _ = _ring_covers(hole, x, y)
+            hit &= ~hole_inside
+        covered |= hit
+    return covered
+
+
+def _stats_from_columns(
+    season_length: np.ndarray, is_forest: np.ndarray, season_length_stat: str
+) -> dict | None:
+    """
+    Area stats dict of the covered rows (NaN season_length = NULL), None if there are
+    none.
+    """
+    n = len(season_length)
+    if n == 0:
+        return None
+
+    lengths = season_length[~np.isnan(season_length)]
+    out = {"n": n, "forest_fraction": float(is_forest.mean())}
+    if season_length_stat in {"mean", "both"}:
+        out["mean_season_length"] = float(lengths.mean()) if len(lengths) else None
+    if season_length_stat in {"median", "both"}:
+        out["median_season_length"] = float(np.median(lengths)) if len(lengths) else None
+    return out
+
+
+class AreaStatsMixin:
+    """
+    get_area_stats / get_area_stats_many / get_area_stats_years for the repositories
+    that test polygons in NumPy (columnar, SQLite, raster): validates the arguments,
+    parses the GeoJSON into rings once and hands them to `_area_stats_by_year`.
+
+    Subclasses implement `_area_stats` (one year), or override `_area_stats_by_year`
+    when their storage can scan a range of years at once.
+    """
+
+    def get_area_stats(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> dict | None:
+        if season_length_stat not in {"mean", "median", "both"}:
+            raise ValueError("Invalid season_length_stat")
+        polygons = _polygon_rings(polygon_geojson)
+        by_year = self._area_stats_by_year(
+            product, year, year, polygons, only_forest, min_season_length, season_length_stat
+        )
+        return by_year.get(year)
+
+    def get_area_stats_many(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygons: Sequence[dict],
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict | None]:
+        if season_length_stat not in {"mean", "median", "both"}:
+            raise ValueError("Invalid season_length_stat")
+        parsed, invalid = [], []
+        for i, polygon in enumerate(polygons):
+            try:
+                parsed.append(_polygon_rings(polygon))
+            except ValueError:
+                invalid.append(i)
+        if invalid:
+            raise InvalidGeometryError(invalid)
+        return [
+            self._area_stats_by_year(
+                product, year, year, p, only_forest, min_season_length, season_length_stat
+            ).get(year)
+            for p in parsed
+        ]
+
+    def get_area_stats_years(
+        self,
+        *,
+        product: str,
+        start_year: int,
+        end_year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict]:
+        if season_length_stat not in {"mean", "median", "both"}:
+            raise ValueError("Invalid season_length_stat")
+        if end_year < start_year:
+            return []
+        polygons = _polygon_rings(polygon_geojson)
+        by_year = self._area_stats_by_year(
+            product,
+            start_year,
+            end_year,
+            polygons,
+            only_forest,
+            min_season_length,
+            season_length_stat,
+        )
+        return [{"year": year, **stats} for year, stats in sorted(by_year.items())]
+
+    def _area_stats_by_year(
+        self,
+        product: str,
+        start_year: int,
+        end_year: int,
+        polygons: list[list[np.ndarray]],
+        only_forest: bool,
+        min_season_length: int | None,
+        season_length_stat: str,
+    ) -> dict[int, dict]:
+        """
+        Stats per year in [start_year, end_year]; years without covered rows are left
+        out.
+        """
+        out = {}
+        for year in range(start_year, end_year + 1):
+            stats = self._area_stats(
+                product, year, polygons, only_forest, min_season_length, season_length_stat
+            )
+            if stats is not None:
+                out[year] = stats
+        return out
+
+    def _area_stats(
+        self,
+        product: str,
+        year: int,
+        polygons: list[list[np.ndarray]],
+        only_forest: bool,
+        min_season_length: int | None,
+        season_length_stat: str,
+    ) -> dict | None:
+        raise NotImplementedError
+
+
+class ColumnarPhenologyRepository(AreaStatsMixin, InMemoryPhenologyRepository):
+    """
+    InMemoryPhenologyRepository that can also answer area statistics, so dev and edge
+    deployments serve every endpoint without PostGIS.
+
+    Point, timeseries and export reads are the inherited ones. For area stats each
+    (product, year) is materialised as NumPy columns (YearColumns), rebuilt lazily on
+    the first area query after a write. A query picks the rows inside the polygon's
+    bbox through a uniform grid of `index_cell_deg` cells, then runs a vectorized
+    point-in-polygon test on those candidates only.
+
+    Results match the PostGIS repository (ST_Covers, boundary inclusive; exact
+    percentile_cont median) with one difference: geometries are validated structurally
+    (closed rings of >= 4 finite positions), self-intersections are not rejected.
+    """
+
+    def __init__(self, *, index_cell_deg: float = 0.1) -> None:
+        if not (index_cell_deg > 0):
+            raise ValueError(f"index_cell_deg must be > 0, got {index_cell_deg}")
+        super().__init__()
+        self._index_cell_deg = index_cell_deg
+        # (product, year) -> (lat, lon) -> metric, the source of the columns
+        self._by_year: dict[tuple[str, int], dict[tuple[float, float], PhenologyMetric]] = {}
+        self._columns: dict[tuple[str, int], YearColumns] = {}
+
+    def add_metric(self, product: str, metric: PhenologyMetric) -> None:
+        with self._lock:
+            super().add_metric(product, metric)
+            self._track(product, [metric])
+
+    def add_metrics(self, product: str, metrics: Iterable[PhenologyMetric]) -> int:
+        metrics = list(metrics)
+        with self._lock:
+            n = super().add_metrics(product, metrics)
+            self._track(product, metrics)
+        return n
+
+    def _track(self, product: str, metrics: Sequence[PhenologyMetric]) -> None:
+        for m in metrics:
+            self._by_year.setdefault((product, m.year), {})[(m.location.lat, m.location.lon)] = m
+            self._columns.pop((product, m.year), None)
+
+    def year_columns(self, product: str, year: int) -> YearColumns | None:
+        key = (product, year)
+        with self._lock:
+            columns = self._columns.get(key)
+            if columns is None and key in self._by_year:
+                columns = YearColumns.from_metrics(
+                    list(self._by_year[key].values()), self._index_cell_deg
+                )
+                self._columns[key] = columns
+        return columns
+
+    def _area_stats(
+        self,
+        product: str,
+        year: int,
+        polygons: list[list[np.ndarray]],
+        only_forest: bool,
+        min_season_length: int | None,
+        season_length_stat: str,
+    ) -> dict | None:
+        columns = self.year_columns(product, year)
+        if columns is None:
+            return None
+
+        exteriors = np.concatenate([rings[0] for rings in polygons])
+        (min_lon, min_lat), (max_lon, max_lat) = exteriors.min(axis=0), exteriors.max(axis=0)
+        idx = columns.rows_in_bbox(min_lon, min_lat, max_lon, max_lat, self._index_cell_deg)
+
+        season_length = columns.season_length[idx]
+        is_forest = columns.is_forest[idx]
+        keep = np.ones(len(idx), dtype=bool)
+        if only_forest:
+            keep &= is_forest
+        if min_season_length is not None:
+            with np.errstate(invalid="ignore"):
+                keep &= season_length >= min_season_length
+        idx, season_length, is_forest = idx[keep], season_length[keep], is_forest[keep]
+
+        covered = _covers(polygons, columns.lon[idx], columns.lat[idx])
+        return _stats_from_columns(season_length[covered], is_forest[covered], season_length_stat)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from fpts.config.settings import Settings
+
+
+def create_pool(dsn: str, settings: Settings, *, name: str = "fpts") -> ConnectionPool:
+    """
+    Build a (closed) psycopg connection pool sized from Settings.
+
+    The pool is opened/closed by the API lifespan (fpts.api.wiring.lifespan) so no
+    connections are made at import/create_app time. Connections are health-checked
+    when handed out, so a restarted database does not surface as a failed request.
+    """
+    return ConnectionPool(
+        dsn,
+        name=name,
+        open=False,
+        min_size=settings.database_pool_min_size,
+        max_size=settings.database_pool_max_size,
+        timeout=settings.database_pool_timeout_s,
+        max_idle=settings.database_pool_max_idle_s,
+        max_lifetime=settings.database_pool_max_lifetime_s,
+        check=ConnectionPool.check_connection,
+        kwargs={
+            "row_factory": dict_row,
+            "connect_timeout": int(settings.database_connect_timeout_s),
+        },
+    )
+
+
+def create_async_pool(
+    dsn: str, settings: Settings, *, name: str = "fpts-async"
+) -> AsyncConnectionPool:
+    """
+    Async counterpart of create_pool for AsyncPostGISPhenologyRepository; also opened
+    and closed by the API lifespan.
+    """
+    return AsyncConnectionPool(
+        dsn,
+        name=name,
+        open=False,
+        min_size=settings.database_pool_min_size,
+        max_size=settings.database_pool_max_size,
+        timeout=settings.database_pool_timeout_s,
+        max_idle=settings.database_pool_max_idle_s,
+        max_lifetime=settings.database_pool_max_lifetime_s,
+        check=AsyncConnectionPool.check_connection,
+        kwargs={
+            "row_factory": dict_row,
+            "connect_timeout": int(settings.database_connect_timeout_s),
+        },
+    )
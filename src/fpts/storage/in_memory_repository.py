@@ -1,9 +1,14 @@
-from typing import Tuple
+import math
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Callable, Iterable, Iterator, Sequence, Tuple
 
-from fpts.domain.models import Location, PhenologyMetric
+from fpts.domain.models import BBox, Location, PhenologyMetric
 from fpts.storage.phenology_repository import PhenologyRepository
 
 Key = Tuple[str, float, float, int]  # (product, lat, lon, year)
+SeriesKey = Tuple[str, float, float]  # (product, lat, lon)
 
 
 class InMemoryPhenologyRepository(PhenologyRepository):
@@ -15,20 +20,100 @@ class InMemoryPhenologyRepository(PhenologyRepository):
     This is useful for:
     - Early wiring and tests
     - Unit tests where we don't want a real database
+
+    Besides the (product, lat, lon, year) store, a secondary index keeps each
+    location's metrics as year-sorted parallel lists, so timeseries lookups are a
+    bisect plus a slice (O(log n + k)) instead of a scan of every row.
+
+    Writes can come from another thread (the write-behind queue) while requests read,
+    so writes and the reads that iterate the store hold `_lock`; readers copy what
+    they iterate under it. Single-key lookups are plain dict reads and skip it.
     """
 
     def __init__(self) -> None:
         self._store: dict[Key, PhenologyMetric] = {}
+        # (product, lat, lon) -> (sorted years, metrics aligned with them)
+        self._series: dict[SeriesKey, tuple[list[int], list[PhenologyMetric]]] = {}
+        # reentrant: subclasses extend the writes under the same lock
+        self._lock = threading.RLock()
 
     def add_metric(self, product: str, metric: PhenologyMetric) -> None:
         key: Key = (product, metric.location.lat, metric.location.lon, metric.year)
-        self._store[key] = metric
+        with self._lock:
+            self._store[key] = metric
+
+            years, metrics = self._series.setdefault(key[:3], ([], []))
+            i = bisect_left(years, metric.year)
+            if i < len(years) and years[i] == metric.year:
+                metrics[i] = metric
+            else:
+                years.insert(i, metric.year)
+                metrics.insert(i, metric)
+
+    def add_metrics(self, product: str, metrics: Iterable[PhenologyMetric]) -> int:
+        """
+        Bulk add_metric: the year index of each touched location is rebuilt with one
+        sort instead of one sorted insert per row. Later duplicates of a (location,
+        year) replace earlier ones. Returns the number of metrics added.
+        """
+        metrics = list(metrics)
+        added: dict[SeriesKey, dict[int, PhenologyMetric]] = defaultdict(dict)
+        with self._lock:
+            for metric in metrics:
+                key: Key = (product, metric.location.lat, metric.location.lon, metric.year)
+                self._store[key] = metric
+                added[key[:3]][metric.year] = metric
+
+            for series_key, new in added.items():
+                years, old = self._series.get(series_key, ([], []))
+                by_year = {**dict(zip(years, old)), **new}
+                years = sorted(by_year)
+                self._series[series_key] = (years, [by_year[y] for y in years])
+        return len(metrics)
+
+    def upsert_many(self, *, product: str, metrics: Iterable[PhenologyMetric]) -> int:
+        """
+        add_metrics with the keyword signature of the database backends' bulk upsert.
+        """
+        return self.add_metrics(product, metrics)
 
     def get_metric_for_location(
-        self, product: str, location: Location, year: int
+        self,
+        product: str,
+        location: Location,
+        year: int,
+        nearest_tolerance_deg: float | None = None,
     ) -> PhenologyMetric | None:
         key: Key = (product, location.lat, location.lon, year)
-        return self._store.get(key)
+        metric = self._store.get(key)
+        if metric is None and nearest_tolerance_deg is not None:
+            metric = self._nearest(product, location, nearest_tolerance_deg, lambda y: y == year)
+        return metric
+
+    def _nearest(
+        self,
+        product: str,
+        location: Location,
+        tolerance_deg: float,
+        year_ok: Callable[[int], bool],
+    ) -> PhenologyMetric | None:
+        # Linear scan; fine for the dev/test backend.
+        with self._lock:
+            items = list(self._store.items())
+        best: PhenologyMetric | None = None
+        best_d = math.inf
+        for (p, lat, lon, year), metric in items:
+            if p != product or not year_ok(year):
+                continue
+            d = math.hypot(lat - location.lat, lon - location.lon)
+            if d <= tolerance_deg and d < best_d:
+                best, best_d = metric, d
+        return best
+
+    def get_metrics_for_locations(
+        self, *, product: str, year: int, locations: Sequence[Location]
+    ) -> list[PhenologyMetric | None]:
+        return [self._store.get((product, loc.lat, loc.lon, year)) for loc in locations]
 
     def get_timeseries_for_location(
         self,
@@ -37,22 +122,28 @@ class InMemoryPhenologyRepository(PhenologyRepository):
         location: Location,
         start_year: int,
         end_year: int,
+        nearest_tolerance_deg: float | None = None,
     ) -> list[PhenologyMetric]:
         if end_year < start_year:
             return []
 
-        items: list[tuple[int, PhenologyMetric]] = []
-        for (p, lat, lon, year), metric in self._store.items():
-            if (
-                p == product
-                and lat == location.lat
-                and lon == location.lon
-                and start_year <= year <= end_year
-            ):
-                items.append((year, metric))
+        with self._lock:
+            years, metrics = self._series.get((product, location.lat, location.lon), ([], []))
+            items = metrics[bisect_left(years, start_year) : bisect_right(years, end_year)]
+
+        if not items and nearest_tolerance_deg is not None:
+            nearest = self._nearest(
+                product, location, nearest_tolerance_deg, lambda y: start_year <= y <= end_year
+            )
+            if nearest is not None:
+                return self.get_timeseries_for_location(
+                    product=product,
+                    location=nearest.location,
+                    start_year=start_year,
+                    end_year=end_year,
+                )
 
-        items.sort(key=lambda t: t[0])
-        return [m for _, m in items]
+        return items
 
     def get_area_stats(
         self,
@@ -60,7 +151,52 @@ class InMemoryPhenologyRepository(PhenologyRepository):
         product: str,
         year: int,
         polygon_geojson: dict,
-        season_length_stat: str,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
     ) -> dict | None:
         # In-memory repo does not do spatial ops; keep it explicit.
-        raise NotImplementedError("Area stats require PostGIS backend")
+        raise NotImplementedError("Area stats require the postgis or columnar backend")
+
+    def get_area_stats_many(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygons: Sequence[dict],
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict | None]:
+        raise NotImplementedError("Area stats require the postgis or columnar backend")
+
+    def get_area_stats_years(
+        self,
+        *,
+        product: str,
+        start_year: int,
+        end_year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict]:
+        raise NotImplementedError("Area stats require the postgis or columnar backend")
+
+    def iter_metrics(
+        self,
+        *,
+        product: str,
+        year: int,
+        bbox: BBox | None = None,
+        chunk_size: int = 10_000,
+    ) -> Iterator[PhenologyMetric]:
+        with self._lock:
+            items = list(self._store.items())
+        selected = sorted(
+            (k, m)
+            for k, m in items
+            if k[0] == product and k[3] == year and (bbox is None or bbox.contains(m.location))
+        )
+        for _, metric in selected:
+            yield metric
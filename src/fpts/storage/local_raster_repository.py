@@ -11,6 +11,10 @@ class LocalRasterRepository(RasterRepository):
     Folder convention (v1):
       {data_dir}/raw/{product}/{year}.tif
 
+    NDVI stacks:
+      {data_dir}/raw/{product}/{year}/doy_{doy}.tif
+      {data_dir}/raw/{product}/{year}/{band}/doy_{doy}.tif  (companion bands)
+
     Example:
       data/raw/mcd12q2/2020.tif
     """
@@ -29,3 +33,9 @@ class LocalRasterRepository(RasterRepository):
         if not stack_dir.exists():
             return []
         return sorted(stack_dir.glob("doy_*.tif"))
+
+    def list_band_stack_paths(self, product: str, year: int, band: str) -> Sequence[Path]:
+        stack_dir = self._data_dir / "raw" / product / str(year) / band
+        if not stack_dir.exists():
+            return []
+        return sorted(stack_dir.glob("doy_*.tif"))
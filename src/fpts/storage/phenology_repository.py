@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Iterator, Optional, Sequence
 
-from fpts.domain.models import Location, PhenologyMetric
+from fpts.domain.models import BBox, Location, PhenologyMetric
 
 
 class PhenologyRepository(ABC):
@@ -18,11 +18,29 @@ class PhenologyRepository(ABC):
 
     @abstractmethod
     def get_metric_for_location(
-        self, *, product: str, location: Location, year: int
+        self,
+        *,
+        product: str,
+        location: Location,
+        year: int,
+        nearest_tolerance_deg: float | None = None,
     ) -> Optional[PhenologyMetric]:
         """
         Return phenology metrics for a single product, location and year,
         or None if no data is available.
+
+        If nearest_tolerance_deg is set and the location itself has no data, return the
+        nearest stored point within that distance (degrees) instead.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_metrics_for_locations(
+        self, *, product: str, year: int, locations: Sequence[Location]
+    ) -> list[PhenologyMetric | None]:
+        """
+        Return metrics for many locations of one product and year, aligned with
+        `locations` (None where no data is available).
         """
         raise NotImplementedError
 
@@ -34,10 +52,14 @@ class PhenologyRepository(ABC):
         location: Location,
         start_year: int,
         end_year: int,
+        nearest_tolerance_deg: float | None = None,
     ) -> list[PhenologyMetric]:
         """
         Return metrics for a single product and location across a year range (inclusive).
         Returns an empty list if no data is available.
+
+        nearest_tolerance_deg falls back to the nearest stored point as for
+        get_metric_for_location.
         """
         raise NotImplementedError
 
@@ -57,3 +79,132 @@ class PhenologyRepository(ABC):
         Returns None if no rows matched.
         """
         raise NotImplementedError
+
+    @abstractmethod
+    def get_area_stats_many(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygons: Sequence[dict],
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict | None]:
+        """
+        get_area_stats for many polygons of one product and year in a single query,
+        aligned with `polygons` (None where no rows matched). Raises
+        InvalidGeometryError if any polygon is invalid.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_area_stats_years(
+        self,
+        *,
+        product: str,
+        start_year: int,
+        end_year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict]:
+        """
+        get_area_stats for every year of an inclusive range in one pass over the
+        polygon: one stats dict (with its "year") per year that has matching rows,
+        sorted by year.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_metrics(
+        self,
+        *,
+        product: str,
+        year: int,
+        bbox: BBox | None = None,
+        chunk_size: int = 10_000,
+    ) -> Iterator[PhenologyMetric]:
+        """
+        Stream every stored metric of one product and year (optionally only inside
+        bbox, edges inclusive) without materialising the slice; chunk_size is the number
+        of rows fetched per round trip.
+        """
+        raise NotImplementedError
+
+
+class AsyncPhenologyRepository(ABC):
+    """
+    Async counterpart of PhenologyRepository's read methods, for async API handlers
+    (same arguments and semantics).
+    """
+
+    @abstractmethod
+    async def get_metric_for_location(
+        self,
+        *,
+        product: str,
+        location: Location,
+        year: int,
+        nearest_tolerance_deg: float | None = None,
+    ) -> Optional[PhenologyMetric]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_metrics_for_locations(
+        self, *, product: str, year: int, locations: Sequence[Location]
+    ) -> list[PhenologyMetric | None]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_timeseries_for_location(
+        self,
+        *,
+        product: str,
+        location: Location,
+        start_year: int,
+        end_year: int,
+        nearest_tolerance_deg: float | None = None,
+    ) -> list[PhenologyMetric]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_area_stats(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> dict | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_area_stats_many(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygons: Sequence[dict],
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict | None]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_area_stats_years(
+        self,
+        *,
+        product: str,
+        start_year: int,
+        end_year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict]:
+        raise NotImplementedError
@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Sequence
+
+import psycopg
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from fpts.domain.area_summary import SummaryLayout
+from fpts.domain.grid import ProductGrids
+from fpts.domain.models import Location, PhenologyMetric
+from fpts.sql.queries.phenology import (
+    GET_AREA_STATS_MANY,
+    GET_AREA_STATS_SUMMARIZED,
+    GET_AREA_STATS_YEARS,
+    GET_METRIC_FOR_LOCATION,
+    GET_METRICS_FOR_LOCATIONS,
+    GET_NEAREST_METRIC_FOR_LOCATION,
+    GET_NEAREST_TIMESERIES_FOR_LOCATION,
+    GET_TIMESERIES_FOR_LOCATION,
+)
+from fpts.storage.phenology_repository import AsyncPhenologyRepository
+from fpts.storage.postgis_phenology_repository import (
+    _area_stats_from_row,
+    _area_stats_many_from_rows,
+    _area_stats_many_params,
+    _area_stats_query,
+    _area_stats_years_from_rows,
+    _area_stats_years_params,
+    _metric_from_row,
+    _replica_connect_timeout,
+    _summarized_area_stats_params,
+    _summarized_area_stats_row,
+)
+from fpts.storage.read_replicas import ReadTarget, ReplicaSet
+
+
+class AsyncPostGISPhenologyRepository(AsyncPhenologyRepository):
+    """
+    Read side of PostGISPhenologyRepository on psycopg's AsyncConnection, so async API
+    handlers wait on the database without holding a threadpool worker.
+
+    Same SQL and constructor options as the sync repository (see there); writes and
+    batch maintenance stay on the sync repository.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        pool: AsyncConnectionPool | None = None,
+        connect_timeout_s: float = 5.0,
+        prepare: bool | None = None,
+        grids: ProductGrids | None = None,
+        subdivide_max_vertices: int | None = None,
+        summaries: SummaryLayout | None = None,
+        replicas: ReplicaSet[AsyncConnectionPool] | None = None,
+    ) -> None:
+        self._dsn = dsn
+        self._pool = pool
+        self._connect_timeout_s = connect_timeout_s
+        self._prepare = prepare
+        self._grids = grids or ProductGrids()
+        self._subdivide_max_vertices = subdivide_max_vertices
+        self._summaries = summaries
+        self._replicas = replicas
+
+    @asynccontextmanager
+    async def _connect(self) -> AsyncIterator[psycopg.AsyncConnection]:
+        # Commits on success / rolls back on error, like the sync repository.
+        if self._pool is not None:
+            async with self._pool.connection() as conn:
+                yield conn
+            return
+
+        async with await psycopg.AsyncConnection.connect(
+            self._dsn,
+            row_factory=dict_row,
+            connect_timeout=int(self._connect_timeout_s),
+        ) as conn:
+            yield conn
+
+    async def _connect_target(self, target: ReadTarget[AsyncConnectionPool]):
+        if target.pool is not None:
+            return target.pool.connection(timeout=self._replicas.acquire_timeout_s)
+        return await psycopg.AsyncConnection.connect(
+            target.dsn,
+            row_factory=dict_row,
+            connect_timeout=_replica_connect_timeout(self._replicas.acquire_timeout_s),
+        )
+
+    @asynccontextmanager
+    async def _connect_read(self) -> AsyncIterator[psycopg.AsyncConnection]:
+        # Replica routing as in the sync repository: first replica that connects, else
+        # the primary.
+        if self._replicas is not None:
+            for target in self._replicas.candidates():
+                async with AsyncExitStack() as stack:
+                    try:
+                        conn = await stack.enter_async_context(await self._connect_target(target))
+                    except psycopg.OperationalError:
+                        self._replicas.mark_down(target)
+                        continue
+                    yield conn
+                    return
+        async with self._connect() as conn:
+            yield conn
+
+    async def get_metric_for_location(
+        self,
+        *,
+        product: str,
+        location: Location,
+        year: int,
+        nearest_tolerance_deg: float | None = None,
+    ) -> PhenologyMetric | None:
+        async with self._connect_read() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    GET_METRIC_FOR_LOCATION,
+                    {
+                        "year": year,
+                        "product": product,
+                        "cell_id": self._grids.for_product(product).cell_id(location),
+                    },
+                    prepare=self._prepare,
+                )
+                row = await cur.fetchone()
+
+                if row is None and nearest_tolerance_deg is not None:
+                    await cur.execute(
+                        GET_NEAREST_METRIC_FOR_LOCATION,
+                        {
+                            "year": year,
+                            "product": product,
+                            "lon": location.lon,
+                            "lat": location.lat,
+                            "tolerance_deg": nearest_tolerance_deg,
+                        },
+                        prepare=self._prepare,
+                    )
+                    row = await cur.fetchone()
+
+        return None if row is None else _metric_from_row(row)
+
+    async def get_metrics_for_locations(
+        self,
+        *,
+        product: str,
+        year: int,
+        locations: Sequence[Location],
+    ) -> list[PhenologyMetric | None]:
+        out: list[PhenologyMetric | None] = [None] * len(locations)
+        if not locations:
+            return out
+
+        grid = self._grids.for_product(product)
+
+        async with self._connect_read() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    GET_METRICS_FOR_LOCATIONS,
+                    {
+                        "product": product,
+                        "year": year,
+                        "cell_ids": [grid.cell_id(loc) for loc in locations],
+                    },
+                    prepare=self._prepare,
+                )
+                rows = await cur.fetchall() or []
+
+        for row in rows:
+            out[int(row["idx"]) - 1] = _metric_from_row(row)
+        return out
+
+    async def get_timeseries_for_location(
+        self,
+        *,
+        product: str,
+        location: Location,
+        start_year: int,
+        end_year: int,
+        nearest_tolerance_deg: float | None = None,
+    ) -> list[PhenologyMetric]:
+        if end_year < start_year:
+            return []
+
+        async with self._connect_read() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    GET_TIMESERIES_FOR_LOCATION,
+                    {
+                        "product": product,
+                        "cell_id": self._grids.for_product(product).cell_id(location),
+                        "start_year": start_year,
+                        "end_year": end_year,
+                    },
+                    prepare=self._prepare,
+                )
+                rows = await cur.fetchall() or []
+
+                if not rows and nearest_tolerance_deg is not None:
+                    await cur.execute(
+                        GET_NEAREST_TIMESERIES_FOR_LOCATION,
+                        {
+                            "product": product,
+                            "lon": location.lon,
+                            "lat": location.lat,
+                            "tolerance_deg": nearest_tolerance_deg,
+                            "start_year": start_year,
+                            "end_year": end_year,
+                        },
+                        prepare=self._prepare,
+                    )
+                    rows = await cur.fetchall() or []
+
+        return [_metric_from_row(row) for row in rows]
+
+    async def get_area_stats(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> dict | None:
+        if season_length_stat not in {"mean", "median", "both"}:
+            raise ValueError("Invalid season_length_stat")
+
+        async with self._connect_read() as conn:
+            async with conn.cursor() as cur:
+                row = None
+                if self._summaries is not None and min_season_length is None:
+                    await cur.execute(
+                        GET_AREA_STATS_SUMMARIZED,
+                        _summarized_area_stats_params(
+                            polygon_geojson,
+                            product=product,
+                            year=year,
+                            only_forest=only_forest,
+                            layout=self._summaries,
+                        ),
+                    )
+                    row = _summarized_area_stats_row(await cur.fetchone(), self._summaries)
+                if row is None:
+                    sql, params = _area_stats_query(
+                        polygon_geojson,
+                        product=product,
+                        year=year,
+                        only_forest=only_forest,
+                        min_season_length=min_season_length,
+                        subdivide_max_vertices=self._subdivide_max_vertices,
+                    )
+                    await cur.execute(sql, params)
+                    row = await cur.fetchone()
+
+        return _area_stats_from_row(row, season_length_stat)
+
+    async def get_area_stats_many(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygons: Sequence[dict],
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict | None]:
+        if season_length_stat not in {"mean", "median", "both"}:
+            raise ValueError("Invalid season_length_stat")
+        if not polygons:
+            return []
+
+        async with self._connect_read() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    GET_AREA_STATS_MANY,
+                    _area_stats_many_params(
+                        polygons,
+                        product=product,
+                        year=year,
+                        only_forest=only_forest,
+                        min_season_length=min_season_length,
+                        subdivide_max_vertices=self._subdivide_max_vertices,
+                    ),
+                )
+                rows = await cur.fetchall() or []
+
+        return _area_stats_many_from_rows(rows, season_length_stat)
+
+    async def get_area_stats_years(
+        self,
+        *,
+        product: str,
+        start_year: int,
+        end_year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict]:
+        if season_length_stat not in {"mean", "median", "both"}:
+            raise ValueError("Invalid season_length_stat")
+        if end_year < start_year:
+            return []
+
+        async with self._connect_read() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    GET_AREA_STATS_YEARS,
+                    _area_stats_years_params(
+                        polygon_geojson,
+                        product=product,
+                        start_year=start_year,
+                        end_year=end_year,
+                        only_forest=only_forest,
+                        min_season_length=min_season_length,
+                        subdivide_max_vertices=self._subdivide_max_vertices,
+                    ),
+                )
+                rows = await cur.fetchall() or []
+
+        return _area_stats_years_from_rows(rows, season_length_stat)
@@ -1,33 +1,384 @@
 from __future__ import annotations
 
-from typing import Iterable
+import json
+import math
+import secrets
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Iterable, Iterator, Sequence
 
 import psycopg
+from psycopg import sql as pgsql
 from psycopg.rows import dict_row
 from psycopg.types.json import Json
+from psycopg_pool import ConnectionPool
 
-from fpts.domain.models import Location, PhenologyMetric
+from fpts.domain.area_summary import SummaryLayout
+from fpts.domain.errors import InvalidGeometryError
+from fpts.domain.grid import ProductGrids
+from fpts.domain.models import BBox, Location, PhenologyMetric
 from fpts.sql.queries.phenology import (
+    AREA_SUMMARY_CELLS_OF_ROWS,
+    BUILD_AREA_SUMMARIES,
+    BUILD_AREA_SUMMARY_CELLS,
+    CLUSTER_FILL_STAGE,
+    CLUSTER_REPLACE_ROWS,
+    COUNT_PRODUCT_YEAR,
+    CREATE_GEOM_BRIN_INDEX,
+    DELETE_AREA_SUMMARIES,
+    DELETE_AREA_SUMMARY_CELLS,
+    ENSURE_PARTITION,
+    EXPORT_METRICS,
     GET_AREA_STATS,
+    GET_AREA_STATS_MANY,
+    GET_AREA_STATS_SUBDIVIDED,
+    GET_AREA_STATS_SUMMARIZED,
+    GET_AREA_STATS_YEARS,
     GET_METRIC_FOR_LOCATION,
+    GET_METRICS_FOR_LOCATIONS,
+    GET_NEAREST_METRIC_FOR_LOCATION,
+    GET_NEAREST_TIMESERIES_FOR_LOCATION,
     GET_TIMESERIES_FOR_LOCATION,
+    IS_PARTITIONED,
+    RELOAD_COPY_STAGE,
+    RELOAD_CREATE_STAGE,
+    RELOAD_CREATE_TEMP_STAGE,
+    RELOAD_INDEX_STAGE,
+    RELOAD_PARTITION_NAMES,
+    RELOAD_REPLACE_ROWS,
+    RELOAD_SWAP_PARTITION,
     UPSERT_MANY,
+    VACUUM_ANALYZE_METRICS,
 )
 from fpts.storage.phenology_repository import PhenologyRepository
+from fpts.storage.read_replicas import ReadTarget, ReplicaSet
+
+_WORLD = BBox(min_lon=-180.0, min_lat=-90.0, max_lon=180.0, max_lat=90.0)
+
+# ST_Subdivide rejects smaller limits
+_MIN_SUBDIVIDE_VERTICES = 5
+
+
+def _replica_connect_timeout(acquire_timeout_s: float) -> int:
+    # libpq's connect_timeout is in whole seconds, with a 2 s minimum
+    return max(2, math.ceil(acquire_timeout_s))
+
+
+def _vertex_count(geojson: dict) -> int:
+    """
+    Number of positions in a GeoJSON geometry (any type; 0 if it has no coordinates).
+    """
+
+    def count(coords) -> int:
+        if not isinstance(coords, (list, tuple)) or not coords:
+            return 0
+        if isinstance(coords[0], (int, float)):
+            return 1
+        return sum(count(c) for c in coords)
+
+    if geojson.get("type") == "GeometryCollection":
+        return sum(_vertex_count(g) for g in geojson.get("geometries") or [])
+    return count(geojson.get("coordinates"))
+
+
+def _metric_from_row(row) -> PhenologyMetric:
+    return PhenologyMetric(
+        year=int(row["year"]),
+        location=Location(lat=float(row["lat"]), lon=float(row["lon"])),
+        sos_date=row["sos_date"],
+        eos_date=row["eos_date"],
+        season_length=row["season_length"],
+        is_forest=row["is_forest"],
+    )
+
+
+def _area_stats_query(
+    polygon_geojson: dict,
+    *,
+    product: str,
+    year: int,
+    only_forest: bool,
+    min_season_length: int | None,
+    subdivide_max_vertices: int | None,
+) -> tuple[str, dict]:
+    """
+    Raw-rows area stats query and its parameters (subdivided for many-vertex polygons).
+    """
+    params = {
+        "product": product,
+        "year": year,
+        "poly": Json(polygon_geojson),
+        "only_forest": only_forest,
+        "min_season_length": min_season_length,
+    }
+    max_vertices = subdivide_max_vertices
+    if max_vertices is not None and _vertex_count(polygon_geojson) > max_vertices:
+        params["max_vertices"] = max_vertices
+        return GET_AREA_STATS_SUBDIVIDED, params
+    return GET_AREA_STATS, params
+
+
+def _summarized_area_stats_params(
+    polygon_geojson: dict,
+    *,
+    product: str,
+    year: int,
+    only_forest: bool,
+    layout: SummaryLayout,
+) -> dict:
+    return {
+        "product": product,
+        "year": year,
+        "poly": Json(polygon_geojson),
+        "only_forest": only_forest,
+        "cell_deg": layout.cell_deg,
+        "bin_days": layout.bin_days,
+        "n_bins": layout.n_bins,
+    }
+
+
+def _summarized_area_stats_row(row, layout: SummaryLayout) -> dict | None:
+    """
+    GET_AREA_STATS_SUMMARIZED result in the shape of the GET_AREA_STATS row; None if
+    the (product, year) has no summaries for the layout.
+    """
+    if row is None or row["ok"] is not True:
+        raise ValueError("Invalid GeoJSON geometry")
+    if not row["summarized"]:
+        return None
+
+    n, n_season = int(row["n"]), int(row["n_season"])
+    return {
+        "ok": True,
+        "n": n,
+        "forest_fraction": row["n_forest"] / n if n else None,
+        "mean_season_length": row["season_length_sum"] / n_season if n_season else None,
+        "median_season_length": layout.median(row["hist_bins"] or [], row["hist_counts"] or []),
+    }
+
+
+def _area_stats_from_row(row, season_length_stat: str) -> dict | None:
+    # row should always exist because flags yields 1 row
+    if row is None or row["ok"] is not True:
+        raise ValueError("Invalid GeoJSON geometry")
+
+    if row["n"] == 0:
+        return None
+
+    out = {
+        "n": int(row["n"]),
+        "forest_fraction": row["forest_fraction"],
+    }
+
+    if season_length_stat in {"mean", "both"}:
+        out["mean_season_length"] = row["mean_season_length"]
+    if season_length_stat in {"median", "both"}:
+        out["median_season_length"] = row["median_season_length"]
+
+    return out
+
+
+def _area_stats_many_params(
+    polygons: Sequence[dict],
+    *,
+    product: str,
+    year: int,
+    only_forest: bool,
+    min_season_length: int | None,
+    subdivide_max_vertices: int | None,
+) -> dict:
+    max_vertices = subdivide_max_vertices
+    return {
+        "product": product,
+        "year": year,
+        "polys": [json.dumps(p) for p in polygons],
+        "max_vertices": [
+            max_vertices if max_vertices is not None and _vertex_count(p) > max_vertices else None
+            for p in polygons
+        ],
+        "only_forest": only_forest,
+        "min_season_length": min_season_length,
+    }
+
+
+def _area_stats_many_from_rows(rows, season_length_stat: str) -> list[dict | None]:
+    """
+    GET_AREA_STATS_MANY rows (ordered by idx) as per-polygon stats; raises
+    InvalidGeometryError naming every invalid polygon.
+    """
+    invalid = [i for i, row in enumerate(rows) if row["ok"] is not True]
+    if invalid:
+        raise InvalidGeometryError(invalid)
+    return [_area_stats_from_row(row, season_length_stat) for row in rows]
+
+
+def _area_stats_years_params(
+    polygon_geojson: dict,
+    *,
+    product: str,
+    start_year: int,
+    end_year: int,
+    only_forest: bool,
+    min_season_length: int | None,
+    subdivide_max_vertices: int | None,
+) -> dict:
+    max_vertices = subdivide_max_vertices
+    if max_vertices is not None and _vertex_count(polygon_geojson) <= max_vertices:
+        max_vertices = None
+    return {
+        "product": product,
+        "start_year": start_year,
+        "end_year": end_year,
+        "poly": Json(polygon_geojson),
+        "only_forest": only_forest,
+        "min_season_length": min_season_length,
+        "max_vertices": max_vertices,
+    }
+
+
+def _area_stats_years_from_rows(rows, season_length_stat: str) -> list[dict]:
+    """
+    GET_AREA_STATS_YEARS rows as per-year stats (each with its "year"), years without
+    rows omitted.
+    """
+    if not rows or rows[0]["ok"] is not True:
+        raise ValueError("Invalid GeoJSON geometry")
+    out = []
+    for row in rows:
+        if row["year"] is None:
+            continue
+        stats = _area_stats_from_row(row, season_length_stat)
+        if stats is not None:
+            out.append({"year": int(row["year"]), **stats})
+    return out
 
 
 class PostGISPhenologyRepository(PhenologyRepository):
-    def __init__(self, dsn: str) -> None:
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        pool: ConnectionPool | None = None,
+        connect_timeout_s: float = 5.0,
+        prepare: bool | None = None,
+        grids: ProductGrids | None = None,
+        subdivide_max_vertices: int | None = None,
+        summaries: SummaryLayout | None = None,
+        replicas: ReplicaSet[ConnectionPool] | None = None,
+    ) -> None:
+        """
+        prepare controls server-side prepared statements for the point/timeseries lookups
+        (passed to psycopg's cursor.execute): True prepares on first use per connection,
+        False never prepares, None keeps psycopg's default (prepare after
+        `prepare_threshold` executions on the same connection). Preparing only pays off
+        with a pool, where connections and their prepared statements outlive a request.
+
+        grids maps each product to the pixel grid its rows are keyed on (cell_id); writes
+        and lookups snap coordinates with the same grid.
+
+        subdivide_max_vertices: area stats for polygons with more vertices than this run
+        against ST_Subdivide pieces of at most that many vertices (None: always test the
+        raw polygon).
+
+        summaries: layout of the pre-aggregated area summaries to answer area stats from
+        (see refresh_area_summaries); None always aggregates raw rows. Queries with
+        min_season_length, or for a (product, year) without summaries, use raw rows.
+
+        replicas: read replicas for the read methods (point, timeseries, area lookups and
+        iter_metrics); writes and batch maintenance always use dsn/pool (the primary).
+        Reads fall back to the primary while no replica accepts connections within the
+        set's acquire_timeout_s. Replica reads can lag the primary by the replication
+        delay.
+        """
+        if subdivide_max_vertices is not None and subdivide_max_vertices < _MIN_SUBDIVIDE_VERTICES:
+            raise ValueError(
+                f"subdivide_max_vertices must be >= {_MIN_SUBDIVIDE_VERTICES}, "
+                f"got {subdivide_max_vertices}"
+            )
         self._dsn = dsn
+        self._pool = pool
+        self._connect_timeout_s = connect_timeout_s
+        self._prepare = prepare
+        self._grids = grids or ProductGrids()
+        self._subdivide_max_vertices = subdivide_max_vertices
+        self._summaries = summaries
+        self._replicas = replicas
+        # Partitioned schema support: detected on first write
+        self._partitioned: bool | None = None
+        self._ensured_partitions: set[tuple[str, int]] = set()
 
     def _connect(self):
-        return psycopg.connect(self._dsn, row_factory=dict_row)
+        # Both context managers commit on success / roll back on error; the pooled one
+        # returns the connection to the pool instead of closing it.
+        if self._pool is not None:
+            return self._pool.connection()
+        return psycopg.connect(
+            self._dsn,
+            row_factory=dict_row,
+            connect_timeout=int(self._connect_timeout_s),
+        )
+
+    def _connect_target(self, target: ReadTarget[ConnectionPool]):
+        if target.pool is not None:
+            return target.pool.connection(timeout=self._replicas.acquire_timeout_s)
+        return psycopg.connect(
+            target.dsn,
+            row_factory=dict_row,
+            connect_timeout=_replica_connect_timeout(self._replicas.acquire_timeout_s),
+        )
+
+    @contextmanager
+    def _connect_read(self) -> Iterator[psycopg.Connection]:
+        # First replica that accepts a connection, else the primary. Only connect
+        # failures fall through (PoolTimeout is an OperationalError); errors raised by
+        # the query itself propagate as usual.
+        if self._replicas is not None:
+            for target in self._replicas.candidates():
+                with ExitStack() as stack:
+                    try:
+                        conn = stack.enter_context(self._connect_target(target))
+                    except psycopg.OperationalError:
+                        self._replicas.mark_down(target)
+                        continue
+                    yield conn
+                    return
+        with self._connect() as conn:
+            yield conn
 
     def upsert(self, *, product: str, metric: PhenologyMetric) -> None:
         self.upsert_many(product=product, metrics=[metric])
 
+    def is_partitioned(self) -> bool:
+        """
+        True if phenology_metrics uses the partitioned DDL (ddl/partitioned/).
+        """
+        if self._partitioned is None:
+            with self._connect() as conn:
+                row = conn.execute(IS_PARTITIONED).fetchone()
+            self._partitioned = bool(row and row["partitioned"])
+        return self._partitioned
+
+    def ensure_partitions(self, *, product: str, years: Iterable[int]) -> None:
+        """
+        Create missing (product, year) partitions when the table is partitioned; no-op
+        otherwise. Each runs in its own short transaction so the parent lock taken by
+        CREATE TABLE ... PARTITION OF is not held for the duration of a write batch.
+        """
+        if not self.is_partitioned():
+            return
+
+        for year in sorted(set(years)):
+            if (product, year) in self._ensured_partitions:
+                continue
+            with self._connect() as conn:
+                conn.execute(ENSURE_PARTITION, {"product": product, "year": year})
+            self._ensured_partitions.add((product, year))
+
     def upsert_many(self, *, product: str, metrics: Iterable[PhenologyMetric]) -> None:
         sql = UPSERT_MANY
+        grid = self._grids.for_product(product)
+
+        metrics = list(metrics)
+        self.ensure_partitions(product=product, years=(m.year for m in metrics))
 
         with self._connect() as conn:
             with conn.cursor() as cur:
@@ -37,6 +388,7 @@ class PostGISPhenologyRepository(PhenologyRepository):
                         {
                             "product": product,
                             "year": metric.year,
+                            "cell_id": grid.cell_id(metric.location),
                             "lon": metric.location.lon,
                             "lat": metric.location.lat,
                             "sos_date": metric.sos_date,
@@ -46,38 +398,252 @@ class PostGISPhenologyRepository(PhenologyRepository):
                         },
                     )
 
+    def replace_year(self, *, product: str, year: int, metrics: Iterable[PhenologyMetric]) -> int:
+        """
+        Replace every stored metric of (product, year) with `metrics`; returns rows loaded.
+
+        Rows are COPYed into a staging table first, so readers never see a half-loaded
+        year and never wait on row locks:
+        - partitioned schema: the staging table gets the leaf's constraints/indexes and
+          replaces the (product, year) partition via DETACH/ATTACH in one short
+          transaction (metadata-only, no bloat in the live table);
+        - unpartitioned schema: DELETE + INSERT ... SELECT in the loading transaction,
+          then VACUUM (ANALYZE) of the table to reclaim the deleted rows. The year's rows
+          stay locked against writers until the load commits, and the vacuum scans the
+          whole table; prefer the partitioned DDL (ddl/partitioned) for large reloads.
+        """
+        if self.is_partitioned():
+            return self._replace_year_partition(product=product, year=year, metrics=metrics)
+
+        stage = pgsql.Identifier(f"phenology_metrics_reload_{secrets.token_hex(4)}")
+        with self._connect() as conn:
+            conn.execute(pgsql.SQL(RELOAD_CREATE_TEMP_STAGE).format(stage=stage))
+            n = self._copy_into(conn, stage, product=product, year=year, metrics=metrics)
+            conn.execute(
+                pgsql.SQL(RELOAD_REPLACE_ROWS).format(
+                    stage=stage, product=pgsql.Literal(product), year=pgsql.Literal(year)
+                )
+            )
+        with self._connect() as conn:
+            conn.autocommit = True
+            try:
+                conn.execute(VACUUM_ANALYZE_METRICS)
+            finally:
+                conn.autocommit = False
+        return n
+
+    def _replace_year_partition(
+        self, *, product: str, year: int, metrics: Iterable[PhenologyMetric]
+    ) -> int:
+        return self._swap_year_partition(
+            product=product,
+            year=year,
+            fill=lambda conn, stage, _live: self._copy_into(
+                conn, stage, product=product, year=year, metrics=metrics
+            ),
+        )
+
+    def cluster_year(self, *, product: str, year: int) -> int:
+        """
+        Physically order stored rows by the geohash of geom so spatially close points
+        share heap pages (area queries then read far fewer pages); returns rows written.
+
+        - partitioned schema: the (product, year) leaf is rewritten in geohash order
+          into a staging table and swapped in like replace_year (readers not blocked;
+          run it while nothing writes to that year).
+        - unpartitioned schema: only the (product, year) rows are deleted and
+          re-inserted in geohash order, in one transaction (readers keep seeing the old
+          rows until commit; the deleted tuples are left for vacuum). New rows go to the
+          table's free space, so the order is as good as the space they land in.
+        """
+        if not self.is_partitioned():
+            stage = pgsql.Identifier(f"phenology_metrics_cluster_{secrets.token_hex(4)}")
+            with self._connect() as conn:
+                conn.execute(
+                    pgsql.SQL(CLUSTER_REPLACE_ROWS).format(
+                        stage=stage, product=pgsql.Literal(product), year=pgsql.Literal(year)
+                    )
+                )
+                row = conn.execute(
+                    COUNT_PRODUCT_YEAR, {"product": product, "year": year}
+                ).fetchone()
+            return int(row["n"])
+
+        def _fill(conn, stage: pgsql.Identifier, live: pgsql.Identifier) -> int:
+            cur = conn.execute(pgsql.SQL(CLUSTER_FILL_STAGE).format(stage=stage, source=live))
+            return cur.rowcount
+
+        return self._swap_year_partition(product=product, year=year, fill=_fill)
+
+    def ensure_brin_index(self, *, pages_per_range: int = 32) -> None:
+        """
+        Create the optional BRIN index on geom (cheap to store and maintain; effective
+        only once rows are clustered, see cluster_year).
+        """
+        with self._connect() as conn:
+            conn.execute(
+                pgsql.SQL(CREATE_GEOM_BRIN_INDEX).format(
+                    pages_per_range=pgsql.Literal(pages_per_range)
+                )
+            )
+
+    def _partition_names(self, *, product: str, year: int) -> dict:
+        self.ensure_partitions(product=product, years=[year])
+        with self._connect() as conn:
+            return conn.execute(
+                RELOAD_PARTITION_NAMES, {"product": product, "year": year}
+            ).fetchone()
+
+    def _swap_year_partition(
+        self,
+        *,
+        product: str,
+        year: int,
+        fill: Callable[[psycopg.Connection, pgsql.Identifier, pgsql.Identifier], int],
+    ) -> int:
+        """
+        Build a staging table with fill(conn, stage, live_leaf) and swap it in for the
+        (product, year) leaf.
+        """
+        names = self._partition_names(product=product, year=year)
+
+        schema = names["schema"]
+        live = pgsql.Identifier(schema, names["year_partition"])
+        stage_name = f"phenology_metrics_reload_{secrets.token_hex(4)}"
+        stage = pgsql.Identifier(schema, stage_name)
+        literals = {"product": pgsql.Literal(product), "year": pgsql.Literal(year)}
+
+        try:
+            # Build: load and index the staging table (its own transaction).
+            with self._connect() as conn:
+                conn.execute(pgsql.SQL(RELOAD_CREATE_STAGE).format(stage=stage))
+                n = fill(conn, stage, live)
+                conn.execute(pgsql.SQL(RELOAD_INDEX_STAGE).format(stage=stage, **literals))
+
+            # Swap: detach + drop the live leaf, attach the staging table in its place.
+            with self._connect() as conn:
+                conn.execute(
+                    pgsql.SQL(RELOAD_SWAP_PARTITION).format(
+                        stage=stage,
+                        product_partition=pgsql.Identifier(schema, names["product_partition"]),
+                        year_partition=live,
+                        year_partition_name=pgsql.Identifier(names["year_partition"]),
+                        year=literals["year"],
+                    )
+                )
+        finally:
+            # No-op after a successful swap (the staging table was renamed).
+            with self._connect() as conn:
+                conn.execute(pgsql.SQL("DROP TABLE IF EXISTS {stage}").format(stage=stage))
+
+        return n
+
+    def _copy_into(
+        self,
+        conn,
+        stage: pgsql.Identifier,
+        *,
+        product: str,
+        year: int,
+        metrics: Iterable[PhenologyMetric],
+    ) -> int:
+        grid = self._grids.for_product(product)
+        n = 0
+        with conn.cursor() as cur:
+            with cur.copy(pgsql.SQL(RELOAD_COPY_STAGE).format(stage=stage)) as copy:
+                for metric in metrics:
+                    if metric.year != year:
+                        raise ValueError(f"Metric year {metric.year} does not match {year}")
+                    loc = metric.location
+                    copy.write_row(
+                        (
+                            product,
+                            year,
+                            grid.cell_id(loc),
+                            loc.lon,
+                            loc.lat,
+                            f"SRID=4326;POINT({loc.lon!r} {loc.lat!r})",
+                            metric.sos_date,
+                            metric.eos_date,
+                            metric.season_length,
+                            metric.is_forest,
+                        )
+                    )
+                    n += 1
+        return n
+
     def get_metric_for_location(
         self,
         *,
         product: str,
         location: Location,
         year: int,
+        nearest_tolerance_deg: float | None = None,
     ) -> PhenologyMetric | None:
         sql = GET_METRIC_FOR_LOCATION
 
-        with self._connect() as conn:
+        with self._connect_read() as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     sql,
                     {
                         "year": year,
                         "product": product,
-                        "lon": location.lon,
-                        "lat": location.lat,
+                        "cell_id": self._grids.for_product(product).cell_id(location),
                     },
+                    prepare=self._prepare,
                 )
                 row = cur.fetchone()
+
+                if row is None and nearest_tolerance_deg is not None:
+                    cur.execute(
+                        GET_NEAREST_METRIC_FOR_LOCATION,
+                        {
+                            "year": year,
+                            "product": product,
+                            "lon": location.lon,
+                            "lat": location.lat,
+                            "tolerance_deg": nearest_tolerance_deg,
+                        },
+                        prepare=self._prepare,
+                    )
+                    row = cur.fetchone()
+
                 if row is None:
                     return None
 
-                return PhenologyMetric(
-                    year=int(row["year"]),
-                    location=Location(lat=float(row["lat"]), lon=float(row["lon"])),
-                    sos_date=row["sos_date"],
-                    eos_date=row["eos_date"],
-                    season_length=row["season_length"],
-                    is_forest=row["is_forest"],
+                return _metric_from_row(row)
+
+    def get_metrics_for_locations(
+        self,
+        *,
+        product: str,
+        year: int,
+        locations: Sequence[Location],
+    ) -> list[PhenologyMetric | None]:
+        out: list[PhenologyMetric | None] = [None] * len(locations)
+        if not locations:
+            return out
+
+        sql = GET_METRICS_FOR_LOCATIONS
+        grid = self._grids.for_product(product)
+
+        with self._connect_read() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    sql,
+                    {
+                        "product": product,
+                        "year": year,
+                        "cell_ids": [grid.cell_id(loc) for loc in locations],
+                    },
+                    prepare=self._prepare,
                 )
+                rows = cur.fetchall() or []
+
+        for row in rows:
+            out[int(row["idx"]) - 1] = _metric_from_row(row)
+        return out
 
     def get_timeseries_for_location(
         self,
@@ -86,39 +652,43 @@ class PostGISPhenologyRepository(PhenologyRepository):
         location: Location,
         start_year: int,
         end_year: int,
+        nearest_tolerance_deg: float | None = None,
     ) -> list[PhenologyMetric]:
         if end_year < start_year:
             return []
 
         sql = GET_TIMESERIES_FOR_LOCATION
 
-        with self._connect() as conn:
+        with self._connect_read() as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     sql,
                     {
                         "product": product,
-                        "lat": location.lat,
-                        "lon": location.lon,
+                        "cell_id": self._grids.for_product(product).cell_id(location),
                         "start_year": start_year,
                         "end_year": end_year,
                     },
+                    prepare=self._prepare,
                 )
                 rows = cur.fetchall() or []
 
-        out: list[PhenologyMetric] = []
-        for row in rows:
-            out.append(
-                PhenologyMetric(
-                    year=int(row["year"]),
-                    location=Location(lat=float(row["lat"]), lon=float(row["lon"])),
-                    sos_date=row["sos_date"],
-                    eos_date=row["eos_date"],
-                    season_length=row["season_length"],
-                    is_forest=row["is_forest"],
-                )
-            )
-        return out
+                if not rows and nearest_tolerance_deg is not None:
+                    cur.execute(
+                        GET_NEAREST_TIMESERIES_FOR_LOCATION,
+                        {
+                            "product": product,
+                            "lon": location.lon,
+                            "lat": location.lat,
+                            "tolerance_deg": nearest_tolerance_deg,
+                            "start_year": start_year,
+                            "end_year": end_year,
+                        },
+                        prepare=self._prepare,
+                    )
+                    rows = cur.fetchall() or []
+
+        return [_metric_from_row(row) for row in rows]
 
     def get_area_stats(
         self,
@@ -133,37 +703,182 @@ class PostGISPhenologyRepository(PhenologyRepository):
         if season_length_stat not in {"mean", "median", "both"}:
             raise ValueError("Invalid season_length_stat")
 
-        sql = GET_AREA_STATS
+        with self._connect_read() as conn:
+            row = None
+            if self._summaries is not None and min_season_length is None:
+                # summary cells for the covered part, raw rows for boundary cells
+                row = _summarized_area_stats_row(
+                    conn.execute(
+                        GET_AREA_STATS_SUMMARIZED,
+                        _summarized_area_stats_params(
+                            polygon_geojson,
+                            product=product,
+                            year=year,
+                            only_forest=only_forest,
+                            layout=self._summaries,
+                        ),
+                    ).fetchone(),
+                    self._summaries,
+                )
+            if row is None:
+                sql, params = _area_stats_query(
+                    polygon_geojson,
+                    product=product,
+                    year=year,
+                    only_forest=only_forest,
+                    min_season_length=min_season_length,
+                    subdivide_max_vertices=self._subdivide_max_vertices,
+                )
+                with conn.cursor() as cur:
+                    cur.execute(sql, params)
+                    row = cur.fetchone()
 
-        with self._connect() as conn:
+        return _area_stats_from_row(row, season_length_stat)
+
+    def get_area_stats_many(
+        self,
+        *,
+        product: str,
+        year: int,
+        polygons: Sequence[dict],
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict | None]:
+        """
+        Always aggregates raw rows (exact medians), also when area summaries are
+        configured.
+        """
+        if season_length_stat not in {"mean", "median", "both"}:
+            raise ValueError("Invalid season_length_stat")
+        if not polygons:
+            return []
+
+        with self._connect_read() as conn:
             with conn.cursor() as cur:
                 cur.execute(
-                    sql,
+                    GET_AREA_STATS_MANY,
+                    _area_stats_many_params(
+                        polygons,
+                        product=product,
+                        year=year,
+                        only_forest=only_forest,
+                        min_season_length=min_season_length,
+                        subdivide_max_vertices=self._subdivide_max_vertices,
+                    ),
+                )
+                rows = cur.fetchall() or []
+
+        return _area_stats_many_from_rows(rows, season_length_stat)
+
+    def get_area_stats_years(
+        self,
+        *,
+        product: str,
+        start_year: int,
+        end_year: int,
+        polygon_geojson: dict,
+        only_forest: bool = False,
+        min_season_length: int | None = None,
+        season_length_stat: str = "mean",
+    ) -> list[dict]:
+        """
+        Always aggregates raw rows (exact medians), also when area summaries are
+        configured.
+        """
+        if season_length_stat not in {"mean", "median", "both"}:
+            raise ValueError("Invalid season_length_stat")
+        if end_year < start_year:
+            return []
+
+        with self._connect_read() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    GET_AREA_STATS_YEARS,
+                    _area_stats_years_params(
+                        polygon_geojson,
+                        product=product,
+                        start_year=start_year,
+                        end_year=end_year,
+                        only_forest=only_forest,
+                        min_season_length=min_season_length,
+                        subdivide_max_vertices=self._subdivide_max_vertices,
+                    ),
+                )
+                rows = cur.fetchall() or []
+
+        return _area_stats_years_from_rows(rows, season_length_stat)
+
+    def iter_metrics(
+        self,
+        *,
+        product: str,
+        year: int,
+        bbox: BBox | None = None,
+        chunk_size: int = 10_000,
+    ) -> Iterator[PhenologyMetric]:
+        """
+        Named (server-side) cursor: rows are fetched chunk_size at a time, so memory
+        stays flat however large the slice. The connection is held until the iterator
+        is exhausted or closed.
+        """
+        bbox = bbox or _WORLD
+        with self._connect_read() as conn:
+            with conn.cursor(name=f"fpts_export_{secrets.token_hex(4)}") as cur:
+                cur.itersize = chunk_size
+                cur.execute(
+                    EXPORT_METRICS,
                     {
                         "product": product,
                         "year": year,
-                        "poly": Json(polygon_geojson),
-                        "only_forest": only_forest,
-                        "min_season_length": min_season_length,
+                        "min_lon": bbox.min_lon,
+                        "min_lat": bbox.min_lat,
+                        "max_lon": bbox.max_lon,
+                        "max_lat": bbox.max_lat,
                     },
                 )
-                row = cur.fetchone()
-
-        # row should always exist because flags yields 1 row
-        if row is None or row["ok"] is not True:
-            raise ValueError("Invalid GeoJSON geometry")
+                for row in cur:
+                    yield _metric_from_row(row)
 
-        if row["n"] == 0:
-            return None
+    def refresh_area_summaries(
+        self, *, product: str, year: int, locations: Sequence[Location] | None = None
+    ) -> int:
+        """
+        Rebuild the pre-aggregated area summaries of one (product, year) from
+        phenology_metrics in a single transaction; returns the number of summary rows.
+        Run after every batch write of that year, summaries are not kept up to date
+        incrementally. With locations, only the summary cells holding the stored rows of
+        those pixels are rebuilt (an empty or unknown set rebuilds nothing).
+        """
+        if self._summaries is None:
+            raise ValueError("Area summaries are not configured (summaries=None)")
 
-        out = {
-            "n": int(row["n"]),
-            "forest_fraction": row["forest_fraction"],
+        layout = self._summaries
+        params = {
+            "product": product,
+            "year": year,
+            "cell_deg": layout.cell_deg,
+            "bin_days": layout.bin_days,
+            "n_bins": layout.n_bins,
         }
+        if locations is None:
+            with self._connect() as conn:
+                conn.execute(DELETE_AREA_SUMMARIES, params)
+                cur = conn.execute(BUILD_AREA_SUMMARIES, params)
+                return cur.rowcount
 
-        if season_length_stat in {"mean", "both"}:
-            out["mean_season_length"] = row["mean_season_length"]
-        if season_length_stat in {"median", "both"}:
-            out["median_season_length"] = row["median_season_length"]
-
-        return out
+        grid = self._grids.for_product(product)
+        cell_ids = sorted({grid.cell_id(location) for location in locations})
+        if not cell_ids:
+            return 0
+        with self._connect() as conn:
+            cells = conn.execute(
+                AREA_SUMMARY_CELLS_OF_ROWS, {**params, "cell_ids": cell_ids}
+            ).fetchall()
+            if not cells:
+                return 0
+            params["cell_rows"] = [row["cell_row"] for row in cells]
+            params["cell_cols"] = [row["cell_col"] for row in cells]
+            conn.execute(DELETE_AREA_SUMMARY_CELLS, params)
+            cur = conn.execute(BUILD_AREA_SUMMARY_CELLS, params)
+            return cur.rowcount
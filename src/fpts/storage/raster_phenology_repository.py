@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Sequence
+
+import numpy as np
+
+from fpts.domain.models import BBox, Location, PhenologyMetric
+from fpts.storage.columnar_repository import AreaStatsMixin, _covers, _stats_from_columns
+from fpts.storage.phenology_repository import PhenologyRepository
+
+# Band layout of a result cube, pixel-interleaved: cube[row, col] is one pixel's
+# (sos_doy, eos_doy, season_length, is_forest). int16 throughout; NODATA in is_forest
+# marks a pixel without a result, sos/eos DOY 0 and season_length -1 a missing value.
+BANDS = ("sos_doy", "eos_doy", "season_length", "is_forest")
+NODATA = -32768
+_SOS, _EOS, _LENGTH, _FOREST = range(len(BANDS))
+
+# Pixel centres are rounded to this many decimals, so lattice coordinates come back
+# as written (10.3, not 10.300000000000001) and boundary tests stay exact.
+_COORD_DECIMALS = 9
+
+# A reader that finds a grid file not written for the current data file (write_year
+# is between its two os.replace calls) retries this often, this far apart.
+_OPEN_ATTEMPTS = 50
+_OPEN_RETRY_S = 0.005
+
+
+@dataclass(frozen=True)
+class CubeGrid:
+    """
+    Regular lon/lat grid of pixel centres: column c is at min_lon + c * step_deg, row r
+    at min_lat + r * step_deg (rows run south to north, like the batch grid). A point
+    belongs to the pixel whose centre is nearest, i.e. pixels are step_deg squares.
+    """
+
+    min_lon: float
+    min_lat: float
+    step_deg: float
+    width: int
+    height: int
+
+    @classmethod
+    def from_bounds(
+        cls, min_lon: float, min_lat: float, max_lon: float, max_lat: float, step_deg: float
+    ) -> CubeGrid:
+        """
+        The grid whose centres are the batch grid's points (GridSpec / iter_grid).
+        """
+        if not (step_deg > 0):
+            raise ValueError(f"step_deg must be > 0, got {step_deg}")
+        return cls(
+            min_lon=min_lon,
+            min_lat=min_lat,
+            step_deg=step_deg,
+            width=math.floor((max_lon - min_lon) / step_deg + 1e-9) + 1,
+            height=math.floor((max_lat - min_lat) / step_deg + 1e-9) + 1,
+        )
+
+    def lons(self, cols: np.ndarray) -> np.ndarray:
+        return np.round(self.min_lon + cols * self.step_deg, _COORD_DECIMALS)
+
+    def lats(self, rows: np.ndarray) -> np.ndarray:
+        return np.round(self.min_lat + rows * self.step_deg, _COORD_DECIMALS)
+
+    def pixels(
+        self, lats: np.ndarray, lons: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (rows, cols, inside) of the pixels containing the points.
+        """
+        rows = np.rint((np.asarray(lats) - self.min_lat) / self.step_deg).astype(np.int64)
+        cols = np.rint((np.asarray(lons) - self.min_lon) / self.step_deg).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.height) & (cols >= 0) & (cols < self.width)
+        return rows, cols, inside
+
+    def window(
+        self, min_lon: float, min_lat: float, max_lon: float, max_lat: float
+    ) -> tuple[slice, slice]:
+        """
+        (rows, cols) slices of the pixels whose centre lies in the bbox (edges inclusive).
+        """
+
+        def span(lo: float, hi: float, origin: float, n: int) -> slice:
+            start = math.ceil((lo - origin) / self.step_deg - 1e-9)
+            stop = math.floor((hi - origin) / self.step_deg + 1e-9) + 1
+            return slice(min(max(start, 0), n), min(max(stop, 0), n))
+
+        return (
+            span(min_lat, max_lat, self.min_lat, self.height),
+            span(min_lon, max_lon, self.min_lon, self.width),
+        )
+
+
+class _Cube(NamedTuple):
+    grid: CubeGrid
+    data: np.ndarray  # read-only memmap, (height, width, len(BANDS)) int16
+    version: tuple[int, int]  # (st_ino, st_mtime_ns) of the data file
+
+
+def _doy(d: date | None, year: int) -> int:
+    return 0 if d is None else (d - date(year, 1, 1)).days + 1
+
+
+def _decode(year: int, values: list[int], lat: float, lon: float) -> PhenologyMetric | None:
+    sos, eos, length, forest = values
+    if forest == NODATA:
+        return None
+    jan1 = date(year, 1, 1)
+    return PhenologyMetric(
+        year=year,
+        location=Location(lat=lat, lon=lon),
+        sos_date=jan1 + timedelta(days=sos - 1) if sos > 0 else None,
+        eos_date=jan1 + timedelta(days=eos - 1) if eos > 0 else None,
+        season_length=None if length < 0 else length,
+        is_forest=bool(forest),
+    )
+
+
+class RasterPhenologyRepository(AreaStatsMixin, PhenologyRepository):
+    """
+    PhenologyRepository over precomputed per-(product, year) result cubes, written by
+    the batch pipeline instead of one database row per pixel.
+
+    Layout under `root`:
+      {root}/{product}/{year}.npy   (height, width, 4) int16 cube, see BANDS
+      {root}/{product}/{year}.json  its CubeGrid, stamped with the cube file's inode
+
+    Cubes are memory-mapped, so reads cost page-cache lookups rather than RAM, and a
+    cube is re-opened when its file changes (write_year replaces it atomically). The
+    inode stamp pairs a grid with the data it was written for, so a reader never
+    combines a new grid with the old data or the other way round.
+    Point and timeseries queries are pixel arithmetic: the pixel containing the point,
+    O(1) per year. Area stats reduce the window of pixels under the polygon's bbox,
+    masked by the columnar backend's point-in-polygon test on the pixel centres (same
+    semantics and geometry validation as ColumnarPhenologyRepository).
+
+    Unlike the row-based backends a point anywhere inside a pixel gets that pixel's
+    result; nearest_tolerance_deg only applies when that pixel has none.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self._root = Path(root)
+        self._cubes: dict[tuple[str, int], _Cube] = {}
+
+    def _paths(self, product: str, year: int) -> tuple[Path, Path]:
+        base = self._root / product / str(year)
+        return base.with_suffix(".npy"), base.with_suffix(".json")
+
+    def _cube(self, product: str, year: int) -> _Cube | None:
+        # os.stat on a plain string: pathlib joins cost more than the lookup itself
+        try:
+            stat = os.stat(f"{self._root}/{product}/{year}.npy")
+        except FileNotFoundError:
+            return None
+
+        # os.replace gives a rewritten cube a new inode
+        version = (stat.st_ino, stat.st_mtime_ns)
+        cube = self._cubes.get((product, year))
+        if cube is None or cube.version != version:
+            cube = self._open_cube(product, year)
+            if cube is not None:
+                self._cubes[(product, year)] = cube
+        return cube
+
+    def _open_cube(self, product: str, year: int) -> _Cube | None:
+        # The data file is replaced after the grid file, so either may be the newer one
+        # for a moment; the grid's stamp tells whether they belong together.
+        data_path, grid_path = self._paths(product, year)
+        for _ in range(_OPEN_ATTEMPTS):
+            try:
+                stat = os.stat(data_path)
+                grid = json.loads(grid_path.read_text())
+                # plain ndarray view: np.memmap indexing is several times slower
+                data = np.load(data_path, mmap_mode="r").view(np.ndarray)
+                loaded_ino = os.stat(data_path).st_ino
+            except FileNotFoundError:
+                return None
+            # grids written before the stamp are trusted if the shape fits
+            stamp = grid.pop("data_inode", stat.st_ino)
+            cube = _Cube(grid=CubeGrid(**grid), data=data, version=(stat.st_ino, stat.st_mtime_ns))
+            shape = (cube.grid.height, cube.grid.width, len(BANDS))
+            if stamp == stat.st_ino == loaded_ino and data.shape == shape:
+                return cube
+            time.sleep(_OPEN_RETRY_S)
+        raise RuntimeError(f"Grid file does not match the cube {data_path}")
+
+    def write_year(
+        self,
+        *,
+        product: str,
+        year: int,
+        grid: CubeGrid,
+        metrics: Iterable[PhenologyMetric],
+        chunk_size: int = 10_000,
+    ) -> int:
+        """
+        Write (replace) the cube of (product, year) from metrics on `grid`; returns the
+        number of pixels written. The cube is built in a memory-mapped temp file, so
+        memory stays flat, and swapped in with os.replace (grid file first, stamped with
+        the new data file's inode, which os.replace keeps). Raises ValueError for a
+        metric outside the grid.
+        """
+        data_path, grid_path = self._paths(product, year)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_data = data_path.with_suffix(".npy.partial")
+        tmp_grid = grid_path.with_suffix(".json.partial")
+
+        cube = np.lib.format.open_memmap(
+            tmp_data, mode="w+", dtype=np.int16, shape=(grid.height, grid.width, len(BANDS))
+        )
+        cube[:] = NODATA
+        it = iter(metrics)
+        n = 0
+        try:
+            while chunk := list(islice(it, chunk_size)):
+                rows, cols, inside = grid.pixels(
+                    [m.location.lat for m in chunk], [m.location.lon for m in chunk]
+                )
+                if not inside.all():
+                    outside = chunk[int(np.argmin(inside))]
+                    raise ValueError(f"Metric outside the cube grid: {outside.location}")
+                cube[rows, cols] = [
+                    (
+                        _doy(m.sos_date, year),
+                        _doy(m.eos_date, year),
+                        -1 if m.season_length is None else m.season_length,
+                        int(m.is_forest),
+                    )
+                    for m in chunk
+                ]
+                n += len(chunk)
+            cube.flush()
+        except BaseException:
+            del cube
+            tmp_data.unlink(missing_ok=True)
+            raise
+        del cube
+
+        tmp_grid.write_text(json.dumps({**asdict(grid), "data_inode": os.stat(tmp_data).st_ino}))
+        os.replace(tmp_grid, grid_path)
+        os.replace(tmp_data, data_path)
+        return n
+
+    def _metrics_at(
+        self, cube: _Cube, year: int, rows: np.ndarray, cols: np.ndarray
+    ) -> list[PhenologyMetric | None]:
+        values = cube.data[rows, cols].tolist()
+        lats = cube.grid.lats(rows).tolist()
+        lons = cube.grid.lons(cols).tolist()
+        return [_decode(year, v, lat, lon) for v, lat, lon in zip(values, lats, lons)]
+
+    def _metric_at(self, cube: _Cube, year: int, row: int, col: int) -> PhenologyMetric | None:
+        # scalar _metrics_at for single-point lookups
+        grid = cube.grid
+        return _decode(
+            year,
+            cube.data[row, col].tolist(),
+            round(grid.min_lat + row * grid.step_deg, _COORD_DECIMALS),
+            round(grid.min_lon + col * grid.step_deg, _COORD_DECIMALS),
+        )
+
+    def _pixel(self, cube: _Cube, location: Location) -> tuple[int, int] | None:
+        # scalar version of CubeGrid.pixels, this is the hot path of point lookups
+        grid = cube.grid
+        row = round((location.lat - grid.min_lat) / grid.step_deg)
+        col = round((location.lon - grid.min_lon) / grid.step_deg)
+        if not (0 <= row < grid.height and 0 <= col < grid.width):
+            return None
+        if cube.data[row, col, _FOREST] == NODATA:
+            return None
+        return row, col
+
+    def _nearest_pixel(
+        self, cube: _Cube, location: Location, tolerance_deg: float
+    ) -> tuple[int, int, float] | None:
+        """
+        (row, col, squared distance) of the nearest pixel with a result whose centre is
+        within tolerance_deg of location.
+        """
+        rows, cols = cube.grid.window(
+            location.lon - tolerance_deg,
+            location.lat - tolerance_deg,
+            location.lon + tolerance_deg,
+            location.lat + tolerance_deg,
+        )
+        present = cube.data[rows, cols, _FOREST] != NODATA
+        if not present.any():
+            return None
+
+        dlat = cube.grid.lats(np.arange(rows.start, rows.stop)) - location.lat
+        dlon = cube.grid.lons(np.arange(cols.start, cols.stop)) - location.lon
+        d2 = dlat[:, None] ** 2 + dlon[None, :] ** 2
+        d2[~present | (d2 > tolerance_deg**2)] = np.inf
+        i, j = np.unravel_index(np.argmin(d2), d2.shape)
+        if not np.isfinite(d2[i, j]):
+            return None
+        return rows.start + int(i), cols.start + int(j), float(d2[i, j])
+
+    def get_metric_for_location(
+        self,
+        *,
+        product: str,
+        location: Location,
+        year: int,
+        nearest_tolerance_deg: float | None = None,
+    ) -> PhenologyMetric | None:
+        cube = self._cube(product, year)
+        if cube is None:
+            return None
+
+        pixel = self._pixel(cube, location)
+        if pixel is None and nearest_tolerance_deg is not None:
+            nearest = self._nearest_pixel(cube, location, nearest_tolerance_deg)
+            if nearest is not None:
+                pixel = nearest[:2]
+        if pixel is None:
+            return None
+
+        return self._metric_at(cube, year, *pixel)
+
+    def get_metrics_for_locations(
+        self,
+        *,
+        product: str,
+        year: int,
+        locations: Sequence[Location],
+    ) -> list[PhenologyMetric | None]:
+        out: list[PhenologyMetric | None] = [None] * len(locations)
+        cube = self._cube(product, year)
+        if cube is None or not locations:
+            return out
+
+        rows, cols, inside = cube.grid.pixels(
+            [loc.lat for loc in locations], [loc.lon for loc in locations]
+        )
+        idx = np.flatnonzero(inside)
+        for i, metric in zip(idx, self._metrics_at(cube, year, rows[idx], cols[idx])):
+            out[int(i)] = metric
+        return out
+
+    def get_timeseries_for_location(
+        self,
+        *,
+        product: str,
+        location: Location,
+        start_year: int,
+        end_year: int,
+        nearest_tolerance_deg: float | None = None,
+    ) -> list[PhenologyMetric]:
+        if end_year < start_year:
+            return []
+
+        years = range(start_year, end_year + 1)
+        series = [
+            m
+            for m in (
+                self.get_metric_for_location(product=product, location=location, year=year)
+                for year in years
+            )
+            if m is not None
+        ]
+
+        if not series and nearest_tolerance_deg is not None:
+            # Like the database backends: the nearest pixel with a result in any year of
+            # the range, then that pixel's series.
+            best: tuple[float, Location] | None = None
+            for year in years:
+                cube = self._cube(product, year)
+                if cube is None:
+                    continue
+                nearest = self._nearest_pixel(cube, location, nearest_tolerance_deg)
+                if nearest is not None and (best is None or nearest[2] < best[0]):
+                    row, col, d2 = nearest
+                    best = (d2, self._metric_at(cube, year, row, col).location)
+            if best is not None:
+                return self.get_timeseries_for_location(
+                    product=product, location=best[1], start_year=start_year, end_year=end_year
+                )
+
+        return series
+
+    def _area_stats(
+        self,
+        product: str,
+        year: int,
+        polygons: list[list[np.ndarray]],
+        only_forest: bool,
+        min_season_length: int | None,
+        season_length_stat: str,
+    ) -> dict | None:
+        cube = self._cube(product, year)
+        if cube is None:
+            return None
+
+        exteriors = np.concatenate([rings[0] for rings in polygons])
+        (min_lon, min_lat), (max_lon, max_lat) = exteriors.min(axis=0), exteriors.max(axis=0)
+        rows, cols = cube.grid.window(min_lon, min_lat, max_lon, max_lat)
+        block = cube.data[rows, cols]
+        forest, length = block[..., _FOREST], block[..., _LENGTH]
+
+        keep = forest != NODATA
+        if only_forest:
+            keep &= forest == 1
+        if min_season_length is not None:
+            keep &= (length >= 0) & (length >= min_season_length)
+        r, c = np.nonzero(keep)
+
+        covered = _covers(polygons, cube.grid.lons(c + cols.start), cube.grid.lats(r + rows.start))
+        r, c = r[covered], c[covered]
+        season_length = length[r, c].astype(np.float64)
+        season_length[season_length < 0] = np.nan
+        return _stats_from_columns(season_length, forest[r, c] == 1, season_length_stat)
+
+    def iter_metrics(
+        self,
+        *,
+        product: str,
+        year: int,
+        bbox: BBox | None = None,
+        chunk_size: int = 10_000,
+    ) -> Iterator[PhenologyMetric]:
+        """
+        Pixels with a result, south to north and west to east (the cell_id order of
+        the database backends), decoded about chunk_size pixels at a time.
+        """
+        cube = self._cube(product, year)
+        if cube is None:
+            return
+
+        rows, cols = (
+            (slice(0, cube.grid.height), slice(0, cube.grid.width))
+            if bbox is None
+            else cube.grid.window(bbox.min_lon, bbox.min_lat, bbox.max_lon, bbox.max_lat)
+        )
+        step = max(1, chunk_size // max(1, cols.stop - cols.start))
+        for row0 in range(rows.start, rows.stop, step):
+            band = cube.data[row0 : min(row0 + step, rows.stop), cols, _FOREST]
+            r, c = np.nonzero(band != NODATA)
+            yield from self._metrics_at(cube, year, r + row0, c + cols.start)
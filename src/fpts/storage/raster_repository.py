@@ -30,3 +30,11 @@ class RasterRepository(ABC):
         typically one file per time step (e.g. per DOY).
         """
         raise NotImplementedError
+
+    @abstractmethod
+    def list_band_stack_paths(self, product: str, year: int, band: str) -> Sequence[Path]:
+        """
+        Return the GeoTIFF paths of a companion band (e.g. EVI, pixel reliability) for
+        (product, year), one file per time step, named like the NDVI stack.
+        """
+        raise NotImplementedError
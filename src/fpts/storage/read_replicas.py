@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Generic, Iterator, Sequence, TypeVar
+
+PoolT = TypeVar("PoolT")
+
+
+@dataclass(eq=False)
+class ReadTarget(Generic[PoolT]):
+    """
+    One read replica: its DSN and, when pooling is enabled, its own pool (a sync
+    ConnectionPool or an AsyncConnectionPool, matching the repository using it).
+    """
+
+    dsn: str
+    pool: PoolT | None = None
+    # time.monotonic() until which the replica is skipped after a failed connect
+    down_until: float = field(default=0.0, repr=False)
+
+
+class ReplicaSet(Generic[PoolT]):
+    """
+    Read replicas of the primary database, handed out round-robin.
+
+    A replica whose connect fails (unreachable, or its pool timed out) is marked down
+    and skipped for `retry_after_s`; the repository then tries the next one and finally
+    the primary, so losing replicas degrades to primary-only reads instead of errors.
+    Repositories wait at most `acquire_timeout_s` for a replica connection (rather than
+    the primary's pool/connect timeout), so the read that finds a replica down is only
+    delayed by that much before falling through.
+    """
+
+    def __init__(
+        self,
+        targets: Sequence[ReadTarget[PoolT]],
+        *,
+        retry_after_s: float = 30.0,
+        acquire_timeout_s: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._targets = list(targets)
+        self._retry_after_s = retry_after_s
+        self.acquire_timeout_s = acquire_timeout_s
+        self._clock = clock
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    @property
+    def targets(self) -> list[ReadTarget[PoolT]]:
+        return list(self._targets)
+
+    def candidates(self) -> Iterator[ReadTarget[PoolT]]:
+        """
+        Replicas not currently marked down, starting at the next one in rotation.
+        """
+        if not self._targets:
+            return
+        with self._lock:
+            start = next(self._next) % len(self._targets)
+        now = self._clock()
+        for i in range(len(self._targets)):
+            target = self._targets[(start + i) % len(self._targets)]
+            if target.down_until <= now:
+                yield target
+
+    def mark_down(self, target: ReadTarget[PoolT]) -> None:
+        target.down_until = self._clock() + self._retry_after_s
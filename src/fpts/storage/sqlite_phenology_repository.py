@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import date
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+
+from fpts.domain.grid import ProductGrids
+from fpts.domain.models import BBox, Location, PhenologyMetric
+from fpts.sql.queries.sqlite_phenology import (
+    CREATE_SCHEMA,
+    DELETE_YEAR,
+    EXPORT_METRICS,
+    EXPORT_METRICS_IN_BBOX,
+    GET_AREA_CANDIDATES,
+    GET_METRIC_FOR_LOCATION,
+    GET_METRICS_FOR_LOCATIONS,
+    GET_NEAREST_METRIC_FOR_LOCATION,
+    GET_NEAREST_TIMESERIES_FOR_LOCATION,
+    GET_TIMESERIES_FOR_LOCATION,
+    UPSERT_METRIC,
+)
+from fpts.storage.columnar_repository import AreaStatsMixin, _covers, _stats_from_columns
+from fpts.storage.phenology_repository import PhenologyRepository
+
+
+def _metric_from_row(row: sqlite3.Row) -> PhenologyMetric:
+    return PhenologyMetric(
+        year=int(row["year"]),
+        location=Location(lat=float(row["lat"]), lon=float(row["lon"])),
+        sos_date=date.fromisoformat(row["sos_date"]) if row["sos_date"] else None,
+        eos_date=date.fromisoformat(row["eos_date"]) if row["eos_date"] else None,
+        season_length=row["season_length"],
+        is_forest=bool(row["is_forest"]),
+    )
+
+
+class SQLitePhenologyRepository(AreaStatsMixin, PhenologyRepository):
+    """
+    PhenologyRepository in a single SQLite file, for edge deployments with no Postgres
+    server and more data than fits in RAM.
+
+    Same layout as the PostGIS table: rows keyed by (product, cell_id, year) with the
+    product's pixel grid, so point and timeseries reads are one unique-index probe. An
+    R*Tree virtual table (maintained by triggers) indexes the points for nearest-pixel
+    lookups, bbox exports and area stats; area stats fetch the rows in the polygon's
+    bbox from the R*Tree and run the columnar backend's vectorized point-in-polygon
+    test on them (same semantics and geometry validation as ColumnarPhenologyRepository).
+
+    The file is opened in WAL mode, so readers never block on a writer. Each thread
+    gets its own connection (cached in a threading.local), which is what sqlite3
+    expects and lets the API threadpool read concurrently.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        grids: ProductGrids | None = None,
+        busy_timeout_s: float = 5.0,
+    ) -> None:
+        """
+        path: database file, created with its schema if missing.
+
+        busy_timeout_s: how long a writer waits for another writer's lock before
+        failing with "database is locked" (readers are never blocked in WAL mode).
+        """
+        self._path = str(path)
+        self._grids = grids or ProductGrids()
+        self._busy_timeout_s = busy_timeout_s
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(CREATE_SCHEMA)
+
+    def _open(self) -> sqlite3.Connection:
+        # check_same_thread=False only so close() can close every thread's connection;
+        # each connection is otherwise used by the thread that opened it.
+        conn = sqlite3.connect(self._path, timeout=self._busy_timeout_s, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # WAL is durable across crashes with NORMAL; only the last commits before a
+        # power loss may roll back.
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """
+        Close every thread's cached connection; later calls reopen them.
+        """
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def _params(self, product: str, metric: PhenologyMetric) -> dict:
+        return {
+            "product": product,
+            "year": metric.year,
+            "cell_id": self._grids.for_product(product).cell_id(metric.location),
+            "lon": metric.location.lon,
+            "lat": metric.location.lat,
+            "sos_date": metric.sos_date.isoformat() if metric.sos_date else None,
+            "eos_date": metric.eos_date.isoformat() if metric.eos_date else None,
+            "season_length": metric.season_length,
+            "is_forest": int(metric.is_forest),
+        }
+
+    def upsert(self, *, product: str, metric: PhenologyMetric) -> None:
+        self.upsert_many(product=product, metrics=[metric])
+
+    def upsert_many(
+        self, *, product: str, metrics: Iterable[PhenologyMetric], chunk_size: int = 10_000
+    ) -> int:
+        """
+        Insert or update metrics in one transaction (executemany in chunk_size batches,
+        so memory stays flat for a streamed year); returns the number of rows written.
+        """
+        conn = self._conn()
+        with conn:
+            return self._write(conn, product, metrics, chunk_size)
+
+    def replace_year(self, *, product: str, year: int, metrics: Iterable[PhenologyMetric]) -> int:
+        """
+        Replace every stored metric of (product, year) with `metrics` in one
+        transaction; readers keep seeing the old year until it commits.
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute(DELETE_YEAR, {"product": product, "year": year})
+            return self._write(conn, product, metrics)
+
+    def _write(
+        self,
+        conn: sqlite3.Connection,
+        product: str,
+        metrics: Iterable[PhenologyMetric],
+        chunk_size: int = 10_000,
+    ) -> int:
+        it = iter(metrics)
+        n = 0
+        while chunk := list(islice(it, chunk_size)):
+            conn.executemany(UPSERT_METRIC, (self._params(product, m) for m in chunk))
+            n += len(chunk)
+        return n
+
+    def get_metric_for_location(
+        self,
+        *,
+        product: str,
+        location: Location,
+        year: int,
+        nearest_tolerance_deg: float | None = None,
+    ) -> PhenologyMetric | None:
+        conn = self._conn()
+        row = conn.execute(
+            GET_METRIC_FOR_LOCATION,
+            {
+                "product": product,
+                "cell_id": self._grids.for_product(product).cell_id(location),
+                "year": year,
+            },
+        ).fetchone()
+
+        if row is None and nearest_tolerance_deg is not None:
+            row = conn.execute(
+                GET_NEAREST_METRIC_FOR_LOCATION,
+                {
+                    "product": product,
+                    "year": year,
+                    "lon": location.lon,
+                    "lat": location.lat,
+                    "tolerance_deg": nearest_tolerance_deg,
+                },
+            ).fetchone()
+
+        return None if row is None else _metric_from_row(row)
+
+    def get_metrics_for_locations(
+        self,
+        *,
+        product: str,
+        year: int,
+        locations: Sequence[Location],
+    ) -> list[PhenologyMetric | None]:
+        out: list[PhenologyMetric | None] = [None] * len(locations)
+        if not locations:
+            return out
+
+        grid = self._grids.for_product(product)
+        rows = self._conn().execute(
+            GET_METRICS_FOR_LOCATIONS,
+            {
+                "product": product,
+                "year": year,
+                "cell_ids": json.dumps([grid.cell_id(loc) for loc in locations]),
+            },
+        )
+        for row in rows:
+            out[int(row["idx"])] = _metric_from_row(row)
+        return out
+
+    def get_timeseries_for_location(
+        self,
+        *,
+        product: str,
+        location: Location,
+        start_year: int,
+        end_year: int,
+        nearest_tolerance_deg: float | None = None,
+    ) -> list[PhenologyMetric]:
+        if end_year < start_year:
+            return []
+
+        conn = self._conn()
+        rows = conn.execute(
+            GET_TIMESERIES_FOR_LOCATION,
+            {
+                "product": product,
+                "cell_id": self._grids.for_product(product).cell_id(location),
+                "start_year": start_year,
+                "end_year": end_year,
+            },
+        ).fetchall()
+
+        if not rows and nearest_tolerance_deg is not None:
+            rows = conn.execute(
+                GET_NEAREST_TIMESERIES_FOR_LOCATION,
+                {
+                    "product": product,
+                    "lon": location.lon,
+                    "lat": location.lat,
+                    "tolerance_deg": nearest_tolerance_deg,
+                    "start_year": start_year,
+                    "end_year": end_year,
+                },
+            ).fetchall()
+
+        return [_metric_from_row(row) for row in rows]
+
+    def _area_stats_by_year(
+        self,
+        product: str,
+        start_year: int,
+        end_year: int,
+        polygons: list[list[np.ndarray]],
+        only_forest: bool,
+        min_season_length: int | None,
+        season_length_stat: str,
+    ) -> dict[int, dict]:
+        """
+        One R*Tree window scan over [start_year, end_year]; years without covered rows
+        are left out.
+        """
+        exteriors = np.concatenate([rings[0] for rings in polygons])
+        (min_lon, min_lat), (max_lon, max_lat) = exteriors.min(axis=0), exteriors.max(axis=0)
+
+        cur = self._conn().cursor()
+        cur.row_factory = None  # plain tuples straight into NumPy
+        rows = cur.execute(
+            GET_AREA_CANDIDATES,
+            {
+                "product": product,
+                "start_year": start_year,
+                "end_year": end_year,
+                "min_lon": float(min_lon),
+                "min_lat": float(min_lat),
+                "max_lon": float(max_lon),
+                "max_lat": float(max_lat),
+                "only_forest": int(only_forest),
+                "min_season_length": min_season_length,
+            },
+        ).fetchall()
+        if not rows:
+            return {}
+
+        # year, lon, lat, season_length (NULL -> NaN), is_forest
+        cols = np.array(rows, dtype=np.float64)
+        covered = cols[_covers(polygons, cols[:, 1], cols[:, 2])]
+        years = covered[:, 0].astype(np.int64)
+
+        out = {}
+        for year in np.unique(years):
+            sel = covered[years == year]
+            stats = _stats_from_columns(sel[:, 3], sel[:, 4] != 0, season_length_stat)
+            if stats is not None:
+                out[int(year)] = stats
+        return out
+
+    def iter_metrics(
+        self,
+        *,
+        product: str,
+        year: int,
+        bbox: BBox | None = None,
+        chunk_size: int = 10_000,
+    ) -> Iterator[PhenologyMetric]:
+        """
+        Rows in cell_id order, fetched chunk_size at a time on a connection of its own
+        (a streaming response may resume the iterator on another thread). The connection
+        is held until the iterator is exhausted or closed.
+        """
+        params: dict = {"product": product, "year": year}
+        sql = EXPORT_METRICS
+        if bbox is not None:
+            sql = EXPORT_METRICS_IN_BBOX
+            params |= {
+                "min_lon": bbox.min_lon,
+                "min_lat": bbox.min_lat,
+                "max_lon": bbox.max_lon,
+                "max_lat": bbox.max_lat,
+            }
+
+        conn = self._open()
+        try:
+            cur = conn.execute(sql, params)
+            while rows := cur.fetchmany(chunk_size):
+                for row in rows:
+                    yield _metric_from_row(row)
+        finally:
+            conn.close()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from dataclasses import replace
+from typing import Callable
+
+from fpts.domain.grid import ProductGrids
+from fpts.domain.models import PhenologyMetric
+from fpts.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+Key = tuple[str, float, float, int]  # (product, lat, lon, year)
+
+
+class WriteBehindQueue:
+    """
+    Persists metrics computed on request (mode=auto) without making the request wait
+    for the write.
+
+    Metrics are computed at the requested coordinate; with `grids`, submit() moves them
+    to the centre of the product's pixel containing it, so they are stored like the
+    batch job's rows (one per pixel) rather than as extra off-grid points.
+
+    submit() only records the metric; a background thread hands the pending metrics to
+    `write(product, metrics)` (a repository's bulk upsert), grouped by product, every
+    `flush_interval_s` or as soon as `batch_size` are pending. Pending metrics are
+    de-duplicated by (product, location, year) and capped at `max_pending`: once full,
+    new points are dropped (and counted) instead of growing the queue, since a dropped
+    point is only recomputed on its next miss. A failed write is logged and its batch
+    dropped for the same reason, so a database outage cannot back the queue up.
+    close() stops the thread and writes whatever is still pending.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[str, list[PhenologyMetric]], object],
+        *,
+        max_pending: int = 10_000,
+        batch_size: int = 500,
+        flush_interval_s: float = 2.0,
+        grids: ProductGrids | None = None,
+    ) -> None:
+        if max_pending < 1 or batch_size < 1:
+            raise ValueError("max_pending and batch_size must be >= 1")
+        if flush_interval_s <= 0:
+            raise ValueError("flush_interval_s must be > 0")
+        self._write = write
+        self._max_pending = max_pending
+        self._batch_size = batch_size
+        self._flush_interval_s = flush_interval_s
+        self._grids = grids
+
+        self._pending: dict[Key, tuple[str, PhenologyMetric]] = {}
+        self._cond = threading.Condition()
+        # Serialises writes between the worker and explicit flush()/close() calls.
+        self._write_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(target=self._run, name="fpts-write-behind", daemon=True)
+            self._thread.start()
+
+    def submit(self, product: str, metric: PhenologyMetric) -> bool:
+        """
+        Queue a metric for writing. Never blocks on the write; returns False if the
+        metric was dropped because the queue is full or closed.
+        """
+        if self._grids is not None:
+            grid = self._grids.for_product(product)
+            metric = replace(metric, location=grid.snap(metric.location))
+        key: Key = (product, metric.location.lat, metric.location.lon, metric.year)
+        with self._cond:
+            if self._closed or (
+                key not in self._pending and len(self._pending) >= self._max_pending
+            ):
+                self.dropped += 1
+                return False
+            self._pending[key] = (product, metric)
+            self.submitted += 1
+            if len(self._pending) >= self._batch_size:
+                self._cond.notify()
+        return True
+
+    def flush(self) -> int:
+        """
+        Write everything pending now. Returns the number of metrics written.
+        """
+        with self._write_lock:
+            with self._cond:
+                pending = list(self._pending.values())
+                self._pending.clear()
+
+            by_product: dict[str, list[PhenologyMetric]] = defaultdict(list)
+            for product, metric in pending:
+                by_product[product].append(metric)
+
+            n = 0
+            for product, metrics in by_product.items():
+                try:
+                    self._write(product, metrics)
+                except Exception:
+                    self.failed += len(metrics)
+                    logger.exception(
+                        "write_behind_flush_failed",
+                        extra={"product": product, "n": len(metrics)},
+                    )
+                    continue
+                self.written += len(metrics)
+                n += len(metrics)
+            if n:
+                logger.debug("write_behind_flushed", extra={"n": n})
+            return n
+
+    def close(self, timeout: float | None = None) -> None:
+        """
+        Stop accepting metrics, stop the worker and write what is still pending.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self._batch_size:
+                    self._cond.wait(self._flush_interval_s)
+                closed = self._closed
+            if closed:
+                # close() does the final flush
+                return
+            self.flush()
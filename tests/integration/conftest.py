@@ -45,6 +45,19 @@ def postgis_dsn() -> str:
     return dsn
 
 
+@pytest.fixture(scope="session")
+def replica_dsn(postgis_dsn: str) -> str:
+    """
+    A second, independent database standing in for a read replica (no replication:
+    tests seed it directly, which makes routing observable).
+    """
+    dsn = os.getenv("FPTS_TEST_READ_DATABASE_DSN")
+    if not dsn:
+        pytest.skip("Set FPTS_TEST_READ_DATABASE_DSN to run read replica tests")
+    _wait_for_db(dsn)
+    return dsn
+
+
 @pytest.fixture(autouse=True)
 def _clean_phenology_metrics(postgis_dsn: str):
     """
@@ -53,7 +66,10 @@ def _clean_phenology_metrics(postgis_dsn: str):
     """
     with psycopg.connect(postgis_dsn) as conn:
         with conn.cursor() as cur:
-            cur.execute("TRUNCATE TABLE public.phenology_metrics RESTART IDENTITY;")
+            cur.execute(
+                "TRUNCATE TABLE public.phenology_metrics, public.phenology_area_summaries "
+                "RESTART IDENTITY;"
+            )
         conn.commit()
 
 
@@ -1,8 +1,16 @@
-from datetime import date
+import asyncio
+import math
+from datetime import date, timedelta
 
+import psycopg
 import pytest
 from fastapi.testclient import TestClient
-from fpts.domain.models import Location, PhenologyMetric
+from fpts.api.main import create_app
+from fpts.config.settings import Settings
+from fpts.domain.area_summary import SummaryLayout
+from fpts.domain.models import BBox, Location, PhenologyMetric
+from fpts.storage.postgis_async_phenology_repository import AsyncPostGISPhenologyRepository
+from fpts.storage.postgis_phenology_repository import PostGISPhenologyRepository
 
 
 @pytest.mark.integration
@@ -599,3 +607,661 @@ def test_phenology_area_rejects_invalid_season_length_stat(app_postgis):
         json={"geometry": poly},
     )
     assert resp.status_code == 422
+
+
+@pytest.mark.integration
+def test_pooled_postgis_reuses_connections(postgis_dsn):
+    app = create_app(
+        settings=Settings(
+            phenology_repo_backend="postgis",
+            database_dsn=postgis_dsn,
+            database_pool_enabled=True,
+            database_pool_min_size=1,
+            database_pool_max_size=2,
+        )
+    )
+
+    with TestClient(app) as client:
+        for _ in range(10):
+            resp = client.get(
+                "/phenology/point",
+                params={"product": "test_product", "lat": 40.0, "lon": 10.0, "year": 2020},
+            )
+            assert resp.status_code == 404
+
+        stats = app.state.db_pool.get_stats()
+        assert stats["requests_num"] == 10
+        assert stats["pool_max"] == 2
+        assert stats.get("connections_num", 0) <= 2
+
+    assert app.state.db_pool.closed
+
+
+@pytest.mark.integration
+def test_get_metrics_for_locations_single_query_postgis(app_postgis):
+    repo = app_postgis.state.phenology_repo
+    a = Location(lat=52.5, lon=13.4)
+    b = Location(lat=48.1, lon=11.6)
+    repo.upsert_many(
+        product="test_product",
+        metrics=[
+            PhenologyMetric(
+                year=2020,
+                location=loc,
+                sos_date=date(2020, 4, 15),
+                eos_date=date(2020, 10, 15),
+                season_length=183,
+                is_forest=True,
+            )
+            for loc in (a, b)
+        ],
+    )
+
+    missing = Location(lat=0.0, lon=0.0)
+    result = repo.get_metrics_for_locations(
+        product="test_product", year=2020, locations=[b, missing, a, b]
+    )
+
+    assert [m.location if m else None for m in result] == [b, None, a, b]
+
+
+@pytest.mark.integration
+def test_phenology_point_snaps_to_stored_pixel_postgis(app_postgis):
+    repo = app_postgis.state.phenology_repo
+    repo.upsert(
+        product="test_product",
+        metric=PhenologyMetric(
+            year=2020,
+            location=Location(lat=52.5, lon=13.4),
+            sos_date=date(2020, 4, 15),
+            eos_date=date(2020, 10, 15),
+            season_length=183,
+            is_forest=True,
+        ),
+    )
+
+    client = TestClient(app_postgis)
+    # inside the same 0.001 deg pixel, not the exact stored coordinate
+    resp = client.get(
+        "/phenology/point",
+        params={"product": "test_product", "lat": 52.5003, "lon": 13.3998, "year": 2020},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["location"] == {"lat": 52.5, "lon": 13.4}
+
+    series = repo.get_timeseries_for_location(
+        product="test_product",
+        location=Location(lat=52.4998, lon=13.4004),
+        start_year=2019,
+        end_year=2021,
+    )
+    assert [m.year for m in series] == [2020]
+
+
+@pytest.mark.integration
+def test_phenology_point_nearest_tolerance_postgis(app_postgis):
+    repo = app_postgis.state.phenology_repo
+    for year in (2020, 2021):
+        repo.upsert(
+            product="test_product",
+            metric=PhenologyMetric(
+                year=year,
+                location=Location(lat=52.5, lon=13.4),
+                sos_date=date(year, 4, 15),
+                eos_date=date(year, 10, 15),
+                season_length=183,
+                is_forest=True,
+            ),
+        )
+
+    client = TestClient(app_postgis)
+    params = {"product": "test_product", "lat": 52.52, "lon": 13.41, "year": 2020}
+
+    assert client.get("/phenology/point", params=params).status_code == 404
+    assert (
+        client.get("/phenology/point", params={**params, "nearest_tolerance_deg": 0.01}).status_code
+        == 404
+    )
+
+    resp = client.get("/phenology/point", params={**params, "nearest_tolerance_deg": 0.05})
+    assert resp.status_code == 200
+    assert resp.json()["location"] == {"lat": 52.5, "lon": 13.4}
+
+    ts = client.get(
+        "/phenology/timeseries",
+        params={
+            "product": "test_product",
+            "lat": 52.52,
+            "lon": 13.41,
+            "start_year": 2019,
+            "end_year": 2021,
+            "nearest_tolerance_deg": 0.05,
+        },
+    )
+    assert ts.status_code == 200
+    assert [m["year"] for m in ts.json()["metrics"]] == [2020, 2021]
+
+
+@pytest.mark.integration
+def test_replace_year_unpartitioned_postgis(app_postgis, postgis_dsn):
+    repo = app_postgis.state.phenology_repo
+    old = Location(lat=52.5, lon=13.4)
+    new = Location(lat=48.1, lon=11.6)
+
+    def _metric(year: int, loc: Location) -> PhenologyMetric:
+        return PhenologyMetric(
+            year=year,
+            location=loc,
+            sos_date=date(year, 4, 15),
+            eos_date=date(year, 10, 15),
+            season_length=183,
+            is_forest=True,
+        )
+
+    def vacuum_count() -> int:
+        with psycopg.connect(postgis_dsn) as conn:
+            return conn.execute(
+                "SELECT vacuum_count FROM pg_stat_user_tables WHERE relname = 'phenology_metrics'"
+            ).fetchone()[0]
+
+    repo.upsert_many(product="test_product", metrics=[_metric(2020, old), _metric(2021, old)])
+    vacuums = vacuum_count()
+
+    assert repo.replace_year(product="test_product", year=2020, metrics=[_metric(2020, new)]) == 1
+    assert vacuum_count() == vacuums + 1
+    assert repo.get_metric_for_location(product="test_product", location=old, year=2020) is None
+    assert repo.get_metric_for_location(product="test_product", location=new, year=2020)
+    assert repo.get_metric_for_location(product="test_product", location=old, year=2021)
+
+
+@pytest.mark.integration
+def test_cluster_year_unpartitioned_postgis(app_postgis, postgis_dsn):
+    repo = app_postgis.state.phenology_repo
+    locs = [Location(lat=50.0 + 0.01 * i, lon=5.0 + 0.01 * j) for i in range(5) for j in range(5)]
+    repo.upsert_many(
+        product="test_product",
+        metrics=[
+            PhenologyMetric(
+                year=2020,
+                location=loc,
+                sos_date=date(2020, 4, 15),
+                eos_date=date(2020, 10, 15),
+                season_length=183,
+                is_forest=True,
+            )
+            for loc in locs[::-1]
+        ],
+    )
+
+    assert repo.cluster_year(product="test_product", year=2020) == len(locs)
+    repo.ensure_brin_index()
+
+    with psycopg.connect(postgis_dsn) as conn:
+        hashes = [
+            r[0]
+            for r in conn.execute(
+                "SELECT ST_GeoHash(geom, 12) FROM phenology_metrics "
+                "WHERE product = 'test_product' AND year = 2020 ORDER BY ctid"
+            ).fetchall()
+        ]
+    assert hashes == sorted(hashes)
+
+
+@pytest.mark.integration
+def test_area_stats_subdivided_matches_raw_polygon_postgis(app_postgis, postgis_dsn):
+    app_postgis.state.phenology_repo.upsert_many(
+        product="test_product",
+        metrics=[
+            PhenologyMetric(
+                year=2020,
+                location=Location(lat=50.0 + 0.01 * i, lon=5.0 + 0.01 * j),
+                sos_date=date(2020, 4, 1),
+                eos_date=date(2020, 4, 1) + timedelta(days=150 + i + j),
+                season_length=150 + i + j,
+                is_forest=(i + j) % 3 != 0,
+            )
+            for i in range(20)
+            for j in range(20)
+        ],
+    )
+    # many-vertex star whose spikes cross the grid, so subdivision cuts run through
+    # stored points and would double count them without de-duplication
+    ring = []
+    for k in range(400):
+        r = 0.09 if k % 2 else 0.06
+        a = 2 * math.pi * k / 400
+        ring.append([5.095 + r * math.cos(a), 50.095 + r * math.sin(a)])
+    polygon = {"type": "Polygon", "coordinates": [ring + [ring[0]]]}
+
+    raw = PostGISPhenologyRepository(dsn=postgis_dsn)
+    subdivided = PostGISPhenologyRepository(dsn=postgis_dsn, subdivide_max_vertices=16)
+    kwargs = dict(
+        product="test_product", year=2020, polygon_geojson=polygon, season_length_stat="both"
+    )
+
+    expected = raw.get_area_stats(**kwargs)
+    assert expected is not None and expected["n"] > 0
+    assert subdivided.get_area_stats(**kwargs) == pytest.approx(expected)
+    assert subdivided.get_area_stats(**kwargs, only_forest=True) == pytest.approx(
+        raw.get_area_stats(**kwargs, only_forest=True)
+    )
+
+    with pytest.raises(ValueError):
+        bowtie = {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]]}
+        subdivided.get_area_stats(**{**kwargs, "polygon_geojson": bowtie})
+
+
+@pytest.mark.integration
+def test_area_stats_from_summaries_match_raw_rows_postgis(app_postgis, postgis_dsn):
+    layout = SummaryLayout(cell_deg=0.05, bin_days=5)
+    summarized = PostGISPhenologyRepository(dsn=postgis_dsn, summaries=layout)
+    raw = PostGISPhenologyRepository(dsn=postgis_dsn)
+
+    summarized.upsert_many(
+        product="test_product",
+        metrics=[
+            PhenologyMetric(
+                year=2020,
+                location=Location(lat=50.0 + 0.01 * i, lon=5.0 + 0.01 * j),
+                sos_date=date(2020, 4, 1),
+                eos_date=date(2020, 4, 1) + timedelta(days=120 + (7 * i + 3 * j) % 90),
+                season_length=120 + (7 * i + 3 * j) % 90,
+                is_forest=(i + j) % 3 != 0,
+            )
+            for i in range(30)
+            for j in range(30)
+        ],
+    )
+    assert summarized.refresh_area_summaries(product="test_product", year=2020) > 0
+
+    # covers several summary cells fully and cuts through others
+    polygon = {
+        "type": "Polygon",
+        "coordinates": [
+            [[5.013, 50.027], [5.243, 50.004], [5.261, 50.219], [5.031, 50.262], [5.013, 50.027]]
+        ],
+    }
+    kwargs = dict(
+        product="test_product", year=2020, polygon_geojson=polygon, season_length_stat="both"
+    )
+
+    for only_forest in (False, True):
+        expected = raw.get_area_stats(**kwargs, only_forest=only_forest)
+        got = summarized.get_area_stats(**kwargs, only_forest=only_forest)
+        assert got["n"] == expected["n"]
+        assert got["mean_season_length"] == pytest.approx(expected["mean_season_length"])
+        assert got["forest_fraction"] == pytest.approx(expected["forest_fraction"])
+        assert (
+            abs(got["median_season_length"] - expected["median_season_length"])
+            <= layout.max_median_error_days
+        )
+
+    # min_season_length and years without summaries are answered from raw rows
+    assert summarized.get_area_stats(**kwargs, min_season_length=150) == raw.get_area_stats(
+        **kwargs, min_season_length=150
+    )
+    assert summarized.get_area_stats(**{**kwargs, "year": 2021}) is None
+
+    with pytest.raises(ValueError):
+        bowtie = {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]]}
+        summarized.get_area_stats(**{**kwargs, "polygon_geojson": bowtie})
+
+
+@pytest.mark.integration
+def test_area_stats_from_summaries_count_points_on_cell_edges_postgis(app_postgis, postgis_dsn):
+    layout = SummaryLayout(cell_deg=0.05, bin_days=5)
+    summarized = PostGISPhenologyRepository(dsn=postgis_dsn, summaries=layout)
+    raw = PostGISPhenologyRepository(dsn=postgis_dsn)
+
+    # every fifth row and column lies on a summary cell edge (e.g. lat 50.05, whose cell
+    # starts at -90 + 2801 * 0.05 = 50.05000000000001)
+    summarized.upsert_many(
+        product="test_product",
+        metrics=[
+            PhenologyMetric(
+                year=2020,
+                location=Location(lat=round(50.0 + 0.01 * i, 2), lon=round(5.0 + 0.01 * j, 2)),
+                sos_date=date(2020, 4, 1),
+                eos_date=date(2020, 4, 1) + timedelta(days=150),
+                season_length=150,
+                is_forest=True,
+            )
+            for i in range(21)
+            for j in range(21)
+        ],
+    )
+    summarized.refresh_area_summaries(product="test_product", year=2020)
+
+    # cuts through the cells around the one it covers
+    box = {
+        "type": "Polygon",
+        "coordinates": [
+            [[5.04, 50.04], [5.16, 50.04], [5.16, 50.16], [5.04, 50.16], [5.04, 50.04]]
+        ],
+    }
+    kwargs = dict(product="test_product", year=2020, polygon_geojson=box)
+    assert summarized.get_area_stats(**kwargs)["n"] == raw.get_area_stats(**kwargs)["n"] == 13 * 13
+
+
+@pytest.mark.integration
+def test_refreshing_summary_cells_of_locations_matches_a_full_rebuild_postgis(
+    app_postgis, postgis_dsn
+):
+    layout = SummaryLayout(cell_deg=0.05, bin_days=5)
+    summarized = PostGISPhenologyRepository(dsn=postgis_dsn, summaries=layout)
+    raw = PostGISPhenologyRepository(dsn=postgis_dsn)
+
+    def metric(lat: float, lon: float, season_length: int) -> PhenologyMetric:
+        return PhenologyMetric(
+            year=2020,
+            location=Location(lat=lat, lon=lon),
+            sos_date=date(2020, 4, 1),
+            eos_date=date(2020, 4, 1) + timedelta(days=season_length),
+            season_length=season_length,
+            is_forest=True,
+        )
+
+    summarized.upsert_many(
+        product="test_product",
+        metrics=[
+            metric(50.0 + 0.01 * i, 5.0 + 0.01 * j, 120 + (i + j) % 40)
+            for i in range(20)
+            for j in range(20)
+        ],
+    )
+    summarized.refresh_area_summaries(product="test_product", year=2020)
+
+    # one point changed and one added, in two summary cells
+    written = [metric(50.02, 5.02, 250), metric(50.0, 5.2, 200)]
+    summarized.upsert_many(product="test_product", metrics=written)
+    assert summarized.refresh_area_summaries(product="test_product", year=2020, locations=[]) == 0
+    assert (
+        summarized.refresh_area_summaries(
+            product="test_product", year=2020, locations=[m.location for m in written]
+        )
+        == 2 * 2
+    )
+
+    bbox = {
+        "type": "Polygon",
+        "coordinates": [[[4.99, 49.99], [5.3, 49.99], [5.3, 50.3], [4.99, 50.3], [4.99, 49.99]]],
+    }
+    kwargs = dict(product="test_product", year=2020, polygon_geojson=bbox)
+    expected = raw.get_area_stats(**kwargs)
+    got = summarized.get_area_stats(**kwargs)
+    assert got["n"] == expected["n"] == 401
+    assert got["mean_season_length"] == pytest.approx(expected["mean_season_length"])
+
+
+@pytest.mark.integration
+def test_async_repo_matches_sync_repo_postgis(postgis_dsn):
+    settings = Settings(
+        phenology_repo_backend="postgis",
+        database_dsn=postgis_dsn,
+        database_pool_enabled=True,
+        database_async_enabled=True,
+    )
+    app = create_app(settings=settings)
+    loc = Location(lat=52.5, lon=13.4)
+    app.state.phenology_repo.upsert_many(
+        product="test_product",
+        metrics=[
+            PhenologyMetric(
+                year=year,
+                location=loc,
+                sos_date=date(year, 4, 15),
+                eos_date=date(year, 10, 15),
+                season_length=183,
+                is_forest=True,
+            )
+            for year in (2020, 2021)
+        ],
+    )
+    polygon = {
+        "type": "Polygon",
+        "coordinates": [[[13.0, 52.0], [14.0, 52.0], [14.0, 53.0], [13.0, 53.0], [13.0, 52.0]]],
+    }
+
+    with TestClient(app) as client:
+        sync_repo = app.state.phenology_repo
+        # the app's async pool is bound to the TestClient event loop, so compare against
+        # a pool-less async repo on a loop of our own
+        async_repo = AsyncPostGISPhenologyRepository(dsn=postgis_dsn)
+
+        async def run():
+            return (
+                await async_repo.get_metric_for_location(
+                    product="test_product", location=loc, year=2020
+                ),
+                await async_repo.get_metrics_for_locations(
+                    product="test_product", year=2020, locations=[loc, Location(lat=0, lon=0)]
+                ),
+                await async_repo.get_timeseries_for_location(
+                    product="test_product", location=loc, start_year=2019, end_year=2021
+                ),
+                await async_repo.get_area_stats(
+                    product="test_product",
+                    year=2020,
+                    polygon_geojson=polygon,
+                    season_length_stat="both",
+                ),
+            )
+
+        point, points, series, stats = asyncio.run(run())
+
+        assert point == sync_repo.get_metric_for_location(
+            product="test_product", location=loc, year=2020
+        )
+        assert points == [point, None]
+        assert [m.year for m in series] == [2020, 2021]
+        assert stats == sync_repo.get_area_stats(
+            product="test_product", year=2020, polygon_geojson=polygon, season_length_stat="both"
+        )
+
+        resp = client.get(
+            "/phenology/point",
+            params={"product": "test_product", "lat": 52.5, "lon": 13.4, "year": 2020},
+        )
+        assert resp.status_code == 200
+        assert resp.json()["season_length"] == 183
+
+
+@pytest.mark.integration
+def test_postgis_repo_iter_metrics_streams_bbox_in_chunks(postgis_dsn):
+    repo = PostGISPhenologyRepository(dsn=postgis_dsn)
+    metrics = [
+        PhenologyMetric(
+            year=2020,
+            location=Location(lat=50.0 + 0.1 * i, lon=10.0),
+            sos_date=date(2020, 4, 1),
+            eos_date=date(2020, 10, 1),
+            season_length=183,
+            is_forest=True,
+        )
+        for i in range(10)
+    ]
+    repo.upsert_many(product="test_product", metrics=metrics)
+
+    everything = list(repo.iter_metrics(product="test_product", year=2020, chunk_size=3))
+    assert sorted(m.location.lat for m in everything) == pytest.approx(
+        [m.location.lat for m in metrics]
+    )
+
+    bbox = BBox(min_lon=9.5, min_lat=50.25, max_lon=10.5, max_lat=50.65)
+    inside = list(repo.iter_metrics(product="test_product", year=2020, bbox=bbox, chunk_size=3))
+    assert sorted(m.location.lat for m in inside) == pytest.approx([50.3, 50.4, 50.5, 50.6])
+    assert list(repo.iter_metrics(product="test_product", year=2019)) == []
+
+
+@pytest.mark.integration
+def test_phenology_export_csv_postgis(app_postgis):
+    repo = app_postgis.state.phenology_repo
+    repo.upsert_many(
+        product="test_product",
+        metrics=[
+            PhenologyMetric(
+                year=2020,
+                location=Location(lat=52.5, lon=13.4),
+                sos_date=date(2020, 4, 15),
+                eos_date=date(2020, 10, 15),
+                season_length=183,
+                is_forest=True,
+            )
+        ],
+    )
+
+    with TestClient(app_postgis) as client:
+        resp = client.get(
+            "/phenology/export",
+            params={"product": "test_product", "year": 2020, "format": "csv"},
+        )
+
+    assert resp.status_code == 200
+    lines = resp.text.splitlines()
+    assert lines[0].startswith("product,year,lat,lon")
+    assert len(lines) == 2
+    assert lines[1].endswith(",2020-04-15,2020-10-15,183,True")
+
+
+@pytest.mark.integration
+def test_area_stats_batch_matches_single_polygon_queries(app_postgis):
+    repo = app_postgis.state.phenology_repo
+    repo.upsert_many(
+        product="test_product",
+        metrics=[
+            PhenologyMetric(
+                year=2020,
+                location=Location(lat=50.0 + 0.1 * i, lon=10.0 + 0.1 * j),
+                sos_date=date(2020, 4, 1),
+                eos_date=date(2020, 4, 1) + timedelta(days=150 + i + j),
+                season_length=150 + i + j,
+                is_forest=(i + j) % 2 == 0,
+            )
+            for i in range(10)
+            for j in range(10)
+        ],
+    )
+
+    def box(x0, y0, x1, y1):
+        return {
+            "type": "Polygon",
+            "coordinates": [[[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]],
+        }
+
+    ring = [
+        [10.45 + 0.3 * math.cos(k * math.pi / 40), 50.45 + 0.3 * math.sin(k * math.pi / 40)]
+        for k in range(80)
+    ]
+    polygons = {
+        "west": box(9.95, 49.95, 10.35, 50.95),
+        "east": box(10.55, 49.95, 10.95, 50.95),
+        "circle": {"type": "Polygon", "coordinates": [ring + [ring[0]]]},
+        "empty": box(20.0, 20.0, 21.0, 21.0),
+    }
+    repo = PostGISPhenologyRepository(
+        dsn=app_postgis.state.settings.database_dsn, subdivide_max_vertices=16
+    )
+
+    many = repo.get_area_stats_many(
+        product="test_product",
+        year=2020,
+        polygons=list(polygons.values()),
+        season_length_stat="both",
+    )
+    single = [
+        repo.get_area_stats(
+            product="test_product", year=2020, polygon_geojson=p, season_length_stat="both"
+        )
+        for p in polygons.values()
+    ]
+    assert many == single
+    assert many[-1] is None
+
+    with TestClient(app_postgis) as client:
+        resp = client.post(
+            "/phenology/area/batch",
+            params={"product": "test_product", "year": 2020, "only_forest": True},
+            json={"polygons": [{"id": k, "geometry": v} for k, v in polygons.items()]},
+        )
+        assert resp.status_code == 200
+        results = resp.json()["results"]
+        assert set(results) == set(polygons)
+        assert results["west"]["forest_fraction"] == 1.0
+        assert results["empty"] is None
+
+        bowtie = {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]]}
+        resp = client.post(
+            "/phenology/area/batch",
+            params={"product": "test_product", "year": 2020},
+            json={
+                "polygons": [
+                    {"id": "ok", "geometry": polygons["west"]},
+                    {"id": "bowtie", "geometry": bowtie},
+                ]
+            },
+        )
+        assert resp.status_code == 400
+        assert resp.json()["detail"] == "Invalid GeoJSON geometry for ids: bowtie"
+
+
+@pytest.mark.integration
+def test_area_stats_years_matches_per_year_queries(app_postgis):
+    repo = app_postgis.state.phenology_repo
+    repo.upsert_many(
+        product="test_product",
+        metrics=[
+            PhenologyMetric(
+                year=year,
+                location=Location(lat=50.0 + 0.1 * i, lon=10.0),
+                sos_date=date(year, 4, 1),
+                eos_date=date(year, 4, 1) + timedelta(days=140 + 5 * i + year % 7),
+                season_length=140 + 5 * i + year % 7,
+                is_forest=i % 3 == 0,
+            )
+            for year in (2018, 2019, 2021)
+            for i in range(6 if year != 2021 else 3)
+        ],
+    )
+    ring = [
+        [10.0 + 0.4 * math.cos(k * math.pi / 40), 50.2 + 0.4 * math.sin(k * math.pi / 40)]
+        for k in range(80)
+    ]
+    circle = {"type": "Polygon", "coordinates": [ring + [ring[0]]]}
+
+    for max_vertices in (None, 16):
+        repo = PostGISPhenologyRepository(
+            dsn=app_postgis.state.settings.database_dsn, subdivide_max_vertices=max_vertices
+        )
+        years = repo.get_area_stats_years(
+            product="test_product",
+            start_year=2017,
+            end_year=2021,
+            polygon_geojson=circle,
+            season_length_stat="both",
+        )
+        assert [y["year"] for y in years] == [2018, 2019, 2021]
+        for y in years:
+            single = repo.get_area_stats(
+                product="test_product",
+                year=y["year"],
+                polygon_geojson=circle,
+                season_length_stat="both",
+            )
+            assert {k: v for k, v in y.items() if k != "year"} == single
+
+    with TestClient(app_postgis) as client:
+        params = {"product": "test_product", "start_year": 2019, "end_year": 2025}
+        resp = client.post("/phenology/area/years", params=params, json={"geometry": circle})
+        assert resp.status_code == 200
+        assert [y["year"] for y in resp.json()["years"]] == [2019, 2021]
+
+        bowtie = {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]]}
+        resp = client.post("/phenology/area/years", params=params, json={"geometry": bowtie})
+        assert resp.status_code == 400
+
+        resp = client.post(
+            "/phenology/area/years",
+            params={**params, "start_year": 2022},
+            json={"geometry": circle},
+        )
+        assert resp.status_code == 404
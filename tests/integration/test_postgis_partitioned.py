@@ -0,0 +1,168 @@
+from datetime import date
+from pathlib import Path
+
+import psycopg
+import pytest
+from fpts.domain.models import Location, PhenologyMetric
+from fpts.storage.postgis_phenology_repository import PostGISPhenologyRepository
+from psycopg.conninfo import make_conninfo
+
+PARTITIONED_DDL = (
+    Path(__file__).resolve().parents[2]
+    / "src"
+    / "fpts"
+    / "sql"
+    / "ddl"
+    / "partitioned"
+    / "phenology_metrics.sql"
+)
+SCHEMA = "fpts_partitioned_test"
+
+
+@pytest.fixture
+def partitioned_dsn(postgis_dsn: str):
+    """
+    Partitioned schema in its own Postgres schema, so it does not clash with the
+    default (unpartitioned) public.phenology_metrics used by the other tests.
+    """
+    with psycopg.connect(postgis_dsn, autocommit=True) as conn:
+        conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.execute(f"CREATE SCHEMA {SCHEMA}")
+        conn.execute(f"SET search_path TO {SCHEMA}, public")
+        conn.execute(PARTITIONED_DDL.read_text())
+
+    yield make_conninfo(postgis_dsn, options=f"-c search_path={SCHEMA},public")
+
+    with psycopg.connect(postgis_dsn, autocommit=True) as conn:
+        conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+
+def _metric(year: int, loc: Location) -> PhenologyMetric:
+    return PhenologyMetric(
+        year=year,
+        location=loc,
+        sos_date=date(year, 4, 15),
+        eos_date=date(year, 10, 15),
+        season_length=183,
+        is_forest=True,
+    )
+
+
+@pytest.mark.integration
+def test_upsert_creates_partitions_and_lookups_prune(partitioned_dsn: str):
+    repo = PostGISPhenologyRepository(dsn=partitioned_dsn)
+    loc = Location(lat=52.5, lon=13.4)
+
+    repo.upsert_many(product="test_product", metrics=[_metric(2020, loc), _metric(2021, loc)])
+    repo.upsert_many(product="other-product", metrics=[_metric(2020, loc)])
+
+    assert repo.is_partitioned()
+    assert repo.get_metric_for_location(product="test_product", location=loc, year=2021)
+    assert [
+        m.year
+        for m in repo.get_timeseries_for_location(
+            product="test_product", location=loc, start_year=2019, end_year=2022
+        )
+    ] == [2020, 2021]
+
+    with psycopg.connect(partitioned_dsn) as conn:
+        leaves = [
+            r[0]
+            for r in conn.execute(
+                "SELECT relid::regclass::text FROM pg_partition_tree('phenology_metrics') "
+                "WHERE isleaf ORDER BY 1"
+            ).fetchall()
+        ]
+        assert len(leaves) == 3
+
+        plan = "\n".join(
+            r[0]
+            for r in conn.execute(
+                "EXPLAIN SELECT * FROM phenology_metrics "
+                "WHERE product = 'test_product' AND year = 2020"
+            ).fetchall()
+        )
+    scanned = [leaf for leaf in leaves if leaf in plan]
+    assert scanned == [leaf for leaf in leaves if leaf.endswith("_2020") and "test_product" in leaf]
+
+
+@pytest.mark.integration
+def test_ensure_partitions_is_idempotent(partitioned_dsn: str):
+    repo = PostGISPhenologyRepository(dsn=partitioned_dsn)
+    repo.ensure_partitions(product="test_product", years=[2020, 2020])
+
+    # a fresh repo (no local cache) goes back to the database function
+    PostGISPhenologyRepository(dsn=partitioned_dsn).ensure_partitions(
+        product="test_product", years=[2020]
+    )
+
+
+@pytest.mark.integration
+def test_replace_year_swaps_partition(partitioned_dsn: str):
+    repo = PostGISPhenologyRepository(dsn=partitioned_dsn)
+    old = Location(lat=52.5, lon=13.4)
+    new = Location(lat=48.1, lon=11.6)
+    repo.upsert_many(product="test_product", metrics=[_metric(2020, old), _metric(2021, old)])
+
+    n = repo.replace_year(product="test_product", year=2020, metrics=[_metric(2020, new)])
+
+    assert n == 1
+    assert repo.get_metric_for_location(product="test_product", location=old, year=2020) is None
+    assert repo.get_metric_for_location(product="test_product", location=new, year=2020)
+    # other years untouched
+    assert repo.get_metric_for_location(product="test_product", location=old, year=2021)
+
+    with psycopg.connect(partitioned_dsn) as conn:
+        leaves = conn.execute(
+            "SELECT relid::regclass::text FROM pg_partition_tree('phenology_metrics') WHERE isleaf"
+        ).fetchall()
+        stray = conn.execute(
+            "SELECT count(*) FROM pg_tables WHERE tablename LIKE 'phenology_metrics_reload_%'"
+        ).fetchone()
+    assert len(leaves) == 2
+    assert stray == (0,)
+
+    # the swapped-in leaf still accepts upserts (unique constraint adopted on attach)
+    repo.upsert(product="test_product", metric=_metric(2020, new))
+
+
+@pytest.mark.integration
+def test_replace_year_failure_keeps_live_data(partitioned_dsn: str):
+    repo = PostGISPhenologyRepository(dsn=partitioned_dsn)
+    loc = Location(lat=52.5, lon=13.4)
+    repo.upsert_many(product="test_product", metrics=[_metric(2020, loc)])
+
+    with pytest.raises(ValueError):
+        repo.replace_year(product="test_product", year=2020, metrics=[_metric(2021, loc)])
+
+    assert repo.get_metric_for_location(product="test_product", location=loc, year=2020)
+
+
+@pytest.mark.integration
+def test_cluster_year_rewrites_leaf_in_geohash_order(partitioned_dsn: str):
+    repo = PostGISPhenologyRepository(dsn=partitioned_dsn)
+    locs = [Location(lat=50.0 + 0.01 * i, lon=5.0 + 0.01 * j) for i in range(5) for j in range(5)]
+    # interleave far-apart points so insertion order is not spatial order
+    repo.upsert_many(product="test_product", metrics=[_metric(2020, loc) for loc in locs[::-1]])
+    repo.upsert_many(product="test_product", metrics=[_metric(2021, locs[0])])
+
+    assert repo.cluster_year(product="test_product", year=2020) == len(locs)
+    repo.ensure_brin_index(pages_per_range=16)
+
+    with psycopg.connect(partitioned_dsn) as conn:
+        hashes = [
+            r[0]
+            for r in conn.execute(
+                "SELECT ST_GeoHash(geom, 12) FROM phenology_metrics "
+                "WHERE product = 'test_product' AND year = 2020 ORDER BY ctid"
+            ).fetchall()
+        ]
+        brin = conn.execute(
+            "SELECT count(*) FROM pg_indexes WHERE indexname = 'idx_phenology_metrics_geom_brin'"
+        ).fetchone()
+    assert hashes == sorted(hashes)
+    assert brin == (1,)
+
+    for loc in locs:
+        assert repo.get_metric_for_location(product="test_product", location=loc, year=2020)
+    assert repo.get_metric_for_location(product="test_product", location=locs[0], year=2021)
@@ -1,8 +1,10 @@
+from datetime import date, timedelta
 from pathlib import Path
 
 import pytest
 from fpts.api.main import create_app
 from fpts.config.settings import Settings
+from fpts.domain.models import Location, PhenologyMetric
 
 
 @pytest.fixture
@@ -11,3 +13,51 @@ def app_memory():
     return create_app(
         settings=Settings(phenology_repo_backend="memory", data_dir=str(fixtures_root))
     )
+
+
+def _box(x0, y0, x1, y1) -> list:
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]
+
+
+def _grid_metrics(
+    year: int,
+    *,
+    missing: tuple[tuple[int, int], ...] = (),
+    no_eos: tuple[tuple[int, int], ...] = (),
+) -> list[PhenologyMetric]:
+    # 11 x 11 points (i: lat, j: lon) on a 0.1 degree lattice over [10, 11] x [50, 51];
+    # (0, 0) has no season length, odd columns are not forest
+    return [
+        PhenologyMetric(
+            year=year,
+            location=Location(lat=round(50 + 0.1 * i, 6), lon=round(10 + 0.1 * j, 6)),
+            sos_date=date(year, 4, 1),
+            eos_date=(
+                None
+                if (i, j) in no_eos
+                else date(year, 4, 1) + timedelta(days=100 + i + year - 2020)
+            ),
+            season_length=None if (i, j) == (0, 0) else 100 + i + year - 2020,
+            is_forest=j % 2 == 0,
+        )
+        for i in range(11)
+        for j in range(11)
+        if (i, j) not in missing
+    ]
+
+
+@pytest.fixture
+def box():
+    """
+    Closed GeoJSON ring of the box [x0, x1] x [y0, y1]: box(x0, y0, x1, y1).
+    """
+    return _box
+
+
+@pytest.fixture
+def grid_metrics():
+    """
+    Metrics factory for the 11 x 11 test lattice: grid_metrics(year, missing=..., no_eos=...)
+    leaves out the `missing` (i, j) pixels and the end of season of the `no_eos` ones.
+    """
+    return _grid_metrics
@@ -1,7 +1,11 @@
+import json
 from datetime import date
+from unittest.mock import MagicMock
 
 from fastapi.testclient import TestClient
+from fpts.domain.errors import InvalidGeometryError
 from fpts.domain.models import Location, PhenologyMetric
+from fpts.query.service import QueryService
 
 
 def test_phenology_point_returns_seeded_metric(app_memory):
@@ -100,3 +104,237 @@ def test_phenology_point_auto_mode_returns_200(app_memory):
     )
 
     assert resp.status_code == 200
+
+
+def test_phenology_points_repo_mode_returns_metrics_in_order(app_memory):
+    repo = app_memory.state.phenology_repo
+    locs = [Location(lat=52.5, lon=13.4), Location(lat=48.1, lon=11.6)]
+    for loc in locs:
+        repo.add_metric(
+            product="test_product",
+            metric=PhenologyMetric(
+                year=2020,
+                location=loc,
+                sos_date=date(2020, 4, 15),
+                eos_date=date(2020, 10, 15),
+                season_length=183,
+                is_forest=True,
+            ),
+        )
+
+    client = TestClient(app_memory)
+    resp = client.post(
+        "/phenology/points",
+        params={"product": "test_product", "year": 2020, "mode": "repo"},
+        json={"locations": [{"lat": 48.1, "lon": 11.6}, {"lat": 52.5, "lon": 13.4}]},
+    )
+    assert resp.status_code == 200
+    assert [d["location"] for d in resp.json()] == [
+        {"lat": 48.1, "lon": 11.6},
+        {"lat": 52.5, "lon": 13.4},
+    ]
+
+
+def test_phenology_points_repo_mode_returns_404_when_any_missing(app_memory):
+    client = TestClient(app_memory)
+    resp = client.post(
+        "/phenology/points",
+        params={"product": "test_product", "year": 2020, "mode": "repo"},
+        json={"locations": [{"lat": 40.0, "lon": 10.0}]},
+    )
+    assert resp.status_code == 404
+
+
+def test_phenology_point_nearest_tolerance_returns_nearby_metric(app_memory):
+    repo = app_memory.state.phenology_repo
+    repo.add_metric(
+        product="test_product",
+        metric=PhenologyMetric(
+            year=2020,
+            location=Location(lat=52.5, lon=13.4),
+            sos_date=date(2020, 4, 15),
+            eos_date=date(2020, 10, 15),
+            season_length=183,
+            is_forest=True,
+        ),
+    )
+    client = TestClient(app_memory)
+    params = {"product": "test_product", "lat": 52.52, "lon": 13.41, "year": 2020}
+
+    assert client.get("/phenology/point", params=params).status_code == 404
+
+    too_far = client.get("/phenology/point", params={**params, "nearest_tolerance_deg": 0.01})
+    assert too_far.status_code == 404
+
+    resp = client.get("/phenology/point", params={**params, "nearest_tolerance_deg": 0.05})
+    assert resp.status_code == 200
+    assert resp.json()["location"] == {"lat": 52.5, "lon": 13.4}
+
+    ts = client.get(
+        "/phenology/timeseries",
+        params={
+            "product": "test_product",
+            "lat": 52.52,
+            "lon": 13.41,
+            "start_year": 2019,
+            "end_year": 2021,
+            "nearest_tolerance_deg": 0.05,
+        },
+    )
+    assert ts.status_code == 200
+    assert [m["year"] for m in ts.json()["metrics"]] == [2020]
+
+
+def test_phenology_export_streams_ndjson_and_csv(app_memory):
+    repo = app_memory.state.phenology_repo
+    for i in range(5):
+        repo.add_metric(
+            product="test_product",
+            metric=PhenologyMetric(
+                year=2020,
+                location=Location(lat=52.0 + i, lon=13.0),
+                sos_date=date(2020, 4, 15),
+                eos_date=None if i == 0 else date(2020, 10, 15),
+                season_length=None if i == 0 else 183,
+                is_forest=i % 2 == 0,
+            ),
+        )
+    repo.add_metric(
+        product="test_product",
+        metric=PhenologyMetric(
+            year=2021,
+            location=Location(lat=52.0, lon=13.0),
+            sos_date=None,
+            eos_date=None,
+            season_length=None,
+            is_forest=False,
+        ),
+    )
+    client = TestClient(app_memory)
+    params = {"product": "test_product", "year": 2020}
+
+    resp = client.get("/phenology/export", params=params)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["lat"] for r in rows] == [52.0, 53.0, 54.0, 55.0, 56.0]
+    assert rows[0] == {
+        "product": "test_product",
+        "year": 2020,
+        "lat": 52.0,
+        "lon": 13.0,
+        "sos_date": "2020-04-15",
+        "eos_date": None,
+        "season_length": None,
+        "is_forest": True,
+    }
+
+    resp = client.get(
+        "/phenology/export", params={**params, "format": "csv", "bbox": "12.5,52.5,13.5,54.5"}
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    assert resp.text.splitlines() == [
+        "product,year,lat,lon,sos_date,eos_date,season_length,is_forest",
+        "test_product,2020,53.0,13.0,2020-04-15,2020-10-15,183,False",
+        "test_product,2020,54.0,13.0,2020-04-15,2020-10-15,183,True",
+    ]
+
+    assert client.get("/phenology/export", params={**params, "bbox": "1,2,3"}).status_code == 400
+    assert client.get("/phenology/export", params={**params, "year": 2019}).text == ""
+
+
+def test_phenology_area_batch_returns_stats_keyed_by_id(app_memory):
+    repo = MagicMock()
+    repo.get_area_stats_many.return_value = [{"n": 3, "forest_fraction": 1.0}, None]
+    app_memory.state.query_service = QueryService(repository=repo)
+    square = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}
+    client = TestClient(app_memory)
+    params = {"product": "test_product", "year": 2020}
+
+    resp = client.post(
+        "/phenology/area/batch",
+        params=params,
+        json={
+            "polygons": [{"id": "north", "geometry": square}, {"id": "south", "geometry": square}]
+        },
+    )
+    assert resp.status_code == 200
+    assert resp.json()["results"] == {
+        "north": {
+            "n": 3,
+            "mean_season_length": None,
+            "median_season_length": None,
+            "forest_fraction": 1.0,
+        },
+        "south": None,
+    }
+    assert repo.get_area_stats_many.call_args.kwargs["polygons"] == [square, square]
+
+    repo.get_area_stats_many.side_effect = InvalidGeometryError([1])
+    resp = client.post(
+        "/phenology/area/batch",
+        params=params,
+        json={"polygons": [{"id": "a", "geometry": square}, {"id": "b", "geometry": square}]},
+    )
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Invalid GeoJSON geometry for ids: b"
+
+    resp = client.post(
+        "/phenology/area/batch",
+        params=params,
+        json={"polygons": [{"id": "a", "geometry": square}, {"id": "a", "geometry": square}]},
+    )
+    assert resp.status_code == 422
+
+
+def test_phenology_area_stats_are_not_implemented_by_the_memory_backend(app_memory):
+    square = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}
+    client = TestClient(app_memory)
+    params = {"product": "test_product", "year": 2020}
+
+    for path, query, body in [
+        ("/phenology/area", params, {"geometry": square}),
+        ("/phenology/area/batch", params, {"polygons": [{"id": "a", "geometry": square}]}),
+        (
+            "/phenology/area/years",
+            {"product": "test_product", "start_year": 2019, "end_year": 2021},
+            {"geometry": square},
+        ),
+    ]:
+        resp = client.post(path, params=query, json=body)
+        assert resp.status_code == 501
+        assert resp.json() == {
+            "error": "not_implemented",
+            "message": "Area stats require the postgis or columnar backend",
+        }
+
+
+def test_phenology_area_years_returns_per_year_stats(app_memory):
+    repo = MagicMock()
+    repo.get_area_stats_years.return_value = [
+        {"year": 2019, "n": 2, "forest_fraction": 0.5, "mean_season_length": 170.0},
+        {"year": 2021, "n": 3, "forest_fraction": 1.0, "mean_season_length": 180.0},
+    ]
+    app_memory.state.query_service = QueryService(repository=repo)
+    square = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}
+    client = TestClient(app_memory)
+    params = {"product": "test_product", "start_year": 2019, "end_year": 2021}
+
+    resp = client.post("/phenology/area/years", params=params, json={"geometry": square})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [y["year"] for y in body["years"]] == [2019, 2021]
+    assert body["years"][1]["mean_season_length"] == 180.0
+    assert repo.get_area_stats_years.call_count == 1
+
+    resp = client.post(
+        "/phenology/area/years", params={**params, "end_year": 2018}, json={"geometry": square}
+    )
+    assert resp.status_code == 400
+
+    repo.get_area_stats_years.return_value = []
+    resp = client.post(
+        "/phenology/area/years", params={**params, "product": "other"}, json={"geometry": square}
+    )
+    assert resp.status_code == 404
@@ -0,0 +1,55 @@
+import random
+import statistics
+from collections import Counter
+
+import pytest
+from fpts.domain.area_summary import SEASON_LENGTH_MAX_DAYS, SummaryLayout
+
+
+def _histogram(layout: SummaryLayout, values: list[int]) -> tuple[list[int], list[int]]:
+    counts = Counter(layout.bin_index(v) for v in values)
+    bins = sorted(counts)
+    return bins, [counts[b] for b in bins]
+
+
+def test_median_is_exact_with_one_day_bins():
+    layout = SummaryLayout(bin_days=1)
+    rng = random.Random(0)
+    for n in (1, 2, 7, 100):
+        values = [rng.randrange(0, SEASON_LENGTH_MAX_DAYS + 1) for _ in range(n)]
+        assert layout.median(*_histogram(layout, values)) == statistics.median(values)
+
+
+@pytest.mark.parametrize("bin_days", [2, 5, 16])
+def test_median_within_documented_bin_error(bin_days: int):
+    layout = SummaryLayout(bin_days=bin_days)
+    rng = random.Random(bin_days)
+    for n in (1, 2, 51, 1000):
+        values = [rng.randrange(90, 260) for _ in range(n)]
+        estimate = layout.median(*_histogram(layout, values))
+        assert abs(estimate - statistics.median(values)) <= layout.max_median_error_days
+
+
+def test_histograms_merge_by_adding_counts():
+    layout = SummaryLayout(bin_days=5)
+    a, b = [120, 180, 181], [200, 17]
+    bins_a, counts_a = _histogram(layout, a)
+    bins_b, counts_b = _histogram(layout, b)
+
+    merged = layout.median(bins_a + bins_b, counts_a + counts_b)
+    assert merged == layout.median(*_histogram(layout, a + b))
+
+
+def test_bin_index_clamps_out_of_range_lengths():
+    layout = SummaryLayout(bin_days=5)
+    assert layout.bin_index(-3) == 0
+    assert layout.bin_index(SEASON_LENGTH_MAX_DAYS) == layout.n_bins - 1
+    assert layout.bin_index(1000) == layout.n_bins - 1
+    assert layout.median([], []) is None
+
+
+def test_layout_validation():
+    with pytest.raises(ValueError):
+        SummaryLayout(cell_deg=0)
+    with pytest.raises(ValueError):
+        SummaryLayout(bin_days=0)
@@ -0,0 +1,182 @@
+import csv
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from fpts.api.main import create_app
+from fpts.config.settings import Settings
+from fpts.domain.errors import InvalidGeometryError
+from fpts.domain.models import Location, PhenologyMetric
+from fpts.storage.columnar_repository import ColumnarPhenologyRepository
+
+
+@pytest.fixture
+def repo(grid_metrics) -> ColumnarPhenologyRepository:
+    repo = ColumnarPhenologyRepository(index_cell_deg=0.25)
+    repo.add_metrics("p", grid_metrics(2020))
+    return repo
+
+
+def test_area_stats_are_boundary_inclusive_and_respect_holes(repo, box):
+
+    def stats(coords, **kwargs):
+        return repo.get_area_stats(
+            product="p",
+            year=2020,
+            polygon_geojson={"type": "Polygon", "coordinates": coords},
+            season_length_stat="both",
+            **kwargs,
+        )
+
+    # edges on lattice lines: 3 x 3 points, two of the three columns forest
+    inner = stats([box(10.2, 50.2, 10.4, 50.4)])
+    assert inner["n"] == 9
+    assert inner["forest_fraction"] == pytest.approx(2 / 3)
+    assert inner["mean_season_length"] == pytest.approx(103)
+    assert inner["median_season_length"] == pytest.approx(103)
+
+    # a hole strictly containing the centre point only
+    holed = stats([box(10.2, 50.2, 10.4, 50.4), box(10.25, 50.25, 10.35, 50.35)])
+    assert holed["n"] == 8
+
+    # the corner row without season_length counts in n but not in mean / median
+    corner = stats([box(9.95, 49.95, 10.05, 50.05)])
+    assert corner["n"] == 1
+    assert corner["mean_season_length"] is None
+
+    assert stats([box(10.2, 50.2, 10.4, 50.4)], only_forest=True)["n"] == 6
+    assert stats([box(10.2, 50.2, 10.4, 50.4)], min_season_length=104)["n"] == 3
+    assert stats([box(20, 20, 21, 21)]) is None
+    assert (
+        repo.get_area_stats(
+            product="p",
+            year=2019,
+            polygon_geojson={"type": "Polygon", "coordinates": [box(0, 0, 1, 1)]},
+        )
+        is None
+    )
+
+
+def test_triangle_and_multipolygon_against_brute_force(repo, box):
+    triangle = [[10.0, 50.0], [11.0, 50.0], [10.0, 51.0], [10.0, 50.0]]
+    # lattice points with x + y <= 1 (in 0.1 steps), edges included
+    expected = sum(1 for i in range(11) for j in range(11) if i + j <= 10)
+
+    got = repo.get_area_stats(
+        product="p", year=2020, polygon_geojson={"type": "Polygon", "coordinates": [triangle]}
+    )
+    assert got["n"] == expected
+
+    multi = {
+        "type": "MultiPolygon",
+        "coordinates": [[box(10.0, 50.0, 10.1, 50.1)], [box(10.9, 50.9, 11.0, 51.0)]],
+    }
+    assert repo.get_area_stats(product="p", year=2020, polygon_geojson=multi)["n"] == 8
+
+
+def test_bbox_index_matches_a_full_scan():
+    rng = np.random.default_rng(0)
+    repo = ColumnarPhenologyRepository(index_cell_deg=0.5)
+    lats, lons = rng.uniform(-60, 60, 2_000), rng.uniform(-179, 179, 2_000)
+    repo.add_metrics(
+        "p",
+        [
+            PhenologyMetric(
+                year=2020,
+                location=Location(lat=float(lat), lon=float(lon)),
+                sos_date=None,
+                eos_date=None,
+                season_length=None,
+                is_forest=False,
+            )
+            for lat, lon in zip(lats, lons)
+        ],
+    )
+    columns = repo.year_columns("p", 2020)
+
+    for bbox in [(-10.3, -5.2, 20.7, 30.1), (-179, -60, 179, 60), (100.0, 10.0, 100.2, 10.2)]:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        idx = columns.rows_in_bbox(min_lon, min_lat, max_lon, max_lat, 0.5)
+        full = (
+            (columns.lon >= min_lon)
+            & (columns.lon <= max_lon)
+            & (columns.lat >= min_lat)
+            & (columns.lat <= max_lat)
+        )
+        assert sorted(idx.tolist()) == np.flatnonzero(full).tolist()
+
+
+def test_invalid_geometries_and_batch_variants(repo, box):
+    open_ring = {"type": "Polygon", "coordinates": [[[10, 50], [11, 50], [11, 51], [10, 51]]]}
+    square = {"type": "Polygon", "coordinates": [box(10.2, 50.2, 10.4, 50.4)]}
+
+    with pytest.raises(ValueError):
+        repo.get_area_stats(product="p", year=2020, polygon_geojson=open_ring)
+    with pytest.raises(InvalidGeometryError) as exc:
+        repo.get_area_stats_many(product="p", year=2020, polygons=[square, open_ring])
+    assert exc.value.indexes == [1]
+
+    many = repo.get_area_stats_many(product="p", year=2020, polygons=[square, square])
+    assert [s["n"] for s in many] == [9, 9]
+
+    years = repo.get_area_stats_years(
+        product="p", start_year=2018, end_year=2021, polygon_geojson=square
+    )
+    assert [y["year"] for y in years] == [2020]
+
+
+def test_writes_invalidate_columns(repo, box):
+    square = {"type": "Polygon", "coordinates": [box(10.2, 50.2, 10.4, 50.4)]}
+    assert repo.get_area_stats(product="p", year=2020, polygon_geojson=square)["n"] == 9
+
+    repo.add_metric(
+        "p",
+        PhenologyMetric(
+            year=2020,
+            location=Location(lat=50.25, lon=10.25),
+            sos_date=None,
+            eos_date=None,
+            season_length=None,
+            is_forest=True,
+        ),
+    )
+    assert repo.get_area_stats(product="p", year=2020, polygon_geojson=square)["n"] == 10
+
+
+def test_columnar_backend_serves_area_endpoint_from_seed_csv(tmp_path, box):
+    seed = tmp_path / "seed.csv"
+    with seed.open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(
+            ["product", "year", "lon", "lat", "sos_date", "eos_date", "season_length", "is_forest"]
+        )
+        for i in range(4):
+            w.writerow(
+                [
+                    "ndvi_synth",
+                    2020,
+                    10 + 0.1 * i,
+                    50.0,
+                    "2020-04-01",
+                    "2020-10-01",
+                    183,
+                    i % 2 == 0,
+                ]
+            )
+
+    app = create_app(Settings(phenology_repo_backend="columnar", memory_seed_csv=str(seed)))
+    client = TestClient(app)
+    resp = client.post(
+        "/phenology/area",
+        params={"year": 2020, "product": "ndvi_synth"},
+        json={"geometry": {"type": "Polygon", "coordinates": [box(9.95, 49.95, 10.25, 50.05)]}},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["n"] == 3
+    assert resp.json()["forest_fraction"] == pytest.approx(2 / 3)
+
+    resp = client.get(
+        "/phenology/point",
+        params={"product": "ndvi_synth", "lat": 50.0, "lon": 10.1, "year": 2020},
+    )
+    assert resp.status_code == 200
@@ -0,0 +1,37 @@
+from datetime import date
+
+from fpts.domain.models import Location, PhenologyMetric
+from fpts.query.export import iter_csv, iter_ndjson
+
+
+def _metrics(n: int):
+    for i in range(n):
+        yield PhenologyMetric(
+            year=2020,
+            location=Location(lat=50.0, lon=float(i % 180)),
+            sos_date=date(2020, 4, 1),
+            eos_date=date(2020, 10, 1),
+            season_length=183,
+            is_forest=True,
+        )
+
+
+def test_exports_are_chunked_and_lazy():
+    consumed = 0
+
+    def counting():
+        nonlocal consumed
+        for m in _metrics(2_500):
+            consumed += 1
+            yield m
+
+    chunks = iter_ndjson("p", counting(), chunk_rows=1_000)
+    first = next(chunks)
+    assert first.count(b"\n") == 1_000
+    assert consumed == 1_000
+    assert [c.count(b"\n") for c in chunks] == [1_000, 500]
+
+
+def test_csv_header_is_written_for_empty_export():
+    chunks = list(iter_csv("p", _metrics(0)))
+    assert chunks == [b"product,year,lat,lon,sos_date,eos_date,season_length,is_forest\n"]
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import rasterio
+from fpts.ingestion.cog import (
+    COG_BLOCKSIZE,
+    cog_creation_options,
+    convert_year_to_cog,
+    is_categorical_asset,
+    is_cog,
+)
+from fpts.ingestion.mod13q1 import DownloadRecord, sha256_file, write_checksums
+from rasterio.transform import from_origin
+
+
+def _write_striped(path: Path, value: int, data: np.ndarray | None = None) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if data is None:
+        data = (np.arange(600 * 600) % 97 + value).astype(np.int16).reshape(600, 600)
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        height=600,
+        width=600,
+        count=1,
+        dtype="int16",
+        crs="EPSG:4326",
+        transform=from_origin(west=0.0, north=51.0, xsize=0.001, ysize=0.001),
+        nodata=-3000,
+    ) as dst:
+        dst.write(data, 1)
+
+
+def test_convert_year_to_cog_tiles_compresses_and_updates_checksums(tmp_path: Path) -> None:
+    year_dir = tmp_path / "raw" / "mod13q1" / "2020"
+    _write_striped(year_dir / "doy_001.tif", 0)
+    _write_striped(year_dir / "doy_017.tif", 100)
+    write_checksums(
+        [
+            DownloadRecord(
+                filename="doy_001.tif",
+                sha256=sha256_file(year_dir / "doy_001.tif"),
+                bytes=(year_dir / "doy_001.tif").stat().st_size,
+                href="https://example.com/a.tif",
+                item_id="a",
+                dt="2020-01-01T00:00:00Z",
+                doy=1,
+            )
+        ],
+        year_dir / "checksums.json",
+    )
+    with rasterio.open(year_dir / "doy_001.tif") as src:
+        original = src.read(1)
+
+    records = convert_year_to_cog(data_dir=tmp_path, product="mod13q1", year=2020, max_workers=2)
+
+    for path in sorted(year_dir.glob("doy_*.tif")):
+        assert is_cog(path)
+        with rasterio.open(path) as src:
+            assert src.block_shapes[0] == (COG_BLOCKSIZE, COG_BLOCKSIZE)
+            assert src.compression is not None
+            assert src.overviews(1)
+    with rasterio.open(year_dir / "doy_001.tif") as src:
+        assert np.array_equal(src.read(1), original)
+
+    files = json.loads((year_dir / "checksums.json").read_text())["files"]
+    assert [f["filename"] for f in files] == ["doy_001.tif", "doy_017.tif"]
+    assert files[0]["item_id"] == "a"  # provenance kept
+    assert files[1]["doy"] == 17
+    for rec, f in zip(records, files, strict=True):
+        assert f["sha256"] == rec.sha256 == sha256_file(year_dir / f["filename"])
+
+
+def test_convert_year_to_cog_skips_files_already_converted(tmp_path: Path) -> None:
+    year_dir = tmp_path / "raw" / "mod13q1" / "2020"
+    _write_striped(year_dir / "doy_001.tif", 0)
+
+    first = convert_year_to_cog(data_dir=tmp_path, product="mod13q1", year=2020)
+    mtime = (year_dir / "doy_001.tif").stat().st_mtime_ns
+    second = convert_year_to_cog(data_dir=tmp_path, product="mod13q1", year=2020)
+
+    assert second == first
+    assert (year_dir / "doy_001.tif").stat().st_mtime_ns == mtime
+
+
+def test_qa_companions_keep_valid_codes_in_overviews(tmp_path: Path) -> None:
+    year_dir = tmp_path / "raw" / "mod13q1" / "2020"
+    # pixel_reliability-like classes 0 and 3 in a checkerboard: averaging gives 1 or 2
+    codes = np.where((np.indices((600, 600)).sum(axis=0) % 2) == 0, 0, 3).astype(np.int16)
+    _write_striped(year_dir / "doy_001.tif", 0)
+    _write_striped(year_dir / "250m_16_days_pixel_reliability" / "doy_001.tif", 0, codes)
+
+    convert_year_to_cog(data_dir=tmp_path, product="mod13q1", year=2020)
+
+    with rasterio.open(year_dir / "250m_16_days_pixel_reliability" / "doy_001.tif") as src:
+        assert src.overviews(1)
+        overview = src.read(1, out_shape=(1, 300, 300))
+        assert np.array_equal(src.read(1), codes)
+    assert set(np.unique(overview)) <= {0, 3}
+
+
+def test_creation_options_by_asset_kind() -> None:
+    assert is_categorical_asset("250m_16_days_pixel_reliability")
+    assert is_categorical_asset("250m_16_days_VI_Quality")
+    assert not is_categorical_asset("250m_16_days_EVI")
+
+    ndvi = cog_creation_options("int16")
+    assert (ndvi["OVERVIEW_RESAMPLING"], ndvi["PREDICTOR"]) == ("AVERAGE", "STANDARD")
+    assert cog_creation_options("float32")["PREDICTOR"] == "FLOATING_POINT"
+    qa = cog_creation_options("int16", categorical=True)
+    assert (qa["OVERVIEW_RESAMPLING"], qa["PREDICTOR"]) == ("NEAREST", "NO")
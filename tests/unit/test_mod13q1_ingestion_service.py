@@ -6,37 +6,45 @@ from types import SimpleNamespace
 
 import fpts.ingestion.mod13q1 as mod13q1
 from fpts.config.settings import Settings
-from fpts.ingestion.mod13q1 import Mod13Q1IngestionService
+from fpts.ingestion.mod13q1 import Mod13Q1IngestionService, read_plan
 
 ndvi_key = Settings().mod13q1_ndvi_asset_key
 
 
 class _FakeSearch:
-    def __init__(self, items):
+    def __init__(self, items, page_size):
         self._items = items
+        self._page_size = page_size
 
-    def items(self):
-        return list(self._items)
+    def pages_as_dicts(self):
+        for i in range(0, len(self._items), self._page_size):
+            yield {
+                "type": "FeatureCollection",
+                "features": [item.to_dict() for item in self._items[i : i + self._page_size]],
+            }
 
 
 class _FakeCatalog:
-    def __init__(self, items):
+    def __init__(self, items, page_size=100):
         self._items = items
+        self._page_size = page_size
+        self.search_kwargs = None
 
     def search(self, **kwargs):
-        return _FakeSearch(self._items)
-
-
-class _FakeSigned:
-    def __init__(self, d):
-        self._d = d
+        self.search_kwargs = kwargs
+        return _FakeSearch(self._items, self._page_size)
 
-    def to_dict(self):
-        return self._d
 
+class _FakePc:
+    def __init__(self):
+        self.sign_calls = 0
 
-def _fake_sign(item):
-    return _FakeSigned(item.to_dict())
+    def sign(self, page, copy=True):
+        self.sign_calls += 1
+        for feature in page["features"]:
+            for asset in feature["assets"].values():
+                asset["href"] += "?sig=x"
+        return page
 
 
 def test_build_plan_extracts_ndvi_and_sorts_by_doy(monkeypatch):
@@ -58,7 +66,7 @@ def test_build_plan_extracts_ndvi_and_sorts_by_doy(monkeypatch):
         ),
     ]
 
-    monkeypatch.setattr(mod13q1, "pc", SimpleNamespace(sign=_fake_sign))
+    monkeypatch.setattr(mod13q1, "pc", _FakePc())
     monkeypatch.setattr(mod13q1.Client, "open", lambda *_args, **_kw: _FakeCatalog(fake_items))
 
     svc = Mod13Q1IngestionService(settings=Settings())
@@ -70,11 +78,59 @@ def test_build_plan_extracts_ndvi_and_sorts_by_doy(monkeypatch):
     assert [a.item_id for a in plan.assets] == ["a", "b"]
     assert [a.doy for a in plan.assets] == [1, 60]
     assert [a.href for a in plan.assets] == [
-        "https://example.com/ndvi_a.tif",
-        "https://example.com/ndvi_b.tif",
+        "https://example.com/ndvi_a.tif?sig=x",
+        "https://example.com/ndvi_b.tif?sig=x",
     ]
 
 
+def _items(n: int) -> list[SimpleNamespace]:
+    def _item(i: int) -> SimpleNamespace:
+        dt = f"2020-{1 + i // 28:02d}-{1 + i % 28:02d}T00:00:00Z"
+        return SimpleNamespace(
+            to_dict=lambda: {
+                "id": f"item-{i:03d}",
+                "properties": {"datetime": dt, "updated": "2021-01-01T00:00:00Z"},
+                "assets": {ndvi_key: {"href": f"https://example.com/{i}.tif"}},
+            }
+        )
+
+    return [_item(i) for i in range(n)]
+
+
+def test_write_manifest_stream_signs_once_per_page_and_round_trips(monkeypatch, tmp_path: Path):
+    fake_pc = _FakePc()
+    catalog = _FakeCatalog(_items(25), page_size=10)
+    monkeypatch.setattr(mod13q1, "pc", fake_pc)
+    monkeypatch.setattr(mod13q1.Client, "open", lambda *_args, **_kw: catalog)
+
+    svc = Mod13Q1IngestionService(settings=Settings())
+    out = tmp_path / "manifest.json"
+
+    n = svc.write_manifest_stream(year=2020, bbox=(0.0, 0.0, 1.0, 1.0), out_path=out)
+
+    assert n == 25
+    assert fake_pc.sign_calls == 3  # one bulk sign per page
+    assert catalog.search_kwargs["limit"] == Settings().pc_stac_page_size
+
+    plan = read_plan(out)
+    assert plan.year == 2020
+    assert plan.bbox == (0.0, 0.0, 1.0, 1.0)
+    assert [a.item_id for a in plan.assets] == [f"item-{i:03d}" for i in range(25)]
+    assert plan.assets[0].href == "https://example.com/0.tif?sig=x"
+    assert plan.assets[0].updated == "2021-01-01T00:00:00Z"
+
+
+def test_write_manifest_stream_handles_empty_search(monkeypatch, tmp_path: Path):
+    monkeypatch.setattr(mod13q1, "pc", _FakePc())
+    monkeypatch.setattr(mod13q1.Client, "open", lambda *_args, **_kw: _FakeCatalog([]))
+
+    svc = Mod13Q1IngestionService(settings=Settings())
+    out = tmp_path / "manifest.json"
+
+    assert svc.write_manifest_stream(year=2020, bbox=(0.0, 0.0, 1.0, 1.0), out_path=out) == 0
+    assert read_plan(out).assets == []
+
+
 def test_write_manifest_is_json(tmp_path: Path):
     svc = Mod13Q1IngestionService(settings=Settings())
 
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import fpts.ingestion.mod13q1 as mod13q1
+import numpy as np
+import rasterio
+from fpts.config.settings import Settings
+from fpts.ingestion.mod13q1 import Mod13Q1AssetRef, Mod13Q1IngestionService, Mod13Q1Plan
+from fpts.processing.ndvi_stack import load_band_cube
+from fpts.storage.local_raster_repository import LocalRasterRepository
+from rasterio.transform import from_origin
+
+NDVI = "250m_16_days_NDVI"
+EVI = "250m_16_days_EVI"
+QA = "250m_16_days_pixel_reliability"
+
+
+def _settings() -> Settings:
+    return Settings(mod13q1_ndvi_asset_key=NDVI, mod13q1_extra_asset_keys=[EVI, QA])
+
+
+def _write_tif(path: Path, value: float) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        height=4,
+        width=4,
+        count=1,
+        dtype="float32",
+        crs="EPSG:4326",
+        transform=from_origin(west=-0.5, north=51.5, xsize=0.01, ysize=0.01),
+        nodata=-9999.0,
+    ) as dst:
+        dst.write(np.full((4, 4), value, dtype=np.float32), 1)
+
+
+def test_asset_refs_from_item_returns_every_configured_key() -> None:
+    item = {
+        "id": "x",
+        "properties": {"datetime": "2020-01-17T00:00:00Z"},
+        "assets": {key: {"href": f"https://example.com/{key}.tif"} for key in (NDVI, EVI, QA)},
+    }
+    svc = Mod13Q1IngestionService(settings=_settings())
+
+    refs = mod13q1._asset_refs_from_item(item, svc.asset_keys)
+
+    assert [r.asset_key for r in refs] == [NDVI, EVI, QA]
+    assert {r.doy for r in refs} == {17}
+
+
+def test_fetch_plan_writes_companion_assets_next_to_ndvi(monkeypatch, tmp_path: Path) -> None:
+    sessions = set()
+
+    def _download(url: str, out_path: Path, *, session=None, **_kw) -> tuple[str, int]:
+        sessions.add(id(session))
+        _write_tif(out_path, float(len(url)))
+        return ("sha-" + url, 1)
+
+    monkeypatch.setattr(mod13q1, "download_to_path", _download)
+
+    assets = [
+        Mod13Q1AssetRef(
+            item_id=f"item-{doy}",
+            dt="2020-01-01T00:00:00Z",
+            doy=doy,
+            asset_key=key,
+            href=f"https://example.com/{doy}/{key}.tif",
+        )
+        for doy in (1, 17)
+        for key in (NDVI, EVI, QA)
+    ]
+    plan = Mod13Q1Plan(collection="c", year=2020, bbox=(0.0, 0.0, 1.0, 1.0), assets=assets)
+    svc = Mod13Q1IngestionService(settings=_settings())
+
+    records = svc.fetch_plan(plan, data_dir=tmp_path, max_workers=3)
+
+    assert [r.filename for r in records] == [
+        "doy_001.tif",
+        f"{EVI}/doy_001.tif",
+        f"{QA}/doy_001.tif",
+        "doy_017.tif",
+        f"{EVI}/doy_017.tif",
+        f"{QA}/doy_017.tif",
+    ]
+    assert len(sessions) == 1  # one shared HTTP session
+
+    year_dir = tmp_path / "raw" / "mod13q1" / "2020"
+    files = json.loads((year_dir / "checksums.json").read_text())["files"]
+    assert len(files) == 6
+
+    repo = LocalRasterRepository(data_dir=tmp_path)
+    assert [p.name for p in repo.list_ndvi_stack_paths("mod13q1", 2020)] == [
+        "doy_001.tif",
+        "doy_017.tif",
+    ]
+
+    cube = load_band_cube(
+        {
+            "ndvi": repo.list_ndvi_stack_paths("mod13q1", 2020),
+            "evi": repo.list_band_stack_paths("mod13q1", 2020, EVI),
+            "reliability": repo.list_band_stack_paths("mod13q1", 2020, QA),
+        }
+    )
+    assert cube.dims == ("time", "band", "y", "x")
+    assert cube["band"].values.tolist() == ["ndvi", "evi", "reliability"]
+    assert cube["time"].values.tolist() == [1, 17]
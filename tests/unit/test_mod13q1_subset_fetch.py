@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import replace
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pytest
+import rasterio
+from fpts.config.settings import Settings
+from fpts.ingestion.mod13q1 import Mod13Q1AssetRef, Mod13Q1IngestionService, Mod13Q1Plan
+from rasterio.transform import from_origin
+
+ndvi_key = Settings().mod13q1_ndvi_asset_key
+
+
+class _RangeRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Static file handler with single-range support (like S3/Azure blob) and byte accounting.
+    """
+
+    bytes_served = 0
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        path = Path(self.translate_path(self.path))
+        range_header = self.headers.get("Range")
+        if not path.is_file() or not range_header:
+            return super().do_GET()
+
+        size = path.stat().st_size
+        start_s, end_s = range_header.removeprefix("bytes=").split(",")[0].split("-")
+        start = int(start_s)
+        end = min(int(end_s) if end_s else size - 1, size - 1)
+
+        with path.open("rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+
+        self.send_response(206)
+        self.send_header("Content-Type", "image/tiff")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        type(self).bytes_served += len(body)
+
+
+@pytest.fixture
+def static_server(tmp_path: Path):
+    root = tmp_path / "remote"
+    root.mkdir()
+    _RangeRequestHandler.bytes_served = 0
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(_RangeRequestHandler, directory=str(root))
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield root, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _write_tiled_tile(path: Path) -> None:
+    # 1024x1024 int16 "tile" at 0.001 deg covering lon [0, 1.024], lat [50.0, 51.024]
+    data = (np.arange(1024 * 1024, dtype=np.int64) % 10_000).astype(np.int16).reshape(1024, 1024)
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        height=1024,
+        width=1024,
+        count=1,
+        dtype="int16",
+        crs="EPSG:4326",
+        transform=from_origin(west=0.0, north=51.024, xsize=0.001, ysize=0.001),
+        nodata=-3000,
+        tiled=True,
+        blockxsize=256,
+        blockysize=256,
+    ) as dst:
+        dst.write(data, 1)
+
+
+def test_fetch_plan_subset_reads_only_bbox_window(static_server, tmp_path: Path) -> None:
+    root, base_url = static_server
+    remote = root / "tile.tif"
+    _write_tiled_tile(remote)
+
+    plan = Mod13Q1Plan(
+        collection="c",
+        year=2020,
+        bbox=(0.1005, 50.9005, 0.2005, 51.0005),
+        assets=[
+            Mod13Q1AssetRef(
+                item_id="x",
+                dt="2020-01-01T00:00:00Z",
+                doy=1,
+                asset_key=ndvi_key,
+                href=f"{base_url}/tile.tif",
+            )
+        ],
+    )
+
+    svc = Mod13Q1IngestionService(settings=Settings())
+    records = svc.fetch_plan(plan, data_dir=tmp_path / "data", subset=True)
+
+    out = tmp_path / "data" / "raw" / "mod13q1" / "2020" / "doy_001.tif"
+    assert [r.filename for r in records] == ["doy_001.tif"]
+    assert records[0].window == {"col_off": 100, "row_off": 23, "width": 101, "height": 101}
+
+    with rasterio.open(out) as cropped, rasterio.open(remote) as full:
+        assert (cropped.width, cropped.height) == (101, 101)
+        assert cropped.bounds.left <= 0.1005 and cropped.bounds.right >= 0.2005
+        expected = full.read(1, window=((23, 124), (100, 201)))
+        assert np.array_equal(cropped.read(1), expected)
+
+    # only the header and the intersecting tiles went over the wire
+    assert 0 < _RangeRequestHandler.bytes_served < remote.stat().st_size / 2
+
+    checksums = json.loads((out.parent / "checksums.json").read_text())
+    assert checksums["files"][0]["window"] == records[0].window
+
+
+def test_fetch_plan_subset_keeps_window_for_existing_files(static_server, tmp_path: Path) -> None:
+    root, base_url = static_server
+    _write_tiled_tile(root / "tile.tif")
+
+    plan = Mod13Q1Plan(
+        collection="c",
+        year=2020,
+        bbox=(0.1005, 50.9005, 0.2005, 51.0005),
+        assets=[
+            Mod13Q1AssetRef(
+                item_id="x",
+                dt="2020-01-01T00:00:00Z",
+                doy=1,
+                asset_key=ndvi_key,
+                href=f"{base_url}/tile.tif",
+            )
+        ],
+    )
+
+    svc = Mod13Q1IngestionService(settings=Settings())
+    first = svc.fetch_plan(plan, data_dir=tmp_path / "data", subset=True)
+    second = svc.fetch_plan(plan, data_dir=tmp_path / "data", subset=True)
+
+    assert second == first
+
+
+def test_fetch_plan_subset_refetches_files_of_another_bbox_or_mode(
+    static_server, tmp_path: Path
+) -> None:
+    root, base_url = static_server
+    _write_tiled_tile(root / "tile.tif")
+
+    plan = Mod13Q1Plan(
+        collection="c",
+        year=2020,
+        bbox=(0.1005, 50.9005, 0.2005, 51.0005),
+        assets=[
+            Mod13Q1AssetRef(
+                item_id="x",
+                dt="2020-01-01T00:00:00Z",
+                doy=1,
+                asset_key=ndvi_key,
+                href=f"{base_url}/tile.tif",
+            )
+        ],
+    )
+    other_bbox = replace(plan, bbox=(0.5005, 50.5005, 0.5505, 50.5505))
+    data_dir = tmp_path / "data"
+    out = data_dir / "raw" / "mod13q1" / "2020" / "doy_001.tif"
+    svc = Mod13Q1IngestionService(settings=Settings())
+
+    # a full tile on disk is not reused as a crop
+    svc.fetch_plan(plan, data_dir=data_dir)
+    records = svc.fetch_plan(plan, data_dir=data_dir, subset=True)
+    assert records[0].window == {"col_off": 100, "row_off": 23, "width": 101, "height": 101}
+    with rasterio.open(out) as cropped:
+        assert (cropped.width, cropped.height) == (101, 101)
+
+    # nor a crop of another bbox
+    records = svc.fetch_plan(other_bbox, data_dir=data_dir, subset=True)
+    assert records[0].window == {"col_off": 500, "row_off": 473, "width": 51, "height": 51}
+    with rasterio.open(out) as cropped:
+        assert (cropped.width, cropped.height) == (51, 51)
+
+    # and a crop is not reused as the full tile
+    records = svc.fetch_plan(plan, data_dir=data_dir)
+    assert records[0].window is None
+    with rasterio.open(out) as full:
+        assert (full.width, full.height) == (1024, 1024)
+
+
+def test_fetch_plan_subset_rejects_disjoint_bbox(static_server, tmp_path: Path) -> None:
+    root, base_url = static_server
+    _write_tiled_tile(root / "tile.tif")
+
+    plan = Mod13Q1Plan(
+        collection="c",
+        year=2020,
+        bbox=(10.0, 10.0, 11.0, 11.0),
+        assets=[
+            Mod13Q1AssetRef(
+                item_id="x",
+                dt="2020-01-01T00:00:00Z",
+                doy=1,
+                asset_key=ndvi_key,
+                href=f"{base_url}/tile.tif",
+            )
+        ],
+    )
+
+    svc = Mod13Q1IngestionService(settings=Settings())
+    with pytest.raises(ValueError, match="does not intersect"):
+        svc.fetch_plan(plan, data_dir=tmp_path / "data", subset=True)
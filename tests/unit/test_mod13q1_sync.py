@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import fpts.ingestion.mod13q1 as mod13q1
+from fpts.config.settings import Settings
+from fpts.ingestion.mod13q1 import (
+    Mod13Q1AssetRef,
+    Mod13Q1IngestionService,
+    Mod13Q1Plan,
+    read_checksums,
+    read_plan,
+)
+
+ndvi_key = Settings().mod13q1_ndvi_asset_key
+
+
+def _asset(doy: int, item_id: str, updated: str | None = None) -> Mod13Q1AssetRef:
+    return Mod13Q1AssetRef(
+        item_id=item_id,
+        dt="2020-01-01T00:00:00Z",
+        doy=doy,
+        asset_key=ndvi_key,
+        href=f"https://example.com/{item_id}.tif?sig=new",
+        updated=updated,
+    )
+
+
+def _plan(*assets: Mod13Q1AssetRef) -> Mod13Q1Plan:
+    return Mod13Q1Plan(collection="c", year=2020, bbox=(0.0, 0.0, 1.0, 1.0), assets=list(assets))
+
+
+def _fake_download(calls: list[str]):
+    def _download(url: str, out_path: Path, **_kw) -> tuple[str, int]:
+        calls.append(url)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_bytes(url.encode())
+        return ("sha-" + url, len(url))
+
+    return _download
+
+
+def test_sync_plan_fetches_only_new_and_changed_assets(monkeypatch, tmp_path: Path) -> None:
+    calls: list[str] = []
+    monkeypatch.setattr(mod13q1, "download_to_path", _fake_download(calls))
+    svc = Mod13Q1IngestionService(settings=Settings())
+
+    first = svc.sync_plan(_plan(_asset(1, "a"), _asset(17, "b", "t0")), data_dir=tmp_path)
+    assert first.changed_doys == [1, 17]
+    assert len(calls) == 2
+
+    calls.clear()
+    fresh = _plan(_asset(1, "a"), _asset(17, "b", "t1"), _asset(33, "c"))
+    diff = svc.sync_plan(fresh, data_dir=tmp_path)
+
+    assert [a.doy for a in diff.added] == [33]
+    assert [a.doy for a in diff.changed] == [17]  # reprocessed upstream
+    assert [a.doy for a in diff.unchanged] == [1]
+    assert calls == [
+        "https://example.com/c.tif?sig=new",
+        "https://example.com/b.tif?sig=new",
+    ]
+
+    year_dir = tmp_path / "raw" / "mod13q1" / "2020"
+    changes = json.loads((year_dir / "changes.json").read_text())
+    assert changes["changed_doys"] == [17, 33]
+    assert [r.filename for r in read_checksums(year_dir / "checksums.json")] == [
+        "doy_001.tif",
+        "doy_017.tif",
+        "doy_033.tif",
+    ]
+    assert [a.doy for a in read_plan(year_dir / "manifest.json").assets] == [1, 17, 33]
+
+
+def test_sync_plan_refetches_missing_files_and_dry_run_fetches_nothing(
+    monkeypatch, tmp_path: Path
+) -> None:
+    calls: list[str] = []
+    monkeypatch.setattr(mod13q1, "download_to_path", _fake_download(calls))
+    svc = Mod13Q1IngestionService(settings=Settings())
+    svc.sync_plan(_plan(_asset(1, "a"), _asset(17, "b")), data_dir=tmp_path)
+
+    year_dir = tmp_path / "raw" / "mod13q1" / "2020"
+    (year_dir / "doy_017.tif").unlink()
+    calls.clear()
+
+    diff = svc.sync_plan(_plan(_asset(1, "a"), _asset(17, "b")), data_dir=tmp_path, dry_run=True)
+
+    assert diff.changed_doys == [17]
+    assert calls == []
+    assert json.loads((year_dir / "changes.json").read_text())["changed_doys"] == [17]
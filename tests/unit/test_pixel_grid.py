@@ -0,0 +1,76 @@
+import pytest
+from fpts.domain.grid import PixelGrid, ProductGrids, geohash
+from fpts.domain.models import Location
+
+
+def test_coordinates_inside_a_pixel_share_a_cell_id():
+    grid = PixelGrid(step_deg=0.001)
+    center = Location(lat=52.5, lon=13.4)
+
+    nearby = [
+        Location(lat=52.5004, lon=13.4004),
+        Location(lat=52.4996, lon=13.3996),
+        Location(lat=52.500000001, lon=13.399999999),
+    ]
+
+    assert {grid.cell_id(loc) for loc in nearby} == {grid.cell_id(center)}
+    assert grid.cell_id(Location(lat=52.5006, lon=13.4)) != grid.cell_id(center)
+
+
+def test_cell_center_round_trips():
+    grid = PixelGrid(step_deg=0.001)
+    for loc in [
+        Location(lat=52.5, lon=13.4),
+        Location(lat=-33.9, lon=-70.6),
+        Location(lat=-90.0, lon=-180.0),
+        Location(lat=90.0, lon=180.0),
+    ]:
+        center = grid.cell_center(grid.cell_id(loc))
+        assert center.lat == pytest.approx(loc.lat)
+        assert center.lon == pytest.approx(loc.lon)
+
+
+def test_cell_ids_are_unique_across_the_antimeridian_edge():
+    grid = PixelGrid(step_deg=1.0)
+    west = grid.cell_id(Location(lat=0.0, lon=180.0))
+    next_row = grid.cell_id(Location(lat=1.0, lon=-180.0))
+    assert west != next_row
+
+
+def test_product_grids_use_override_then_default():
+    grids = ProductGrids.from_steps(0.001, {"mod13q1": 0.0025})
+    assert grids.for_product("mod13q1").step_deg == 0.0025
+    assert grids.for_product("ndvi_synth").step_deg == 0.001
+
+
+def test_pixel_grid_rejects_non_positive_step():
+    with pytest.raises(ValueError):
+        PixelGrid(step_deg=0.0)
+
+
+def test_geohash_matches_reference_encoding():
+    loc = Location(lat=57.64911, lon=10.40744)
+    assert geohash(loc, precision=11) == "u4pruydqqvj"
+    assert geohash(loc).startswith("u4pruydqqvj")
+    assert len(geohash(loc)) == 12
+
+
+def test_geohash_order_keeps_neighbours_together():
+    a = Location(lat=52.5, lon=13.4)
+    a_near = Location(lat=52.5001, lon=13.4001)
+    far = Location(lat=-33.9, lon=-70.6)
+    assert geohash(a)[:6] == geohash(a_near)[:6]
+    assert geohash(a)[0] != geohash(far)[0]
+
+
+def test_check_lattice_accepts_only_the_pixel_centres():
+    grid = PixelGrid(step_deg=0.02)
+    grid.check_lattice(min_lon=5.0, min_lat=50.0, step_deg=0.02)
+    grid.check_lattice(min_lon=-0.48, min_lat=51.02, step_deg=0.02)
+
+    with pytest.raises(ValueError, match="step"):
+        grid.check_lattice(min_lon=5.0, min_lat=50.0, step_deg=0.001)
+    with pytest.raises(ValueError, match="min_lon"):
+        grid.check_lattice(min_lon=5.005, min_lat=50.0, step_deg=0.02)
+    with pytest.raises(ValueError, match="min_lat"):
+        grid.check_lattice(min_lon=5.0, min_lat=50.01, step_deg=0.02)
@@ -0,0 +1,343 @@
+import math
+from contextlib import contextmanager
+from datetime import date
+
+import psycopg
+import pytest
+from fastapi.testclient import TestClient
+from fpts.api.main import create_app
+from fpts.config.settings import Settings
+from fpts.domain.models import Location, PhenologyMetric
+from fpts.storage.postgis_async_phenology_repository import AsyncPostGISPhenologyRepository
+from fpts.storage.postgis_phenology_repository import PostGISPhenologyRepository
+from fpts.storage.read_replicas import ReadTarget, ReplicaSet
+
+
+def _metric(location: Location) -> PhenologyMetric:
+    return PhenologyMetric(
+        year=2020,
+        location=location,
+        sos_date=date(2020, 4, 1),
+        eos_date=date(2020, 10, 1),
+        season_length=183,
+        is_forest=True,
+    )
+
+
+class _FakeCursor:
+    def __init__(self, executed: list) -> None:
+        self._executed = executed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def execute(self, sql, params, *, prepare=None) -> None:
+        self._executed.append({**params, "prepare": prepare})
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+
+class _FakeConnection:
+    def __init__(self, executed: list) -> None:
+        self._executed = executed
+
+    def cursor(self):
+        return _FakeCursor(self._executed)
+
+
+class _FakePool:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.executed: list[dict] = []
+
+    def open(self, wait: bool = False, timeout: float = 30.0) -> None:
+        self.calls.append(f"open(wait={wait})")
+
+    def close(self) -> None:
+        self.calls.append("close")
+
+    @contextmanager
+    def connection(self, timeout=None):
+        self.calls.append("connection" if timeout is None else f"connection(timeout={timeout})")
+        yield _FakeConnection(self.executed)
+
+
+def test_pool_disabled_by_default():
+    app = create_app(Settings(phenology_repo_backend="postgis"))
+
+    assert app.state.db_pool is None
+    assert app.state.phenology_repo._pool is None
+
+
+def test_pool_is_created_closed_and_shared_with_repo():
+    # No DB is reachable here: building the app must not connect.
+    app = create_app(Settings(phenology_repo_backend="postgis", database_pool_enabled=True))
+
+    pool = app.state.db_pool
+    assert pool is not None
+    assert pool.closed
+    assert app.state.phenology_repo._pool is pool
+    assert (pool.min_size, pool.max_size) == (1, 10)
+
+
+def test_lifespan_opens_and_closes_pool():
+    app = create_app(Settings(phenology_repo_backend="postgis", database_pool_enabled=True))
+    fake = _FakePool()
+    app.state.db_pool = fake
+
+    with TestClient(app) as client:
+        assert fake.calls == ["open(wait=True)"]
+        assert client.get("/health").status_code == 200
+
+    assert fake.calls == ["open(wait=True)", "close"]
+
+
+def test_repo_borrows_connections_from_pool():
+    fake = _FakePool()
+    repo = PostGISPhenologyRepository(dsn="postgresql://unused", pool=fake)
+
+    for _ in range(3):
+        assert (
+            repo.get_metric_for_location(
+                product="p", location=Location(lat=52.5, lon=13.4), year=2020
+            )
+            is None
+        )
+
+    assert fake.calls == ["connection"] * 3
+    assert len(fake.executed) == 3
+
+
+def test_repo_passes_prepare_mode_to_cursor():
+    fake = _FakePool()
+    repo = PostGISPhenologyRepository(dsn="postgresql://unused", pool=fake, prepare=True)
+    loc = Location(lat=52.5, lon=13.4)
+
+    repo.get_metric_for_location(product="p", location=loc, year=2020)
+    repo.get_timeseries_for_location(product="p", location=loc, start_year=2018, end_year=2020)
+
+    assert [e["prepare"] for e in fake.executed] == [True, True]
+
+
+def test_prepare_mode_wired_from_settings():
+    app = create_app(Settings(phenology_repo_backend="postgis", database_prepare_statements=True))
+    assert app.state.phenology_repo._prepare is True
+
+    app = create_app(Settings(phenology_repo_backend="postgis"))
+    assert app.state.phenology_repo._prepare is None
+
+
+def test_large_polygons_use_subdivided_area_query():
+    fake = _FakePool()
+    repo = PostGISPhenologyRepository(
+        dsn="postgresql://unused", pool=fake, subdivide_max_vertices=8
+    )
+    small = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]}
+    ring = [[math.cos(i / 10), math.sin(i / 10)] for i in range(63)]
+    large = {"type": "MultiPolygon", "coordinates": [[ring + [ring[0]]]]}
+
+    for poly in (small, large):
+        # the fake cursor returns no row, which the repo reports as invalid geometry
+        with pytest.raises(ValueError):
+            repo.get_area_stats(product="p", year=2020, polygon_geojson=poly)
+
+    assert ["max_vertices" in e for e in fake.executed] == [False, True]
+    assert fake.executed[1]["max_vertices"] == 8
+
+
+def test_subdivide_limit_wired_from_settings():
+    app = create_app(Settings(phenology_repo_backend="postgis", area_subdivide_max_vertices=64))
+    assert app.state.phenology_repo._subdivide_max_vertices == 64
+
+    with pytest.raises(ValueError):
+        PostGISPhenologyRepository(dsn="postgresql://unused", subdivide_max_vertices=4)
+
+
+class _FakeAsyncPool:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    async def open(self, wait: bool = False, timeout: float = 30.0) -> None:
+        self.calls.append(f"open(wait={wait})")
+
+    async def close(self) -> None:
+        self.calls.append("close")
+
+
+def test_async_repo_disabled_by_default():
+    app = create_app(Settings(phenology_repo_backend="postgis"))
+
+    assert app.state.phenology_async_repo is None
+    assert app.state.db_async_pool is None
+
+
+def test_async_repo_and_pool_wired_from_settings():
+    app = create_app(
+        Settings(
+            phenology_repo_backend="postgis",
+            database_pool_enabled=True,
+            database_async_enabled=True,
+            database_prepare_statements=True,
+        )
+    )
+
+    async_repo = app.state.phenology_async_repo
+    assert isinstance(async_repo, AsyncPostGISPhenologyRepository)
+    assert async_repo._pool is app.state.db_async_pool
+    assert async_repo._prepare is True
+    assert app.state.query_service._async_repository is async_repo
+
+
+def test_lifespan_opens_and_closes_async_pool():
+    app = create_app(Settings(phenology_repo_backend="postgis", database_async_enabled=True))
+    fake = _FakeAsyncPool()
+    app.state.db_async_pool = fake
+
+    with TestClient(app):
+        assert fake.calls == ["open(wait=True)"]
+
+    assert fake.calls == ["open(wait=True)", "close"]
+
+
+class _DownPool(_FakePool):
+    @contextmanager
+    def connection(self, timeout=None):
+        self.calls.append(f"connection(timeout={timeout})")
+        raise psycopg.OperationalError("replica unreachable")
+        yield  # pragma: no cover
+
+
+def test_reads_round_robin_over_replicas_and_writes_use_primary():
+    primary, r1, r2 = _FakePool(), _FakePool(), _FakePool()
+    repo = PostGISPhenologyRepository(
+        dsn="postgresql://primary",
+        pool=primary,
+        replicas=ReplicaSet([ReadTarget("postgresql://r1", r1), ReadTarget("postgresql://r2", r2)]),
+    )
+    loc = Location(lat=52.5, lon=13.4)
+
+    for _ in range(4):
+        repo.get_metric_for_location(product="p", location=loc, year=2020)
+    repo.get_timeseries_for_location(product="p", location=loc, start_year=2019, end_year=2020)
+
+    assert (len(r1.executed), len(r2.executed)) == (3, 2)
+    assert primary.calls == []
+
+    # upsert_many borrows from the primary (the fake connection cannot copy; only the
+    # routing matters here)
+    with pytest.raises(AttributeError):
+        repo.upsert_many(product="p", metrics=[_metric(loc)])
+    assert primary.calls == ["connection"]
+    assert (len(r1.calls), len(r2.calls)) == (3, 2)
+
+
+def test_reads_skip_down_replica_and_fall_back_to_primary():
+    now = [0.0]
+    primary, down, up = _FakePool(), _DownPool(), _FakePool()
+    replicas = ReplicaSet(
+        [ReadTarget("postgresql://down", down), ReadTarget("postgresql://up", up)],
+        retry_after_s=30.0,
+        acquire_timeout_s=0.25,
+        clock=lambda: now[0],
+    )
+    repo = PostGISPhenologyRepository(dsn="postgresql://primary", pool=primary, replicas=replicas)
+    loc = Location(lat=52.5, lon=13.4)
+
+    for _ in range(3):
+        repo.get_metric_for_location(product="p", location=loc, year=2020)
+    # tried once with the short acquire timeout, then skipped until retry_after_s
+    assert down.calls == ["connection(timeout=0.25)"]
+    assert up.calls == ["connection(timeout=0.25)"] * 3
+    assert len(up.executed) == 3
+    assert primary.calls == []
+
+    now[0] = 31.0
+    assert "postgresql://down" in [t.dsn for t in replicas.candidates()]
+
+    all_down = ReplicaSet([ReadTarget("postgresql://down", _DownPool())])
+    repo = PostGISPhenologyRepository(dsn="postgresql://primary", pool=primary, replicas=all_down)
+    repo.get_metric_for_location(product="p", location=loc, year=2020)
+    assert primary.calls == ["connection"]
+    assert len(primary.executed) == 1
+
+
+def test_read_replicas_wired_from_settings():
+    dsns = ["postgresql://replica-a/fpts", "postgresql://replica-b/fpts"]
+    app = create_app(Settings(phenology_repo_backend="postgis"))
+    assert app.state.phenology_repo._replicas is None
+    assert app.state.db_read_pools == []
+
+    app = create_app(
+        Settings(
+            phenology_repo_backend="postgis",
+            database_pool_enabled=True,
+            database_async_enabled=True,
+            database_read_dsns=dsns,
+            database_read_acquire_timeout_s=0.2,
+        )
+    )
+    assert app.state.phenology_repo._replicas.acquire_timeout_s == 0.2
+    assert app.state.phenology_async_repo._replicas.acquire_timeout_s == 0.2
+    targets = app.state.phenology_repo._replicas.targets
+    assert [t.dsn for t in targets] == dsns
+    assert [t.pool for t in targets] == app.state.db_read_pools
+    assert all(pool.closed for pool in app.state.db_read_pools)
+    async_targets = app.state.phenology_async_repo._replicas.targets
+    assert [t.pool for t in async_targets] == app.state.db_async_read_pools
+    assert len(app.state.db_async_read_pools) == 2
+
+
+def test_lifespan_opens_replica_pools_without_waiting():
+    app = create_app(Settings(phenology_repo_backend="postgis"))
+    fake = _FakePool()
+    app.state.db_read_pools = [fake]
+
+    with TestClient(app):
+        assert fake.calls == ["open(wait=False)"]
+
+    assert fake.calls == ["open(wait=False)", "close"]
+
+
+def test_area_stats_many_subdivides_only_large_polygons():
+    fake = _FakePool()
+    repo = PostGISPhenologyRepository(
+        dsn="postgresql://unused", pool=fake, subdivide_max_vertices=8
+    )
+    small = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]}
+    ring = [[math.cos(i / 10), math.sin(i / 10)] for i in range(63)]
+    large = {"type": "Polygon", "coordinates": [ring + [ring[0]]]}
+
+    repo.get_area_stats_many(product="p", year=2020, polygons=[small, large, small])
+
+    assert fake.calls == ["connection"]
+    assert fake.executed[0]["max_vertices"] == [None, 8, None]
+    assert len(fake.executed[0]["polys"]) == 3
+    assert repo.get_area_stats_many(product="p", year=2020, polygons=[]) == []
+    assert fake.calls == ["connection"]
+
+
+def test_area_stats_years_subdivides_large_polygons():
+    fake = _FakePool()
+    repo = PostGISPhenologyRepository(
+        dsn="postgresql://unused", pool=fake, subdivide_max_vertices=8
+    )
+    small = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]}
+    ring = [[math.cos(i / 10), math.sin(i / 10)] for i in range(63)]
+    large = {"type": "Polygon", "coordinates": [ring + [ring[0]]]}
+
+    for poly in (small, large):
+        # the fake cursor returns no rows, which the repo reports as invalid geometry
+        with pytest.raises(ValueError):
+            repo.get_area_stats_years(
+                product="p", start_year=2001, end_year=2025, polygon_geojson=poly
+            )
+
+    assert [e["max_vertices"] for e in fake.executed] == [None, 8]
+    assert (fake.executed[0]["start_year"], fake.executed[0]["end_year"]) == (2001, 2025)
@@ -70,3 +70,72 @@ def test_query_service_timeseries_returns_sorted_metrics():
         product="test_product", location=loc, start_year=2018, end_year=2022
     )
     assert [m.year for m in result] == [2019, 2021]
+
+
+def test_query_service_point_metrics_aligned_with_input():
+    repo = InMemoryPhenologyRepository()
+    service = QueryService(repository=repo)
+
+    a = Location(lat=52.5, lon=13.4)
+    b = Location(lat=48.1, lon=11.6)
+    metric = PhenologyMetric(
+        year=2020,
+        location=a,
+        sos_date=date(2020, 4, 15),
+        eos_date=date(2020, 10, 15),
+        season_length=183,
+        is_forest=True,
+    )
+    repo.add_metric(product="test_product", metric=metric)
+
+    result = service.get_point_metrics(product="test_product", locations=[b, a, a], year=2020)
+
+    assert result == [None, metric, metric]
+
+
+def _yearly(loc: Location, year: int, season_length: int = 150) -> PhenologyMetric:
+    return PhenologyMetric(
+        year=year,
+        location=loc,
+        sos_date=date(year, 4, 1),
+        eos_date=None,
+        season_length=season_length,
+        is_forest=False,
+    )
+
+
+def test_in_memory_timeseries_index_matches_single_and_bulk_adds():
+    loc, other = Location(lat=52.5, lon=13.4), Location(lat=52.5, lon=13.5)
+    single, bulk = InMemoryPhenologyRepository(), InMemoryPhenologyRepository()
+
+    years = [2015, 2003, 2020, 2010, 2001]
+    for year in years:
+        single.add_metric(product="p", metric=_yearly(loc, year))
+    single.add_metric(product="p", metric=_yearly(loc, 2010, season_length=99))
+    single.add_metric(product="p", metric=_yearly(other, 2010))
+
+    assert bulk.add_metrics("p", [_yearly(loc, y) for y in years[:3]]) == 3
+    bulk.add_metrics(
+        "p",
+        [_yearly(loc, 2010), _yearly(loc, 2001), _yearly(loc, 2010, 99), _yearly(other, 2010)],
+    )
+
+    for repo in (single, bulk):
+        series = repo.get_timeseries_for_location(
+            product="p", location=loc, start_year=2003, end_year=2015
+        )
+        assert [(m.year, m.season_length) for m in series] == [
+            (2003, 150),
+            (2010, 99),
+            (2015, 150),
+        ]
+        assert (
+            repo.get_timeseries_for_location(
+                product="p", location=loc, start_year=2016, end_year=2019
+            )
+            == []
+        )
+        assert (
+            repo.get_metric_for_location(product="p", location=loc, year=2010).season_length == 99
+        )
+        assert [m.year for m in repo.iter_metrics(product="p", year=2010)] == [2010, 2010]
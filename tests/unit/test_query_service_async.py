@@ -0,0 +1,118 @@
+import asyncio
+import threading
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+from fpts.cache.redis_cache import RedisTTLCache
+from fpts.cache.ttl_cache import InMemoryTTLCache
+from fpts.domain.models import Location, PhenologyMetric
+from fpts.query.service import QueryService
+
+LOC = Location(lat=52.5, lon=13.4)
+METRIC = PhenologyMetric(
+    year=2020,
+    location=LOC,
+    sos_date=date(2020, 4, 10),
+    eos_date=date(2020, 10, 10),
+    season_length=183,
+    is_forest=True,
+)
+
+
+def test_aget_point_metric_awaits_async_repo_and_shares_cache():
+    repo = MagicMock()
+    async_repo = MagicMock()
+    async_repo.get_metric_for_location = AsyncMock(return_value=METRIC)
+    cache = InMemoryTTLCache[str, PhenologyMetric](maxsize=100, ttl_seconds=999)
+    service = QueryService(repository=repo, point_cache=cache, async_repository=async_repo)
+
+    r1 = asyncio.run(service.aget_point_metric(product="p1", location=LOC, year=2020))
+    r2 = service.get_point_metric(product="p1", location=LOC, year=2020)
+
+    assert r1 == r2 == METRIC
+    assert async_repo.get_metric_for_location.await_count == 1
+    repo.get_metric_for_location.assert_not_called()
+
+
+def test_aget_methods_fall_back_to_sync_repo_without_async_repo():
+    repo = MagicMock()
+    repo.get_metric_for_location.return_value = METRIC
+    repo.get_metrics_for_locations.return_value = [METRIC, None]
+    repo.get_timeseries_for_location.return_value = [METRIC]
+    repo.get_area_stats.return_value = {"n": 1, "forest_fraction": 1.0}
+    service = QueryService(repository=repo)
+
+    async def run():
+        return (
+            await service.aget_point_metric(product="p1", location=LOC, year=2020),
+            await service.aget_point_metrics(product="p1", locations=[LOC, LOC], year=2020),
+            await service.aget_point_timeseries(
+                product="p1", location=LOC, start_year=2019, end_year=2021
+            ),
+            await service.aget_area_stats(product="p1", year=2020, polygon_geojson={}),
+        )
+
+    point, points, series, stats = asyncio.run(run())
+
+    assert point == METRIC
+    assert points == [METRIC, None]
+    assert series == [METRIC]
+    assert stats == {"n": 1, "forest_fraction": 1.0}
+
+
+def test_aget_point_metrics_fetches_only_cache_misses():
+    other = Location(lat=48.1, lon=11.6)
+    async_repo = MagicMock()
+    async_repo.get_metric_for_location = AsyncMock(return_value=METRIC)
+    async_repo.get_metrics_for_locations = AsyncMock(return_value=[None])
+    cache = InMemoryTTLCache[str, PhenologyMetric](maxsize=100, ttl_seconds=999)
+    service = QueryService(repository=MagicMock(), point_cache=cache, async_repository=async_repo)
+
+    async def run():
+        await service.aget_point_metric(product="p1", location=LOC, year=2020)
+        return await service.aget_point_metrics(product="p1", locations=[LOC, other], year=2020)
+
+    assert asyncio.run(run()) == [METRIC, None]
+    async_repo.get_metrics_for_locations.assert_awaited_once_with(
+        product="p1", year=2020, locations=[other]
+    )
+
+
+class _ThreadRecordingRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.threads: set[int] = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return self.data.get(key)
+
+    def setex(self, key, ttl, raw):
+        self.threads.add(threading.get_ident())
+        self.data[key] = raw
+
+
+def test_aget_point_metric_runs_redis_cache_io_off_the_event_loop():
+    cache = RedisTTLCache[PhenologyMetric](
+        redis_url="redis://localhost:1/0",
+        ttl_seconds=999,
+        dumps=lambda m: m.year,
+        loads=lambda raw: METRIC,
+    )
+    client = _ThreadRecordingRedis()
+    cache._client = client
+    async_repo = MagicMock()
+    async_repo.get_metric_for_location = AsyncMock(return_value=METRIC)
+    service = QueryService(repository=MagicMock(), point_cache=cache, async_repository=async_repo)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        first = await service.aget_point_metric(product="p1", location=LOC, year=2020)
+        second = await service.aget_point_metric(product="p1", location=LOC, year=2020)
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(run())
+
+    assert first == second == METRIC
+    assert async_repo.get_metric_for_location.await_count == 1
+    assert client.threads and loop_thread not in client.threads
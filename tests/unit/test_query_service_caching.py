@@ -160,3 +160,120 @@ def test_area_stats_cache_key_includes_filters():
     )
 
     assert repo.get_area_stats.call_count == 2
+
+
+def test_point_metrics_fetch_only_cache_misses_in_one_call():
+    repo = MagicMock()
+    cached_loc = Location(lat=52.5, lon=13.4)
+    miss_loc = Location(lat=48.1, lon=11.6)
+    absent_loc = Location(lat=0.0, lon=0.0)
+
+    def _metric(loc: Location) -> PhenologyMetric:
+        return PhenologyMetric(
+            year=2020,
+            location=loc,
+            sos_date=None,
+            eos_date=None,
+            season_length=None,
+            is_forest=True,
+        )
+
+    repo.get_metric_for_location.return_value = _metric(cached_loc)
+    repo.get_metrics_for_locations.return_value = [_metric(miss_loc), None]
+
+    point_cache = InMemoryTTLCache[str, PhenologyMetric](maxsize=100, ttl_seconds=999)
+    service = QueryService(repository=repo, point_cache=point_cache)
+    _ = service.get_point_metric(product="p1", location=cached_loc, year=2020)  # warm
+
+    result = service.get_point_metrics(
+        product="p1", locations=[cached_loc, miss_loc, absent_loc], year=2020
+    )
+
+    assert result == [_metric(cached_loc), _metric(miss_loc), None]
+    repo.get_metrics_for_locations.assert_called_once_with(
+        product="p1", year=2020, locations=[miss_loc, absent_loc]
+    )
+
+    # found misses are now cached; the absent point is asked for again
+    repo.get_metrics_for_locations.reset_mock()
+    repo.get_metrics_for_locations.return_value = [None]
+    _ = service.get_point_metrics(product="p1", locations=[miss_loc, absent_loc], year=2020)
+    repo.get_metrics_for_locations.assert_called_once_with(
+        product="p1", year=2020, locations=[absent_loc]
+    )
+
+
+def test_point_metric_cache_key_includes_nearest_tolerance():
+    repo = MagicMock()
+    loc = Location(lat=52.5, lon=13.4)
+    repo.get_metric_for_location.return_value = PhenologyMetric(
+        year=2020,
+        location=loc,
+        sos_date=None,
+        eos_date=None,
+        season_length=None,
+        is_forest=True,
+    )
+
+    point_cache = InMemoryTTLCache[str, PhenologyMetric](maxsize=100, ttl_seconds=999)
+    service = QueryService(repository=repo, point_cache=point_cache)
+
+    _ = service.get_point_metric(product="p1", location=loc, year=2020)
+    _ = service.get_point_metric(product="p1", location=loc, year=2020, nearest_tolerance_deg=0.01)
+    _ = service.get_point_metric(product="p1", location=loc, year=2020, nearest_tolerance_deg=0.01)
+
+    assert repo.get_metric_for_location.call_count == 2
+    assert repo.get_metric_for_location.call_args.kwargs["nearest_tolerance_deg"] == 0.01
+
+
+def test_area_stats_many_fetches_only_uncached_polygons_in_one_call():
+    repo = MagicMock()
+    square = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}
+    other = {"type": "Polygon", "coordinates": [[[2, 2], [3, 2], [3, 3], [2, 3], [2, 2]]]}
+    empty = {"type": "Polygon", "coordinates": [[[5, 5], [6, 5], [6, 6], [5, 6], [5, 5]]]}
+    repo.get_area_stats.return_value = {"n": 4, "forest_fraction": 0.5}
+    repo.get_area_stats_many.return_value = [{"n": 9, "forest_fraction": 1.0}, None]
+
+    cache = InMemoryTTLCache[str, dict](maxsize=100, ttl_seconds=999)
+    service = QueryService(repository=repo, area_stats_cache=cache)
+
+    service.get_area_stats(product="p1", year=2020, polygon_geojson=square)
+    out = service.get_area_stats_many(product="p1", year=2020, polygons=[square, other, empty])
+
+    assert out == [{"n": 4, "forest_fraction": 0.5}, {"n": 9, "forest_fraction": 1.0}, None]
+    assert repo.get_area_stats_many.call_count == 1
+    assert repo.get_area_stats_many.call_args.kwargs["polygons"] == [other, empty]
+
+    # shares keys with get_area_stats; empty results are not cached
+    repo.get_area_stats_many.return_value = [None]
+    assert service.get_area_stats_many(product="p1", year=2020, polygons=[other, empty]) == [
+        {"n": 9, "forest_fraction": 1.0},
+        None,
+    ]
+    assert repo.get_area_stats_many.call_args.kwargs["polygons"] == [empty]
+
+
+def test_area_stats_years_cached_per_range():
+    repo = MagicMock()
+    square = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}
+    years = [{"year": 2019, "n": 2, "forest_fraction": 0.5}, {"year": 2021, "n": 3}]
+    repo.get_area_stats_years.return_value = years
+
+    cache = InMemoryTTLCache[str, dict](maxsize=100, ttl_seconds=999)
+    service = QueryService(repository=repo, area_stats_cache=cache)
+
+    kwargs = {"product": "p1", "polygon_geojson": square, "start_year": 2019, "end_year": 2021}
+    assert service.get_area_stats_years(**kwargs) == years
+    assert service.get_area_stats_years(**kwargs) == years
+    assert repo.get_area_stats_years.call_count == 1
+
+    # a different range, or the single-year query, is a different entry
+    service.get_area_stats_years(**{**kwargs, "end_year": 2022})
+    assert repo.get_area_stats_years.call_count == 2
+    service.get_area_stats(product="p1", year=2019, polygon_geojson=square)
+    assert repo.get_area_stats.call_count == 1
+
+    repo.get_area_stats_years.return_value = []
+    for _ in range(2):
+        assert service.get_area_stats_years(**{**kwargs, "product": "p2"}) == []
+    assert repo.get_area_stats_years.call_count == 4
@@ -0,0 +1,218 @@
+import os
+from dataclasses import replace
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from fpts.api.main import create_app
+from fpts.config.settings import Settings
+from fpts.domain.errors import InvalidGeometryError
+from fpts.domain.models import BBox, Location, PhenologyMetric
+from fpts.storage import raster_phenology_repository
+from fpts.storage.columnar_repository import ColumnarPhenologyRepository
+from fpts.storage.raster_phenology_repository import CubeGrid, RasterPhenologyRepository
+
+# 11 x 11 pixels on a 0.1 degree lattice over [10, 11] x [50, 51]
+GRID = CubeGrid.from_bounds(10.0, 50.0, 11.0, 51.0, 0.1)
+
+
+@pytest.fixture
+def raster_metrics(grid_metrics):
+    # the (1, 1) pixel has no result, the (0, 1) one no end of season
+    return partial(grid_metrics, missing=((1, 1),), no_eos=((0, 1),))
+
+
+@pytest.fixture
+def repo(tmp_path, raster_metrics):
+    repo = RasterPhenologyRepository(tmp_path)
+    for year in (2019, 2020, 2021):
+        assert (
+            repo.write_year(product="p", year=year, grid=GRID, metrics=raster_metrics(year)) == 120
+        )
+    return repo
+
+
+def test_grid_matches_the_batch_grid():
+    assert (GRID.width, GRID.height) == (11, 11)
+    assert GRID.window(10.15, 50.2, 10.4, 99.0) == (slice(2, 11), slice(2, 5))
+    assert GRID.window(20.0, 20.0, 21.0, 21.0) == (slice(0, 0), slice(11, 11))
+
+
+def test_point_lookups_are_pixel_arithmetic(repo, raster_metrics):
+    stored = raster_metrics(2020)
+    # the pixel containing the point, returned at the pixel centre
+    metric = repo.get_metric_for_location(
+        product="p", location=Location(lat=50.33, lon=10.18), year=2020
+    )
+    assert metric == next(m for m in stored if m.location == Location(lat=50.3, lon=10.2))
+    assert (
+        repo.get_metric_for_location(
+            product="p", location=Location(lat=50.0, lon=10.1), year=2020
+        ).eos_date
+        is None
+    )
+    assert (
+        repo.get_metric_for_location(
+            product="p", location=Location(lat=50.0, lon=10.0), year=2020
+        ).season_length
+        is None
+    )
+
+    hole = Location(lat=50.11, lon=10.1)
+    assert repo.get_metric_for_location(product="p", location=hole, year=2020) is None
+    nearest = repo.get_metric_for_location(
+        product="p", location=hole, year=2020, nearest_tolerance_deg=0.1
+    )
+    assert nearest.location == Location(lat=50.2, lon=10.1)
+    outside = Location(lat=49.0, lon=10.0)
+    assert repo.get_metric_for_location(product="p", location=outside, year=2020) is None
+    assert repo.get_metric_for_location(product="p", location=outside, year=2018) is None
+
+    batch = repo.get_metrics_for_locations(
+        product="p", year=2021, locations=[Location(lat=50.5, lon=10.5), outside, hole]
+    )
+    assert [m and m.season_length for m in batch] == [106, None, None]
+
+
+def test_timeseries_and_nearest_timeseries(repo):
+    series = repo.get_timeseries_for_location(
+        product="p", location=Location(lat=50.5, lon=10.5), start_year=2018, end_year=2020
+    )
+    assert [(m.year, m.season_length) for m in series] == [(2019, 104), (2020, 105)]
+
+    series = repo.get_timeseries_for_location(
+        product="p",
+        location=Location(lat=50.09, lon=10.12),
+        start_year=2020,
+        end_year=2021,
+        nearest_tolerance_deg=0.15,
+    )
+    assert [(m.year, m.location) for m in series] == [
+        (2020, Location(lat=50.1, lon=10.2)),
+        (2021, Location(lat=50.1, lon=10.2)),
+    ]
+
+
+def test_area_stats_match_the_columnar_backend(repo, box, raster_metrics):
+    columnar = ColumnarPhenologyRepository(index_cell_deg=0.25)
+    for year in (2019, 2020, 2021):
+        columnar.add_metrics("p", raster_metrics(year))
+
+    triangle = [[10.0, 50.0], [11.0, 50.0], [10.0, 51.0], [10.0, 50.0]]
+    geometries = [
+        {"type": "Polygon", "coordinates": [box(10.2, 50.2, 10.4, 50.4)]},
+        {
+            "type": "Polygon",
+            "coordinates": [box(10.0, 50.0, 10.4, 50.4), box(10.25, 50.25, 10.35, 50.35)],
+        },
+        {"type": "Polygon", "coordinates": [triangle]},
+        {
+            "type": "MultiPolygon",
+            "coordinates": [[box(9.0, 49.0, 10.1, 50.1)], [box(10.9, 50.9, 11.0, 51.0)]],
+        },
+        {"type": "Polygon", "coordinates": [box(20, 20, 21, 21)]},
+    ]
+    for geometry in geometries:
+        for kwargs in ({}, {"only_forest": True}, {"min_season_length": 104}):
+            args = dict(product="p", polygon_geojson=geometry, season_length_stat="both", **kwargs)
+            assert repo.get_area_stats(year=2020, **args) == columnar.get_area_stats(
+                year=2020, **args
+            )
+            assert repo.get_area_stats_years(
+                start_year=2018, end_year=2021, **args
+            ) == columnar.get_area_stats_years(start_year=2018, end_year=2021, **args)
+
+    many = repo.get_area_stats_many(product="p", year=2020, polygons=geometries)
+    assert [s and s["n"] for s in many] == [9, 23, 65, 7, None]
+
+    open_ring = {"type": "Polygon", "coordinates": [[[10, 50], [11, 50], [11, 51], [10, 51]]]}
+    with pytest.raises(InvalidGeometryError) as exc:
+        repo.get_area_stats_many(product="p", year=2020, polygons=[geometries[0], open_ring])
+    assert exc.value.indexes == [1]
+
+
+def test_export_order_and_bbox(repo, raster_metrics):
+    exported = list(repo.iter_metrics(product="p", year=2020, chunk_size=5))
+    assert exported == raster_metrics(2020)
+
+    bbox = BBox(min_lon=10.05, min_lat=50.0, max_lon=10.2, max_lat=50.1)
+    assert [m.location for m in repo.iter_metrics(product="p", year=2020, bbox=bbox)] == [
+        Location(lat=50.0, lon=10.1),
+        Location(lat=50.0, lon=10.2),
+        Location(lat=50.1, lon=10.2),
+    ]
+    assert list(repo.iter_metrics(product="p", year=2018)) == []
+
+
+def test_rewrites_are_picked_up_and_bad_writes_leave_the_cube(repo, tmp_path, raster_metrics):
+    loc = Location(lat=50.5, lon=10.5)
+    assert repo.get_metric_for_location(product="p", location=loc, year=2020) is not None
+
+    with pytest.raises(ValueError):
+        repo.write_year(
+            product="p",
+            year=2020,
+            grid=GRID,
+            metrics=[
+                *raster_metrics(2020),
+                replace(raster_metrics(2020)[0], location=Location(lat=60.0, lon=10.0)),
+            ],
+        )
+    assert repo.get_metric_for_location(product="p", location=loc, year=2020) is not None
+    assert sorted(os.listdir(tmp_path / "p")) == [
+        f"{year}.{ext}" for year in (2019, 2020, 2021) for ext in ("json", "npy")
+    ]
+
+    small = CubeGrid.from_bounds(10.0, 50.0, 10.1, 50.1, 0.1)
+    repo.write_year(product="p", year=2020, grid=small, metrics=raster_metrics(2020)[:2])
+    assert repo.get_metric_for_location(product="p", location=loc, year=2020) is None
+    assert len(list(repo.iter_metrics(product="p", year=2020))) == 2
+
+
+def test_a_new_grid_is_not_paired_with_the_old_data(repo, tmp_path, monkeypatch):
+    # same shape as GRID, shifted by half a pixel
+    shifted = CubeGrid.from_bounds(10.05, 50.05, 11.05, 51.05, 0.1)
+    corner = PhenologyMetric(
+        year=2020,
+        location=Location(lat=50.05, lon=10.05),
+        sos_date=None,
+        eos_date=None,
+        season_length=None,
+        is_forest=True,
+    )
+    RasterPhenologyRepository(tmp_path / "staging").write_year(
+        product="p", year=2020, grid=shifted, metrics=[corner]
+    )
+    # a writer between its two os.replace calls: new grid, old data
+    os.replace(tmp_path / "staging" / "p" / "2020.json", tmp_path / "p" / "2020.json")
+
+    def finish_swap(_seconds):
+        os.replace(tmp_path / "staging" / "p" / "2020.npy", tmp_path / "p" / "2020.npy")
+
+    monkeypatch.setattr(raster_phenology_repository, "time", SimpleNamespace(sleep=finish_swap))
+
+    assert repo.get_metric_for_location(product="p", location=corner.location, year=2020) == corner
+
+
+def test_raster_backend_serves_the_api(tmp_path, box, raster_metrics):
+    RasterPhenologyRepository(tmp_path).write_year(
+        product="ndvi_synth", year=2020, grid=GRID, metrics=raster_metrics(2020)
+    )
+
+    app = create_app(Settings(phenology_repo_backend="raster", raster_results_dir=str(tmp_path)))
+    client = TestClient(app)
+    resp = client.get(
+        "/phenology/point",
+        params={"product": "ndvi_synth", "lat": 50.52, "lon": 10.48, "year": 2020},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["season_length"] == 105
+
+    resp = client.post(
+        "/phenology/area",
+        params={"year": 2020, "product": "ndvi_synth"},
+        json={"geometry": {"type": "Polygon", "coordinates": [box(10.2, 50.2, 10.4, 50.4)]}},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["n"] == 9
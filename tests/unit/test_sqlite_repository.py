@@ -0,0 +1,173 @@
+import threading
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from fpts.api.main import create_app
+from fpts.config.settings import Settings
+from fpts.domain.errors import InvalidGeometryError
+from fpts.domain.models import BBox, Location, PhenologyMetric
+from fpts.storage.columnar_repository import ColumnarPhenologyRepository
+from fpts.storage.sqlite_phenology_repository import SQLitePhenologyRepository
+
+
+@pytest.fixture
+def repo(tmp_path, grid_metrics):
+    repo = SQLitePhenologyRepository(tmp_path / "phenology.sqlite")
+    for year in (2019, 2020, 2021):
+        repo.upsert_many(product="p", metrics=grid_metrics(year))
+    yield repo
+    repo.close()
+
+
+def test_point_batch_and_timeseries_lookups(repo):
+    loc = Location(lat=50.3, lon=10.2)
+    metric = repo.get_metric_for_location(product="p", location=loc, year=2020)
+    assert metric == PhenologyMetric(
+        year=2020,
+        location=loc,
+        sos_date=date(2020, 4, 1),
+        eos_date=date(2020, 4, 1) + timedelta(days=103),
+        season_length=103,
+        is_forest=True,
+    )
+    assert repo.get_metric_for_location(product="p", location=loc, year=2018) is None
+    assert repo.get_metric_for_location(product="q", location=loc, year=2020) is None
+
+    off = Location(lat=50.303, lon=10.198)
+    assert repo.get_metric_for_location(product="p", location=off, year=2020) is None
+    nearest = repo.get_metric_for_location(
+        product="p", location=off, year=2020, nearest_tolerance_deg=0.05
+    )
+    assert nearest.location == loc
+
+    batch = repo.get_metrics_for_locations(
+        product="p", year=2021, locations=[loc, Location(lat=0.0, lon=0.0), loc]
+    )
+    assert [m and m.season_length for m in batch] == [104, None, 104]
+
+    series = repo.get_timeseries_for_location(
+        product="p", location=loc, start_year=2018, end_year=2020
+    )
+    assert [m.year for m in series] == [2019, 2020]
+    series = repo.get_timeseries_for_location(
+        product="p", location=off, start_year=2020, end_year=2021, nearest_tolerance_deg=0.05
+    )
+    assert [(m.year, m.location) for m in series] == [(2020, loc), (2021, loc)]
+
+
+def test_upsert_updates_the_rtree_and_replace_year_drops_old_rows(repo):
+    moved = PhenologyMetric(
+        year=2020,
+        location=Location(lat=50.0, lon=10.0004),  # same pixel as (50.0, 10.0)
+        sos_date=None,
+        eos_date=None,
+        season_length=None,
+        is_forest=True,
+    )
+    repo.upsert(product="p", metric=moved)
+    assert (
+        repo.get_metric_for_location(product="p", location=Location(lat=50.0, lon=10.0), year=2020)
+        == moved
+    )
+    exported = list(
+        repo.iter_metrics(
+            product="p",
+            year=2020,
+            bbox=BBox(min_lon=10.0001, min_lat=49.9, max_lon=10.001, max_lat=50.01),
+        )
+    )
+    assert exported == [moved]
+
+    assert repo.replace_year(product="p", year=2020, metrics=[moved]) == 1
+    assert list(repo.iter_metrics(product="p", year=2020)) == [moved]
+    assert len(list(repo.iter_metrics(product="p", year=2021, chunk_size=7))) == 121
+
+
+def test_area_stats_match_the_columnar_backend(repo, box, grid_metrics):
+    columnar = ColumnarPhenologyRepository(index_cell_deg=0.25)
+    for year in (2019, 2020, 2021):
+        columnar.add_metrics("p", grid_metrics(year))
+
+    triangle = [[10.0, 50.0], [11.0, 50.0], [10.0, 51.0], [10.0, 50.0]]
+    geometries = [
+        {"type": "Polygon", "coordinates": [box(10.2, 50.2, 10.4, 50.4)]},
+        {
+            "type": "Polygon",
+            "coordinates": [box(10.2, 50.2, 10.4, 50.4), box(10.25, 50.25, 10.35, 50.35)],
+        },
+        {"type": "Polygon", "coordinates": [triangle]},
+        {
+            "type": "MultiPolygon",
+            "coordinates": [[box(10.0, 50.0, 10.1, 50.1)], [box(10.9, 50.9, 11.0, 51.0)]],
+        },
+        {"type": "Polygon", "coordinates": [box(20, 20, 21, 21)]},
+    ]
+    for geometry in geometries:
+        for kwargs in ({}, {"only_forest": True}, {"min_season_length": 104}):
+            args = dict(product="p", polygon_geojson=geometry, season_length_stat="both", **kwargs)
+            assert repo.get_area_stats(year=2020, **args) == columnar.get_area_stats(
+                year=2020, **args
+            )
+            assert repo.get_area_stats_years(
+                start_year=2018, end_year=2021, **args
+            ) == columnar.get_area_stats_years(start_year=2018, end_year=2021, **args)
+
+    many = repo.get_area_stats_many(product="p", year=2020, polygons=geometries)
+    assert [s and s["n"] for s in many] == [9, 8, 66, 8, None]
+
+    open_ring = {"type": "Polygon", "coordinates": [[[10, 50], [11, 50], [11, 51], [10, 51]]]}
+    with pytest.raises(InvalidGeometryError) as exc:
+        repo.get_area_stats_many(product="p", year=2020, polygons=[geometries[0], open_ring])
+    assert exc.value.indexes == [1]
+    with pytest.raises(ValueError):
+        repo.get_area_stats(product="p", year=2020, polygon_geojson=open_ring)
+
+
+def test_each_thread_gets_its_own_connection_in_wal_mode(repo):
+    assert repo._conn().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert repo._conn() is repo._conn()
+
+    seen = {}
+
+    def read(i: int) -> None:
+        seen[i] = (
+            repo._conn(),
+            repo.get_metric_for_location(
+                product="p", location=Location(lat=50.5, lon=10.5), year=2020
+            ),
+        )
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    conns = {id(conn) for conn, _ in seen.values()} | {id(repo._conn())}
+    assert len(conns) == 5
+    assert all(metric.season_length == 105 for _, metric in seen.values())
+
+
+def test_sqlite_backend_serves_the_api(tmp_path, box, grid_metrics):
+    path = tmp_path / "edge.sqlite"
+    writer = SQLitePhenologyRepository(path)
+    writer.upsert_many(product="ndvi_synth", metrics=grid_metrics(2020))
+    writer.close()
+
+    app = create_app(Settings(phenology_repo_backend="sqlite", sqlite_path=str(path)))
+    with TestClient(app) as client:
+        resp = client.get(
+            "/phenology/point",
+            params={"product": "ndvi_synth", "lat": 50.1, "lon": 10.1, "year": 2020},
+        )
+        assert resp.status_code == 200
+
+        resp = client.post(
+            "/phenology/area",
+            params={"year": 2020, "product": "ndvi_synth"},
+            json={"geometry": {"type": "Polygon", "coordinates": [box(10.2, 50.2, 10.4, 50.4)]}},
+        )
+        assert resp.status_code == 200
+        assert resp.json()["n"] == 9
+        assert resp.json()["forest_fraction"] == pytest.approx(2 / 3)
@@ -0,0 +1,249 @@
+import threading
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+import rasterio
+from fastapi.testclient import TestClient
+from fpts.api.main import create_app
+from fpts.api.wiring import create_write_behind
+from fpts.config.settings import Settings
+from fpts.domain.grid import ProductGrids
+from fpts.domain.models import Location, PhenologyMetric
+from fpts.storage.columnar_repository import ColumnarPhenologyRepository
+from fpts.storage.postgis_phenology_repository import PostGISPhenologyRepository
+from fpts.storage.write_behind import WriteBehindQueue
+from rasterio.transform import from_origin
+
+
+def _metric(lat: float, year: int = 2020, season_length: int = 100) -> PhenologyMetric:
+    return PhenologyMetric(
+        year=year,
+        location=Location(lat=lat, lon=10.0),
+        sos_date=date(year, 4, 1),
+        eos_date=None,
+        season_length=season_length,
+        is_forest=True,
+    )
+
+
+class Recorder:
+    def __init__(self, fail_products: tuple[str, ...] = ()) -> None:
+        self.writes: list[tuple[str, list[PhenologyMetric]]] = []
+        self.fail_products = fail_products
+        self.written = threading.Event()
+
+    def __call__(self, product: str, metrics: list[PhenologyMetric]) -> None:
+        if product in self.fail_products:
+            raise RuntimeError("database is down")
+        self.writes.append((product, metrics))
+        self.written.set()
+
+
+def test_pending_metrics_are_deduplicated_bounded_and_flushed_by_product():
+    write = Recorder(fail_products=("bad",))
+    queue = WriteBehindQueue(write, max_pending=3, batch_size=100)
+
+    assert queue.submit("p", _metric(50.0))
+    assert queue.submit("p", _metric(50.0, season_length=120))  # replaces the first
+    assert queue.submit("q", _metric(50.0))
+    assert queue.submit("bad", _metric(51.0))
+    assert not queue.submit("p", _metric(52.0))  # full
+    assert queue.submit("p", _metric(50.0, season_length=130))  # already pending
+    assert (len(queue), queue.dropped) == (3, 1)
+
+    assert queue.flush() == 2
+    assert [(product, [m.season_length for m in ms]) for product, ms in write.writes] == [
+        ("p", [130]),
+        ("q", [100]),
+    ]
+    assert (len(queue), queue.written, queue.failed) == (0, 2, 1)
+    assert queue.flush() == 0
+
+
+def test_worker_flushes_full_batches_and_close_flushes_the_rest():
+    write = Recorder()
+    queue = WriteBehindQueue(write, batch_size=2, flush_interval_s=60.0)
+    queue.start()
+
+    queue.submit("p", _metric(50.0))
+    queue.submit("p", _metric(51.0))
+    assert write.written.wait(5.0)
+    queue.submit("p", _metric(52.0))
+
+    queue.close()
+    assert [m.location.lat for _, ms in write.writes for m in ms] == [50.0, 51.0, 52.0]
+    assert not queue.submit("p", _metric(53.0))
+
+
+def test_worker_flushes_on_the_interval():
+    write = Recorder()
+    queue = WriteBehindQueue(write, batch_size=100, flush_interval_s=0.01)
+    queue.start()
+    queue.submit("p", _metric(50.0))
+    assert write.written.wait(5.0)
+    queue.close()
+    assert queue.written == 1
+
+
+def test_metrics_are_snapped_to_the_product_pixel_grid():
+    write = Recorder()
+    grids = ProductGrids.from_steps(0.001, {"coarse": 0.1})
+    queue = WriteBehindQueue(write, grids=grids)
+
+    # both inside the pixel centred on (50.0, 10.0): one pending metric
+    assert queue.submit("coarse", _metric(50.03))
+    assert queue.submit("coarse", replace(_metric(49.97), season_length=120))
+    assert queue.submit(
+        "fine", replace(_metric(50.0304), location=Location(lat=50.0304, lon=-0.0004))
+    )
+    assert len(queue) == 2
+
+    queue.flush()
+    assert [(p, [(m.location, m.season_length) for m in ms]) for p, ms in write.writes] == [
+        ("coarse", [(Location(lat=50.0, lon=10.0), 120)]),
+        ("fine", [(Location(lat=50.03, lon=-0.0), 100)]),
+    ]
+
+
+@pytest.mark.parametrize("summaries", [False, True])
+def test_postgis_flushes_refresh_the_summary_cells_of_the_points_written(summaries):
+    repo = MagicMock(spec=PostGISPhenologyRepository)
+    queue = create_write_behind(
+        Settings(write_behind_enabled=True, area_summaries_enabled=summaries), repo
+    )
+    queue.submit("p", _metric(50.0, year=2021))
+    queue.submit("p", _metric(50.0, year=2020))
+    queue.submit("p", _metric(51.0, year=2021))
+    assert queue.flush() == 3
+
+    assert repo.upsert_many.call_count == 1
+    refreshed = [c.kwargs for c in repo.refresh_area_summaries.call_args_list]
+    assert refreshed == (
+        [
+            {"product": "p", "year": 2020, "locations": [Location(lat=50.0, lon=10.0)]},
+            {
+                "product": "p",
+                "year": 2021,
+                "locations": [Location(lat=50.0, lon=10.0), Location(lat=51.0, lon=10.0)],
+            },
+        ]
+        if summaries
+        else []
+    )
+
+
+def test_invalid_limits_are_rejected():
+    with pytest.raises(ValueError):
+        WriteBehindQueue(Recorder(), max_pending=0)
+    with pytest.raises(ValueError):
+        WriteBehindQueue(Recorder(), flush_interval_s=0)
+
+
+def _write_ndvi_stack(data_dir: Path) -> None:
+    doys = [1, 50, 100, 150, 200, 250, 300, 350]
+    ndvi_values = [0.10, 0.12, 0.20, 0.50, 0.70, 0.60, 0.25, 0.12]
+    transform = from_origin(west=-0.5, north=51.5, xsize=0.01, ysize=0.01)
+    for doy, v in zip(doys, ndvi_values, strict=True):
+        path = data_dir / "raw" / "ndvi_synth" / "2020" / f"doy_{doy:03d}.tif"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with rasterio.open(
+            path,
+            "w",
+            driver="GTiff",
+            height=10,
+            width=10,
+            count=1,
+            dtype="float32",
+            crs="EPSG:4326",
+            transform=transform,
+            nodata=-9999,
+        ) as dst:
+            dst.write(np.full((10, 10), v, dtype=np.float32), 1)
+
+
+@pytest.mark.parametrize("backend", ["memory", "columnar", "sqlite"])
+def test_auto_mode_persists_computed_metrics_at_the_default_threshold(tmp_path, backend):
+    _write_ndvi_stack(tmp_path)
+    app = create_app(
+        Settings(
+            phenology_repo_backend=backend,
+            data_dir=str(tmp_path),
+            sqlite_path=str(tmp_path / "phenology.sqlite"),
+            write_behind_enabled=True,
+            write_behind_flush_interval_s=60.0,
+        )
+    )
+    repo = app.state.phenology_repo
+    params = {"year": 2020, "product": "ndvi_synth"}
+    # off the 0.001 degree pixel centres, unlike the other points
+    off_centre = {"lat": 51.4953, "lon": -0.4951}
+
+    def stored(lat: float, lon: float) -> PhenologyMetric | None:
+        return repo.get_metric_for_location(
+            product="ndvi_synth", location=Location(lat=lat, lon=lon), year=2020
+        )
+
+    with TestClient(app) as client:
+        auto = {**params, "mode": "auto"}
+        resp = client.get("/phenology/point", params={**auto, "lat": 51.485, "lon": -0.485})
+        assert resp.status_code == 200
+        resp = client.get("/phenology/point", params={**auto, **off_centre})
+        assert resp.status_code == 200
+        resp = client.get(
+            "/phenology/point",
+            params={**auto, "lat": 51.465, "lon": -0.465, "threshold_frac": 0.3},
+        )
+        assert resp.status_code == 200
+        resp = client.post(
+            "/phenology/points",
+            params=auto,
+            json={"locations": [{"lat": 51.475, "lon": -0.475}]},
+        )
+        assert resp.status_code == 200
+        # not written before the flush
+        assert stored(51.485, -0.485) is None
+
+        assert app.state.write_behind.flush() == 3
+        assert stored(51.485, -0.485).season_length == 100
+        assert stored(51.475, -0.475) is not None
+        assert stored(51.465, -0.465) is None
+
+        # the persisted row answers once the cached computation has expired
+        app.state.point_metric_cache._data.clear()
+        resp = client.get("/phenology/point", params={**params, "mode": "repo", **off_centre})
+        assert resp.status_code == 200
+        assert resp.json()["season_length"] == 100
+
+
+def test_flushes_do_not_break_concurrent_reads_of_the_memory_backends():
+    repo = ColumnarPhenologyRepository(index_cell_deg=0.5)
+    repo.add_metrics("p", [_metric(50.0 + i / 1000) for i in range(100)])
+    errors: list[BaseException] = []
+
+    def write() -> None:
+        for i in range(500):
+            repo.upsert_many(
+                product="p", metrics=[_metric(60.0 + (i * 10 + j) / 1e5) for j in range(10)]
+            )
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        while writer.is_alive():
+            list(repo.iter_metrics(product="p", year=2020))
+            repo.get_metric_for_location(
+                product="p",
+                location=Location(lat=50.0004, lon=10.0),
+                year=2020,
+                nearest_tolerance_deg=0.01,
+            )
+            repo.year_columns("p", 2020)
+    except RuntimeError as e:  # dictionary changed size during iteration
+        errors.append(e)
+    finally:
+        writer.join()
+    assert errors == []